@@ -10,7 +10,7 @@ from services.ai_composition import AICompositionService
 from services.music_theory import MusicTheoryService
 from services.practice_plan import PracticePlanService
 from services.corpus_integration import CorpusIntegrationService
-from services.harmony_ai import HarmonyAIService
+from services.harmony_ai import HarmonyAIService, InferenceQueueFull, InferenceTimeout
 
 load_dotenv()
 
@@ -29,12 +29,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# AI 서비스 초기화
-composition_service = AICompositionService()
+# AI 서비스 초기화 (Harmony AI 서비스는 작곡 서비스와 공유)
+harmony_ai_service = HarmonyAIService()
+composition_service = AICompositionService(harmony_ai=harmony_ai_service)
 theory_service = MusicTheoryService()
 practice_plan_service = PracticePlanService()
 corpus_integration_service = CorpusIntegrationService()
-harmony_ai_service = HarmonyAIService()
 
 # Pydantic 모델들
 class HarmonyProgressionRequest(BaseModel):
@@ -88,15 +88,18 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    readiness = harmony_ai_service.get_readiness()
     return {
         "status": "healthy", 
+        "ready": readiness["ready"],
         "ai_services": {
             "composition": True,
             "theory": True,
             "practice_plan": True,
             "corpus_integration": True,
             "harmony_ai": True
-        }
+        },
+        "harmony_ai_model": readiness
     }
 
 # AI Composition API 엔드포인트들
@@ -104,13 +107,18 @@ async def health_check():
 async def suggest_harmony_progression(request: HarmonyProgressionRequest):
     """화성 진행 제안"""
     try:
-        result = composition_service.suggest_harmony_progression(
+        result = await harmony_ai_service.run_inference(
+            composition_service.suggest_harmony_progression,
             style=request.style,
             difficulty=request.difficulty,
             length=request.length,
             mood=request.mood
         )
         return result
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"AI 추론 요청이 많아 처리할 수 없습니다: {str(e)}")
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=f"AI 추론 시간 초과: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"화성 진행 제안 실패: {str(e)}")
 
@@ -290,6 +298,7 @@ async def get_ai_service_status():
         status = {
             "composition_service": composition_service.get_service_status(),
             "harmony_ai": harmony_ai_service.get_ai_status(),
+            "ready": harmony_ai_service.is_ready(),
             "corpus_integration": {
                 "available": corpus_integration_service.corpus_available,
                 "status": "active" if corpus_integration_service.corpus_available else "inactive"
@@ -327,10 +336,11 @@ async def compare_ai_vs_enhanced(
 ):
     """AI 모드와 고도화 모드를 비교합니다."""
     try:
-        # AI 모드 결과
+        # AI 모드 결과 (모델 로드 전이면 로드를 시작하고 고도화 진행으로 응답)
         ai_result = None
-        if harmony_ai_service.is_ai_available():
-            ai_result = harmony_ai_service.generate_ai_harmony_progression(
+        if harmony_ai_service.ai_available:
+            ai_result = await harmony_ai_service.run_inference(
+                harmony_ai_service.generate_ai_harmony_progression,
                 style=style, difficulty=difficulty, length=length, mood=mood
             )
         
@@ -351,6 +361,10 @@ async def compare_ai_vs_enhanced(
         }
         
         return {"success": True, "data": comparison}
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"AI 추론 요청이 많아 처리할 수 없습니다: {str(e)}")
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=f"AI 추론 시간 초과: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -393,8 +407,12 @@ async def analyze_harmony_advanced(
     """고급 화성 분석을 수행합니다."""
     try:
         chords = chord_progression.split("-")
-        result = harmony_ai_service.analyze_harmony_with_ai(chords, style)
+        result = await harmony_ai_service.run_inference(harmony_ai_service.analyze_harmony_with_ai, chords, style)
         return {"success": True, "data": result}
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"AI 추론 요청이 많아 처리할 수 없습니다: {str(e)}")
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=f"AI 추론 시간 초과: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -407,13 +425,18 @@ async def get_modulation_guide(
 ):
     """조성 전환 가이드를 생성합니다."""
     try:
-        result = harmony_ai_service.generate_ai_modulation_guide(
+        result = await harmony_ai_service.run_inference(
+            harmony_ai_service.generate_ai_modulation_guide,
             from_key=from_key,
             to_key=to_key,
             difficulty=difficulty,
             style=style
         )
         return {"success": True, "data": result}
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"AI 추론 요청이 많아 처리할 수 없습니다: {str(e)}")
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=f"AI 추론 시간 초과: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -9,18 +9,17 @@ from .harmony_ai import HarmonyAIService
 class AICompositionService:
     """AI 작곡 어시스턴트 서비스"""
     
-    def __init__(self):
+    def __init__(self, harmony_ai: Optional[HarmonyAIService] = None):
         self.logger = logging.getLogger(__name__)
         
-        # AI 서비스 초기화
-        self.harmony_ai = HarmonyAIService()
+        # AI 서비스 초기화 (앱에서 만든 HarmonyAIService가 있으면 공유)
+        self.harmony_ai = harmony_ai or HarmonyAIService()
         self.corpus_integration = CorpusIntegrationService()
         
-        # AI 상태 확인
-        self.ai_available = self.harmony_ai.is_ai_available()
+        # AI 상태 확인 (모델이 백그라운드에서 로드될 수 있으므로 ai_available은 요청 시점에 판단)
         self.corpus_available = self.corpus_integration.corpus_available
         
-        if self.ai_available:
+        if self.harmony_ai.ai_available:
             self.logger.info("AI Composition Service: Harmony AI 모델 사용 가능")
         else:
             self.logger.warning("AI Composition Service: Harmony AI 모델 사용 불가, 기본 로직 사용")
@@ -35,6 +34,11 @@ class AICompositionService:
         self.fallback_melody_templates = self._load_fallback_melody_templates()
         self.fallback_modulation_guides = self._load_fallback_modulation_guides()
     
+    @property
+    def ai_available(self) -> bool:
+        """Harmony AI 모델이 로드되어 사용 가능한지"""
+        return self.harmony_ai.is_ai_available()
+    
     def _load_harmony_patterns(self) -> Dict[str, List[Dict]]:
         """화성 진행 패턴을 로드합니다."""
         try:
@@ -188,8 +192,9 @@ class AICompositionService:
     ) -> Dict[str, Any]:
         """화성 진행을 제안합니다."""
         try:
-            # 1순위: AI 모델 사용
-            if self.ai_available:
+            # 1순위: AI 모델 사용 (모델 로드 전이면 generate_ai_harmony_progression이 로드를 시작하고
+            # 규칙 기반 고도화 진행으로 응답)
+            if self.harmony_ai.ai_available:
                 self.logger.info("AI 모델을 사용하여 화성 진행 생성")
                 return self.harmony_ai.generate_ai_harmony_progression(
                     style=style, difficulty=difficulty, length=length, mood=mood
@@ -1,6 +1,8 @@
 import logging
 import os
 import sys
+import threading
+import time
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 import json
@@ -9,40 +11,150 @@ import json
 sys.path.append(str(Path(__file__).parent.parent.parent / "corpus-service"))
 try:
     from app.services.harmony_transformer import HarmonyTransformerService
+    from app.services.model_registry import MODEL_REGISTRY
+    from app.services.generation_batcher import GenerationBatcher
+    from app.services.inference_executor import InferenceExecutor, InferenceQueueFull, InferenceTimeout
     HARMONY_AI_AVAILABLE = True
 except ImportError:
     HARMONY_AI_AVAILABLE = False
+    # 추론 스레드 풀이 없으면 이 예외들은 발생하지 않는다 (except 절에서 빈 튜플은 아무것도 잡지 않음)
+    InferenceQueueFull = InferenceTimeout = ()
     logging.warning("Harmony Transformer 모델을 import할 수 없습니다.")
 
+# 모델 로드 방식: eager(생성 시 동기 로드), background(생성 시 백그라운드 로드), lazy(첫 AI 요청 시 백그라운드 로드)
+MODEL_LOAD_MODES = ("eager", "background", "lazy")
+DEFAULT_MODEL_LOAD_MODE = os.getenv("HARMONY_AI_LOAD_MODE", "background")
+
+# 서빙 전용 로드: 저장된 어댑터를 기본 가중치에 병합하고 eval/no-grad로 로드 (ai-service는 학습하지 않는다)
+INFERENCE_ONLY = os.getenv("HARMONY_AI_INFERENCE_ONLY", "true").lower() in ("1", "true", "yes")
+ADAPTER_PATH = os.getenv("HARMONY_AI_ADAPTER_PATH") or None
+# 추론 전용 모델 정밀도: 빈 값(float32), int8(동적 양자화), bf16
+QUANTIZATION = os.getenv("HARMONY_AI_QUANTIZATION") or None
+
+# 동시 생성 요청 마이크로 배칭 (최대 배치 크기, 첫 요청 이후 대기 시간 ms)
+GENERATION_BATCH_SIZE = int(os.getenv("HARMONY_AI_BATCH_SIZE", "8"))
+GENERATION_BATCH_WAIT_MS = float(os.getenv("HARMONY_AI_BATCH_WAIT_MS", "5"))
+
+# 추론 전용 스레드 풀 (스레드 수, 대기열 길이, 제한 시간 초)
+INFERENCE_WORKERS = int(os.getenv("HARMONY_AI_INFERENCE_WORKERS", "8"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("HARMONY_AI_INFERENCE_QUEUE_SIZE", "32"))
+INFERENCE_TIMEOUT = float(os.getenv("HARMONY_AI_INFERENCE_TIMEOUT", "60"))
+
 class HarmonyAIService:
-    """Harmony Transformer AI 모델을 활용하는 서비스"""
+    """Harmony Transformer AI 모델을 활용하는 서비스
+    
+    모델 가중치는 프로세스 전역 레지스트리에서 공유되므로 인스턴스가 여러 개여도
+    같은 모델은 한 번만 로드된다. background/lazy 모드에서는 모델을 별도 스레드에서
+    로드하며, 로드가 끝나기 전의 화성 진행 요청은 규칙 기반 진행으로 응답한다.
+    """
     
-    def __init__(self):
+    def __init__(self, harmony_transformer: Optional[Any] = None, load_mode: Optional[str] = None):
         self.logger = logging.getLogger(__name__)
         self.ai_available = HARMONY_AI_AVAILABLE
+        self.model_loaded = False
+        self.load_mode = load_mode or DEFAULT_MODEL_LOAD_MODE
+        if self.load_mode not in MODEL_LOAD_MODES:
+            self.logger.warning(f"알 수 없는 모델 로드 방식 {self.load_mode}, background 사용")
+            self.load_mode = "background"
+        
+        # 모델 준비 상태: unavailable / not_loaded / loading / ready / failed
+        self.model_state = "not_loaded" if self.ai_available else "unavailable"
+        self.model_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._load_lock = threading.Lock()
+        self._load_thread: Optional[threading.Thread] = None
+        self.inference_executor = None
         
         if self.ai_available:
             try:
-                self.harmony_transformer = HarmonyTransformerService()
-                self.model_loaded = False
-                self._load_model()
-                self.logger.info("Harmony AI 서비스 초기화 성공")
+                self.harmony_transformer = harmony_transformer or HarmonyTransformerService(
+                    adapter_path=ADAPTER_PATH,
+                    inference_only=INFERENCE_ONLY,
+                    quantization=QUANTIZATION
+                )
+                self.generation_batcher = GenerationBatcher(
+                    self.harmony_transformer,
+                    max_batch_size=GENERATION_BATCH_SIZE,
+                    max_wait_ms=GENERATION_BATCH_WAIT_MS
+                )
+                self.inference_executor = InferenceExecutor(
+                    max_workers=INFERENCE_WORKERS,
+                    max_queue=INFERENCE_QUEUE_SIZE,
+                    timeout=INFERENCE_TIMEOUT
+                )
+                if self.load_mode == "eager":
+                    self._load_model()
+                elif self.load_mode == "background":
+                    self.start_background_load()
+                self.logger.info(f"Harmony AI 서비스 초기화 성공 (모델 로드 방식: {self.load_mode})")
             except Exception as e:
                 self.logger.error(f"Harmony AI 서비스 초기화 실패: {e}")
                 self.ai_available = False
+                self.model_state = "unavailable"
         else:
             self.logger.warning("Harmony AI 모델을 사용할 수 없습니다. 기본 로직을 사용합니다.")
     
     def _load_model(self):
         """AI 모델을 로드합니다."""
-        try:
-            if not self.model_loaded:
+        with self._load_lock:
+            if self.model_loaded:
+                return
+            self.model_state = "loading"
+            started = time.time()
+            try:
                 self.harmony_transformer.load_model()
                 self.model_loaded = True
+                self.model_state = "ready"
+                self.model_error = None
                 self.logger.info("Harmony Transformer 모델 로드 완료")
-        except Exception as e:
-            self.logger.error(f"모델 로드 실패: {e}")
-            self.model_loaded = False
+            except Exception as e:
+                self.logger.error(f"모델 로드 실패: {e}")
+                self.model_loaded = False
+                self.model_state = "failed"
+                self.model_error = str(e)
+            finally:
+                self.load_seconds = time.time() - started
+    
+    def start_background_load(self) -> bool:
+        """백그라운드 스레드에서 모델 로드 시작 (이미 로드됐거나 로드 중이면 False)"""
+        if not self.ai_available or self.model_loaded:
+            return False
+        with self._load_lock:
+            if self._load_thread is not None and self._load_thread.is_alive():
+                return False
+            self.model_state = "loading"
+            self._load_thread = threading.Thread(target=self._load_model, name="harmony-ai-model-loader", daemon=True)
+            self._load_thread.start()
+        return True
+    
+    def _ensure_loading(self):
+        """lazy 모드에서 첫 AI 요청이 들어오면 백그라운드 로드 시작"""
+        if self.load_mode == "lazy" and self.model_state == "not_loaded":
+            self.start_background_load()
+    
+    async def run_inference(self, fn, *args, **kwargs):
+        """모델을 쓸 수 있는 호출을 추론 전용 스레드에서 실행하고 기다린다
+        
+        대기열이 가득 차면 InferenceQueueFull, 제한 시간을 넘기면 InferenceTimeout.
+        AI 모델을 쓸 수 없는 환경이면 기본 로직뿐이므로 바로 실행한다.
+        """
+        if self.inference_executor is None:
+            return fn(*args, **kwargs)
+        return await self.inference_executor.run(fn, *args, **kwargs)
+    
+    def is_ready(self) -> bool:
+        """모델 로드가 끝나 AI 응답을 줄 수 있는지 (AI를 쓸 수 없는 환경이면 기본 로직으로 준비 완료)"""
+        return self.model_state in ("ready", "unavailable", "failed")
+    
+    def get_readiness(self) -> Dict[str, Any]:
+        """모델 준비 상태"""
+        return {
+            "ready": self.is_ready(),
+            "model_state": self.model_state,
+            "load_mode": self.load_mode,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.model_error
+        }
     
     def generate_ai_harmony_progression(
         self, 
@@ -53,15 +165,19 @@ class HarmonyAIService:
         context: str = ""
     ) -> Dict[str, Any]:
         """AI를 사용하여 화성 진행을 생성합니다."""
-        if not self.ai_available or not self.model_loaded:
+        if not self.ai_available:
             return self._generate_fallback_harmony_progression(style, difficulty, length, mood)
+        if not self.model_loaded:
+            # 모델 로드 중에는 규칙 기반 고도화 진행으로 응답
+            self._ensure_loading()
+            return self._generate_enhanced_harmony_progression(style, difficulty, length, mood)
         
         try:
             # AI 모델을 위한 컨텍스트 구성
             ai_context = self._build_ai_context(style, difficulty, length, mood, context)
             
             # AI 모델을 통한 화성 진행 생성
-            ai_suggestions = self.harmony_transformer.generate_harmony_suggestions(
+            ai_suggestions = self.generation_batcher.generate_sync(
                 context=ai_context,
                 style=style,
                 length=length
@@ -86,6 +202,8 @@ class HarmonyAIService:
         ai_enhancement: bool = True
     ) -> Dict[str, Any]:
         """AI를 사용하여 멜로디를 생성합니다."""
+        if ai_enhancement:
+            self._ensure_loading()
         if not self.ai_available or not self.model_loaded or not ai_enhancement:
             return self._generate_fallback_melody(harmony_progression, style, rhythm_pattern)
         
@@ -94,7 +212,7 @@ class HarmonyAIService:
             harmony_context = self._harmony_progression_to_context(harmony_progression)
             
             # AI 모델을 통한 멜로디 생성
-            ai_melody = self.harmony_transformer.generate_harmony_suggestions(
+            ai_melody = self.generation_batcher.generate_sync(
                 context=harmony_context,
                 style=style,
                 length=len(harmony_progression)
@@ -115,6 +233,7 @@ class HarmonyAIService:
         style: str = "classical"
     ) -> Dict[str, Any]:
         """AI를 사용하여 화성 진행을 분석합니다."""
+        self._ensure_loading()
         if not self.ai_available or not self.model_loaded:
             return self._analyze_harmony_fallback(chord_progression, style)
         
@@ -142,6 +261,7 @@ class HarmonyAIService:
         style: str = "classical"
     ) -> Dict[str, Any]:
         """AI를 사용하여 조성 전환 가이드를 생성합니다."""
+        self._ensure_loading()
         if not self.ai_available or not self.model_loaded:
             return self._generate_fallback_modulation_guide(from_key, to_key, difficulty)
         
@@ -150,7 +270,7 @@ class HarmonyAIService:
             modulation_context = f"Modulate from {from_key} to {to_key} in {style} style"
             
             # AI 모델을 통한 전조 가이드 생성
-            ai_guide = self.harmony_transformer.generate_harmony_suggestions(
+            ai_guide = self.generation_batcher.generate_sync(
                 context=modulation_context,
                 style=style,
                 length=6  # 전조를 위한 충분한 길이
@@ -599,6 +719,10 @@ class HarmonyAIService:
         return {
             "ai_available": self.ai_available,
             "model_loaded": self.model_loaded,
+            "readiness": self.get_readiness(),
+            "generation_batching": self.generation_batcher.get_stats() if self.ai_available else None,
+            "inference": self.inference_executor.get_stats() if self.inference_executor else None,
             "service_status": "active" if self.ai_available else "inactive",
-            "model_type": "Harmony Transformer" if self.ai_available else "None"
+            "model_type": "Harmony Transformer" if self.ai_available else "None",
+            "shared_models": MODEL_REGISTRY.status() if self.ai_available else []
         }
@@ -1,29 +1,131 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional
+import asyncio
+import json
 import logging
 import os
+import threading
 from pathlib import Path
 
-from app.services.harmony_transformer import HarmonyTransformer
 from app.services.corpus_processor import CorpusProcessor
+from app.services.inference_executor import InferenceExecutor, InferenceQueueFull, InferenceTimeout
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# 서비스 인스턴스들
+# 서비스 인스턴스들 (모델은 프로세스 전역 레지스트리를 통해 공유)
 try:
-    harmony_transformer = HarmonyTransformer()
+    from app.services.harmony_transformer import HarmonyTransformerService
+    from app.services.generation_batcher import GenerationBatcher
+    from app.services.continuation_cache import ContinuationCache
+    from app.services.harmony_constraints import build_chord_vocabulary
+    from app.services.training_monitor import FINISHED_STATES
+    from app.services.training_profile import TrainingProfile
+    harmony_transformer = HarmonyTransformerService(
+        settings.HT_MODEL_NAME,
+        adapter_path=settings.HT_ADAPTER_PATH or None,
+        inference_only=settings.HT_INFERENCE_ONLY,
+        quantization=settings.HT_QUANTIZATION or None,
+        dataset_cache_dir=settings.HT_DATASET_CACHE_DIR or None,
+        session_cache=ContinuationCache(
+            max_sessions=settings.HT_SESSION_CACHE_SIZE,
+            max_bytes=settings.HT_SESSION_CACHE_MB * 1024 * 1024
+        )
+    )
+    # 동시에 들어온 화성 진행 제안 요청을 모아 한 번에 생성
+    generation_batcher = GenerationBatcher(
+        harmony_transformer,
+        max_batch_size=settings.HT_GENERATION_BATCH_SIZE,
+        max_wait_ms=settings.HT_GENERATION_BATCH_WAIT_MS
+    )
     logger.info("Harmony Transformer 초기화 성공")
 except ImportError as e:
     logger.warning(f"PyTorch 및 Transformers가 설치되지 않았습니다. AI 모델 기능이 제한됩니다: {e}")
     harmony_transformer = None
+    generation_batcher = None
 
-corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH)
+# 블로킹 모델 호출은 이벤트 루프 밖 전용 스레드에서 실행 (대기열 길이/시간 제한)
+inference_executor = InferenceExecutor(
+    max_workers=settings.HT_INFERENCE_WORKERS,
+    max_queue=settings.HT_INFERENCE_QUEUE_SIZE,
+    timeout=settings.HT_INFERENCE_TIMEOUT
+)
+
+async def _run_inference(fn, *args, timeout: Optional[float] = None, **kwargs):
+    """추론 전용 스레드에서 실행 (대기열 초과는 503, 시간 초과는 504)"""
+    try:
+        return await inference_executor.run(fn, *args, timeout=timeout, **kwargs)
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"추론 요청이 많아 처리할 수 없습니다: {str(e)}")
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=f"추론 시간 초과: {str(e)}")
+
+corpus_processor = CorpusProcessor(
+    settings.WHEN_IN_ROME_CORPUS_PATH,
+    settings.CORPUS_INDEX_PATH,
+    scan_workers=settings.CORPUS_SCAN_WORKERS,
+    scan_executor=settings.CORPUS_SCAN_EXECUTOR
+)
+
+# 이 모듈의 corpus_processor 스캔은 스레드마다 동시에 하지 않도록 잠금 안에서만
+_corpus_lock = threading.Lock()
+
+def _ensure_corpus_scanned():
+    """코퍼스가 아직 스캔되지 않았으면 스캔 (모델 로드/학습 준비 단계에서만 호출)"""
+    with _corpus_lock:
+        if not corpus_processor.corpus_items:
+            corpus_processor.scan_corpus()
+
+def _load_model(chord_vocabulary: bool) -> Dict[str, Any]:
+    """추론 스레드에서 실행: 모델 로드 후, 요청되면 제약 디코딩용 코퍼스 화음 어휘를 한 번 구축"""
+    result = harmony_transformer.load_model()
+    if chord_vocabulary and not harmony_transformer.chord_vocabulary:
+        _ensure_corpus_scanned()
+        with _corpus_lock:
+            if not harmony_transformer.chord_vocabulary:
+                harmony_transformer.set_chord_vocabulary(build_chord_vocabulary(
+                    corpus_processor.corpus_items,
+                    min_count=settings.HT_CHORD_VOCAB_MIN_COUNT,
+                    max_size=settings.HT_CHORD_VOCAB_SIZE
+                ))
+    return result
+
+def _run_training():
+    """백그라운드 학습 작업: 모델/코퍼스가 없으면 먼저 준비하고 학습 데이터를 만든 뒤 파인튜닝"""
+    monitor = harmony_transformer.training_monitor
+    try:
+        if not harmony_transformer.model:
+            monitor.update(message="모델 로드 중")
+            harmony_transformer.load_model()
+        if not corpus_processor.corpus_items:
+            monitor.update(message="코퍼스 스캔 중")
+            _ensure_corpus_scanned()
+        
+        monitor.update(message="학습 데이터 준비 중")
+        training_data = harmony_transformer.prepare_training_data(
+            corpus_processor.corpus_items,
+            packing=settings.HT_SEQUENCE_PACKING,
+            overlap=settings.HT_PACKING_OVERLAP
+        )
+        monitor.update(message="파인튜닝 중")
+        harmony_transformer.start_training(
+            training_data,
+            length_bucketing=settings.HT_LENGTH_BUCKETING,
+            profile=TrainingProfile.from_settings(settings)
+        )
+    except Exception as e:
+        # start_training 안의 실패는 이미 기록됨, 그 전 단계 실패만 여기서 기록
+        logger.error(f"백그라운드 학습 실패: {e}")
+        if monitor.is_running():
+            monitor.fail(str(e))
 
 @router.get("/load-model")
-async def load_ai_model():
-    """AI 모델 로드"""
+async def load_ai_model(
+    chord_vocabulary: Optional[bool] = Query(None, description="제약 디코딩용 코퍼스 화음 어휘도 준비 (기본값: 제약 디코딩 설정)")
+):
+    """AI 모델 로드 (제약 디코딩을 쓰면 코퍼스 화음 어휘도 이때 한 번 구축)"""
     try:
         if not harmony_transformer:
             raise HTTPException(
@@ -31,12 +133,19 @@ async def load_ai_model():
                 detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
             )
         
-        result = harmony_transformer.load_model()
+        if chord_vocabulary is None:
+            chord_vocabulary = settings.HT_CONSTRAINED_DECODING
+        
+        # 모델 로드/코퍼스 스캔은 오래 걸릴 수 있으므로 시간 제한 없음
+        result = await _run_inference(_load_model, chord_vocabulary, timeout=0)
         return {
             "success": True,
             "message": "AI 모델 로드 완료",
-            "model_info": result
+            "model_info": result,
+            "chord_vocabulary": len(harmony_transformer.chord_vocabulary)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"AI 모델 로드 실패: {e}")
         raise HTTPException(status_code=500, detail=f"AI 모델 로드 실패: {str(e)}")
@@ -54,7 +163,11 @@ async def get_model_info():
         model_info = harmony_transformer.get_model_info()
         return {
             "success": True,
-            "model_info": model_info
+            "model_info": model_info,
+            "inference": inference_executor.get_stats(),
+            "generation_batching": generation_batcher.get_stats(),
+            "session_cache": harmony_transformer.session_cache.get_stats(),
+            "chord_vocabulary": len(harmony_transformer.chord_vocabulary)
         }
     except Exception as e:
         logger.error(f"모델 정보 조회 실패: {e}")
@@ -70,14 +183,23 @@ async def prepare_training_data():
                 detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
             )
         
-        # 코퍼스 데이터를 학습용으로 변환
-        training_data = harmony_transformer.prepare_training_data(corpus_processor.corpus_items)
+        # 코퍼스 데이터를 학습용으로 변환 (파싱/토큰화/캐시 구축은 오래 걸릴 수 있으므로 시간 제한 없음)
+        training_data = await _run_inference(
+            harmony_transformer.prepare_training_data,
+            corpus_processor.corpus_items,
+            packing=settings.HT_SEQUENCE_PACKING,
+            overlap=settings.HT_PACKING_OVERLAP,
+            timeout=0
+        )
         
+        # 데이터셋 객체는 JSON으로 보낼 수 없으므로 요약 필드만 응답
         return {
             "success": True,
             "message": "학습 데이터 준비 완료",
-            "training_data_info": training_data
+            "training_data_info": {key: value for key, value in training_data.items() if key != 'dataset'}
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"학습 데이터 준비 실패: {e}")
         raise HTTPException(status_code=500, detail=f"학습 데이터 준비 실패: {str(e)}")
@@ -92,13 +214,22 @@ async def start_model_training(background_tasks: BackgroundTasks):
                 detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
             )
         
-        # 백그라운드에서 학습 시작
-        background_tasks.add_task(harmony_transformer.start_training)
+        # 한 번에 하나의 학습 작업만 실행
+        try:
+            job_id = harmony_transformer.training_monitor.begin("학습 대기 중")
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=f"모델 학습 시작 실패: {str(e)}")
+        
+        # 백그라운드에서 학습 시작 (진행 상황은 /training-status, /training-status/stream)
+        background_tasks.add_task(_run_training)
         
         return {
             "success": True,
-            "message": "AI 모델 파인튜닝이 백그라운드에서 시작되었습니다"
+            "message": "AI 모델 파인튜닝이 백그라운드에서 시작되었습니다",
+            "job_id": job_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"모델 학습 시작 실패: {e}")
         raise HTTPException(status_code=500, detail=f"모델 학습 시작 실패: {str(e)}")
@@ -118,15 +249,59 @@ async def get_training_status():
             "success": True,
             "training_status": status
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"학습 상태 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=f"학습 상태 조회 실패: {str(e)}")
 
+@router.get("/training-status/stream")
+async def stream_training_status(
+    request: Request,
+    interval: float = Query(settings.HT_TRAINING_STREAM_INTERVAL, ge=0.1, le=60.0, description="상태 확인 간격(초)")
+):
+    """AI 모델 학습 상태 스트림 (Server-Sent Events)
+
+    상태가 바뀔 때마다 training_status 이벤트로 전체 상태를 보내고, 작업이 끝나면
+    (completed/failed) 마지막 상태를 보낸 뒤 스트림을 닫는다.
+    """
+    if not harmony_transformer:
+        raise HTTPException(
+            status_code=501, 
+            detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
+        )
+    monitor = harmony_transformer.training_monitor
+    
+    async def events():
+        version = None
+        quiet = 0.0
+        while not await request.is_disconnected():
+            if monitor.version != version:
+                status = monitor.snapshot()
+                version = status['version']
+                quiet = 0.0
+                yield f"id: {version}\nevent: training_status\ndata: {json.dumps(status, ensure_ascii=False, default=str)}\n\n"
+                if status['status'] in FINISHED_STATES:
+                    break
+            elif quiet >= 15.0:
+                # 프록시가 연결을 끊지 않도록 주기적으로 주석 전송
+                quiet = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(interval)
+            quiet += interval
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/generate-harmony-suggestion")
 async def generate_harmony_suggestion(
     context: str = Query(..., description="화성 진행 컨텍스트"),
     style: str = Query("classical", description="음악 스타일"),
-    length: int = Query(4, description="제안할 화성 진행 길이")
+    length: int = Query(4, description="제안할 화성 진행 길이 (제약 디코딩이면 화음 수)"),
+    constrained: Optional[bool] = Query(None, description="코퍼스 화음 어휘로 제한한 생성 (기본값: 설정)")
 ):
     """화성 진행 제안 생성"""
     try:
@@ -136,16 +311,78 @@ async def generate_harmony_suggestion(
                 detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
             )
         
-        suggestions = harmony_transformer.generate_harmony_suggestions(context, style, length)
+        # 빈 컨텍스트는 길이 0 프롬프트가 되어 generate가 실패하므로 배처에 넣기 전에 거절
+        if not context.strip():
+            raise HTTPException(status_code=400, detail="화성 진행 컨텍스트를 입력하세요")
+        
+        # 추론 스레드에서 배처에 넣어, 동시에 들어온 요청과 함께 한 번에 생성
+        if constrained is None:
+            constrained = settings.HT_CONSTRAINED_DECODING
+        if constrained and not harmony_transformer.chord_vocabulary:
+            # 생성 요청에서는 코퍼스를 스캔하지 않음 (어휘는 모델 로드 시 구축)
+            raise HTTPException(
+                status_code=409,
+                detail="제약 디코딩용 화음 어휘가 준비되지 않았습니다. /load-model?chord_vocabulary=true 로 먼저 준비하세요"
+            )
+        suggestions = await _run_inference(generation_batcher.generate_sync, context, style, length, constrained)
         
         return {
             "success": True,
             "suggestions": suggestions
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"화성 진행 제안 생성 실패: {e}")
         raise HTTPException(status_code=500, detail=f"화성 진행 제안 생성 실패: {str(e)}")
 
+@router.post("/generate-harmony-continuation")
+async def generate_harmony_continuation(
+    session_id: str = Query(..., description="이어 쓰기 세션 ID"),
+    context: str = Query(..., description="화성 진행 컨텍스트 (이전 요청의 컨텍스트에 이어 붙인 것)"),
+    style: str = Query("classical", description="음악 스타일"),
+    length: int = Query(4, description="제안할 화성 진행 길이")
+):
+    """세션 KV 캐시를 이용한 화성 진행 이어 쓰기 제안 (이전 컨텍스트와 겹치는 부분은 다시 인코딩하지 않음)"""
+    try:
+        if not harmony_transformer:
+            raise HTTPException(
+                status_code=501, 
+                detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
+            )
+        
+        if not context.strip():
+            raise HTTPException(status_code=400, detail="화성 진행 컨텍스트를 입력하세요")
+        
+        result = await _run_inference(
+            harmony_transformer.continue_harmony_suggestions, session_id, context, style, length
+        )
+        
+        return {
+            "success": True,
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"화성 진행 이어 쓰기 실패: {e}")
+        raise HTTPException(status_code=500, detail=f"화성 진행 이어 쓰기 실패: {str(e)}")
+
+@router.delete("/sessions/{session_id}")
+async def end_generation_session(session_id: str):
+    """이어 쓰기 세션 캐시 해제"""
+    if not harmony_transformer:
+        raise HTTPException(
+            status_code=501, 
+            detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
+        )
+    
+    return {
+        "success": True,
+        "session_id": session_id,
+        "released": harmony_transformer.end_session(session_id)
+    }
+
 @router.post("/analyze-harmony-progression")
 async def analyze_harmony_progression(
     progression: str = Query(..., description="분석할 화성 진행")
@@ -158,12 +395,14 @@ async def analyze_harmony_progression(
                 detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
             )
         
-        analysis = harmony_transformer.analyze_harmony_progression(progression)
+        analysis = await _run_inference(harmony_transformer.analyze_harmony_progression, progression)
         
         return {
             "success": True,
             "analysis": analysis
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"화성 진행 분석 실패: {e}")
         raise HTTPException(status_code=500, detail=f"화성 진행 분석 실패: {str(e)}")
@@ -197,12 +436,14 @@ async def save_current_model():
                 detail="PyTorch 및 Transformers가 설치되지 않아 AI 모델 기능을 사용할 수 없습니다"
             )
         
-        result = harmony_transformer.save_model()
+        result = await _run_inference(harmony_transformer.save_model, timeout=0)
         return {
             "success": True,
             "message": "모델 저장 완료",
             "save_path": result
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"모델 저장 실패: {e}")
         raise HTTPException(status_code=500, detail=f"모델 저장 실패: {str(e)}")
@@ -1,18 +1,24 @@
 from fastapi import APIRouter, HTTPException, Query, UploadFile, File, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import List, Optional, Dict, Any
 import logging
 import os
 from pathlib import Path
 
-from app.services.corpus_processor import CorpusProcessor
+from app.services.corpus_processor import CORPUS_ITEM_FIELDS, CorpusProcessor
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # 코퍼스 프로세서 인스턴스
-corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH)
+corpus_processor = CorpusProcessor(
+    settings.WHEN_IN_ROME_CORPUS_PATH,
+    settings.CORPUS_INDEX_PATH,
+    scan_workers=settings.CORPUS_SCAN_WORKERS,
+    scan_executor=settings.CORPUS_SCAN_EXECUTOR
+)
 
 @router.get("/scan")
 async def scan_corpus():
@@ -32,22 +38,48 @@ async def get_corpus_items(
     genre: Optional[str] = Query(None, description="장르로 필터링"),
     composer: Optional[str] = Query(None, description="작곡가로 필터링"),
     page: int = Query(1, ge=1, description="페이지 번호"),
-    size: int = Query(50, ge=1, le=100, description="페이지 크기")
+    size: int = Query(50, ge=1, le=100, description="페이지 크기"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (지정 시 page 대신 커서 기반 조회, 첫 페이지는 빈 값)"),
+    fields: Optional[str] = Query(None, description="응답에 포함할 필드 (쉼표 구분, 예: item_id,composer,metadata)")
 ):
-    """코퍼스 아이템 조회 (필터링 및 페이징 지원)"""
+    """코퍼스 아이템 조회 (필터링, 페이징/커서 및 필드 선택 지원)"""
     try:
-        result = corpus_processor.get_corpus_items(genre, composer)
+        selected_fields = None
+        if fields:
+            selected_fields = [field.strip() for field in fields.split(',') if field.strip()]
+            unknown_fields = [field for field in selected_fields if field not in CORPUS_ITEM_FIELDS]
+            if unknown_fields:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"지원하지 않는 필드: {', '.join(unknown_fields)}. 허용된 필드: {', '.join(CORPUS_ITEM_FIELDS)}"
+                )
+        
+        if cursor is not None:
+            # 커서 기반 조회: 아이템 ID 순, 페이지 깊이와 무관하게 일정한 비용
+            result = corpus_processor.get_corpus_page(
+                genre, composer, cursor=cursor or None, limit=size, fields=selected_fields
+            )
+            if not result["success"]:
+                status_code = 400 if result.get("invalid_cursor") else 500
+                raise HTTPException(status_code=status_code, detail=result["message"])
+            
+            return {
+                "items": result["items"],
+                "total": result["total"],
+                "size": size,
+                "next_cursor": result["next_cursor"]
+            }
+        
+        # 페이징 적용 (패싯 색인에서 해당 페이지만 잘라 옴)
+        result = corpus_processor.get_corpus_items(genre, composer, offset=(page - 1) * size, limit=size)
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["message"])
         
-        items = result["items"]
+        paginated_items = result["items"]
+        if selected_fields is not None:
+            paginated_items = [item.to_dict(selected_fields) for item in paginated_items]
         total = result["total"]
         
-        # 페이징 적용
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        paginated_items = items[start_idx:end_idx]
-        
         return {
             "items": paginated_items,
             "total": total,
@@ -55,6 +87,8 @@ async def get_corpus_items(
             "size": size,
             "total_pages": (total + size - 1) // size
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"코퍼스 아이템 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=f"코퍼스 아이템 조회 실패: {str(e)}")
@@ -93,14 +127,16 @@ async def process_score(score_path: str):
 
 @router.get("/export")
 async def export_corpus_data(
-    format: str = Query("json", description="내보내기 형식 (json 또는 csv)")
+    format: str = Query("json", description="내보내기 형식 (json, ndjson 또는 csv)"),
+    compress: bool = Query(False, description="gzip 압축 여부")
 ):
     """코퍼스 데이터 내보내기"""
     try:
-        if format not in ["json", "csv"]:
-            raise HTTPException(status_code=400, detail="지원하지 않는 형식입니다. json 또는 csv를 사용하세요")
+        if format not in ["json", "ndjson", "csv"]:
+            raise HTTPException(status_code=400, detail="지원하지 않는 형식입니다. json, ndjson 또는 csv를 사용하세요")
         
-        result = corpus_processor.export_corpus_data(format)
+        # 파일 기록은 이벤트 루프를 막지 않도록 스레드풀에서 실행
+        result = await run_in_threadpool(corpus_processor.export_corpus_data, format, compress)
         if result["success"]:
             return result
         else:
@@ -109,6 +145,29 @@ async def export_corpus_data(
         logger.error(f"데이터 내보내기 실패: {e}")
         raise HTTPException(status_code=500, detail=f"데이터 내보내기 실패: {str(e)}")
 
+@router.get("/export/stream")
+async def stream_corpus_data(
+    format: str = Query("ndjson", description="내보내기 형식 (ndjson, csv 또는 json)"),
+    compress: bool = Query(False, description="gzip 압축 여부")
+):
+    """코퍼스 데이터를 임시 파일 없이 스트리밍으로 내보내기"""
+    try:
+        result = corpus_processor.stream_corpus_data(format, compress)
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        
+        # 동기 이터레이터는 StreamingResponse가 스레드풀에서 순회한다
+        return StreamingResponse(
+            result["chunks"],
+            media_type=result["media_type"],
+            headers={"Content-Disposition": f'attachment; filename="{result["filename"]}"'}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"스트리밍 내보내기 실패: {e}")
+        raise HTTPException(status_code=500, detail=f"스트리밍 내보내기 실패: {str(e)}")
+
 @router.get("/download/{format}")
 async def download_corpus_data(format: str):
     """코퍼스 데이터 다운로드"""
@@ -167,24 +226,31 @@ async def upload_corpus_file(
         
         logger.info(f"파일 업로드 완료: {file_path}")
         
+        # 스캔된 코퍼스가 있으면 해당 작곡가 디렉토리만 다시 스캔하여 검색 색인 갱신 (이벤트 루프 밖에서)
+        index_update = await run_in_threadpool(corpus_processor.refresh_directory, target_directory)
+        
         return {
             "success": True,
             "message": "파일 업로드 완료",
             "file_path": file_path,
-            "file_size": len(content)
+            "file_size": len(content),
+            "index_update": index_update
         }
     except Exception as e:
         logger.error(f"파일 업로드 실패: {e}")
         raise HTTPException(status_code=500, detail=f"파일 업로드 실패: {str(e)}")
 
 @router.get("/search")
-async def search_corpus(query: str = Query(..., description="검색어")):
+async def search_corpus(
+    query: str = Query(..., description="검색어"),
+    limit: Optional[int] = Query(None, ge=1, description="최대 결과 수 (관련도 순)")
+):
     """코퍼스 검색"""
     try:
         if not query.strip():
             raise HTTPException(status_code=400, detail="검색어를 입력하세요")
         
-        result = corpus_processor.search_corpus(query)
+        result = corpus_processor.search_corpus(query, limit)
         if result["success"]:
             return result
         else:
@@ -193,6 +259,30 @@ async def search_corpus(query: str = Query(..., description="검색어")):
         logger.error(f"코퍼스 검색 실패: {e}")
         raise HTTPException(status_code=500, detail=f"코퍼스 검색 실패: {str(e)}")
 
+@router.get("/progression-search")
+async def search_progression(
+    progression: str = Query(..., description="화성 진행 (예: ii-V-I, ii V i)"),
+    mode: Optional[str] = Query(None, description="조성 모드로 제한 (major 또는 minor)"),
+    key: Optional[str] = Query(None, description="특정 조성으로 제한 (예: c, Eb)"),
+    level: str = Query("numeral", description="비교 단위 (numeral: 로마 숫자만, chord: 전위/부속화음 포함 표기)"),
+    limit: Optional[int] = Query(50, ge=1, description="최대 작품 수")
+):
+    """화성 진행을 포함하는 작품과 마디 구간 검색"""
+    try:
+        # 첫 검색은 진행 색인을 구축하므로 이벤트 루프 밖에서 실행
+        result = await run_in_threadpool(
+            corpus_processor.search_progression, progression, mode=mode, key=key, level=level, limit=limit
+        )
+        if result["success"]:
+            return result
+        status_code = 400 if result.get("invalid_query") else 500
+        raise HTTPException(status_code=status_code, detail=result["message"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"화성 진행 검색 실패: {e}")
+        raise HTTPException(status_code=500, detail=f"화성 진행 검색 실패: {str(e)}")
+
 @router.get("/genres")
 async def get_genres():
     """사용 가능한 장르 목록 조회"""
@@ -11,6 +11,9 @@ class Settings(BaseSettings):
     
     # When-in-Rome 코퍼스 설정
     WHEN_IN_ROME_CORPUS_PATH: str = "../When-in-Rome/Corpus"
+    CORPUS_INDEX_PATH: str = "data/corpus_index.sqlite"  # 증분 스캔 인덱스 (빈 값이면 비활성화)
+    CORPUS_SCAN_WORKERS: int = 1  # 1 이하면 순차 스캔
+    CORPUS_SCAN_EXECUTOR: str = "process"  # "process" 또는 "thread"
     
     # AI 모델 설정
     AI_MODEL_CACHE_DIR: str = "models/cache"
@@ -20,9 +23,34 @@ class Settings(BaseSettings):
     # Harmony Transformer 설정
     HT_MODEL_NAME: str = "microsoft/DialoGPT-medium"  # 기본 모델
     HT_MAX_LENGTH: int = 512
-    HT_BATCH_SIZE: int = 8
-    HT_LEARNING_RATE: float = 5e-5
-    HT_EPOCHS: int = 3
+    HT_BATCH_SIZE: int = 0  # 학습 배치 크기 (0이면 데이터셋 크기에 따라 자동)
+    HT_LEARNING_RATE: float = 2e-4  # LoRA 학습률
+    HT_EPOCHS: int = 0  # 학습 에포크 수 (0이면 데이터셋 크기에 따라 자동)
+    HT_GRADIENT_ACCUMULATION_STEPS: int = 1  # 옵티마이저 스텝마다 그라디언트를 모을 배치 수
+    HT_DATALOADER_WORKERS: int = -1  # 학습 데이터 로딩 워커 프로세스 수 (-1이면 자동: Linux는 코어 4개당 1개(최대 4), 그 밖은 0)
+    HT_PERSISTENT_WORKERS: bool = True  # 에포크가 바뀌어도 데이터 로딩 워커를 유지
+    HT_PREFETCH_FACTOR: int = 2  # 워커마다 미리 준비할 배치 수
+    HT_TORCH_THREADS: int = 0  # 학습 중 torch 연산 스레드 수 (0이면 사용 가능한 코어 - 워커 수, torchrun이면 rank별로 나눔)
+    HT_DDP_BACKEND: str = "gloo"  # torchrun 분산 학습 백엔드 (CPU는 gloo)
+    HT_ADAPTER_PATH: str = ""  # 저장된 LoRA 어댑터 경로 (빈 값이면 새 어댑터)
+    HT_INFERENCE_ONLY: bool = False  # True면 어댑터를 병합한 추론 전용 모델로 로드 (학습 불가)
+    HT_QUANTIZATION: str = ""  # 추론 전용 모델 정밀도: "" (float32), "int8" (동적 양자화), "bf16"
+    HT_GENERATION_BATCH_SIZE: int = 8  # 한 번의 generate로 묶을 최대 요청 수
+    HT_GENERATION_BATCH_WAIT_MS: float = 5.0  # 첫 요청 이후 다른 요청을 기다리는 시간
+    HT_INFERENCE_WORKERS: int = 8  # 추론 전용 스레드 수 (생성 배치 크기 이상이어야 배치가 찬다)
+    HT_INFERENCE_QUEUE_SIZE: int = 32  # 실행 중 외에 대기할 수 있는 추론 요청 수
+    HT_INFERENCE_TIMEOUT: float = 60.0  # 추론 요청 제한 시간(초), 0 이하면 무제한
+    HT_SESSION_CACHE_SIZE: int = 64  # 이어 쓰기 세션 KV 캐시 최대 세션 수
+    HT_SESSION_CACHE_MB: int = 256  # 이어 쓰기 세션 KV 캐시 메모리 상한 (MB)
+    HT_CONSTRAINED_DECODING: bool = False  # 화성 진행 제안 기본값: 코퍼스 화음 어휘로 제한한 생성 (length는 화음 수)
+    HT_CHORD_VOCAB_MIN_COUNT: int = 2  # 제약 디코딩 어휘에 넣을 화음의 최소 등장 횟수
+    HT_CHORD_VOCAB_SIZE: int = 4000  # 제약 디코딩 어휘 최대 화음 수 (빈도순)
+    HT_DATASET_CACHE_DIR: str = "data/token_cache"  # 토큰화된 학습 데이터 캐시 (빈 값이면 매번 토큰화)
+    HT_LENGTH_BUCKETING: bool = True  # 학습 시 길이가 비슷한 예시끼리 배치 구성 (패딩은 항상 배치 최대 길이까지)
+    HT_SEQUENCE_PACKING: bool = True  # 긴 악장은 겹치는 창으로 나누고 짧은 곡은 이어 붙여 최대 시퀀스 길이(512) 블록으로 학습
+    HT_PACKING_OVERLAP: int = 64  # 긴 악장을 나눌 때 앞 창과 겹치는 토큰 수 (문맥으로만 쓰고 손실에서 제외)
+    HT_HARMONY_TOKENIZER_PATH: str = ""  # 화성 토크나이저 디렉터리 (설정하면 학습 스크립트가 HF 모델 대신 HarmonyTransformer를 처음부터 학습, 없으면 코퍼스에서 생성)
+    HT_TRAINING_STREAM_INTERVAL: float = 1.0  # 학습 상태 스트림(SSE) 상태 확인 간격(초)
     
     # 로깅 설정
     LOG_LEVEL: str = "INFO"
@@ -0,0 +1,234 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RomanNumeralAnalysis:
+    """로마 숫자 분석 결과"""
+    measure: int
+    roman_numeral: str
+    key: str
+    inversion: Optional[str]
+    secondary_dominant: Optional[str]
+    modulation: Optional[str]
+    form_section: Optional[str]
+    beat: float = 1.0
+    chord: Optional[str] = None  # 원래 화음 표기 (예: "viio7/V")
+
+# 코드 배열로 저장하는 문자열 열 (RomanNumeralAnalysis 필드 이름)
+STRING_COLUMNS = (
+    'roman_numeral',
+    'key',
+    'inversion',
+    'secondary_dominant',
+    'modulation',
+    'form_section',
+    'chord',
+)
+
+# 열 이름 → codes 배열의 행 번호
+COLUMN_INDEX = {name: row for row, name in enumerate(STRING_COLUMNS)}
+
+# 행(row) 튜플 안에서 각 문자열 열의 위치 (RomanNumeralAnalysis 필드 순서)
+_ROW_POSITIONS = (1, 2, 3, 4, 5, 6, 8)
+
+class HarmonyVocabulary:
+    """화성 분석 문자열 어휘 (문자열 ↔ 정수 코드)
+
+    코드 0은 None으로 예약되어 있다. 모든 작품이 하나의 어휘를 공유하므로
+    같은 로마 숫자/조성/전위 문자열은 코퍼스 전체에서 한 번만 저장된다.
+    """
+
+    NONE_CODE = 0
+
+    def __init__(self):
+        self._values: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"values": self._values}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self._values = list(state["values"])
+        self._codes = {value: code for code, value in enumerate(self._values) if value is not None}
+        self._lock = threading.Lock()
+
+    def intern(self, value: Optional[str]) -> int:
+        """문자열의 코드 반환 (처음 보는 문자열이면 추가)"""
+        if value is None:
+            return self.NONE_CODE
+
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._values)
+                    self._values.append(value)
+                    self._codes[value] = code
+        return code
+
+    def codes(self, values: Iterable[Optional[str]]) -> np.ndarray:
+        """등록된 문자열들의 코드 배열 (어휘에 없는 문자열은 어떤 열과도 일치하지 않으므로 제외)"""
+        codes = [
+            self.NONE_CODE if value is None else self._codes.get(value)
+            for value in values
+        ]
+        return np.array([code for code in codes if code is not None], dtype=np.int64)
+
+    def lookup(self, code: int) -> Optional[str]:
+        """코드 → 문자열"""
+        return self._values[code]
+
+    def decode(self, codes: np.ndarray) -> List[Optional[str]]:
+        """코드 배열 → 문자열 목록"""
+        values = self._values
+        return [values[code] for code in codes.tolist()]
+
+# 프로세스 전체에서 공유하는 어휘
+HARMONY_VOCABULARY = HarmonyVocabulary()
+
+def _narrow(array: np.ndarray) -> np.ndarray:
+    """값을 잃지 않는 범위에서 더 작은 dtype으로 변환"""
+    if array.dtype == np.float32:
+        narrowed = array.astype(np.float16)
+        return narrowed if np.array_equal(narrowed, array) else array
+    if array.size == 0 or (array.min() >= 0 and array.max() <= np.iinfo(np.uint16).max):
+        return array.astype(np.uint16)
+    return array
+
+class AnalysisColumns(Sequence):
+    """작품 하나의 화음별 분석을 열 단위 NumPy 배열로 저장
+
+    measures, beats와 문자열 열의 어휘 코드(열 × 화음)만 보관한다. 값 범위가
+    허용하면 uint16/float16으로 줄여 화음당 약 18바이트를 사용한다.
+    기존 list[RomanNumeralAnalysis]와 같은 시퀀스 인터페이스를 제공하며,
+    레코드는 접근할 때만 생성된다.
+    """
+
+    __slots__ = ('measures', 'beats', 'codes', 'vocabulary')
+
+    def __init__(
+        self,
+        measures: np.ndarray,
+        beats: np.ndarray,
+        codes: np.ndarray,
+        vocabulary: HarmonyVocabulary = HARMONY_VOCABULARY
+    ):
+        self.measures = measures
+        self.beats = beats
+        self.codes = codes
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[Tuple[Any, ...]],
+        vocabulary: HarmonyVocabulary = HARMONY_VOCABULARY
+    ) -> "AnalysisColumns":
+        """RomanNumeralAnalysis 필드 순서의 튜플 목록으로 생성"""
+        count = len(rows)
+        measures = np.fromiter((row[0] for row in rows), dtype=np.int32, count=count)
+        beats = np.fromiter((row[7] for row in rows), dtype=np.float32, count=count)
+
+        intern = vocabulary.intern
+        codes = np.empty((len(STRING_COLUMNS), count), dtype=np.int32)
+        for column, position in enumerate(_ROW_POSITIONS):
+            codes[column] = np.fromiter(
+                (intern(row[position]) for row in rows), dtype=np.int32, count=count
+            )
+
+        return cls(_narrow(measures), _narrow(beats), _narrow(codes), vocabulary)
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[RomanNumeralAnalysis],
+        vocabulary: HarmonyVocabulary = HARMONY_VOCABULARY
+    ) -> "AnalysisColumns":
+        """RomanNumeralAnalysis 목록으로 생성"""
+        return cls.from_rows([
+            (record.measure, record.roman_numeral, record.key, record.inversion,
+             record.secondary_dominant, record.modulation, record.form_section,
+             record.beat, record.chord)
+            for record in records
+        ], vocabulary)
+
+    def __len__(self) -> int:
+        return len(self.measures)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[RomanNumeralAnalysis, List[RomanNumeralAnalysis]]:
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("analysis index out of range")
+        return self._record(index)
+
+    def __iter__(self) -> Iterator[RomanNumeralAnalysis]:
+        lookup = self.vocabulary._values
+        beats = self.beats.tolist()
+        columns = [row.tolist() for row in self.codes]
+        for i, measure in enumerate(self.measures.tolist()):
+            roman, key, inversion, secondary, modulation, form_section, chord = (
+                lookup[column[i]] for column in columns
+            )
+            yield RomanNumeralAnalysis(
+                measure, roman, key, inversion, secondary, modulation, form_section, beats[i], chord
+            )
+
+    def _record(self, i: int) -> RomanNumeralAnalysis:
+        """i번째 화음의 레코드 생성"""
+        roman, key, inversion, secondary, modulation, form_section, chord = (
+            self.vocabulary.decode(self.codes[:, i])
+        )
+        return RomanNumeralAnalysis(
+            int(self.measures[i]), roman, key, inversion, secondary, modulation,
+            form_section, float(self.beats[i]), chord
+        )
+
+    def mask(self, name: str, values: Iterable[Optional[str]]) -> np.ndarray:
+        """열 값이 values 중 하나인 화음의 불리언 마스크"""
+        return np.isin(self.codes[COLUMN_INDEX[name]], self.vocabulary.codes(values))
+
+    def column(self, name: str) -> np.ndarray:
+        """문자열 열의 코드 배열 (읽기 전용 뷰)"""
+        view = self.codes[COLUMN_INDEX[name]]
+        view.flags.writeable = False
+        return view
+
+    def values(self, name: str) -> List[Optional[str]]:
+        """열 값을 문자열 목록으로 반환 (measure, beat 포함)"""
+        if name == 'measure':
+            return self.measures.tolist()
+        if name == 'beat':
+            return self.beats.tolist()
+        return self.vocabulary.decode(self.codes[COLUMN_INDEX[name]])
+
+    @property
+    def nbytes(self) -> int:
+        """배열이 차지하는 바이트 수"""
+        return self.measures.nbytes + self.beats.nbytes + self.codes.nbytes
+
+@dataclass
+class WorkAnalysis:
+    """작품 분석 결과"""
+    composer: str
+    title: str
+    movement: str
+    time_signature: str
+    form: str
+    key_signature: str
+    analysis: AnalysisColumns
+    total_measures: int
+    last_measure: int = 0  # 분석 파일에 등장한 가장 큰 마디 번호
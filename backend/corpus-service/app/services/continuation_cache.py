@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def cache_nbytes(past_key_values: Any) -> int:
+    """KV 캐시가 차지하는 텐서 바이트 수 (Cache 객체 또는 레이어별 (key, value) 튜플)"""
+    layers = getattr(past_key_values, 'layers', None)
+    if layers is not None:
+        tensors = [tensor for layer in layers for tensor in (getattr(layer, 'keys', None), getattr(layer, 'values', None))]
+    else:
+        tensors = [tensor for layer in past_key_values or () for tensor in layer]
+    return sum(tensor.nelement() * tensor.element_size() for tensor in tensors if tensor is not None and hasattr(tensor, 'nelement'))
+
+class ContinuationEntry:
+    """세션 하나의 캐시 (캐시가 담고 있는 토큰 ID와 past_key_values)"""
+
+    __slots__ = ('token_ids', 'past_key_values', 'nbytes', 'last_used')
+
+    def __init__(self, token_ids: List[int], past_key_values: Any):
+        self.token_ids = token_ids
+        self.past_key_values = past_key_values
+        self.nbytes = cache_nbytes(past_key_values)
+        self.last_used = time.time()
+
+class ContinuationCache:
+    """세션별 프리픽스 KV 캐시 (LRU, 세션 수/메모리 상한)
+
+    세션의 직전 컨텍스트를 인코딩한 past_key_values를 보관해 두고, 다음 요청의
+    컨텍스트가 같은 토큰으로 시작하면 공통 프리픽스만큼 캐시를 재사용한다.
+    lookup은 캐시를 복사하지 않고 세션에서 꺼내 소유권을 넘기므로, 호출한 쪽이 캐시를
+    늘린 뒤 store로 다시 넣는다 (그 사이 같은 세션의 다른 요청은 캐시 미스).
+    """
+
+    def __init__(self, max_sessions: int = 64, max_bytes: int = 256 * 1024 * 1024):
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[str, ContinuationEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "reused_tokens": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, session_id: str, token_ids: List[int]) -> Tuple[int, Optional[Any]]:
+        """token_ids와 공통 프리픽스가 있으면 (프리픽스 길이, 그 길이로 자른 캐시)
+
+        공통 프리픽스가 있으면 세션 항목을 꺼내(제거) 캐시를 그대로 넘긴다. 없으면 항목은 그대로 둔다.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self._stats["misses"] += 1
+                return 0, None
+
+            cached = entry.token_ids
+            limit = min(len(cached), len(token_ids))
+            common = 0
+            while common < limit and cached[common] == token_ids[common]:
+                common += 1
+            if common == 0:
+                self._stats["misses"] += 1
+                return 0, None
+
+            self._discard(session_id)
+            past_key_values = entry.past_key_values
+            self._stats["hits"] += 1
+            self._stats["reused_tokens"] += common
+
+        if common < len(cached):
+            # 음수 인자: 뒤에서부터 그만큼의 토큰을 잘라낸다
+            past_key_values.crop(common - len(cached))
+        return common, past_key_values
+
+    def store(self, session_id: str, token_ids: List[int], past_key_values: Any) -> bool:
+        """세션 캐시 저장 (메모리 상한보다 크면 저장하지 않고 False)"""
+        entry = ContinuationEntry(list(token_ids), past_key_values)
+        with self._lock:
+            self._discard(session_id)
+            if entry.nbytes > self.max_bytes:
+                logger.debug(f"세션 캐시가 메모리 상한보다 커서 저장하지 않음: {session_id} ({entry.nbytes} bytes)")
+                return False
+
+            self._entries[session_id] = entry
+            self._total_bytes += entry.nbytes
+            # 가장 오래 쓰지 않은 세션부터 제거
+            while len(self._entries) > self.max_sessions or self._total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self._stats["evictions"] += 1
+        return True
+
+    def drop(self, session_id: str) -> bool:
+        """세션 캐시 제거"""
+        with self._lock:
+            return self._discard(session_id)
+
+    def clear(self):
+        """모든 세션 캐시 제거 (모델이 바뀌면 캐시는 무효)"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """세션 수, 사용 메모리, 적중/재사용 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "sessions": len(self._entries),
+                "max_sessions": self.max_sessions,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            })
+        return stats
+
+    def _discard(self, session_id: str) -> bool:
+        """잠금을 잡은 상태에서 세션 제거"""
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return False
+        self._total_bytes -= entry.nbytes
+        return True
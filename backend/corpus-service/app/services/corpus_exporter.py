@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+import logging
+import zlib
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# 지원하는 스트리밍 내보내기 형식 → (미디어 타입, 파일 확장자)
+EXPORT_FORMATS = {
+    'json': ('application/json', 'json'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+# CSV 열 (WhenInRomeItem 필드 + 메타데이터)
+CSV_COLUMNS = [
+    'corpus', 'composer', 'work', 'movement', 'analysis_path', 'score_path',
+    'title', 'time_signature', 'form', 'key_signature', 'total_measures'
+]
+
+# 한 번에 내보내는 청크 크기 (바이트 기준, 대략값)
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def _chunked(parts: Iterable[str], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """작은 문자열 조각을 chunk_size 정도의 바이트 청크로 묶기"""
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+def iter_ndjson(items: Iterable[Any]) -> Iterator[bytes]:
+    """아이템을 한 줄에 하나씩 JSON으로 (NDJSON)"""
+    return _chunked(json.dumps(asdict(item), ensure_ascii=False) + '\n' for item in items)
+
+def iter_json(items: Iterable[Any], total_items: int, statistics: Dict[str, Any]) -> Iterator[bytes]:
+    """기존 export_to_json과 같은 구조의 JSON 문서를 아이템 단위로 생성"""
+    def parts():
+        yield '{\n  "total_items": %d,\n  "corpus_items": [' % total_items
+        for index, item in enumerate(items):
+            yield (',\n    ' if index else '\n    ') + json.dumps(asdict(item), ensure_ascii=False)
+        yield '\n  ],\n  "statistics": '
+        yield json.dumps(statistics, ensure_ascii=False)
+        yield '\n}\n'
+
+    return _chunked(parts())
+
+def iter_csv(items: Iterable[Any]) -> Iterator[bytes]:
+    """아이템을 CSV 행으로 (헤더 포함)"""
+    def parts():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(CSV_COLUMNS)
+        for item in items:
+            metadata = item.metadata
+            writer.writerow([
+                item.corpus,
+                item.composer,
+                item.work,
+                item.movement,
+                item.analysis_path,
+                item.score_path,
+                metadata.get('title', ''),
+                metadata.get('time_signature', ''),
+                metadata.get('form', ''),
+                metadata.get('key_signature', ''),
+                metadata.get('total_measures', 0)
+            ])
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return _chunked(parts())
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """청크 스트림을 gzip 형식으로 점진 압축"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def write_chunks(chunks: Iterable[bytes], output_path: str) -> int:
+    """청크 스트림을 파일에 순서대로 기록하고 기록한 바이트 수 반환"""
+    written = 0
+    with open(output_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+def export_filename(format: str, compress: bool = False, prefix: str = "corpus_export") -> str:
+    """내보내기 파일 이름 (압축 시 .gz)"""
+    _, extension = EXPORT_FORMATS[format]
+    return f"{prefix}.{extension}" + (".gz" if compress else "")
+
+def media_type_for(format: str, compress: bool = False) -> str:
+    """스트리밍 응답 미디어 타입"""
+    return "application/gzip" if compress else EXPORT_FORMATS[format][0]
@@ -0,0 +1,193 @@
+import logging
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CorpusIndex:
+    """analysis.txt 메타데이터 영속 인덱스 (경로 + mtime + size 기준)
+
+    스캔 시작 시 전체 인덱스를 메모리로 읽어 두고, 파일 stat 결과가
+    인덱스와 같으면 분석 파일을 다시 열지 않고 저장된 메타데이터를 재사용한다.
+    변경/추가된 항목은 스캔 종료 시 한 번의 트랜잭션으로 기록된다.
+    """
+
+    SCHEMA_VERSION = 2
+
+    def __init__(self, index_path: Optional[str]):
+        # index_path가 None이면 디스크에 기록하지 않는 메모리 전용 인덱스
+        self.index_path = Path(index_path) if index_path else None
+        self._entries: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+        self._dirty: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+        self._seen: set = set()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """인덱스 DB 연결 (필요 시 스키마 생성)"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.index_path))
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, metadata TEXT)"
+        )
+        row = conn.execute(
+            "SELECT value FROM index_meta WHERE key = 'schema_version'"
+        ).fetchone()
+        if row is None or int(row[0]) != self.SCHEMA_VERSION:
+            # 스키마가 바뀌면 기존 항목은 신뢰할 수 없으므로 비운다
+            conn.execute("DELETE FROM analysis_files")
+            conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('schema_version', ?)",
+                (str(self.SCHEMA_VERSION),)
+            )
+            conn.commit()
+        return conn
+
+    @classmethod
+    def from_entries(cls, entries: Dict[str, Tuple[int, int, Dict[str, Any]]]) -> "CorpusIndex":
+        """주어진 항목으로 메모리 전용 인덱스 생성 (병렬 스캔 워커용)"""
+        index = cls(None)
+        index._entries = dict(entries)
+        index._loaded = True
+        return index
+
+    def load(self) -> int:
+        """디스크의 인덱스를 메모리로 로드"""
+        self._entries = {}
+        self._dirty = {}
+        self._seen = set()
+        self.hits = 0
+        self.misses = 0
+
+        if self.index_path is None:
+            self._loaded = True
+            return 0
+
+        try:
+            conn = self._connect()
+            try:
+                for path, mtime_ns, size, metadata in conn.execute(
+                    "SELECT path, mtime_ns, size, metadata FROM analysis_files"
+                ):
+                    self._entries[path] = (mtime_ns, size, json.loads(metadata))
+            finally:
+                conn.close()
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"코퍼스 인덱스 로드 실패, 전체 재스캔합니다: {e}")
+            self._entries = {}
+
+        self._loaded = True
+        logger.info(f"코퍼스 인덱스 로드 완료: {len(self._entries)}개 항목 ({self.index_path})")
+        return len(self._entries)
+
+    def get(self, path: str, mtime_ns: int, size: int) -> Optional[Dict[str, Any]]:
+        """stat 정보가 일치하는 경우 캐시된 메타데이터 반환"""
+        if not self._loaded:
+            self.load()
+
+        self._seen.add(path)
+        entry = self._dirty.get(path) or self._entries.get(path)
+        if entry and entry[0] == mtime_ns and entry[1] == size:
+            self.hits += 1
+            return dict(entry[2])
+
+        self.misses += 1
+        return None
+
+    def put(self, path: str, mtime_ns: int, size: int, metadata: Dict[str, Any]):
+        """새로 파싱한 메타데이터 기록 (save 시 반영)"""
+        self._seen.add(path)
+        self._dirty[path] = (mtime_ns, size, dict(metadata))
+
+    def snapshot_by_prefix(self, directories: List[str]) -> Dict[str, Dict[str, Tuple[int, int, Dict[str, Any]]]]:
+        """디렉토리별로 그 아래 경로의 인덱스 항목을 묶어 반환"""
+        if not self._loaded:
+            self.load()
+
+        snapshots = {directory: {} for directory in directories}
+        for path, entry in self._entries.items():
+            # analysis.txt는 작곡가 디렉토리 아래 여러 단계에 있을 수 있으므로 상위 경로를 차례로 확인
+            parent = os.path.dirname(path)
+            while parent and parent not in snapshots:
+                next_parent = os.path.dirname(parent)
+                if next_parent == parent:
+                    parent = None
+                    break
+                parent = next_parent
+            if parent:
+                snapshots[parent][path] = entry
+
+        return snapshots
+
+    def export_delta(self) -> Dict[str, Any]:
+        """이번 스캔에서 확인/갱신된 항목 (워커 → 부모 프로세스 전달용)"""
+        return {
+            "seen": list(self._seen),
+            "dirty": self._dirty,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def merge_delta(self, delta: Dict[str, Any]):
+        """워커가 반환한 변경분 병합"""
+        if not self._loaded:
+            self.load()
+
+        self._seen.update(delta["seen"])
+        self._dirty.update(delta["dirty"])
+        self.hits += delta["hits"]
+        self.misses += delta["misses"]
+
+    def save(self, prune: bool = True) -> Dict[str, int]:
+        """변경 사항을 디스크에 기록하고, 이번 스캔에서 보이지 않은 항목은 제거"""
+        stale = [path for path in self._entries if path not in self._seen] if prune else []
+
+        if self.index_path is not None and (self._dirty or stale):
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO analysis_files (path, mtime_ns, size, metadata) "
+                            "VALUES (?, ?, ?, ?)",
+                            [
+                                (path, mtime_ns, size, json.dumps(metadata, ensure_ascii=False))
+                                for path, (mtime_ns, size, metadata) in self._dirty.items()
+                            ]
+                        )
+                        conn.executemany(
+                            "DELETE FROM analysis_files WHERE path = ?",
+                            [(path,) for path in stale]
+                        )
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"코퍼스 인덱스 저장 실패: {e}")
+
+        for path in stale:
+            self._entries.pop(path, None)
+        self._entries.update(self._dirty)
+
+        summary = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "updated": len(self._dirty),
+            "removed": len(stale),
+            "total": len(self._entries)
+        }
+
+        self._dirty = {}
+        self._seen = set()
+        self.hits = 0
+        self.misses = 0
+
+        logger.info(f"코퍼스 인덱스 저장 완료: {summary}")
+        return summary
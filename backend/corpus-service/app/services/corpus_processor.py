@@ -1,16 +1,30 @@
 import logging
+import base64
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import json
+import numpy as np
 import pandas as pd
 import music21 as m21
-from .when_in_rome_processor import WhenInRomeProcessor, WhenInRomeItem, WorkAnalysis
+from .when_in_rome_processor import COMPOSER_SCANNERS, WhenInRomeProcessor, WhenInRomeItem, WorkAnalysis
+from .corpus_exporter import EXPORT_FORMATS, export_filename, media_type_for
+from .facet_index import CorpusFacetIndex
+from .progression_index import PROGRESSION_LEVELS, ProgressionIndex
+from .search_index import CorpusSearchIndex
 
 logger = logging.getLogger(__name__)
 
+# API 응답에서 선택할 수 있는 CorpusItem 필드
+CORPUS_ITEM_FIELDS = (
+    'item_id', 'genre', 'composer', 'set', 'movement',
+    'score_path', 'analysis_path', 'auto_analysis_path', 'metadata'
+)
+
 class CorpusItem:
     """코퍼스 아이템 데이터 구조 (기존 API 호환성 유지)"""
-    def __init__(self, when_in_rome_item: WhenInRomeItem):
+    def __init__(self, when_in_rome_item: WhenInRomeItem, item_id: Optional[int] = None):
+        self.item_id = item_id  # 프로세서 안에서 고유한 아이템 ID (색인 키)
         self.genre = when_in_rome_item.corpus
         self.composer = when_in_rome_item.composer
         self.set = when_in_rome_item.work
@@ -19,56 +33,106 @@ class CorpusItem:
         self.analysis_path = when_in_rome_item.analysis_path
         self.auto_analysis_path = None  # 자동 분석 파일 경로
         self.metadata = when_in_rome_item.metadata
+    
+    def to_dict(self, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """선택한 필드만 담은 응답용 딕셔너리 (None이면 전체 필드)"""
+        return {field: getattr(self, field) for field in (fields or CORPUS_ITEM_FIELDS)}
 
 class HarmonyAnalysis:
     """화성 분석 결과 (기존 API 호환성 유지)"""
     def __init__(self, work_analysis: WorkAnalysis):
-        self.roman_numerals = [analysis.roman_numeral for analysis in work_analysis.analysis]
-        self.chord_progressions = [f"{analysis.key}:{analysis.roman_numeral}" for analysis in work_analysis.analysis if analysis.key != "Unknown"]
+        # 열 단위 분석 배열에서 코드 비교로 계산 (레코드 객체를 만들지 않음)
+        columns = work_analysis.analysis
+        vocabulary = columns.vocabulary
+        measures = columns.measures.tolist()
+        romans = columns.column('roman_numeral')
+        keys = columns.column('key')
+        roman_values = vocabulary.decode(romans)
+        key_values = vocabulary.decode(keys)
+        
+        self.roman_numerals = roman_values
+        known_key = ~columns.mask('key', ["Unknown"])
+        self.chord_progressions = [
+            f"{key_values[i]}:{roman_values[i]}" for i in np.flatnonzero(known_key).tolist()
+        ]
         self.cadences = []
         self.modulations = []
         self.form_sections = []
         
-        # 종지 패턴 감지
-        for i, analysis in enumerate(work_analysis.analysis):
-            if i > 0:
-                prev_analysis = work_analysis.analysis[i-1]
-                # V-I 진행 감지
-                if prev_analysis.roman_numeral in ['V', 'v'] and analysis.roman_numeral in ['I', 'i']:
-                    self.cadences.append(f"V-I (m{prev_analysis.measure}-{analysis.measure})")
-                # IV-I 진행 감지
-                elif prev_analysis.roman_numeral in ['IV', 'iv'] and analysis.roman_numeral in ['I', 'i']:
-                    self.cadences.append(f"IV-I (m{prev_analysis.measure}-{analysis.measure})")
-            
-            # 조성 변화 감지
-            if analysis.key != "Unknown" and analysis.key != work_analysis.key_signature:
-                self.modulations.append(f"m{analysis.measure}: {analysis.key}")
-            
-            # 형식 섹션
-            if analysis.form_section:
-                self.form_sections.append(f"m{analysis.measure}: {analysis.form_section}")
+        # 종지 패턴 감지 (V-I, IV-I 진행)
+        tonic = columns.mask('roman_numeral', ['I', 'i'])[1:]
+        dominant = columns.mask('roman_numeral', ['V', 'v'])[:-1]
+        subdominant = columns.mask('roman_numeral', ['IV', 'iv'])[:-1]
+        for i in np.flatnonzero(tonic & (dominant | subdominant)).tolist():
+            label = "V-I" if dominant[i] else "IV-I"
+            self.cadences.append(f"{label} (m{measures[i]}-{measures[i + 1]})")
+        
+        # 조성 변화 감지
+        modulated = known_key & ~columns.mask('key', [work_analysis.key_signature])
+        for i in np.flatnonzero(modulated).tolist():
+            self.modulations.append(f"m{measures[i]}: {key_values[i]}")
+        
+        # 형식 섹션
+        form_sections = columns.column('form_section')
+        for i in np.flatnonzero(~columns.mask('form_section', [None])).tolist():
+            self.form_sections.append(f"m{measures[i]}: {vocabulary.lookup(form_sections[i])}")
 
 class CorpusProcessor:
     """코퍼스 데이터 처리기 (When-in-Rome 통합)"""
     
-    def __init__(self, corpus_base_path: str):
+    def __init__(
+        self,
+        corpus_base_path: str,
+        index_path: Optional[str] = None,
+        scan_workers: int = 1,
+        scan_executor: str = "process"
+    ):
         self.corpus_base_path = Path(corpus_base_path)
-        self.when_in_rome_processor = WhenInRomeProcessor(corpus_base_path)
+        self.when_in_rome_processor = WhenInRomeProcessor(
+            corpus_base_path,
+            index_path,
+            scan_workers=scan_workers,
+            scan_executor=scan_executor
+        )
         self.corpus_items: List[CorpusItem] = []
+        # 검색용 역색인 (스캔 시 구축, 업로드 시 증분 갱신)
+        self.search_index = CorpusSearchIndex()
+        # 장르/작곡가 패싯 색인 (목록/필터/통계 조회용)
+        self.facet_index = CorpusFacetIndex()
+        # 화성 진행 색인 (검색 단위별, 첫 진행 검색 시 구축하고 코퍼스가 바뀌면 폐기)
+        self.progression_indexes: Dict[str, ProgressionIndex] = {}
+        self._progression_lock = threading.Lock()
+        # 아이템 목록/검색·패싯 색인 잠금 (업로드 갱신은 스레드 풀에서, 조회는 이벤트 루프에서 실행되므로
+        # 색인을 바꾸거나 읽는 동안만 잡는다. 파일 스캔은 이 잠금 밖에서 한다)
+        self._index_lock = threading.RLock()
+        # 스캔/증분 갱신 직렬화 (동시 업로드의 갱신이 스캔 결과와 파일 인덱스를 서로 덮어쓰지 않도록)
+        self._scan_lock = threading.Lock()
+        # 아이템 ID는 재스캔 후에도 계속 증가 (커서가 가리키는 위치가 재사용되지 않도록)
+        self._next_item_id = 0
+        self._scan_generation = 0
         
     def scan_corpus(self) -> Dict[str, Any]:
         """코퍼스 스캔 및 데이터 로드"""
         logger.info("When-in-Rome 코퍼스 스캔 시작")
         
         try:
-            # When-in-Rome 프로세서로 코퍼스 스캔
-            when_in_rome_items = self.when_in_rome_processor.scan_corpus()
-            
-            # 기존 API 호환성을 위해 CorpusItem으로 변환
-            self.corpus_items = [CorpusItem(item) for item in when_in_rome_items]
-            
-            # 통계 정보 생성
-            statistics = self._generate_statistics()
+            with self._scan_lock:
+                # When-in-Rome 프로세서로 코퍼스 스캔
+                when_in_rome_items = self.when_in_rome_processor.scan_corpus()
+                
+                with self._index_lock:
+                    # 기존 API 호환성을 위해 CorpusItem으로 변환
+                    self._scan_generation += 1
+                    self.corpus_items = self._create_items(when_in_rome_items)
+                    
+                    # 검색/패싯 색인 재구축
+                    self.search_index.clear()
+                    self.facet_index.clear()
+                    self.progression_indexes = {}
+                    self._index_items(self.corpus_items)
+                    
+                    # 통계 정보 생성
+                    statistics = self._generate_statistics()
             
             logger.info(f"코퍼스 스캔 완료: {len(self.corpus_items)}개 아이템")
             return {
@@ -85,21 +149,26 @@ class CorpusProcessor:
                 "statistics": {}
             }
     
-    def get_corpus_items(self, genre: str = None, composer: str = None) -> Dict[str, Any]:
-        """코퍼스 아이템 조회 (필터링 지원)"""
+    def get_corpus_items(
+        self,
+        genre: str = None,
+        composer: str = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """코퍼스 아이템 조회 (패싯 색인 기반 필터링, offset/limit 지원)"""
         try:
-            filtered_items = self.corpus_items
-            
-            if genre:
-                filtered_items = [item for item in filtered_items if item.genre == genre]
-            
-            if composer:
-                filtered_items = [item for item in filtered_items if item.composer == composer]
+            with self._index_lock:
+                filtered_items = self.facet_index.items(genre, composer)
+                total = self.facet_index.count(genre, composer)
+            if offset or limit is not None:
+                end = None if limit is None else offset + limit
+                filtered_items = filtered_items[offset:end]
             
             return {
                 "success": True,
                 "items": filtered_items,
-                "total": len(filtered_items)
+                "total": total
             }
             
         except Exception as e:
@@ -111,6 +180,63 @@ class CorpusProcessor:
                 "total": 0
             }
     
+    def get_corpus_page(
+        self,
+        genre: str = None,
+        composer: str = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """커서 기반 아이템 조회 (아이템 ID 순, 페이지 깊이와 무관하게 O(limit))
+
+        cursor는 이전 응답의 next_cursor이며, 재스캔 이후의 커서는 거부된다.
+        fields를 지정하면 해당 필드만 직렬화한다.
+        """
+        try:
+            with self._index_lock:
+                after_id = self._decode_cursor(cursor) if cursor else None
+                items, has_more = self.facet_index.page_after(genre, composer, after_id, limit)
+                total = self.facet_index.count(genre, composer)
+                next_cursor = self._encode_cursor(items[-1].item_id) if has_more else None
+            
+            return {
+                "success": True,
+                "items": [item.to_dict(fields) for item in items],
+                "total": total,
+                "next_cursor": next_cursor
+            }
+            
+        except ValueError as e:
+            return {
+                "success": False,
+                "message": f"잘못된 커서: {str(e)}",
+                "invalid_cursor": True
+            }
+        except Exception as e:
+            logger.error(f"코퍼스 아이템 조회 실패: {e}")
+            return {
+                "success": False,
+                "message": f"코퍼스 아이템 조회 실패: {str(e)}"
+            }
+    
+    def _encode_cursor(self, item_id: int) -> str:
+        """(스캔 세대, 마지막 아이템 ID) → 불투명 커서 문자열"""
+        raw = f"{self._scan_generation}:{item_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+    
+    def _decode_cursor(self, cursor: str) -> int:
+        """커서 문자열 → 마지막 아이템 ID (형식 오류/만료 시 ValueError)"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            generation, item_id = (int(part) for part in raw.split(':'))
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("커서 형식이 올바르지 않습니다")
+        
+        if generation != self._scan_generation:
+            raise ValueError("코퍼스가 다시 스캔되어 커서가 만료되었습니다")
+        return item_id
+    
     def get_corpus_statistics(self) -> Dict[str, Any]:
         """코퍼스 통계 정보 반환"""
         try:
@@ -164,18 +290,11 @@ class CorpusProcessor:
                 "message": f"악보 처리 실패: {str(e)}"
             }
     
-    def search_corpus(self, query: str) -> Dict[str, Any]:
-        """코퍼스 검색"""
+    def search_corpus(self, query: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """코퍼스 검색 (제목/작곡가/장르 역색인, 관련도 순)"""
         try:
-            query_lower = query.lower()
-            results = []
-            
-            for item in self.corpus_items:
-                # 제목, 작곡가, 장르에서 검색
-                if (query_lower in item.metadata.get('title', '').lower() or
-                    query_lower in item.composer.lower() or
-                    query_lower in item.genre.lower()):
-                    results.append(item)
+            with self._index_lock:
+                results = self.search_index.search(query, limit)
             
             return {
                 "success": True,
@@ -192,11 +311,104 @@ class CorpusProcessor:
                 "total": 0
             }
     
+    def search_progression(
+        self,
+        progression: str,
+        mode: Optional[str] = None,
+        key: Optional[str] = None,
+        level: str = 'numeral',
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """화성 진행(예: "ii-V-i")을 포함하는 작품과 마디 구간 검색"""
+        try:
+            if level not in PROGRESSION_LEVELS:
+                raise ValueError(f"지원하지 않는 검색 단위: {level}")
+            if mode not in (None, "major", "minor"):
+                raise ValueError(f"지원하지 않는 조성 모드: {mode}")
+            
+            # 동시에 들어온 첫 검색은 한 번만 구축 (구축 중 재스캔되면 폐기된 딕셔너리에 저장됨)
+            with self._index_lock:
+                indexes, corpus_items = self.progression_indexes, self.corpus_items
+            index = indexes.get(level)
+            if index is None:
+                with self._progression_lock:
+                    index = indexes.get(level)
+                    if index is None:
+                        index = ProgressionIndex(level)
+                        index.build(corpus_items)
+                        indexes[level] = index
+            
+            return {
+                "success": True,
+                **index.search(progression, mode=mode, key=key, limit=limit)
+            }
+            
+        except ValueError as e:
+            return {
+                "success": False,
+                "message": f"잘못된 진행 검색 조건: {str(e)}",
+                "invalid_query": True
+            }
+        except Exception as e:
+            logger.error(f"화성 진행 검색 실패: {e}")
+            return {
+                "success": False,
+                "message": f"화성 진행 검색 실패: {str(e)}"
+            }
+    
+    def refresh_directory(self, relative_path: str) -> Dict[str, Any]:
+        """업로드된 경로가 속한 작곡가 디렉토리만 다시 스캔하고 색인 갱신"""
+        try:
+            if not self.corpus_items:
+                return {
+                    "success": False,
+                    "message": "코퍼스가 아직 스캔되지 않았습니다"
+                }
+            
+            parts = Path(relative_path).parts
+            if len(parts) < 2 or parts[0] not in COMPOSER_SCANNERS:
+                return {
+                    "success": False,
+                    "message": f"작곡가 단위 갱신을 지원하지 않는 경로: {relative_path}"
+                }
+            
+            corpus_name, composer = parts[0], parts[1]
+            with self._scan_lock:
+                when_in_rome_items = self.when_in_rome_processor.scan_composer(corpus_name, composer)
+                
+                with self._index_lock:
+                    # 기존 아이템을 색인과 목록에서 제거한 뒤 새 아이템 추가
+                    kept_items = []
+                    for item in self.corpus_items:
+                        if item.genre == corpus_name and item.composer == composer:
+                            self.search_index.remove(item.item_id)
+                            self.facet_index.remove(item.item_id)
+                        else:
+                            kept_items.append(item)
+                    
+                    new_items = self._create_items(when_in_rome_items)
+                    self.corpus_items = kept_items + new_items
+                    self._index_items(new_items)
+                    self.progression_indexes = {}
+            
+            return {
+                "success": True,
+                "message": f"{corpus_name}/{composer} 갱신 완료: {len(new_items)}개 아이템",
+                "updated": len(new_items)
+            }
+            
+        except Exception as e:
+            logger.error(f"코퍼스 증분 갱신 실패: {e}")
+            return {
+                "success": False,
+                "message": f"코퍼스 증분 갱신 실패: {str(e)}"
+            }
+    
     def get_genres(self) -> List[str]:
         """사용 가능한 장르 목록 반환"""
         try:
-            genres = list(set(item.genre for item in self.corpus_items))
-            return sorted(genres)
+            with self._index_lock:
+                return list(self.facet_index.genres())
         except Exception as e:
             logger.error(f"장르 목록 조회 실패: {e}")
             return []
@@ -204,31 +416,31 @@ class CorpusProcessor:
     def get_composers(self, genre: str = None) -> List[str]:
         """사용 가능한 작곡가 목록 반환"""
         try:
-            composers = []
-            for item in self.corpus_items:
-                if not genre or item.genre == genre:
-                    composers.append(item.composer)
-            
-            return sorted(list(set(composers)))
+            with self._index_lock:
+                return list(self.facet_index.composers(genre))
         except Exception as e:
             logger.error(f"작곡가 목록 조회 실패: {e}")
             return []
     
-    def export_corpus_data(self, format: str = 'json') -> Dict[str, Any]:
-        """코퍼스 데이터 내보내기"""
+    def export_corpus_data(self, format: str = 'json', compress: bool = False) -> Dict[str, Any]:
+        """코퍼스 데이터 내보내기 (청크 단위로 파일에 기록)"""
         try:
-            if format == 'json':
-                output_path = f"corpus_export_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json"
-                success = self.when_in_rome_processor.export_to_json(output_path)
-            elif format == 'csv':
-                output_path = f"corpus_export_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                success = self.when_in_rome_processor.export_to_csv(output_path)
-            else:
+            if format not in EXPORT_FORMATS:
                 return {
                     "success": False,
                     "message": f"지원하지 않는 형식: {format}"
                 }
             
+            output_path = export_filename(
+                format, compress, prefix=f"corpus_export_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
+            )
+            if format == 'json':
+                success = self.when_in_rome_processor.export_to_json(output_path, compress)
+            elif format == 'ndjson':
+                success = self.when_in_rome_processor.export_to_ndjson(output_path, compress)
+            else:
+                success = self.when_in_rome_processor.export_to_csv(output_path, compress)
+            
             if success:
                 return {
                     "success": True,
@@ -248,37 +460,51 @@ class CorpusProcessor:
                 "message": f"데이터 내보내기 실패: {str(e)}"
             }
     
+    def stream_corpus_data(self, format: str = 'ndjson', compress: bool = False) -> Dict[str, Any]:
+        """스트리밍 응답용 내보내기 (임시 파일 없이 청크 이터레이터 반환)"""
+        try:
+            if format not in EXPORT_FORMATS:
+                return {
+                    "success": False,
+                    "message": f"지원하지 않는 형식: {format}"
+                }
+            
+            return {
+                "success": True,
+                "chunks": self.when_in_rome_processor.iter_export(format, compress),
+                "media_type": media_type_for(format, compress),
+                "filename": export_filename(format, compress)
+            }
+            
+        except Exception as e:
+            logger.error(f"스트리밍 내보내기 준비 실패: {e}")
+            return {
+                "success": False,
+                "message": f"스트리밍 내보내기 준비 실패: {str(e)}"
+            }
+    
+    def _create_items(self, when_in_rome_items: List[WhenInRomeItem]) -> List[CorpusItem]:
+        """When-in-Rome 아이템을 ID가 부여된 CorpusItem으로 변환"""
+        items = []
+        for when_in_rome_item in when_in_rome_items:
+            items.append(CorpusItem(when_in_rome_item, self._next_item_id))
+            self._next_item_id += 1
+        return items
+    
+    def _index_items(self, items: List[CorpusItem]):
+        """아이템을 검색/패싯 색인에 추가"""
+        for item in items:
+            self.facet_index.add(item.item_id, item)
+            self.search_index.add(item.item_id, item, {
+                'title': item.metadata.get('title', ''),
+                'composer': item.composer,
+                'genre': item.genre
+            })
+    
     def _generate_statistics(self) -> Dict[str, Any]:
-        """통계 정보 생성"""
-        if not self.corpus_items:
-            return {}
-        
-        # 장르별 통계
-        genre_distribution = {}
-        for item in self.corpus_items:
-            if item.genre not in genre_distribution:
-                genre_distribution[item.genre] = 0
-            genre_distribution[item.genre] += 1
-        
-        # 작곡가별 통계
-        composer_distribution = {}
-        for item in self.corpus_items:
-            if item.composer not in composer_distribution:
-                composer_distribution[item.composer] = 0
-            composer_distribution[item.composer] += 1
-        
-        # 분석 파일 존재 여부 통계
-        manual_analysis_count = sum(1 for item in self.corpus_items if item.analysis_path)
-        score_count = sum(1 for item in self.corpus_items if item.score_path)
-        
-        return {
-            "total_items": len(self.corpus_items),
-            "genre_distribution": genre_distribution,
-            "composer_distribution": composer_distribution,
-            "manual_analysis_count": manual_analysis_count,
-            "score_count": score_count,
-            "analysis_coverage": f"{manual_analysis_count}/{len(self.corpus_items)} ({manual_analysis_count/len(self.corpus_items)*100:.1f}%)"
-        }
+        """통계 정보 생성 (패싯 색인의 캐시된 집계 사용)"""
+        with self._index_lock:
+            return dict(self.facet_index.statistics())
     
     def _find_analysis_file(self, score_path: str) -> Optional[str]:
         """악보 파일에 해당하는 분석 파일 찾기"""
@@ -0,0 +1,71 @@
+import logging
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Dict, Iterator
+
+import torch.distributed as dist
+
+logger = logging.getLogger(__name__)
+
+def distributed_env() -> Dict[str, int]:
+    """torchrun이 설정한 환경 변수 기준 프로세스 위치 (단일 프로세스면 rank 0 / world_size 1)"""
+    world_size = int(os.environ.get("WORLD_SIZE", "1"))
+    return {
+        'rank': int(os.environ.get("RANK", "0")),
+        'local_rank': int(os.environ.get("LOCAL_RANK", "0")),
+        'world_size': world_size,
+        'local_world_size': int(os.environ.get("LOCAL_WORLD_SIZE", str(world_size)))
+    }
+
+def is_distributed() -> bool:
+    """torchrun 등으로 여러 프로세스가 함께 학습하는지"""
+    return distributed_env()['world_size'] > 1
+
+def is_main_process() -> bool:
+    """전역 rank 0인지 (단일 프로세스 학습이면 항상 True)"""
+    return distributed_env()['rank'] == 0
+
+def init_distributed(backend: str = "gloo", timeout_seconds: int = 1800) -> bool:
+    """분산 학습이면 프로세스 그룹 초기화 (이미 초기화됐으면 그대로 사용)
+
+    CPU 학습이므로 기본 백엔드는 gloo이며, 주소/포트/rank는 torchrun이 넣어 준
+    환경 변수(MASTER_ADDR, MASTER_PORT, RANK, WORLD_SIZE)를 따른다.
+    반환값: 분산 학습 여부
+    """
+    if not is_distributed():
+        return False
+    if not dist.is_initialized():
+        dist.init_process_group(backend=backend, timeout=timedelta(seconds=timeout_seconds))
+        env = distributed_env()
+        logger.info(f"분산 학습 초기화: rank {env['rank']}/{env['world_size']} (백엔드: {backend})")
+    return True
+
+def cleanup_distributed():
+    """프로세스 그룹 정리 (학습 스크립트 종료 시)"""
+    if dist.is_available() and dist.is_initialized():
+        dist.destroy_process_group()
+
+def barrier():
+    if dist.is_available() and dist.is_initialized():
+        dist.barrier()
+
+def broadcast_object(value: Any, src: int = 0) -> Any:
+    """rank src의 값을 모든 rank에 전달 (분산 학습이 아니면 그대로 반환)"""
+    if not (dist.is_available() and dist.is_initialized()):
+        return value
+    objects = [value]
+    dist.broadcast_object_list(objects, src=src)
+    return objects[0]
+
+@contextmanager
+def main_process_first() -> Iterator[None]:
+    """rank 0이 먼저 실행한 뒤 나머지 rank가 실행 (토큰 캐시 생성 등 공유 파일 작업용)"""
+    main = is_main_process()
+    if not main:
+        barrier()
+    try:
+        yield
+    finally:
+        if main:
+            barrier()
@@ -0,0 +1,149 @@
+import bisect
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CorpusFacetIndex:
+    """장르/작곡가 패싯 색인 (패싯 값 → 아이템 ID 순서 보존 맵)
+
+    스캔과 증분 갱신 시에만 갱신되며, 목록/통계 조회는 미리 정렬해 둔
+    캐시를 사용하므로 코퍼스 크기가 아니라 결과 크기에 비례한다.
+    아이템 ID는 증가하는 순서로 추가된다고 가정하므로 각 패싯은 ID 순으로 정렬되어 있다.
+    아이템은 genre, composer, score_path, analysis_path 속성을 가진다고 가정한다.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def clear(self):
+        """색인 초기화"""
+        self._all: Dict[int, Any] = {}
+        self._by_genre: Dict[str, Dict[int, Any]] = {}
+        self._by_composer: Dict[str, Dict[int, Any]] = {}
+        self._by_genre_composer: Dict[Tuple[str, str], Dict[int, Any]] = {}
+        self._analysis_count = 0
+        self._score_count = 0
+        self._invalidate()
+
+    def _invalidate(self):
+        """정렬 목록/통계 캐시 무효화"""
+        self._item_lists: Dict[Tuple[Optional[str], Optional[str]], List[Any]] = {}
+        self._id_lists: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+        self._composer_lists: Dict[Optional[str], List[str]] = {}
+        self._genre_list: Optional[List[str]] = None
+        self._statistics: Optional[Dict[str, Any]] = None
+
+    def add(self, item_id: int, item: Any):
+        """아이템 추가"""
+        if item_id in self._all:
+            self.remove(item_id)
+
+        self._all[item_id] = item
+        self._by_genre.setdefault(item.genre, {})[item_id] = item
+        self._by_composer.setdefault(item.composer, {})[item_id] = item
+        self._by_genre_composer.setdefault((item.genre, item.composer), {})[item_id] = item
+        self._analysis_count += 1 if item.analysis_path else 0
+        self._score_count += 1 if item.score_path else 0
+        self._invalidate()
+
+    def remove(self, item_id: int):
+        """아이템 제거"""
+        item = self._all.pop(item_id, None)
+        if item is None:
+            return
+
+        for facets, value in (
+            (self._by_genre, item.genre),
+            (self._by_composer, item.composer),
+            (self._by_genre_composer, (item.genre, item.composer)),
+        ):
+            members = facets.get(value)
+            if members is not None:
+                members.pop(item_id, None)
+                if not members:
+                    del facets[value]
+
+        self._analysis_count -= 1 if item.analysis_path else 0
+        self._score_count -= 1 if item.score_path else 0
+        self._invalidate()
+
+    def _members(self, genre: Optional[str], composer: Optional[str]) -> Dict[int, Any]:
+        """패싯 조건에 맞는 ID → 아이템 맵"""
+        if genre and composer:
+            return self._by_genre_composer.get((genre, composer), {})
+        if genre:
+            return self._by_genre.get(genre, {})
+        if composer:
+            return self._by_composer.get(composer, {})
+        return self._all
+
+    def items(self, genre: Optional[str] = None, composer: Optional[str] = None) -> List[Any]:
+        """패싯 조건에 맞는 아이템 목록 (스캔 순서, 캐시된 목록이므로 수정하지 않는다)"""
+        key = (genre or None, composer or None)
+        items = self._item_lists.get(key)
+        if items is None:
+            items = self._item_lists[key] = list(self._members(genre, composer).values())
+        return items
+
+    def page_after(
+        self,
+        genre: Optional[str] = None,
+        composer: Optional[str] = None,
+        after_id: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[List[Any], bool]:
+        """after_id 다음 아이템부터 limit개와 다음 페이지 존재 여부 (키셋 페이지네이션)"""
+        key = (genre or None, composer or None)
+        items = self.items(genre, composer)
+        ids = self._id_lists.get(key)
+        if ids is None:
+            ids = self._id_lists[key] = list(self._members(genre, composer).keys())
+
+        start = 0 if after_id is None else bisect.bisect_right(ids, after_id)
+        return items[start:start + limit], start + limit < len(items)
+
+    def count(self, genre: Optional[str] = None, composer: Optional[str] = None) -> int:
+        """패싯 조건에 맞는 아이템 수"""
+        return len(self._members(genre, composer))
+
+    def genres(self) -> List[str]:
+        """정렬된 장르 목록"""
+        if self._genre_list is None:
+            self._genre_list = sorted(self._by_genre)
+        return self._genre_list
+
+    def composers(self, genre: Optional[str] = None) -> List[str]:
+        """정렬된 작곡가 목록 (장르 지정 시 해당 장르만)"""
+        genre = genre or None
+        composers = self._composer_lists.get(genre)
+        if composers is None:
+            if genre:
+                composers = sorted(
+                    composer for item_genre, composer in self._by_genre_composer
+                    if item_genre == genre
+                )
+            else:
+                composers = sorted(self._by_composer)
+            self._composer_lists[genre] = composers
+        return composers
+
+    def statistics(self) -> Dict[str, Any]:
+        """장르/작곡가 분포와 분석 파일 통계"""
+        if self._statistics is None:
+            total = len(self._all)
+            if not total:
+                self._statistics = {}
+            else:
+                self._statistics = {
+                    "total_items": total,
+                    "genre_distribution": {genre: len(members) for genre, members in self._by_genre.items()},
+                    "composer_distribution": {composer: len(members) for composer, members in self._by_composer.items()},
+                    "manual_analysis_count": self._analysis_count,
+                    "score_count": self._score_count,
+                    "analysis_coverage": f"{self._analysis_count}/{total} ({self._analysis_count/total*100:.1f}%)"
+                }
+        return self._statistics
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 큐에 들어가는 요청: (컨텍스트, 스타일, 길이, 제약 디코딩 여부, 결과 Future)
+_Request = Tuple[str, str, int, bool, Future]
+
+class GenerationBatcher:
+    """generate_harmony_suggestions 요청을 모아 한 번의 배치 generate로 처리하는 마이크로 배처
+
+    요청은 스레드 안전한 큐에 들어가고, 전용 작업 스레드가 첫 요청 이후 최대
+    max_wait_ms 동안(또는 max_batch_size개가 찰 때까지) 요청을 모은 뒤 길이/제약 디코딩
+    여부별로 묶어 HarmonyTransformerService.generate_harmony_suggestions_batch를 호출한다.
+    코루틴은 generate(), 일반 스레드는 generate_sync()로 결과를 기다린다.
+    """
+
+    def __init__(self, service: Any, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.service = service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "max_batch": 0}
+
+    def submit(self, context: str, style: str = "classical", length: int = 4, constrained: bool = False) -> Future:
+        """요청을 큐에 넣고 결과 Future 반환"""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((context, style, length, constrained, future))
+        return future
+
+    async def generate(
+        self,
+        context: str,
+        style: str = "classical",
+        length: int = 4,
+        constrained: bool = False
+    ) -> List[Dict[str, Any]]:
+        """코루틴용: 배치 처리 결과를 기다린다 (이벤트 루프를 막지 않는다)"""
+        return await asyncio.wrap_future(self.submit(context, style, length, constrained))
+
+    def generate_sync(
+        self,
+        context: str,
+        style: str = "classical",
+        length: int = 4,
+        constrained: bool = False,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """동기 호출용: 배치 처리 결과를 기다린다"""
+        return self.submit(context, style, length, constrained).result(timeout)
+
+    def close(self):
+        """작업 스레드 종료 (대기 중인 요청은 처리 후 종료)"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """처리한 요청/배치 수와 평균 배치 크기"""
+        stats = dict(self._stats)
+        stats["average_batch"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+    def _ensure_worker(self):
+        """작업 스레드를 처음 요청 시 시작"""
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="harmony-generation-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        """첫 요청 이후 max_wait 동안 요청을 모아 배치로 처리"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: List[_Request]):
+        """길이와 제약 디코딩 여부가 같은 요청끼리 묶어 한 번에 생성하고 Future에 결과 전달"""
+        groups: Dict[Tuple[int, bool], List[_Request]] = {}
+        for request in batch:
+            if request[4].set_running_or_notify_cancel():
+                groups.setdefault((request[2], request[3]), []).append(request)
+
+        for (length, constrained), requests in groups.items():
+            try:
+                results = self.service.generate_harmony_suggestions_batch(
+                    [(context, style) for context, style, _, _, _ in requests],
+                    length,
+                    constrained=constrained
+                )
+            except Exception as e:
+                logger.error(f"배치 화성 진행 제안 생성 실패 ({len(requests)}건): {e}")
+                for request in requests:
+                    request[4].set_exception(e)
+                continue
+
+            for request, result in zip(requests, results):
+                request[4].set_result(result)
+
+            self._stats["requests"] += len(requests)
+            self._stats["batches"] += 1
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(requests))
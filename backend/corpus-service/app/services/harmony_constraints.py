@@ -0,0 +1,192 @@
+import logging
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import torch
+from transformers import LogitsProcessor
+
+from .rntxt_parser import load_work_analysis
+
+logger = logging.getLogger(__name__)
+
+_MEASURE_PATTERN = re.compile(r"\bm(\d+)\b")
+
+def harmony_token(key: Optional[str], chord: Optional[str], roman: Optional[str]) -> str:
+    """학습 텍스트와 같은 마디 화음 표기 "조성:로마숫자" (원래 화음 표기 우선, 조성 미상은 C)"""
+    return f"{key if key and key != 'Unknown' else 'C'}:{chord or roman}"
+
+def build_chord_vocabulary(
+    corpus_items: Iterable[Any],
+    min_count: int = 1,
+    max_size: Optional[int] = None
+) -> List[str]:
+    """코퍼스 분석 파일에 등장한 "조성:로마숫자" 화음 목록 (빈도 내림차순)"""
+    counts: Counter = Counter()
+    for item in corpus_items:
+        analysis_path = getattr(item, 'analysis_path', None)
+        if not analysis_path:
+            continue
+        try:
+            columns = load_work_analysis(analysis_path).analysis
+        except Exception as e:
+            logger.debug(f"화성 어휘 수집 실패 {analysis_path}: {e}")
+            continue
+        counts.update(
+            harmony_token(key, chord, roman)
+            for key, chord, roman in zip(columns.values('key'), columns.values('chord'), columns.values('roman_numeral'))
+            if chord or roman
+        )
+
+    chords = [chord for chord, count in counts.most_common(max_size) if count >= min_count]
+    logger.info(f"화성 어휘 수집 완료: {len(chords)}개 (전체 {len(counts)}개)")
+    return chords
+
+def next_measure(context: str) -> int:
+    """컨텍스트 다음 마디 번호 (마지막 "m<번호>" + 1, 없으면 " | "로 나눈 마디 수 + 1)"""
+    measures = _MEASURE_PATTERN.findall(context)
+    if measures:
+        return int(measures[-1]) + 1
+    return len([part for part in context.split('|') if part.strip()]) + 1
+
+class ChordTrieNode:
+    """트라이 노드 (다음 토큰 ID → 자식, 여기서 끝나는 화음)"""
+
+    __slots__ = ('children', 'chord')
+
+    def __init__(self):
+        self.children: Dict[int, "ChordTrieNode"] = {}
+        self.chord: Optional[str] = None
+
+class ChordTrie:
+    """화음 어휘를 모델 토크나이저의 토큰 ID 열로 저장한 트라이
+
+    각 화음은 학습 텍스트에서처럼 앞에 공백을 붙여(" C:V7") 인코딩한다.
+    디코딩했을 때 원래 문자열로 돌아오지 않는 화음(UNK 등)은 제외한다.
+    """
+
+    def __init__(self, tokenizer, chords: Iterable[str]):
+        self.tokenizer = tokenizer
+        self.root = ChordTrieNode()
+        self.depth = 0
+        self.size = 0
+        skipped = 0
+
+        for chord in chords:
+            text = f" {chord}"
+            token_ids = tokenizer.encode(text, add_special_tokens=False)
+            if not token_ids or tokenizer.decode(token_ids).strip() != chord:
+                skipped += 1
+                continue
+            node = self.root
+            for token_id in token_ids:
+                node = node.children.setdefault(token_id, ChordTrieNode())
+            if node.chord is None:
+                node.chord = chord
+                self.size += 1
+                self.depth = max(self.depth, len(token_ids))
+
+        if skipped:
+            logger.debug(f"토크나이저로 표현할 수 없는 화음 {skipped}개 제외")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def encode(self, text: str) -> List[int]:
+        """화음 사이의 고정 텍스트(" | m5" 등) 인코딩"""
+        return self.tokenizer.encode(text, add_special_tokens=False)
+
+class _RowState:
+    """생성 행 하나의 진행 상태 (몇 번째 마디의 구분자/화음 토큰 위치에 있는지)"""
+
+    __slots__ = ('consumed', 'unit', 'position', 'node', 'chords', 'done')
+
+    def __init__(self, root: ChordTrieNode):
+        self.consumed = 0
+        self.unit = 0
+        self.position = 0  # 구분자 안의 위치 (구분자를 다 쓰면 트라이를 따라감)
+        self.node = root
+        self.chords: List[str] = []
+        self.done = False
+
+class ChordConstraintProcessor(LogitsProcessor):
+    """생성 토큰을 "구분자 + 어휘에 있는 화음" 마디 단위로만 허용하는 LogitsProcessor
+
+    행마다 마디별 구분자 토큰(prefixes[row][i], 예: " | m5")은 그대로 강제하고, 그 뒤에는
+    트라이를 따라 화음 토큰만 허용한다. 화음이 끝날 수 있는 노드에서는 다음 마디의
+    구분자를, 마지막 마디에서는 EOS를 허용하므로 length개의 화음이 완성되면 생성이 멈춘다.
+    """
+
+    def __init__(self, trie: ChordTrie, prompt_length: int, prefixes: List[List[List[int]]], eos_token_id: int):
+        self.trie = trie
+        self.prompt_length = prompt_length
+        self.prefixes = prefixes
+        self.eos_token_id = eos_token_id
+        self.states = [_RowState(trie.root) for _ in prefixes]
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        mask = torch.full_like(scores, float('-inf'))
+        for row, state in enumerate(self.states):
+            self._consume(row, state, input_ids[row])
+            mask[row, self._allowed(row, state)] = 0
+        return scores + mask
+
+    def finalize(self, sequences: torch.LongTensor) -> List[List[str]]:
+        """generate 출력으로 마지막 토큰까지 반영하고 행별 완성된 화음 목록 반환
+
+        마지막 단계의 토큰(EOS 등)은 프로세서를 거치지 않으므로 여기서 처리하며,
+        토큰 한도에 걸려 끝난 행도 끝날 수 있는 위치의 화음은 포함한다.
+        """
+        results = []
+        for row, state in enumerate(self.states):
+            self._consume(row, state, sequences[row])
+            prefix = self.prefixes[row][state.unit] if state.unit < len(self.prefixes[row]) else []
+            if not state.done and state.position >= len(prefix) and state.node.chord is not None:
+                state.chords.append(state.node.chord)
+                state.done = True
+            results.append(list(state.chords))
+        return results
+
+    def _consume(self, row: int, state: _RowState, sequence: torch.LongTensor):
+        """아직 반영하지 않은 생성 토큰만큼 상태 진행"""
+        generated = sequence[self.prompt_length + state.consumed:].tolist()
+        for token_id in generated:
+            self._advance(row, state, token_id)
+        state.consumed += len(generated)
+
+    def _advance(self, row: int, state: _RowState, token_id: int):
+        """토큰 하나만큼 상태 진행"""
+        if state.done:
+            return
+        prefix = self.prefixes[row][state.unit] if state.unit < len(self.prefixes[row]) else []
+        if state.position < len(prefix):
+            state.position += 1
+            return
+
+        child = state.node.children.get(token_id)
+        if child is not None:
+            state.node = child
+            return
+
+        # 화음 밖의 토큰: 현재 화음을 확정하고 다음 마디(또는 종료)로
+        state.chords.append(state.node.chord)
+        state.unit += 1
+        state.node = self.trie.root
+        if token_id == self.eos_token_id or state.unit >= len(self.prefixes[row]):
+            state.done = True
+        else:
+            state.position = 1
+
+    def _allowed(self, row: int, state: _RowState) -> List[int]:
+        """현재 상태에서 허용되는 다음 토큰"""
+        if state.done:
+            return [self.eos_token_id]
+        prefixes = self.prefixes[row]
+        prefix = prefixes[state.unit]
+        if state.position < len(prefix):
+            return [prefix[state.position]]
+
+        allowed = list(state.node.children)
+        if state.node.chord is not None:
+            allowed.append(prefixes[state.unit + 1][0] if state.unit + 1 < len(prefixes) else self.eos_token_id)
+        return allowed
@@ -0,0 +1,302 @@
+import json
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import torch
+
+from .rntxt_parser import TOKEN_RE, load_work_analysis
+
+logger = logging.getLogger(__name__)
+
+# 저장 파일 이름 (모델/어댑터 디렉터리 안)
+TOKENIZER_FILE = "harmony_tokenizer.json"
+
+PAD_TOKEN = "[PAD]"
+UNK_TOKEN = "[UNK]"
+BOS_TOKEN = "<START>"
+EOS_TOKEN = "<END>"
+BAR_TOKEN = "|"
+SPECIAL_TOKENS = (PAD_TOKEN, UNK_TOKEN, BOS_TOKEN, EOS_TOKEN, BAR_TOKEN)
+
+# 학습 텍스트의 마디 번호 (예: "m12"), 마디 구분자로 취급
+_MEASURE_RE = re.compile(r"m\d+[a-z]?")
+
+def split_chord(label: str) -> List[str]:
+    """화음 표기를 (로마 숫자+성질, 전위/숫자저음, 부속화음 대상) 토큰으로 분리
+
+    예: "V65/V" → ["V", "65", "/V"], "viio7" → ["viio", "7"], "Ger65" → ["Ger", "65"].
+    추가/생략음 표기("[add9]")는 버린다. 화음으로 읽을 수 없으면 표기 전체를 한 토큰으로.
+    """
+    match = TOKEN_RE.fullmatch(label)
+    if not match or match.lastgroup != 'chord':
+        return [label]
+    parts = [label[:match.start('figure')]]
+    if match.group('figure'):
+        parts.append(match.group('figure'))
+    if match.group('applied'):
+        parts.append(match.group('applied'))
+    return parts
+
+def _key_token(key: Optional[str]) -> str:
+    """조성 토큰 (학습 텍스트와 같이 조성 미상은 C)"""
+    return f"{key if key and key != 'Unknown' else 'C'}:"
+
+class HarmonyTokenizer:
+    """화성 분석 전용 토크나이저 (조성, 로마 숫자, 전위, 부속화음 대상, 마디 구분자마다 토큰 하나)
+
+    어휘는 파싱된 코퍼스에서 만들며, 조성 토큰은 조성이 바뀔 때만 넣는다.
+    "m12 C:V65/V | m13 C:I"는 ["|", "C:", "V", "65", "/V", "|", "I"]가 되어 GPT-2 BPE보다
+    훨씬 짧고 어휘(임베딩 행렬)도 수백 개 수준이다. HarmonyDataset/Trainer에서 쓰도록
+    HF 토크나이저와 같은 __call__ / encode / decode / save_pretrained / from_pretrained를 제공한다.
+    """
+
+    def __init__(self, tokens: Iterable[str]):
+        self.tokens: List[str] = list(SPECIAL_TOKENS)
+        for token in tokens:
+            if token not in SPECIAL_TOKENS:
+                self.tokens.append(token)
+        self.token_to_id: Dict[str, int] = {token: index for index, token in enumerate(self.tokens)}
+        if len(self.token_to_id) != len(self.tokens):
+            raise ValueError("화성 토크나이저 어휘에 중복 토큰이 있습니다")
+
+        self.pad_token, self.unk_token, self.bos_token, self.eos_token, self.bar_token = SPECIAL_TOKENS
+        self.pad_token_id, self.unk_token_id, self.bos_token_id, self.eos_token_id, self.bar_token_id = range(len(SPECIAL_TOKENS))
+        self.padding_side = "right"
+
+    @classmethod
+    def build(cls, corpus_items: Iterable[Any], min_count: int = 1) -> "HarmonyTokenizer":
+        """코퍼스 분석 파일에서 어휘 생성 (조성 → 로마 숫자 → 전위 → 부속화음 순, 각각 빈도순)"""
+        counts: Dict[str, Counter] = {'key': Counter(), 'numeral': Counter(), 'figure': Counter(), 'applied': Counter()}
+        works = 0
+        for item in corpus_items:
+            analysis_path = getattr(item, 'analysis_path', None)
+            if not analysis_path:
+                continue
+            try:
+                columns = load_work_analysis(analysis_path).analysis
+            except Exception as e:
+                logger.debug(f"화성 토크나이저 어휘 수집 실패 {analysis_path}: {e}")
+                continue
+            works += 1
+            counts['key'].update(_key_token(key) for key in columns.values('key'))
+            for chord, roman in zip(columns.values('chord'), columns.values('roman_numeral')):
+                label = chord or roman
+                if not label:
+                    continue
+                parts = split_chord(label)
+                counts['numeral'][parts[0]] += 1
+                for part in parts[1:]:
+                    counts['applied' if part.startswith('/') else 'figure'][part] += 1
+
+        tokens = [
+            token
+            for group in ('key', 'numeral', 'figure', 'applied')
+            for token, count in counts[group].most_common()
+            if count >= min_count
+        ]
+        tokenizer = cls(tokens)
+        logger.info(f"화성 토크나이저 생성: 작품 {works}개, 어휘 {len(tokenizer)}개")
+        return tokenizer
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def vocab_size(self) -> int:
+        return len(self.tokens)
+
+    def get_vocab(self) -> Dict[str, int]:
+        return dict(self.token_to_id)
+
+    def tokenize(self, text: str) -> List[str]:
+        """학습/컨텍스트 텍스트("<START> m1 C:I | m2 C:V65/V <END>")를 토큰 문자열로 분리"""
+        tokens: List[str] = []
+        key = None
+        for piece in text.split():
+            if piece in (BOS_TOKEN, EOS_TOKEN):
+                tokens.append(piece)
+            elif piece == BAR_TOKEN or _MEASURE_RE.fullmatch(piece):
+                # "m12"와 "|"가 연달아 나와도 마디 구분자는 하나만
+                if not tokens or tokens[-1] != BAR_TOKEN:
+                    tokens.append(BAR_TOKEN)
+            else:
+                if ':' in piece:
+                    piece_key, _, label = piece.partition(':')
+                    if f"{piece_key}:" != key:
+                        key = f"{piece_key}:"
+                        tokens.append(key)
+                    if not label:
+                        continue
+                else:
+                    label = piece
+                tokens.extend(split_chord(label))
+        return tokens
+
+    def encode_harmony(self, harmony_sequence: List[Dict[str, Any]], add_special_tokens: bool = True) -> List[int]:
+        """HarmonyDataset의 화성 시퀀스(measure/key/roman_numeral)를 텍스트를 거치지 않고 바로 인코딩"""
+        tokens: List[str] = [BOS_TOKEN] if add_special_tokens else []
+        key = None
+        measure = None
+        for harmony in harmony_sequence:
+            if harmony['measure'] != measure:
+                measure = harmony['measure']
+                tokens.append(BAR_TOKEN)
+            harmony_key = _key_token(harmony['key'])
+            if harmony_key != key:
+                key = harmony_key
+                tokens.append(key)
+            tokens.extend(split_chord(harmony['roman_numeral']))
+        if add_special_tokens:
+            tokens.append(EOS_TOKEN)
+        return self.convert_tokens_to_ids(tokens)
+
+    def convert_tokens_to_ids(self, tokens: Union[str, List[str]]) -> Union[int, List[int]]:
+        if isinstance(tokens, str):
+            return self.token_to_id.get(tokens, self.unk_token_id)
+        lookup, unk = self.token_to_id, self.unk_token_id
+        return [lookup.get(token, unk) for token in tokens]
+
+    def convert_ids_to_tokens(self, ids: Union[int, List[int]]) -> Union[str, List[str]]:
+        if isinstance(ids, int):
+            return self.tokens[ids]
+        return [self.tokens[index] for index in ids]
+
+    def encode(self, text: str, add_special_tokens: bool = False) -> List[int]:
+        """텍스트 → 토큰 ID (add_special_tokens=True면 앞뒤에 <START>/<END>가 없을 때 추가)"""
+        ids = self.convert_tokens_to_ids(self.tokenize(text))
+        if add_special_tokens:
+            if not ids or ids[0] != self.bos_token_id:
+                ids.insert(0, self.bos_token_id)
+            if ids[-1] != self.eos_token_id:
+                ids.append(self.eos_token_id)
+        return ids
+
+    def decode_progression(self, ids: Iterable[int]) -> List[str]:
+        """토큰 ID → 마디별 화음 문자열 목록 (예: ["C:I", "C:V65/V G:I"])"""
+        measures: List[List[str]] = []
+        current: List[str] = []
+        chord: List[str] = []
+        key = "C:"
+
+        for index in ids:
+            index = int(index)
+            if index in (self.pad_token_id, self.bos_token_id, self.unk_token_id):
+                continue
+            if index == self.eos_token_id:
+                break
+            token = self.tokens[index]
+            # 전위/숫자저음("65", "b7")과 부속화음 대상("/V")은 앞 화음에 붙인다
+            if chord and (token.startswith('/') or token.lstrip('#b')[:1].isdigit()):
+                chord.append(token)
+                continue
+            if chord:
+                current.append(key + "".join(chord))
+                chord = []
+            if index == self.bar_token_id:
+                if current:
+                    measures.append(current)
+                current = []
+            elif token.endswith(':'):
+                key = token
+            else:
+                chord = [token]
+        if chord:
+            current.append(key + "".join(chord))
+        if current:
+            measures.append(current)
+        return [" ".join(measure) for measure in measures]
+
+    def decode(self, ids: Iterable[int], skip_special_tokens: bool = True) -> str:
+        """토큰 ID → 학습 텍스트와 같은 " | "로 구분한 마디 문자열"""
+        if not skip_special_tokens:
+            return " ".join(self.convert_ids_to_tokens([int(index) for index in ids]))
+        return " | ".join(self.decode_progression(ids))
+
+    def batch_decode(self, sequences: Iterable[Iterable[int]], skip_special_tokens: bool = True) -> List[str]:
+        return [self.decode(sequence, skip_special_tokens) for sequence in sequences]
+
+    def __call__(
+        self,
+        text: Union[str, List[str]],
+        truncation: bool = False,
+        padding: Union[bool, str] = False,
+        max_length: Optional[int] = None,
+        return_tensors: Optional[str] = None,
+        padding_side: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """HF 토크나이저와 같은 형태의 인코딩 (input_ids, attention_mask)"""
+        single = isinstance(text, str)
+        sequences = [self.encode(item) for item in ([text] if single else text)]
+        return self.pad_sequences(
+            sequences,
+            truncation=truncation,
+            padding=padding,
+            max_length=max_length,
+            return_tensors=return_tensors,
+            padding_side=padding_side,
+            single=single
+        )
+
+    def pad_sequences(
+        self,
+        sequences: List[List[int]],
+        truncation: bool = False,
+        padding: Union[bool, str] = False,
+        max_length: Optional[int] = None,
+        return_tensors: Optional[str] = None,
+        padding_side: Optional[str] = None,
+        single: bool = False
+    ) -> Dict[str, Any]:
+        """토큰 ID 목록들을 자르고(truncation) 패딩해 input_ids/attention_mask로 반환"""
+        if truncation and max_length:
+            sequences = [sequence[:max_length] for sequence in sequences]
+
+        if padding == 'max_length' and max_length:
+            target = max_length
+        elif padding in (True, 'longest') or return_tensors == 'pt':
+            target = max((len(sequence) for sequence in sequences), default=0)
+        else:
+            target = None
+
+        left = (padding_side or self.padding_side) == "left"
+        input_ids, attention_mask = [], []
+        for sequence in sequences:
+            fill = max(0, target - len(sequence)) if target is not None else 0
+            pad, mask = [self.pad_token_id] * fill, [1] * len(sequence)
+            input_ids.append(pad + sequence if left else sequence + pad)
+            attention_mask.append([0] * fill + mask if left else mask + [0] * fill)
+
+        if return_tensors == 'pt':
+            return {
+                'input_ids': torch.tensor(input_ids, dtype=torch.long),
+                'attention_mask': torch.tensor(attention_mask, dtype=torch.long)
+            }
+        if single:
+            return {'input_ids': input_ids[0], 'attention_mask': attention_mask[0]}
+        return {'input_ids': input_ids, 'attention_mask': attention_mask}
+
+    def save_pretrained(self, output_dir: str) -> str:
+        """어휘를 output_dir/harmony_tokenizer.json으로 저장하고 경로 반환"""
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, TOKENIZER_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'type': 'harmony', 'version': 1, 'tokens': self.tokens}, f, ensure_ascii=False, indent=0)
+        return path
+
+    @classmethod
+    def from_pretrained(cls, path: str) -> "HarmonyTokenizer":
+        """save_pretrained로 저장한 디렉터리 또는 JSON 파일에서 로드"""
+        if os.path.isdir(path):
+            path = os.path.join(path, TOKENIZER_FILE)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('type') != 'harmony':
+            raise ValueError(f"화성 토크나이저 파일이 아닙니다: {path}")
+        tokens = data['tokens']
+        if tuple(tokens[:len(SPECIAL_TOKENS)]) != SPECIAL_TOKENS:
+            raise ValueError(f"화성 토크나이저 특수 토큰이 맞지 않습니다: {path}")
+        return cls(tokens[len(SPECIAL_TOKENS):])
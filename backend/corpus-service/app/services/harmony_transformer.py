@@ -10,7 +10,8 @@ from transformers import (
     AutoModelForCausalLM, 
     TrainingArguments, 
     Trainer,
-    DataCollatorForLanguageModeling
+    DynamicCache,
+    LogitsProcessorList
 )
 from peft import (
     LoraConfig, 
@@ -19,11 +20,27 @@ from peft import (
     PeftModel
 )
 from datasets import Dataset as HFDataset
+from safetensors.torch import load_file as load_safetensors, save_file as save_safetensors
 import numpy as np
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import pickle
 import time
+import copy
+
+from .analysis_store import AnalysisColumns
+from .continuation_cache import ContinuationCache
+from .harmony_constraints import ChordConstraintProcessor, ChordTrie, next_measure
+from .harmony_tokenizer import TOKENIZER_FILE, HarmonyTokenizer
+from .token_cache import TokenizedCorpusCache
+from .training_batching import DynamicPaddingCollator, LengthBucketTrainer
+from .training_profile import TrainingProfile
+from .distributed_training import broadcast_object, distributed_env, init_distributed
+from .training_monitor import TrainingMonitor, TrainingProgressCallback
+from .model_quantization import QUANTIZATION_MODES, describe_precision, quantize_model
+from .model_registry import MODEL_REGISTRY, ModelEntry, model_key
+from .rntxt_parser import load_work_analysis
+from .sequence_packing import PackedSequenceDataset
 
 # MPS 완전 비활성화
 if hasattr(torch.backends, 'mps'):
@@ -43,8 +60,17 @@ os.environ['PYTORCH_CUDA_ALLOC_CONF'] = 'max_split_size_mb:128'
 
 logger = logging.getLogger(__name__)
 
+# model_name을 로드할 수 없을 때 대신 쓰는 작은 기본 모델
+SIMPLE_MODEL_NAME = "distilgpt2"
+
 class HarmonyTransformer(nn.Module):
-    """화성학 특화 Transformer 모델"""
+    """화성학 특화 Transformer 모델
+
+    어휘 크기는 from_tokenizer()로 화성 토크나이저(HarmonyTokenizer)에 맞춘다.
+    causal=True이면 다음 토큰 예측(언어 모델)용 인과 마스크를 쓰고, labels를 주면 손실을 계산한다.
+    position_ids를 주면(패킹 블록) 위치가 이어지지 않는 곳을 조각 경계로 보고 조각끼리 서로
+    참조하지 않도록 마스크한다.
+    """
     
     def __init__(
         self,
@@ -53,15 +79,19 @@ class HarmonyTransformer(nn.Module):
         nhead: int = 8,
         num_layers: int = 6,
         dropout: float = 0.1,
-        max_seq_length: int = 512
+        max_seq_length: int = 512,
+        pad_token_id: Optional[int] = None,
+        causal: bool = False
     ):
         super().__init__()
         
+        self.vocab_size = vocab_size
         self.d_model = d_model
         self.max_seq_length = max_seq_length
+        self.causal = causal
         
         # 임베딩 레이어
-        self.token_embedding = nn.Embedding(vocab_size, d_model)
+        self.token_embedding = nn.Embedding(vocab_size, d_model, padding_idx=pad_token_id)
         self.position_embedding = nn.Embedding(max_seq_length, d_model)
         
         # 화성학 특화 레이어
@@ -89,6 +119,12 @@ class HarmonyTransformer(nn.Module):
         # 가중치 초기화
         self._init_weights()
     
+    @classmethod
+    def from_tokenizer(cls, tokenizer: HarmonyTokenizer, **kwargs) -> "HarmonyTransformer":
+        """화성 토크나이저의 어휘 크기/패딩 토큰에 맞춘 모델 생성"""
+        kwargs.setdefault('causal', True)
+        return cls(vocab_size=len(tokenizer), pad_token_id=tokenizer.pad_token_id, **kwargs)
+    
     def _init_weights(self):
         """가중치 초기화"""
         for module in self.modules():
@@ -104,13 +140,17 @@ class HarmonyTransformer(nn.Module):
         input_ids: torch.Tensor,
         attention_mask: Optional[torch.Tensor] = None,
         harmony_ids: Optional[torch.Tensor] = None,
-        key_ids: Optional[torch.Tensor] = None
+        key_ids: Optional[torch.Tensor] = None,
+        labels: Optional[torch.Tensor] = None,
+        position_ids: Optional[torch.Tensor] = None
     ) -> Dict[str, torch.Tensor]:
         """순전파"""
         batch_size, seq_len = input_ids.shape
         
-        # 위치 인덱스 생성
-        position_ids = torch.arange(seq_len, device=input_ids.device).unsqueeze(0).expand(batch_size, -1)
+        # 위치 인덱스 생성 (패킹 블록이면 조각마다 0부터 시작하는 position_ids를 그대로 사용)
+        packed = position_ids is not None
+        if not packed:
+            position_ids = torch.arange(seq_len, device=input_ids.device).unsqueeze(0).expand(batch_size, -1)
         
         # 임베딩 결합
         token_embeds = self.token_embedding(input_ids)
@@ -136,34 +176,69 @@ class HarmonyTransformer(nn.Module):
         else:
             transformer_mask = None
         
-        encoded = self.transformer(embeddings, src_key_padding_mask=transformer_mask)
+        causal_mask = None
+        if self.causal:
+            # 패딩 마스크와 같은 불리언 형식 (True = 이후 위치, 참조 불가)
+            causal_mask = torch.triu(
+                torch.ones(seq_len, seq_len, dtype=torch.bool, device=input_ids.device), diagonal=1
+            )
+        if packed:
+            # 조각 번호: 위치가 1씩 늘지 않는 곳에서 새 조각 시작 → 다른 조각은 참조 불가 (헤드마다 반복)
+            segment_ids = (torch.diff(position_ids, dim=-1, prepend=position_ids[:, :1] - 1) != 1).cumsum(-1)
+            segment_mask = segment_ids.unsqueeze(-1) != segment_ids.unsqueeze(1)
+            if causal_mask is not None:
+                segment_mask = segment_mask | causal_mask
+            causal_mask = segment_mask.repeat_interleave(self.transformer.layers[0].self_attn.num_heads, dim=0)
+        
+        encoded = self.transformer(
+            embeddings,
+            mask=causal_mask,
+            src_key_padding_mask=transformer_mask,
+            is_causal=self.causal and not packed
+        )
         
         # 출력 생성
         logits = self.output_projection(encoded)
         harmony_logits = self.harmony_classifier(encoded)
         key_logits = self.key_classifier(encoded)
         
-        return {
+        outputs = {
             'logits': logits,
             'harmony_logits': harmony_logits,
             'key_logits': key_logits,
             'hidden_states': encoded
         }
+        
+        if labels is not None:
+            # 다음 토큰 예측: 위치 t의 출력으로 t+1번째 토큰을 맞춘다 (-100은 무시)
+            outputs['loss'] = F.cross_entropy(
+                logits[:, :-1].reshape(-1, logits.size(-1)),
+                labels[:, 1:].reshape(-1),
+                ignore_index=-100
+            )
+        
+        return outputs
 
 class HarmonyDataset(Dataset):
-    """화성학 데이터셋"""
+    """화성학 데이터셋
+
+    tokenizer가 HarmonyTokenizer이면 화성 시퀀스를 텍스트로 바꾸지 않고 바로 토큰 ID로 인코딩한다.
+    padding=False이면 max_length로 자르기만 하고 패딩은 콜레이터(DynamicPaddingCollator)에 맡긴다.
+    """
     
     def __init__(
         self, 
         corpus_items: List[Any],
         tokenizer,
         max_length: int = 512,
-        include_harmony: bool = True
+        include_harmony: bool = True,
+        padding: Any = 'max_length'
     ):
         self.corpus_items = corpus_items
         self.tokenizer = tokenizer
         self.max_length = max_length
         self.include_harmony = include_harmony
+        self.padding = padding
         
         # 데이터 전처리
         self.processed_data = self._preprocess_data()
@@ -208,20 +283,11 @@ class HarmonyDataset(Dataset):
     def _extract_harmony_data(self, analysis_path: str) -> Optional[Dict[str, Any]]:
         """분석 파일에서 화성 데이터 추출 (개선된 버전)"""
         try:
-            with open(analysis_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # 스캔/악보 처리와 공유하는 파싱 결과 사용 (파일을 다시 읽지 않음)
+            work_analysis = load_work_analysis(analysis_path)
             
-            # 마디별 화성 분석 추출
-            lines = content.split('\n')
-            harmony_sequence = []
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('m') and ':' in line:
-                    # 마디 분석 파싱
-                    harmony_info = self._parse_harmony_line(line)
-                    if harmony_info:
-                        harmony_sequence.append(harmony_info)
+            # 마디별 화성 분석 추출 (열 단위 배열에서 바로 변환)
+            harmony_sequence = self._columns_to_harmony(work_analysis.analysis)
             
             if not harmony_sequence:
                 return None
@@ -247,44 +313,21 @@ class HarmonyDataset(Dataset):
             logger.debug(f"화성 데이터 추출 실패 {analysis_path}: {e}")
             return None
     
-    def _parse_harmony_line(self, line: str) -> Optional[Dict[str, Any]]:
-        """마디 라인 파싱"""
-        try:
-            parts = line.split()
-            if len(parts) < 2:
-                return None
-            
-            # 마디 번호 추출
-            measure_part = parts[0]
-            if not measure_part.startswith('m'):
-                return None
-            
-            measure = int(measure_part[1:])
-            
-            # 로마 숫자와 키 정보 추출
-            roman_numeral = None
-            key = None
-            
-            for part in parts[1:]:
-                if ':' in part:
-                    key_part = part.rstrip(':')
-                    if len(key_part) <= 3:
-                        key = key_part
-                elif part in ['i', 'I', 'ii', 'II', 'iii', 'III', 'iv', 'IV', 'v', 'V', 'vi', 'VI', 'vii', 'VII']:
-                    roman_numeral = part
-            
-            if not roman_numeral:
-                return None
-            
-            return {
+    def _columns_to_harmony(self, columns: AnalysisColumns) -> List[Dict[str, Any]]:
+        """열 단위 분석 배열을 학습용 화성 정보 목록으로 변환"""
+        # 전위/부속화음까지 포함한 원래 표기 사용 (예: "V65/V")
+        chords = columns.values('chord')
+        romans = columns.values('roman_numeral')
+        keys = columns.values('key')
+        
+        return [
+            {
                 'measure': measure,
-                'roman_numeral': roman_numeral,
-                'key': key or 'C'
+                'roman_numeral': chord or roman,
+                'key': key if key != "Unknown" else 'C'
             }
-            
-        except Exception as e:
-            logger.debug(f"마디 라인 파싱 실패: {line} - {e}")
-            return None
+            for measure, chord, roman, key in zip(columns.values('measure'), chords, romans, keys)
+        ]
     
     def _calculate_sequence_complexity(self, harmony_sequence: List[Dict[str, Any]]) -> float:
         """화성 시퀀스의 복잡도 계산"""
@@ -321,11 +364,22 @@ class HarmonyDataset(Dataset):
     def __getitem__(self, idx: int) -> Dict[str, Any]:
         data = self.processed_data[idx]
         
+        if isinstance(self.tokenizer, HarmonyTokenizer):
+            # 화성 토크나이저: 조성/로마 숫자/전위/마디 구분자 단위 토큰
+            encoding = self.tokenizer.pad_sequences(
+                [self.tokenizer.encode_harmony(data['harmony_sequence'])],
+                truncation=True,
+                padding=self.padding,
+                max_length=self.max_length,
+                return_tensors='pt'
+            )
+            return {key: value.squeeze(0) for key, value in encoding.items()}
+        
         # 토크나이징
         encoding = self.tokenizer(
             data['text'],
             truncation=True,
-            padding='max_length',
+            padding=self.padding,
             max_length=self.max_length,
             return_tensors='pt'
         )
@@ -337,12 +391,54 @@ class HarmonyDataset(Dataset):
         return encoding
 
 class HarmonyTransformerService:
-    """Harmony Transformer 서비스"""
+    """Harmony Transformer 서비스
+
+    모델은 프로세스 전역 레지스트리(MODEL_REGISTRY)를 통해 로드하므로 같은
+    모델 이름/어댑터 경로를 쓰는 서비스 인스턴스는 가중치를 한 벌만 공유한다.
+    inference_only=True이면 학습용 LoRA 래퍼 없이 저장된 어댑터를 기본 가중치에
+    병합하고 eval/no-grad 상태로 로드한다 (서빙 전용, 학습 불가). 이때
+    quantization="int8"/"bf16"을 주면 병합된 모델에 동적 int8 양자화 또는 bf16 변환을 적용한다.
+    harmony_tokenizer_path를 주면 HF 모델 대신 그 화성 토크나이저(HarmonyTokenizer) 어휘에 맞춘
+    HarmonyTransformer를 처음부터 학습한다 (학습 전용, generate 기반 생성은 지원하지 않음).
+    """
     
-    def __init__(self, model_name: str = "microsoft/DialoGPT-medium"):
+    def __init__(
+        self,
+        model_name: str = "microsoft/DialoGPT-medium",
+        adapter_path: Optional[str] = None,
+        inference_only: bool = False,
+        session_cache: Optional[ContinuationCache] = None,
+        quantization: Optional[str] = None,
+        dataset_cache_dir: Optional[str] = None,
+        harmony_tokenizer_path: Optional[str] = None
+    ):
+        if harmony_tokenizer_path:
+            if inference_only:
+                raise ValueError("화성 토크나이저 모델은 학습 전용이라 추론 전용 모드로 로드할 수 없습니다")
+            # 레지스트리 키가 토크나이저(어휘)마다 달라지도록 모델 이름에 경로를 넣음
+            model_name = f"harmony-transformer:{os.path.abspath(harmony_tokenizer_path)}"
         self.model_name = model_name
+        self.harmony_tokenizer_path = harmony_tokenizer_path
+        self.adapter_path = adapter_path
+        self.inference_only = inference_only
+        if quantization and quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"지원하지 않는 양자화 모드: {quantization} (지원: {', '.join(QUANTIZATION_MODES)})")
+        if quantization and not inference_only:
+            logger.warning("양자화는 추론 전용 모드에서만 적용됩니다. 학습용 모델은 float32로 로드합니다.")
+            quantization = None
+        self.quantization = quantization or None
+        # 이어 쓰기(continuation) 요청용 세션별 프리픽스 KV 캐시
+        self.session_cache = session_cache if session_cache is not None else ContinuationCache()
+        # 제약 디코딩용 화음 어휘 ("조성:로마숫자")와 현재 토크나이저로 만든 트라이
+        self.chord_vocabulary: List[str] = []
+        self._chord_trie: Optional[ChordTrie] = None
+        # 토큰화된 학습 데이터 캐시 디렉터리 (None이면 매번 토큰화)
+        self.dataset_cache_dir = dataset_cache_dir
         self.model = None
         self.tokenizer = None
+        self._model_entry: Optional[ModelEntry] = None
+        # 학습 작업 진행 상황 (get_training_status / 학습 상태 스트림)
+        self.training_monitor = TrainingMonitor()
         
         # CPU 강제 사용 (MPS 문제 완전 해결)
         self.device = torch.device("cpu")
@@ -361,12 +457,203 @@ class HarmonyTransformerService:
         logger.info("MPS 호환성 문제를 피하기 위해 CPU를 강제로 사용합니다.")
     
     def load_model(self) -> Dict[str, Any]:
-        """모델 로드"""
+        """모델 로드 (레지스트리에 이미 있으면 공유)"""
+        if self._model_entry is not None:
+            return self._model_entry.info
+        
+        entry = MODEL_REGISTRY.acquire(
+            model_key(self.model_name, self.adapter_path, self.inference_only, self.quantization),
+            self._build_model
+        )
+        self._attach(entry)
+        return entry.info
+    
+    def release_model(self) -> bool:
+        """공유 모델 참조 해제 (마지막 참조였으면 True)"""
+        entry = self._model_entry
+        if entry is None:
+            return False
+        
+        self._model_entry = None
+        self.model = None
+        self.tokenizer = None
+        self._chord_trie = None
+        self.session_cache.clear()
+        return MODEL_REGISTRY.release(entry.key)
+    
+    def _attach(self, entry: ModelEntry):
+        """레지스트리 항목의 모델/토크나이저를 이 서비스에 연결"""
+        self._model_entry = entry
+        self.model = entry.model
+        self.tokenizer = entry.tokenizer
+        self._chord_trie = None
+        self.session_cache.clear()
+    
+    def _build_model(self) -> Tuple[Any, Any, Dict[str, Any]]:
+        """레지스트리 로더: 기본 모델(+어댑터) 로드"""
+        if self.harmony_tokenizer_path:
+            return self._build_harmony_model(self.adapter_path)
+        if self.inference_only:
+            return self._build_inference_model(self.adapter_path)
+        if self.adapter_path:
+            return self._build_fine_tuned_model(self.adapter_path)
+        return self._build_base_model()
+    
+    def prepare_harmony_tokenizer(self, corpus_items: List[Any], min_count: int = 1) -> Optional[Dict[str, Any]]:
+        """harmony_tokenizer_path에 화성 토크나이저가 없으면 코퍼스에서 만들어 저장 (HF 모델이면 None)"""
+        if not self.harmony_tokenizer_path:
+            return None
+        
+        path = self.harmony_tokenizer_path
+        if os.path.exists(os.path.join(path, TOKENIZER_FILE)):
+            tokenizer = HarmonyTokenizer.from_pretrained(path)
+            built = False
+        else:
+            tokenizer = HarmonyTokenizer.build(corpus_items, min_count=min_count)
+            tokenizer.save_pretrained(path)
+            built = True
+        return {'path': path, 'vocab_size': len(tokenizer), 'built': built}
+    
+    def _build_harmony_model(self, weights_path: Optional[str] = None) -> Tuple[Any, Any, Dict[str, Any]]:
+        """화성 토크나이저 어휘에 맞춘 HarmonyTransformer 생성 (weights_path에 학습된 가중치가 있으면 로드)"""
+        path = self.harmony_tokenizer_path
+        if not os.path.exists(os.path.join(path, TOKENIZER_FILE)):
+            raise ValueError(f"화성 토크나이저가 없습니다 (prepare_harmony_tokenizer로 먼저 생성): {path}")
+        tokenizer = HarmonyTokenizer.from_pretrained(path)
+        model = HarmonyTransformer.from_tokenizer(
+            tokenizer,
+            d_model=self.config['d_model'],
+            nhead=self.config['nhead'],
+            num_layers=self.config['num_layers'],
+            dropout=self.config['dropout'],
+            max_seq_length=self.config['max_seq_length']
+        )
+        
+        weights_file = os.path.join(weights_path, "model.safetensors") if weights_path else None
+        if weights_file and os.path.exists(weights_file):
+            model.load_state_dict(load_safetensors(weights_file, device="cpu"))
+            logger.info(f"HarmonyTransformer 가중치 로드: {weights_file}")
+        model = model.to(self.device)
+        
+        logger.info(f"HarmonyTransformer 생성 (화성 토크나이저 어휘: {len(tokenizer)}개)")
+        return model, tokenizer, {
+            'model_name': 'HarmonyTransformer',
+            'harmony_tokenizer_path': path,
+            'vocab_size': len(tokenizer),
+            'device': str(self.device),
+            'total_params': sum(p.numel() for p in model.parameters()),
+            'trainable_params': sum(p.numel() for p in model.parameters() if p.requires_grad)
+        }
+    
+    def _require_generative_model(self):
+        """generate 기반 생성이 가능한 모델인지 확인"""
+        if not self.model or not self.tokenizer:
+            raise ValueError("모델과 토크나이저가 로드되지 않았습니다")
+        if isinstance(self.model, HarmonyTransformer):
+            raise ValueError("HarmonyTransformer(화성 토크나이저 모델)는 학습 전용이라 생성을 지원하지 않습니다")
+    
+    def _load_tokenizer(self, adapter_path: Optional[str] = None) -> Tuple[Any, int]:
+        """토크나이저 로드 (어댑터와 함께 저장된 토크나이저 우선, 없으면 기본 모델 + 특수 토큰)
+
+        반환값: (토크나이저, 새로 추가된 특수 토큰 수)
+        """
+        if adapter_path and (
+            os.path.exists(f"{adapter_path}/tokenizer.json") or os.path.exists(f"{adapter_path}/tokenizer_config.json")
+        ):
+            tokenizer = AutoTokenizer.from_pretrained(adapter_path)
+            num_added = 0
+        else:
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            num_added = tokenizer.add_special_tokens({
+                'pad_token': '[PAD]',
+                'sep_token': '[SEP]',
+                'additional_special_tokens': ['[HARMONY]', '[KEY]']
+            })
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        return tokenizer, num_added
+    
+    def _build_inference_model(self, adapter_path: Optional[str] = None) -> Tuple[Any, Any, Dict[str, Any]]:
+        """추론 전용 모델 로드: 어댑터를 기본 가중치에 병합하고 eval/no-grad로 고정 (실패 시 간단한 모델로 대체)"""
+        try:
+            logger.info(f"추론 전용 모델 로드 중: {self.model_name} (어댑터: {adapter_path})")
+            tokenizer, _ = self._load_tokenizer(adapter_path)
+            
+            # from_pretrained는 CPU에 바로 올리므로 별도 이동/복사가 필요 없다
+            model = AutoModelForCausalLM.from_pretrained(
+                self.model_name,
+                torch_dtype=torch.float32,
+                device_map=None,
+                trust_remote_code=True,
+                low_cpu_mem_usage=True
+            )
+            if model.get_input_embeddings().num_embeddings != len(tokenizer):
+                model.resize_token_embeddings(len(tokenizer))
+            
+            if adapter_path:
+                # LoRA 가중치를 기본 가중치에 더해 넣고 PEFT 래퍼 제거 (토큰당 추가 행렬곱 없음)
+                model = PeftModel.from_pretrained(model, adapter_path, torch_dtype=torch.float32)
+                model = model.merge_and_unload()
+        except Exception as e:
+            logger.error(f"추론 전용 모델 로드 실패: {e}")
+            # 대안: 더 간단한 모델 사용 (어댑터는 model_name 기준으로 학습되어 적용하지 않음)
+            logger.info("대안 모델 로드 시도...")
+            return self._build_simple_inference_model()
+        
+        return self._finish_inference_model(model, tokenizer, {
+            'model_name': self.model_name,
+            'adapter_path': adapter_path,
+            'adapter_merged': bool(adapter_path)
+        })
+    
+    def _build_simple_inference_model(self) -> Tuple[Any, Any, Dict[str, Any]]:
+        """간단한 모델을 추론 전용으로 로드 (대안, 어댑터 없음)"""
+        logger.info(f"간단한 모델 로드 시도: {SIMPLE_MODEL_NAME}")
+        tokenizer = AutoTokenizer.from_pretrained(SIMPLE_MODEL_NAME)
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        
+        model = AutoModelForCausalLM.from_pretrained(
+            SIMPLE_MODEL_NAME,
+            torch_dtype=torch.float32,
+            device_map=None,
+            trust_remote_code=True,
+            low_cpu_mem_usage=True
+        )
+        return self._finish_inference_model(model, tokenizer, {
+            'model_name': SIMPLE_MODEL_NAME,
+            'adapter_path': None,
+            'adapter_merged': False,
+            'note': '간단한 모델로 대체됨 (어댑터 미적용)'
+        })
+    
+    def _finish_inference_model(self, model: Any, tokenizer: Any, info: Dict[str, Any]) -> Tuple[Any, Any, Dict[str, Any]]:
+        """eval/no-grad 고정과 양자화를 적용하고 레지스트리용 모델 정보를 만든다"""
+        model.eval()
+        model.requires_grad_(False)
+        
+        if self.quantization:
+            model = quantize_model(model, self.quantization)
+            logger.info(f"추론 전용 모델에 {self.quantization} 정밀도 적용")
+        
+        logger.info("추론 전용 모델 로드 완료")
+        return model, tokenizer, {
+            **info,
+            'device': str(self.device),
+            'inference_only': True,
+            'quantization': self.quantization,
+            'precision': describe_precision(model),
+            'total_params': sum(p.numel() for p in model.parameters()),
+            'trainable_params': 0
+        }
+    
+    def _build_base_model(self) -> Tuple[Any, Any, Dict[str, Any]]:
+        """기본 모델 + 새 LoRA 어댑터 로드 (실패 시 간단한 모델로 대체)"""
         try:
             logger.info(f"모델 로드 중: {self.model_name}")
             
             # 토크나이저 로드
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
             
             # 특수 토큰 추가
             special_tokens = {
@@ -376,11 +663,11 @@ class HarmonyTransformerService:
             }
             
             # 특수 토큰 추가
-            num_added = self.tokenizer.add_special_tokens(special_tokens)
+            num_added = tokenizer.add_special_tokens(special_tokens)
             logger.info(f"추가된 특수 토큰 수: {num_added}")
             
             # 기본 모델 로드 (CPU 강제 사용)
-            self.model = AutoModelForCausalLM.from_pretrained(
+            model = AutoModelForCausalLM.from_pretrained(
                 self.model_name,
                 torch_dtype=torch.float32,
                 device_map=None,  # CPU 강제 사용
@@ -390,15 +677,11 @@ class HarmonyTransformerService:
             
             # 토크나이저 크기 변경에 맞춰 모델 임베딩 레이어 크기 조정
             if num_added > 0:
-                self.model.resize_token_embeddings(len(self.tokenizer))
+                model.resize_token_embeddings(len(tokenizer))
             
             # CPU로 강제 이동 및 확인
-            self.model = self.model.to(self.device)
-            logger.info(f"모델이 {self.device}에 로드되었습니다: {self.model.device}")
-            
-            # 모든 모듈을 CPU로 강제 이동
-            for param in self.model.parameters():
-                param.data = param.data.to(self.device)
+            model = model.to(self.device)
+            logger.info(f"모델이 {self.device}에 로드되었습니다: {model.device}")
             
             # LoRA 설정
             lora_config = LoraConfig(
@@ -411,45 +694,41 @@ class HarmonyTransformerService:
             )
             
             # PEFT 모델로 변환
-            self.model = get_peft_model(self.model, lora_config)
+            model = get_peft_model(model, lora_config)
             
             # PEFT 모델도 CPU로 이동
-            self.model = self.model.to(self.device)
-            
-            # 모든 PEFT 파라미터도 CPU로 강제 이동
-            for param in self.model.parameters():
-                param.data = param.data.to(self.device)
+            model = model.to(self.device)
             
-            logger.info(f"PEFT 모델이 {self.device}에 로드되었습니다: {self.model.device}")
+            logger.info(f"PEFT 모델이 {self.device}에 로드되었습니다: {model.device}")
             
             logger.info("모델 로드 완료")
             
-            return {
+            return model, tokenizer, {
                 'model_name': self.model_name,
                 'device': str(self.device),
                 'lora_config': lora_config,
-                'total_params': sum(p.numel() for p in self.model.parameters()),
-                'trainable_params': sum(p.numel() for p in self.model.parameters() if p.requires_grad)
+                'total_params': sum(p.numel() for p in model.parameters()),
+                'trainable_params': sum(p.numel() for p in model.parameters() if p.requires_grad)
             }
             
         except Exception as e:
             logger.error(f"모델 로드 실패: {e}")
             # 대안: 더 간단한 모델 사용
             logger.info("대안 모델 로드 시도...")
-            return self._load_simple_model()
+            return self._build_simple_model()
     
-    def _load_simple_model(self) -> Dict[str, Any]:
+    def _build_simple_model(self) -> Tuple[Any, Any, Dict[str, Any]]:
         """간단한 모델 로드 (대안)"""
         try:
             # 더 간단한 모델 사용
-            simple_model_name = "distilgpt2"
+            simple_model_name = SIMPLE_MODEL_NAME
             logger.info(f"간단한 모델 로드 시도: {simple_model_name}")
             
-            self.tokenizer = AutoTokenizer.from_pretrained(simple_model_name)
-            if self.tokenizer.pad_token is None:
-                self.tokenizer.pad_token = self.tokenizer.eos_token
+            tokenizer = AutoTokenizer.from_pretrained(simple_model_name)
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
             
-            self.model = AutoModelForCausalLM.from_pretrained(
+            model = AutoModelForCausalLM.from_pretrained(
                 simple_model_name,
                 torch_dtype=torch.float32,
                 device_map=None,  # CPU 강제 사용
@@ -458,12 +737,8 @@ class HarmonyTransformerService:
             )
             
             # CPU로 강제 이동 및 확인
-            self.model = self.model.to(self.device)
-            logger.info(f"간단한 모델이 {self.device}에 로드되었습니다: {self.model.device}")
-            
-            # 모든 모듈을 CPU로 강제 이동
-            for param in self.model.parameters():
-                param.data = param.data.to(self.device)
+            model = model.to(self.device)
+            logger.info(f"간단한 모델이 {self.device}에 로드되었습니다: {model.device}")
             
             # LoRA 설정
             lora_config = LoraConfig(
@@ -476,25 +751,21 @@ class HarmonyTransformerService:
             )
             
             # PEFT 모델로 변환
-            self.model = get_peft_model(self.model, lora_config)
+            model = get_peft_model(model, lora_config)
             
             # PEFT 모델도 CPU로 이동
-            self.model = self.model.to(self.device)
+            model = model.to(self.device)
             
-            # 모든 PEFT 파라미터도 CPU로 강제 이동
-            for param in self.model.parameters():
-                param.data = param.data.to(self.device)
-            
-            logger.info(f"간단한 PEFT 모델이 {self.device}에 로드되었습니다: {self.model.device}")
+            logger.info(f"간단한 PEFT 모델이 {self.device}에 로드되었습니다: {model.device}")
             
             logger.info("간단한 모델 로드 완료")
             
-            return {
+            return model, tokenizer, {
                 'model_name': simple_model_name,
                 'device': str(self.device),
                 'lora_config': lora_config,
-                'total_params': sum(p.numel() for p in self.model.parameters()),
-                'trainable_params': sum(p.numel() for p in self.model.parameters() if p.requires_grad),
+                'total_params': sum(p.numel() for p in model.parameters()),
+                'trainable_params': sum(p.numel() for p in model.parameters() if p.requires_grad),
                 'note': '간단한 모델로 대체됨'
             }
             
@@ -512,52 +783,104 @@ class HarmonyTransformerService:
             'device': str(self.device),
             'total_params': sum(p.numel() for p in self.model.parameters()),
             'trainable_params': sum(p.numel() for p in self.model.parameters() if p.requires_grad),
-            'model_type': 'Harmony Transformer (LoRA)'
+            'model_type': 'Harmony Transformer (LoRA 병합)' if self.inference_only else 'Harmony Transformer (LoRA)',
+            'adapter_path': self.adapter_path,
+            'inference_only': self.inference_only,
+            'quantization': self.quantization,
+            'shared_references': self._model_entry.references if self._model_entry else 0
         }
     
-    def prepare_training_data(self, corpus_items: List[Any]) -> Dict[str, Any]:
-        """학습 데이터 준비"""
+    def prepare_training_data(
+        self,
+        corpus_items: List[Any],
+        packing: bool = False,
+        overlap: int = 0
+    ) -> Dict[str, Any]:
+        """학습 데이터 준비
+
+        dataset_cache_dir가 설정되어 있으면 토큰화 결과를 코퍼스 버전 + 토크나이저 해시 기준으로
+        메모리 매핑 샤드에 저장해 두고, 같은 코퍼스/토크나이저로 다시 준비할 때는 그대로 연다.
+        예시는 max_length로 자르기만 하고 패딩하지 않는다 (start_training의 콜레이터가 배치별로 패딩).
+        packing=True이면 악장 전체를 자르지 않고 토큰화한 뒤 max_length 크기 블록으로 다시 묶는다
+        (긴 악장은 overlap 토큰씩 겹치는 창으로 나누고, 짧은 곡은 이어 붙이되 조각별 position_ids로
+        서로 참조하지 않게 함).
+        """
         try:
             if not self.tokenizer:
                 raise ValueError("토크나이저가 로드되지 않았습니다")
             
             logger.info(f"학습 데이터 준비 중: {len(corpus_items)}개 아이템")
+            max_length = self.config['max_seq_length']
+            # 패킹할 때는 창으로 나눌 수 있도록 자르지 않은 시퀀스를 토큰화
+            encode_length = None if packing else max_length
+            cache_key = None
+            
+            if self.dataset_cache_dir:
+                cache = TokenizedCorpusCache(self.dataset_cache_dir)
+                tokenized_dataset = cache.get_or_build(
+                    corpus_items,
+                    self.tokenizer,
+                    encode_length,
+                    lambda items: self._encode_corpus(items, encode_length),
+                    pad_token_id=self.tokenizer.pad_token_id
+                )
+                cache_key = tokenized_dataset.manifest['key']
+            else:
+                # 데이터셋 생성
+                dataset = HarmonyDataset(corpus_items, self.tokenizer)
+                
+                if len(dataset) == 0:
+                    raise ValueError("처리 가능한 데이터가 없습니다")
+                
+                # HuggingFace 데이터셋으로 변환
+                hf_dataset = HFDataset.from_list([
+                    {
+                        'text': item['text'],
+                        'harmony_sequence': item['harmony_sequence']
+                    }
+                    for item in dataset.processed_data
+                ])
+                
+                # 토크나이징 (패딩은 배치 단위로 콜레이터에서)
+                def tokenize_function(examples):
+                    return self.tokenizer(
+                        examples['text'],
+                        truncation=encode_length is not None,
+                        max_length=encode_length
+                    )
+                
+                tokenized_dataset = hf_dataset.map(tokenize_function, batched=True)
+                
+                # 학습에 필요한 필드만 유지하고 나머지는 제거
+                tokenized_dataset = tokenized_dataset.remove_columns(['text', 'harmony_sequence'])
             
-            # 데이터셋 생성
-            dataset = HarmonyDataset(corpus_items, self.tokenizer)
-            
-            if len(dataset) == 0:
+            if len(tokenized_dataset) == 0:
                 raise ValueError("처리 가능한 데이터가 없습니다")
             
-            # HuggingFace 데이터셋으로 변환
-            hf_dataset = HFDataset.from_list([
-                {
-                    'text': item['text'],
-                    'harmony_sequence': item['harmony_sequence']
-                }
-                for item in dataset.processed_data
-            ])
-            
-            # 토크나이징
-            def tokenize_function(examples):
-                return self.tokenizer(
-                    examples['text'],
-                    truncation=True,
-                    padding='max_length',
-                    max_length=self.config['max_seq_length']
+            packing_stats = None
+            if packing:
+                # 조각끼리는 position_ids로 분리되고, 화성 토크나이저 시퀀스는 이미 <END>로 끝나므로 구분자를 넣지 않음
+                separator_id = None if isinstance(self.tokenizer, HarmonyTokenizer) else self.tokenizer.eos_token_id
+                tokenized_dataset = PackedSequenceDataset(
+                    tokenized_dataset,
+                    max_length,
+                    overlap=overlap,
+                    separator_id=separator_id
+                )
+                packing_stats = tokenized_dataset.stats()
+                logger.info(
+                    f"시퀀스 패킹: {packing_stats['source_examples']}개 악장 → {packing_stats['blocks']}개 블록 "
+                    f"(채움 비율 {packing_stats['fill_ratio']:.1%}, 겹치는 창 {packing_stats['overlapping_windows']}개)"
                 )
-            
-            tokenized_dataset = hf_dataset.map(tokenize_function, batched=True)
-            
-            # 학습에 필요한 필드만 유지하고 나머지는 제거
-            tokenized_dataset = tokenized_dataset.remove_columns(['text', 'harmony_sequence'])
             
             logger.info(f"학습 데이터 준비 완료: {len(tokenized_dataset)}개 예시")
-            
+            sample = tokenized_dataset[0]
             return {
                 'total_examples': len(tokenized_dataset),
-                'features': list(tokenized_dataset.features.keys()),
-                'sample_data': tokenized_dataset[0] if len(tokenized_dataset) > 0 else None,
+                'features': list(sample.keys()),
+                'sample_data': {key: value.tolist() if hasattr(value, 'tolist') else value for key, value in sample.items()},
+                'cache_key': cache_key,
+                'packing': packing_stats,
                 'dataset': tokenized_dataset
             }
             
@@ -565,22 +888,62 @@ class HarmonyTransformerService:
             logger.error(f"학습 데이터 준비 실패: {e}")
             raise
     
-    def start_training(self, training_data: Dict[str, Any], output_dir: str = None):
-        """모델 파인튜닝 시작 (최적화된 버전)"""
+    def _encode_corpus(self, corpus_items: List[Any], max_length: Optional[int], batch_size: int = 256):
+        """코퍼스 아이템을 패딩 없는 토큰 ID 시퀀스로 차례로 인코딩 (캐시 생성용, max_length가 없으면 자르지 않음)"""
+        dataset = HarmonyDataset(corpus_items, self.tokenizer, max_length=max_length)
+        if isinstance(self.tokenizer, HarmonyTokenizer):
+            for item in dataset.processed_data:
+                yield self.tokenizer.encode_harmony(item['harmony_sequence'])[:max_length]
+            return
+        
+        for start in range(0, len(dataset.processed_data), batch_size):
+            texts = [item['text'] for item in dataset.processed_data[start:start + batch_size]]
+            yield from self.tokenizer(texts, truncation=max_length is not None, max_length=max_length)['input_ids']
+    
+    def start_training(
+        self,
+        training_data: Dict[str, Any],
+        output_dir: str = None,
+        length_bucketing: bool = True,
+        profile: Optional[TrainingProfile] = None
+    ):
+        """모델 파인튜닝 시작 (최적화된 버전)
+
+        배치는 배치 안의 최대 길이까지만 패딩하고(DynamicPaddingCollator), length_bucketing=True이면
+        길이가 비슷한 예시끼리 배치를 묶어(LengthBucketSampler) 패딩 토큰 연산을 줄인다.
+        profile(TrainingProfile)의 배치 크기/에포크/학습률, DataLoader 워커, torch 스레드 수를 쓰며
+        스레드 수는 학습이 끝나면 원래대로 되돌린다.
+
+        torchrun으로 실행하면 DDP(profile.ddp_backend, 기본 gloo)로 학습한다. 모든 rank가
+        rank 0의 output_dir을 쓰고, 체크포인트/모델/토크나이저 저장은 rank 0만 한다.
+
+        진행 상황은 training_monitor에 기록된다. 호출 전에 training_monitor.begin()으로 작업을
+        시작해 두지 않았으면 여기서 시작한다.
+        """
+        if not self.training_monitor.is_running():
+            self.training_monitor.begin()
         try:
             if not self.model or not self.tokenizer:
                 raise ValueError("모델과 토크나이저가 로드되지 않았습니다")
             
+            if self.inference_only:
+                raise ValueError("추론 전용 모드로 로드된 모델은 학습할 수 없습니다")
+            
             if not training_data.get('dataset'):
                 raise ValueError("학습 데이터가 준비되지 않았습니다")
             
-            # 출력 디렉토리 설정
+            profile = profile or TrainingProfile()
+            distributed = init_distributed(profile.ddp_backend)
+            world_size = distributed_env()['world_size']
+            
+            # 출력 디렉토리 설정 (분산 학습이면 rank 0 기준으로 통일)
             if not output_dir:
                 output_dir = f"models/harmony_transformer_finetuned_{int(time.time())}"
+            output_dir = broadcast_object(output_dir)
             
             os.makedirs(output_dir, exist_ok=True)
             
-            # 데이터셋 크기에 따른 동적 설정
+            # 데이터셋 크기에 따른 동적 설정 (프로필에 지정된 값이 우선)
             dataset_size = len(training_data['dataset'])
             
             # 에포크 수 계산 (데이터셋 크기에 따라 조정)
@@ -599,6 +962,8 @@ class HarmonyTransformerService:
                 batch_size = 8
                 warmup_steps = 50
                 save_steps = 100
+            num_epochs = profile.epochs or num_epochs
+            batch_size = profile.batch_size or batch_size
             
             # 학습 인수 설정 (최적화된 설정)
             training_args = TrainingArguments(
@@ -606,65 +971,102 @@ class HarmonyTransformerService:
                 num_train_epochs=num_epochs,
                 per_device_train_batch_size=batch_size,
                 per_device_eval_batch_size=batch_size,
+                gradient_accumulation_steps=profile.gradient_accumulation_steps,
                 warmup_steps=warmup_steps,
                 weight_decay=0.01,
-                learning_rate=2e-4,  # 더 낮은 학습률로 안정적인 학습
+                learning_rate=profile.learning_rate,
                 lr_scheduler_type="cosine",  # 코사인 스케줄러
-                logging_dir=f"{output_dir}/logs",
                 logging_steps=max(1, warmup_steps // 5),
                 save_steps=save_steps,
                 save_total_limit=3,  # 최대 3개 체크포인트 유지
-                dataloader_pin_memory=False,
                 remove_unused_columns=False,
-                report_to=None,  # Weights & Biases 비활성화
+                report_to="none",  # Weights & Biases 등 외부 로깅 비활성화
                 # 그라디언트 클리핑
                 max_grad_norm=1.0,
                 # 혼합 정밀도 학습 비활성화 (CPU 사용 시)
                 fp16=False,
-                dataloader_num_workers=0  # macOS에서 안정성을 위해
+                # CPU 학습 (torchrun 실행 시 accelerate가 MULTI_CPU/gloo DDP로 설정)
+                use_cpu=True,
+                # DataLoader 워커/프리페치 (CPU 학습이므로 pin_memory 없음)
+                **profile.dataloader_arguments(),
+                # torchrun 분산 학습. LoRA 모델은 어댑터 외 가중치가 고정이라 미사용 파라미터 탐색을 생략하고,
+                # HarmonyTransformer는 손실에 쓰이지 않는 화성/조성 임베딩·분류기가 있어 탐색이 필요하다
+                ddp_backend=profile.ddp_backend if distributed else None,
+                ddp_find_unused_parameters=isinstance(self.model, HarmonyTransformer) if distributed else None,
+                # 진행 상황의 tokens/sec용 (패딩 제외, 모든 rank 합계)
+                include_num_input_tokens_seen="non_padding"
             )
             
-            # 데이터 콜레이터
-            data_collator = DataCollatorForLanguageModeling(
-                tokenizer=self.tokenizer,
-                mlm=False  # Causal Language Modeling
+            # 패킹 블록은 attention_mask 없이 position_ids로 조각 경계를 전달하므로, 조각별 마스크가
+            # 적용되도록 학습 중에는 KV 캐시를 끈다 (캐시가 있으면 transformers가 패킹을 감지하지 않음)
+            model_config = getattr(self.model, 'config', None)
+            previous_use_cache = getattr(model_config, 'use_cache', None)
+            if previous_use_cache is not None:
+                model_config.use_cache = False
+            
+            # 데이터 콜레이터 (Causal LM, 배치 최대 길이까지만 패딩)
+            data_collator = DynamicPaddingCollator(
+                self.tokenizer.pad_token_id,
+                padding_side=getattr(self.tokenizer, 'padding_side', 'right')
             )
             
             # 트레이너 생성
-            trainer = Trainer(
+            trainer_class = LengthBucketTrainer if length_bucketing else Trainer
+            trainer = trainer_class(
                 model=self.model,
                 args=training_args,
                 train_dataset=training_data['dataset'],
                 data_collator=data_collator,
-                tokenizer=self.tokenizer
+                processing_class=self.tokenizer,
+                callbacks=[TrainingProgressCallback(self.training_monitor)]
             )
             
             # 학습 시작
-            logger.info(f"모델 파인튜닝 시작 (에포크: {num_epochs}, 배치 크기: {batch_size})")
+            logger.info(
+                f"모델 파인튜닝 시작 (에포크: {num_epochs}, 배치 크기: {batch_size}, "
+                f"길이 버킷: {'사용' if length_bucketing else '사용 안 함'}, "
+                f"워커: {profile.dataloader_workers}, 스레드: {profile.torch_threads or torch.get_num_threads()}, "
+                f"프로세스: {world_size}, 그라디언트 누적: {profile.gradient_accumulation_steps})"
+            )
             start_time = time.time()
             
-            train_result = trainer.train()
+            previous_threads = profile.apply_threads()
+            try:
+                train_result = trainer.train()
+            finally:
+                profile.restore_threads(previous_threads)
+                if previous_use_cache is not None:
+                    model_config.use_cache = previous_use_cache
             
             end_time = time.time()
             training_duration = end_time - start_time
             
-            # 모델 저장
+            # 모델 저장 (save_model은 rank 0만 기록)
             trainer.save_model()
-            self.tokenizer.save_pretrained(output_dir)
+            if trainer.is_world_process_zero():
+                self.tokenizer.save_pretrained(output_dir)
+            trainer.accelerator.wait_for_everyone()
             
             # 학습 완료 후 모델을 CPU로 강제 이동
             self.ensure_model_on_cpu()
             
             # 학습 요약 생성
             training_summary = {
-                "dataset_size": len(training_data),
+                "dataset_size": dataset_size,
                 "epochs": training_args.num_train_epochs,
                 "batch_size": training_args.per_device_train_batch_size,
+                "global_batch_size": batch_size * world_size * profile.gradient_accumulation_steps,
+                "world_size": world_size,
                 "training_time": train_result.metrics.get("train_runtime", 0),
-                "final_loss": train_result.metrics.get("train_loss", 0)
+                "samples_per_second": train_result.metrics.get("train_samples_per_second", 0),
+                "final_loss": train_result.metrics.get("train_loss", 0),
+                "length_bucketing": length_bucketing,
+                "learning_rate": training_args.learning_rate,
+                "runtime": profile.describe()
             }
             
             logger.info("모델 파인튜닝 완료!")
+            self.training_monitor.finish(training_summary)
             return {
                 'success': True,
                 'output_dir': output_dir,
@@ -673,62 +1075,257 @@ class HarmonyTransformerService:
             
         except Exception as e:
             logger.error(f"모델 파인튜닝 실패: {e}")
+            self.training_monitor.fail(str(e))
             raise
     
+    def set_chord_vocabulary(self, chords: List[str]) -> int:
+        """제약 디코딩에 쓸 화음 어휘 설정 (트라이는 다음 제약 생성 때 현재 토크나이저로 만든다)"""
+        self.chord_vocabulary = list(chords)
+        self._chord_trie = None
+        return len(self.chord_vocabulary)
+    
+    def _get_chord_trie(self) -> ChordTrie:
+        """화음 어휘 트라이 (토크나이저가 바뀌면 다시 만든다)"""
+        if not self.chord_vocabulary:
+            raise ValueError("제약 디코딩용 화음 어휘가 설정되지 않았습니다")
+        trie = self._chord_trie
+        if trie is None or trie.tokenizer is not self.tokenizer:
+            trie = ChordTrie(self.tokenizer, self.chord_vocabulary)
+            if not len(trie):
+                raise ValueError("토크나이저로 표현할 수 있는 화음이 없습니다")
+            logger.info(f"화음 트라이 생성: {len(trie)}개 화음, 최대 {trie.depth}토큰")
+            self._chord_trie = trie
+        return trie
+    
     def generate_harmony_suggestions(
         self, 
         context: str, 
         style: str = "classical", 
-        length: int = 4
+        length: int = 4,
+        constrained: bool = False
     ) -> List[Dict[str, Any]]:
         """화성 진행 제안 생성"""
         try:
-            if not self.model or not self.tokenizer:
-                raise ValueError("모델과 토크나이저가 로드되지 않았습니다")
-            
-            # 컨텍스트 토크나이징
-            inputs = self.tokenizer(
-                context,
-                return_tensors="pt",
-                truncation=True,
-                max_length=self.config['max_seq_length'] - length
+            return self.generate_harmony_suggestions_batch([(context, style)], length, constrained=constrained)[0]
+        except Exception as e:
+            logger.error(f"화성 진행 제안 생성 실패: {e}")
+            raise
+    
+    def generate_harmony_suggestions_batch(
+        self,
+        requests: List[Tuple[str, str]],
+        length: int = 4,
+        num_return_sequences: int = 3,
+        constrained: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """여러 (컨텍스트, 스타일) 요청의 화성 진행 제안을 한 번의 generate로 생성
+
+        컨텍스트는 왼쪽 패딩으로 길이를 맞추며, 결과는 요청 순서대로 반환한다.
+        constrained=True이면 length는 토큰 수가 아니라 화음(마디) 수이며, 생성은
+        화음 어휘 트라이로 제한된다 (_generate_constrained 참고).
+        """
+        self._require_generative_model()
+        if constrained:
+            return self._generate_constrained(requests, length, num_return_sequences)
+        
+        contexts = [context for context, _ in requests]
+        
+        # 컨텍스트 토크나이징 (생성은 오른쪽 끝에서 이어지므로 왼쪽 패딩)
+        inputs = self.tokenizer(
+            contexts,
+            return_tensors="pt",
+            padding=True,
+            padding_side="left",
+            truncation=True,
+            max_length=self.config['max_seq_length'] - length
+        )
+        
+        # 모델과 같은 디바이스로 이동
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        
+        # 생성
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=length,
+                num_return_sequences=num_return_sequences,
+                do_sample=True,
+                temperature=0.8,
+                top_p=0.9,
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id
             )
-            
-            # 모델과 같은 디바이스로 이동
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
-            # 생성
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_length=inputs['input_ids'].shape[1] + length,
-                    num_return_sequences=3,
-                    do_sample=True,
-                    temperature=0.8,
-                    top_p=0.9,
-                    pad_token_id=self.tokenizer.pad_token_id,
-                    eos_token_id=self.tokenizer.eos_token_id
-                )
-            
-            # 결과 디코딩
+        
+        # 결과 디코딩 (출력은 요청별로 num_return_sequences개씩 연속)
+        generated_texts = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        results = []
+        for index, (context, style) in enumerate(requests):
+            start = index * num_return_sequences
+            results.append(self._texts_to_suggestions(
+                generated_texts[start:start + num_return_sequences], context, style, length
+            ))
+        
+        return results
+    
+    def _generate_constrained(
+        self,
+        requests: List[Tuple[str, str]],
+        length: int,
+        num_return_sequences: int
+    ) -> List[List[Dict[str, Any]]]:
+        """화음 어휘 트라이로 제한한 생성: 마디마다 " | m<번호>" 구분자와 어휘에 있는 화음만 허용
+
+        자유 텍스트 생성과 달리 모든 단계가 쓸 수 있는 화음이 되고, length개의 화음이
+        완성되면 EOS로 멈추므로 잘린 화음이나 화음이 아닌 출력에 토큰을 쓰지 않는다.
+        """
+        trie = self._get_chord_trie()
+        contexts = [context.strip() for context, _ in requests]
+        
+        # 요청별 마디 번호와 구분자 토큰 (출력 행은 요청마다 num_return_sequences개씩 연속)
+        start_measures = [next_measure(context) for context in contexts]
+        request_prefixes = [
+            [
+                trie.encode(f"{' | ' if context or offset else ''}m{start + offset}")
+                for offset in range(length)
+            ]
+            for context, start in zip(contexts, start_measures)
+        ]
+        row_prefixes = [prefixes for prefixes in request_prefixes for _ in range(num_return_sequences)]
+        max_new_tokens = max(sum(len(prefix) for prefix in prefixes) for prefixes in request_prefixes) + length * trie.depth
+        
+        inputs = self.tokenizer(
+            contexts,
+            return_tensors="pt",
+            padding=True,
+            padding_side="left",
+            truncation=True,
+            max_length=max(1, self.config['max_seq_length'] - max_new_tokens)
+        )
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        processor = ChordConstraintProcessor(
+            trie, inputs['input_ids'].shape[1], row_prefixes, self.tokenizer.eos_token_id
+        )
+        
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                num_return_sequences=num_return_sequences,
+                do_sample=True,
+                temperature=0.8,
+                top_p=0.9,
+                logits_processor=LogitsProcessorList([processor]),
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id
+            )
+        
+        # 프로세서가 추적한 화음을 그대로 사용 (텍스트를 다시 나눌 필요 없음)
+        row_chords = processor.finalize(outputs)
+        results = []
+        for index, (_, style) in enumerate(requests):
             suggestions = []
-            for output in outputs:
-                generated_text = self.tokenizer.decode(output, skip_special_tokens=True)
-                suggestion_text = generated_text[len(context):].strip()
-                
-                if suggestion_text:
+            for chords in row_chords[index * num_return_sequences:(index + 1) * num_return_sequences]:
+                if chords:
                     suggestions.append({
-                        'progression': suggestion_text.split(' | '),
+                        'progression': chords,
+                        'measures': list(range(start_measures[index], start_measures[index] + len(chords))),
                         'confidence': 0.8,
                         'style': style,
-                        'explanation': f"{style} 스타일의 {length}마디 화성 진행"
+                        'constrained': True,
+                        'explanation': f"{style} 스타일의 {len(chords)}마디 화성 진행"
                     })
-            
-            return suggestions
-            
-        except Exception as e:
-            logger.error(f"화성 진행 제안 생성 실패: {e}")
-            raise
+            results.append(suggestions)
+        
+        return results
+    
+    def continue_harmony_suggestions(
+        self,
+        session_id: str,
+        context: str,
+        style: str = "classical",
+        length: int = 4,
+        num_return_sequences: int = 3
+    ) -> Dict[str, Any]:
+        """세션의 이전 컨텍스트를 이어 쓰는 화성 진행 제안 (공통 프리픽스의 KV 캐시 재사용)
+
+        컨텍스트 마지막 토큰 직전까지의 past_key_values를 세션 캐시에 보관하므로,
+        직전 요청의 컨텍스트에 마디를 덧붙인 요청은 새 토큰만 인코딩한다.
+        """
+        self._require_generative_model()
+        
+        input_ids = self.tokenizer(
+            context,
+            return_tensors="pt",
+            truncation=True,
+            max_length=self.config['max_seq_length'] - length
+        )['input_ids'].to(self.device)
+        token_ids = input_ids[0].tolist()
+        if not token_ids:
+            raise ValueError("컨텍스트가 비어 있습니다")
+        
+        # 마지막 토큰은 generate가 직접 처리하므로 그 앞까지를 프리픽스로 캐시
+        prefix_ids = token_ids[:-1]
+        reused, past_key_values = self.session_cache.lookup(session_id, prefix_ids)
+        if past_key_values is None:
+            past_key_values = DynamicCache(config=self.model.config)
+        
+        with torch.inference_mode():
+            if reused < len(prefix_ids):
+                outputs = self.model(
+                    input_ids=input_ids[:, reused:len(prefix_ids)],
+                    past_key_values=past_key_values,
+                    use_cache=True
+                )
+                past_key_values = outputs.past_key_values
+            # 늘린 캐시를 세션에 다시 넣고, generate가 변형할 복사본만 따로 만든다
+            self.session_cache.store(session_id, prefix_ids, past_key_values)
+            generation_cache = copy.deepcopy(past_key_values)
+            generation_cache.batch_repeat_interleave(num_return_sequences)
+            generated = self.model.generate(
+                input_ids=input_ids.repeat(num_return_sequences, 1),
+                attention_mask=torch.ones(num_return_sequences, len(token_ids), dtype=torch.long, device=self.device),
+                past_key_values=generation_cache,
+                max_new_tokens=length,
+                do_sample=True,
+                temperature=0.8,
+                top_p=0.9,
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id
+            )
+        
+        generated_texts = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+        return {
+            'session_id': session_id,
+            'suggestions': self._texts_to_suggestions(generated_texts, context, style, length),
+            'context_tokens': len(token_ids),
+            'reused_tokens': reused,
+            'encoded_tokens': len(token_ids) - reused
+        }
+    
+    def end_session(self, session_id: str) -> bool:
+        """세션 캐시 해제"""
+        return self.session_cache.drop(session_id)
+    
+    def _texts_to_suggestions(
+        self,
+        generated_texts: List[str],
+        context: str,
+        style: str,
+        length: int
+    ) -> List[Dict[str, Any]]:
+        """생성된 전체 텍스트에서 컨텍스트 뒤 부분을 화성 진행 제안으로 변환"""
+        suggestions = []
+        for generated_text in generated_texts:
+            suggestion_text = generated_text[len(context):].strip()
+            
+            if suggestion_text:
+                suggestions.append({
+                    'progression': suggestion_text.split(' | '),
+                    'confidence': 0.8,
+                    'style': style,
+                    'explanation': f"{style} 스타일의 {length}마디 화성 진행"
+                })
+        return suggestions
     
     def analyze_harmony_progression(self, progression: str) -> Dict[str, Any]:
         """화성 진행 분석"""
@@ -844,8 +1441,11 @@ class HarmonyTransformerService:
             # 디렉토리 생성
             os.makedirs(output_dir, exist_ok=True)
             
-            # 모델 저장
-            self.model.save_pretrained(output_dir)
+            # 모델 저장 (HarmonyTransformer는 HF 모델이 아니므로 가중치만 safetensors로)
+            if isinstance(self.model, HarmonyTransformer):
+                save_safetensors(self.model.state_dict(), os.path.join(output_dir, "model.safetensors"))
+            else:
+                self.model.save_pretrained(output_dir)
             self.tokenizer.save_pretrained(output_dir)
             
             # 설정 정보 저장
@@ -869,24 +1469,26 @@ class HarmonyTransformerService:
             return ""
     
     def load_fine_tuned_model(self, model_path: str) -> bool:
-        """파인튜닝된 모델 로드"""
+        """파인튜닝된 모델 로드 (같은 어댑터를 쓰는 서비스와 공유)"""
         try:
             if not os.path.exists(model_path):
                 raise ValueError(f"모델 경로가 존재하지 않습니다: {model_path}")
             
             logger.info(f"파인튜닝된 모델 로드 중: {model_path}")
             
-            # 모델 로드
-            self.model = PeftModel.from_pretrained(
-                self.model,
-                model_path,
-                torch_dtype=torch.float32,
-                device_map=self.device
+            if self.inference_only:
+                loader = lambda: self._build_inference_model(model_path)
+            else:
+                loader = lambda: self._build_fine_tuned_model(model_path)
+            entry = MODEL_REGISTRY.acquire(
+                model_key(self.model_name, model_path, self.inference_only, self.quantization),
+                loader
             )
             
-            # 토크나이저 로드
-            if os.path.exists(f"{model_path}/tokenizer.json"):
-                self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+            # 기존 모델 참조는 새 모델을 얻은 뒤에 해제
+            self.release_model()
+            self.adapter_path = model_path
+            self._attach(entry)
             
             logger.info("파인튜닝된 모델 로드 완료")
             return True
@@ -895,6 +1497,31 @@ class HarmonyTransformerService:
             logger.error(f"파인튜닝된 모델 로드 실패: {e}")
             return False
     
+    def _build_fine_tuned_model(self, model_path: str) -> Tuple[Any, Any, Dict[str, Any]]:
+        """기본 모델에 저장된 LoRA 어댑터를 얹어 로드"""
+        tokenizer, _ = self._load_tokenizer(model_path)
+        
+        model = AutoModelForCausalLM.from_pretrained(
+            self.model_name,
+            torch_dtype=torch.float32,
+            device_map=None,  # CPU 강제 사용
+            trust_remote_code=True,
+            low_cpu_mem_usage=True
+        )
+        if model.get_input_embeddings().num_embeddings != len(tokenizer):
+            model.resize_token_embeddings(len(tokenizer))
+        
+        model = PeftModel.from_pretrained(model, model_path, torch_dtype=torch.float32)
+        model = model.to(self.device)
+        
+        return model, tokenizer, {
+            'model_name': self.model_name,
+            'adapter_path': model_path,
+            'device': str(self.device),
+            'total_params': sum(p.numel() for p in model.parameters()),
+            'trainable_params': sum(p.numel() for p in model.parameters() if p.requires_grad)
+        }
+    
     def get_available_models(self) -> List[Dict[str, Any]]:
         """사용 가능한 모델 목록"""
         models_dir = Path("models")
@@ -916,15 +1543,8 @@ class HarmonyTransformerService:
         return available_models
     
     def get_training_status(self) -> Dict[str, Any]:
-        """학습 상태 반환"""
-        # 실제 구현에서는 학습 진행 상황을 추적해야 함
-        return {
-            'status': 'idle',
-            'current_epoch': 0,
-            'total_epochs': 0,
-            'loss': 0.0,
-            'progress': 0.0
-        }
+        """학습 상태 반환 (상태, 스텝/에포크, 손실, tokens/sec, ETA, 메모리)"""
+        return self.training_monitor.snapshot()
     
     def batch_analysis(self, corpus_items: List[Any] = None):
         """배치 화성 분석"""
@@ -998,14 +1618,11 @@ class HarmonyTransformerService:
         """파인튜닝된 모델을 테스트합니다."""
         if not self.model:
             return {"success": False, "error": "모델이 로드되지 않았습니다."}
+        if isinstance(self.model, HarmonyTransformer):
+            return {"success": False, "error": "HarmonyTransformer(화성 토크나이저 모델)는 생성 테스트를 지원하지 않습니다."}
         
-        # 테스트 전에 모델을 CPU로 강제 이동
-        self.model = self.model.to(self.device)
-        logger.info(f"테스트를 위해 모델을 {self.device}로 이동: {self.model.device}")
-        
-        # 모든 파라미터도 CPU로 강제 이동
-        for param in self.model.parameters():
-            param.data = param.data.to(self.device)
+        # 모델이 다른 디바이스에 있을 때만 이동 (공유 모델이면 입력을 모델 쪽 디바이스로 보냄)
+        device = self._ensure_model_device()
         
         if test_prompts is None:
             test_prompts = [
@@ -1017,11 +1634,11 @@ class HarmonyTransformerService:
         results = []
         for i, prompt in enumerate(test_prompts, 1):
             try:
-                # 입력을 CPU로 이동
+                # 입력을 모델과 같은 디바이스로 이동
                 inputs = self.tokenizer(prompt, return_tensors="pt", padding=True, truncation=True)
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                inputs = {k: v.to(device) for k, v in inputs.items()}
                 
-                logger.info(f"테스트 {i}: 입력 '{prompt}'을 {self.device}에서 처리")
+                logger.info(f"테스트 {i}: 입력 '{prompt}'을 {device}에서 처리")
                 
                 # 생성
                 with torch.no_grad():
@@ -1055,27 +1672,35 @@ class HarmonyTransformerService:
         return {
             "success": True,
             "results": results,
-            "device_used": str(self.device)
+            "device_used": str(device)
         }
 
+    def _ensure_model_device(self) -> torch.device:
+        """모델이 self.device에 없을 때만 옮기고, 모델이 있는 디바이스를 반환
+
+        레지스트리에서 다른 서비스 인스턴스와 함께 쓰는 모델은 옮기면 공유 가중치가 바뀌므로
+        그대로 두고 현재 디바이스를 반환한다 (호출하는 쪽이 입력을 그 디바이스로 보냄).
+        """
+        devices = {tensor.device for tensor in self.model.parameters()}
+        devices.update(tensor.device for tensor in self.model.buffers())
+        if not devices or devices == {self.device}:
+            return self.device
+        
+        entry = self._model_entry
+        if entry is not None and entry.references > 1:
+            device = next(self.model.parameters()).device
+            logger.warning(f"공유 중인 모델이 {device}에 있어 {self.device}로 옮기지 않습니다")
+            return device
+        
+        self.model.to(self.device)
+        logger.info(f"모델을 {self.device}로 이동")
+        return self.device
+
     def ensure_model_on_cpu(self):
-        """학습 완료 후 모델을 CPU로 강제 이동합니다."""
+        """학습 완료 후 모델이 self.device(CPU)에 있는지 확인하고, 다를 때만 이동합니다."""
         if self.model:
-            # 모델을 CPU로 강제 이동
-            self.model = self.model.to(self.device)
-            
-            # 모든 파라미터도 CPU로 강제 이동
-            for param in self.model.parameters():
-                param.data = param.data.to(self.device)
-            
-            # 모든 모듈도 CPU로 강제 이동
-            for module in self.model.modules():
-                if hasattr(module, 'to'):
-                    module.to(self.device)
-            
-            logger.info(f"모델이 {self.device}로 강제 이동되었습니다: {self.model.device}")
-            return True
+            return self._ensure_model_device() == self.device
         return False
 
-# 서비스 인스턴스 생성
+# 서비스 인스턴스 생성 (모델은 load_model 호출 시 공유 레지스트리에서 로드)
 harmony_transformer_service = HarmonyTransformerService()
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class InferenceQueueFull(RuntimeError):
+    """추론 대기열이 가득 차 요청을 받을 수 없음"""
+
+class InferenceTimeout(TimeoutError):
+    """추론 요청이 제한 시간 안에 끝나지 않음"""
+
+class InferenceExecutor:
+    """모델 추론 전용 스레드 풀 (동시 실행/대기 수 제한, 타임아웃)
+
+    이벤트 루프에서 블로킹 모델 호출(load/generate/analyze/save)을 직접 실행하지 않도록
+    max_workers개의 전용 스레드에서 실행한다. 실행 중 + 대기 중인 작업이
+    max_workers + max_queue에 이르면 새 요청은 InferenceQueueFull로 즉시 거절한다.
+    타임아웃이 지나면 호출자에게 InferenceTimeout을 돌려주며, 아직 시작하지 않은
+    작업은 취소한다 (이미 실행 중인 작업은 끝날 때까지 자리를 차지한다).
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, timeout: Optional[float] = 60.0):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="harmony-inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0}
+
+    @property
+    def capacity(self) -> int:
+        """동시에 받을 수 있는 작업 수 (실행 + 대기)"""
+        return self.max_workers + self.max_queue
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """작업 제출 (대기열이 가득 차면 InferenceQueueFull)"""
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._stats["rejected"] += 1
+                raise InferenceQueueFull(f"추론 대기열이 가득 찼습니다 ({self._in_flight}/{self.capacity})")
+            self._in_flight += 1
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._finish(None)
+            raise
+        future.add_done_callback(self._finish)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """코루틴용: 전용 스레드에서 실행하고 결과를 기다린다 (timeout 미지정 시 기본값, 0 이하면 무제한)"""
+        future = self.submit(fn, *args, **kwargs)
+        limit = self._resolve_timeout(timeout)
+        try:
+            # shield: 타임아웃 시 wait_for가 concurrent Future를 취소하지 않도록 직접 처리
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), limit)
+        except asyncio.TimeoutError:
+            self._on_timeout(future, fn, limit)
+
+    def run_sync(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """동기 호출용: 전용 스레드에서 실행하고 결과를 기다린다"""
+        future = self.submit(fn, *args, **kwargs)
+        limit = self._resolve_timeout(timeout)
+        try:
+            return future.result(limit)
+        except FutureTimeoutError:
+            self._on_timeout(future, fn, limit)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """실행/대기 중 작업 수와 누적 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._in_flight
+        stats["capacity"] = self.capacity
+        stats["max_workers"] = self.max_workers
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """스레드 풀 종료"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _resolve_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """타임아웃 값 결정 (None이면 기본값, 0 이하면 무제한)"""
+        limit = self.timeout if timeout is None else timeout
+        return limit if limit is not None and limit > 0 else None
+
+    def _on_timeout(self, future: Future, fn: Callable[..., Any], limit: Optional[float]):
+        """타임아웃 처리 (시작 전이면 취소) 후 InferenceTimeout"""
+        cancelled = future.cancel()
+        with self._lock:
+            self._stats["timed_out"] += 1
+        name = getattr(fn, "__name__", repr(fn))
+        logger.warning(f"추론 작업 시간 초과: {name} ({limit}초, {'취소됨' if cancelled else '실행 계속'})")
+        raise InferenceTimeout(f"추론 작업이 {limit}초 안에 끝나지 않았습니다")
+
+    def _finish(self, future: Optional[Future]):
+        """작업 종료(완료/실패/취소) 시 자리 반환"""
+        with self._lock:
+            self._in_flight -= 1
+            if future is None or future.cancelled():
+                return
+            if future.exception() is None:
+                self._stats["completed"] += 1
+            else:
+                self._stats["failed"] += 1
@@ -0,0 +1,81 @@
+import logging
+from typing import Any, Dict, List
+
+import torch
+import torch.nn as nn
+from transformers.pytorch_utils import Conv1D
+
+logger = logging.getLogger(__name__)
+
+# 추론 전용 모델에 적용할 수 있는 정밀도 모드
+QUANTIZATION_MODES = ('int8', 'bf16')
+
+def bf16_supported() -> bool:
+    """CPU가 bf16 연산을 하드웨어로 지원하는지 (AVX512-BF16/AMX)"""
+    checker = getattr(torch.cpu, '_is_avx512_bf16_supported', None)
+    try:
+        return bool(checker()) if checker else False
+    except Exception:
+        return False
+
+def conv1d_to_linear(model: nn.Module) -> int:
+    """GPT-2 계열의 Conv1D(가중치가 전치된 선형층)를 nn.Linear로 교체하고 교체한 수를 반환
+
+    동적 양자화는 nn.Linear만 대상으로 하므로 DialoGPT/distilgpt2는 먼저 변환해야 한다.
+    """
+    replaced = 0
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if not isinstance(child, Conv1D):
+                continue
+            in_features, out_features = child.weight.shape
+            linear = nn.Linear(in_features, out_features, bias=child.bias is not None)
+            with torch.no_grad():
+                linear.weight.copy_(child.weight.t())
+                if child.bias is not None:
+                    linear.bias.copy_(child.bias)
+            setattr(parent, name, linear)
+            replaced += 1
+    return replaced
+
+def quantize_model(model: nn.Module, mode: str) -> nn.Module:
+    """추론 전용(병합된) 모델에 정밀도 모드 적용
+
+    int8: 선형층 가중치를 int8로 동적 양자화 (활성값은 실행 시 양자화)
+    bf16: 전체 가중치를 bfloat16으로 변환 (하드웨어 지원이 없으면 느릴 수 있음)
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"지원하지 않는 양자화 모드: {mode} (지원: {', '.join(QUANTIZATION_MODES)})")
+
+    if mode == 'bf16':
+        if not bf16_supported():
+            logger.warning("이 CPU는 bf16 연산을 하드웨어로 지원하지 않습니다. float32보다 느릴 수 있습니다.")
+        return model.to(torch.bfloat16)
+
+    converted = conv1d_to_linear(model)
+    if converted:
+        logger.info(f"Conv1D {converted}개를 nn.Linear로 변환")
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def _state_tensors(model: nn.Module) -> List[torch.Tensor]:
+    """모델 상태의 텐서 목록 (양자화된 선형층의 packed (가중치, 편향) 튜플 포함)"""
+    def flatten(value: Any) -> List[torch.Tensor]:
+        if isinstance(value, torch.Tensor):
+            return [value]
+        if isinstance(value, (tuple, list)):
+            return [tensor for item in value for tensor in flatten(item)]
+        return []
+
+    return [tensor for value in model.state_dict().values() for tensor in flatten(value)]
+
+def model_nbytes(model: nn.Module) -> int:
+    """모델 상태(가중치/버퍼, 양자화된 packed 가중치 포함)의 바이트 수"""
+    return sum(tensor.nelement() * tensor.element_size() for tensor in _state_tensors(model))
+
+def describe_precision(model: nn.Module) -> Dict[str, Any]:
+    """모델의 정밀도 요약 (가중치 dtype 분포와 크기, int8 양자화 가중치 포함)"""
+    dtypes: Dict[str, int] = {}
+    for tensor in _state_tensors(model):
+        key = str(tensor.dtype).replace('torch.', '')
+        dtypes[key] = dtypes.get(key, 0) + tensor.nelement()
+    return {"dtypes": dtypes, "nbytes": model_nbytes(model)}
@@ -0,0 +1,137 @@
+import gc
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 레지스트리 키: (모델 이름, 어댑터 경로 또는 None, 추론 전용 여부, 양자화 모드 또는 None)
+ModelKey = Tuple[str, Optional[str], bool, Optional[str]]
+
+# 로더는 (모델, 토크나이저, 모델 정보)를 반환한다
+ModelLoader = Callable[[], Tuple[Any, Any, Dict[str, Any]]]
+
+def model_key(
+    model_name: str,
+    adapter_path: Optional[str] = None,
+    inference_only: bool = False,
+    quantization: Optional[str] = None
+) -> ModelKey:
+    """모델 이름, 어댑터 경로, 추론 전용 여부, 양자화 모드로 레지스트리 키 생성 (경로는 절대 경로로 정규화)
+
+    추론 전용 모델은 어댑터를 병합해 학습용 래퍼가 없으므로 학습용 모델과 따로 보관한다.
+    """
+    return (
+        model_name,
+        os.path.abspath(adapter_path) if adapter_path else None,
+        inference_only,
+        quantization if inference_only else None
+    )
+
+class ModelEntry:
+    """레지스트리에 올라간 모델 하나 (모델, 토크나이저, 로드 정보, 참조 수)"""
+
+    __slots__ = ('key', 'model', 'tokenizer', 'info', 'references', 'loaded_at', 'load_seconds')
+
+    def __init__(self, key: ModelKey, model: Any, tokenizer: Any, info: Dict[str, Any], load_seconds: float):
+        self.key = key
+        self.model = model
+        self.tokenizer = tokenizer
+        self.info = info
+        self.references = 0
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+
+class ModelRegistry:
+    """프로세스 전역 모델 레지스트리 (참조 카운팅)
+
+    같은 키(모델 이름, 어댑터 경로, 추론 전용 여부, 양자화 모드)를 요청하는 서비스는 모두 같은 모델 객체를 공유한다.
+    처음 요청한 쪽만 로더를 실행하며, 로드 중에 들어온 같은 키의 요청은 로드가
+    끝날 때까지 기다렸다가 결과를 공유한다. 마지막 참조가 해제되면 모델을 내린다.
+    """
+
+    def __init__(self):
+        self._entries: Dict[ModelKey, ModelEntry] = {}
+        self._loading: Dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: ModelKey) -> bool:
+        return key in self._entries
+
+    def acquire(self, key: ModelKey, loader: ModelLoader) -> ModelEntry:
+        """키에 해당하는 모델의 참조를 얻는다 (없으면 loader로 한 번만 로드)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.references += 1
+                return entry
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.references += 1
+                    return entry
+
+            started = time.time()
+            try:
+                model, tokenizer, info = loader()
+            except Exception:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+
+            entry = ModelEntry(key, model, tokenizer, info, time.time() - started)
+            entry.references = 1
+            with self._lock:
+                self._entries[key] = entry
+                self._loading.pop(key, None)
+
+        logger.info(f"공유 모델 로드 완료: {key[0]} (어댑터: {key[1]}, {entry.load_seconds:.1f}초)")
+        return entry
+
+    def release(self, key: ModelKey) -> bool:
+        """참조 해제 (마지막 참조였으면 모델을 내리고 True 반환)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            entry.references -= 1
+            if entry.references > 0:
+                return False
+            del self._entries[key]
+
+        entry.model = None
+        entry.tokenizer = None
+        gc.collect()
+        logger.info(f"공유 모델 해제: {key[0]} (어댑터: {key[1]})")
+        return True
+
+    def get(self, key: ModelKey) -> Optional[ModelEntry]:
+        """이미 로드된 모델 (참조 수는 바꾸지 않는다)"""
+        return self._entries.get(key)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """로드된 모델 목록과 참조 수"""
+        with self._lock:
+            return [
+                {
+                    "model_name": entry.key[0],
+                    "adapter_path": entry.key[1],
+                    "inference_only": entry.key[2],
+                    "quantization": entry.key[3],
+                    "references": entry.references,
+                    "loaded_at": entry.loaded_at,
+                    "load_seconds": round(entry.load_seconds, 3)
+                }
+                for entry in self._entries.values()
+            ]
+
+# 프로세스 전역 레지스트리
+MODEL_REGISTRY = ModelRegistry()
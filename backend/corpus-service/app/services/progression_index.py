@@ -0,0 +1,232 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .analysis_store import HARMONY_VOCABULARY
+from .rntxt_parser import TOKEN_CHORD, classify_token, load_work_analysis
+
+logger = logging.getLogger(__name__)
+
+# 진행 질의 구분자 (예: "ii-V-I", "ii–V–i", "ii V I", "ii,V,I")
+PROGRESSION_SEPARATOR = re.compile(r"[\s,\-–—>]+")
+
+# 검색 단위: 로마 숫자만(예: "V") 또는 원래 화음 표기(예: "V65/V")
+PROGRESSION_LEVELS = {'numeral': 'roman_numeral', 'chord': 'chord'}
+
+class ProgressionIndex:
+    """작품별 화음 시퀀스에 대한 n-gram 색인 (화성 진행 검색용)
+
+    모든 작품의 화음 코드 시퀀스를 작품 경계(-1)를 두고 하나의 배열로 이어 붙인 뒤,
+    길이 NGRAM 구간을 정수 키로 인코딩해 정렬해 둔다. 질의는 첫 n-gram의 위치를
+    searchsorted로 찾은 다음 나머지 화음과 조성 조건을 벡터 연산으로 확인한다.
+    """
+
+    NGRAM = 3
+
+    def __init__(self, level: str = 'numeral'):
+        self.column = PROGRESSION_LEVELS[level]
+        self._reset()
+
+    def _reset(self):
+        """빈 색인으로 초기화"""
+        self.items: List[Any] = []
+        self.sequence = np.empty(0, dtype=np.int64)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.measures = np.empty(0, dtype=np.int32)
+        self.work_ids = np.empty(0, dtype=np.int32)
+        self._gram_keys = np.empty(0, dtype=np.int64)
+        self._gram_positions = np.empty(0, dtype=np.int64)
+        self._base = 1
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def build(self, items: List[Any]) -> Dict[str, int]:
+        """코퍼스 아이템의 분석 파일로 색인 구축 (파싱 결과는 공유 캐시 사용)"""
+        self._reset()
+        sequences, keys, measures, work_ids = [], [], [], []
+
+        for item in items:
+            if not item.analysis_path:
+                continue
+            try:
+                columns = load_work_analysis(item.analysis_path).analysis
+            except Exception as e:
+                logger.debug(f"진행 색인 대상 분석 파일 파싱 실패 {item.analysis_path}: {e}")
+                continue
+            if not len(columns):
+                continue
+
+            work_index = len(self.items)
+            self.items.append(item)
+            codes = columns.column(self.column).astype(np.int64)
+            if self.column == 'chord':
+                # 원래 표기가 없는 화음은 로마 숫자로 대체
+                codes = np.where(codes == 0, columns.column('roman_numeral'), codes)
+
+            # 작품 경계 표시(-1)를 넣어 n-gram이 작품을 넘지 않도록 한다
+            sequences.extend((codes, np.array([-1], dtype=np.int64)))
+            keys.extend((columns.column('key').astype(np.int64), np.array([-1], dtype=np.int64)))
+            measures.extend((columns.measures.astype(np.int32), np.array([0], dtype=np.int32)))
+            work_ids.append(np.full(len(codes) + 1, work_index, dtype=np.int32))
+
+        if sequences:
+            self.sequence = np.concatenate(sequences)
+            self.keys = np.concatenate(keys)
+            self.measures = np.concatenate(measures)
+            self.work_ids = np.concatenate(work_ids)
+
+        self._build_grams()
+        logger.info(f"진행 색인 구축 완료: {len(self.items)}개 작품, {len(self.sequence) - len(self.items)}개 화음")
+        return {"works": len(self.items), "chords": int(len(self.sequence) - len(self.items))}
+
+    def _build_grams(self):
+        """길이 NGRAM 구간을 정수 키로 인코딩하여 정렬"""
+        self._base = len(HARMONY_VOCABULARY) + 1
+        count = len(self.sequence) - self.NGRAM + 1
+        if count <= 0:
+            self._gram_keys = np.empty(0, dtype=np.int64)
+            self._gram_positions = np.empty(0, dtype=np.int64)
+            return
+
+        gram_keys = np.zeros(count, dtype=np.int64)
+        valid = np.ones(count, dtype=bool)
+        for offset in range(self.NGRAM):
+            window = self.sequence[offset:offset + count]
+            valid &= window >= 0
+            gram_keys = gram_keys * self._base + np.maximum(window, 0)
+
+        positions = np.flatnonzero(valid)
+        order = np.argsort(gram_keys[positions], kind='stable')
+        self._gram_keys = gram_keys[positions][order]
+        self._gram_positions = positions[order]
+
+    def parse_progression(self, progression: str) -> List[str]:
+        """질의 문자열 → 화음 기호 목록 (numeral 단위면 전위/부속화음 표기 제거)"""
+        symbols = [token for token in PROGRESSION_SEPARATOR.split(progression.strip()) if token]
+        if not symbols:
+            raise ValueError("화성 진행이 비어 있습니다")
+
+        if self.column == 'chord':
+            return symbols
+
+        numerals = []
+        for symbol in symbols:
+            entry = classify_token(symbol)
+            if entry[0] != TOKEN_CHORD:
+                raise ValueError(f"로마 숫자로 해석할 수 없는 기호: {symbol}")
+            numerals.append(entry[1])
+        return numerals
+
+    def search(
+        self,
+        progression: str,
+        mode: Optional[str] = None,
+        key: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """화성 진행을 포함하는 작품과 마디 구간 검색
+
+        mode: "major"/"minor" (조성 표기의 대소문자 기준), key: 정확한 조성 (예: "c", "Eb")
+        진행 전체가 같은 조성 안에 있어야 일치로 본다.
+        """
+        symbols = self.parse_progression(progression)
+        codes = HARMONY_VOCABULARY.codes(symbols)
+        # 색인에 없는 기호(어휘에 없거나 구축 이후 추가된 코드)가 있으면 일치할 수 없다
+        if len(codes) != len(symbols) or not len(self.sequence) or codes.max() >= self._base:
+            return {"progression": symbols, "works": [], "total_works": 0, "total_matches": 0}
+
+        starts = self._candidate_starts(codes)
+
+        # 나머지 화음 일치 확인 (n-gram 범위 밖 화음)
+        length = len(codes)
+        starts = starts[starts + length <= len(self.sequence)]
+        for offset in range(min(self.NGRAM, length), length):
+            starts = starts[self.sequence[starts + offset] == codes[offset]]
+
+        # 진행 전체가 한 조성 안에 있고 조성 조건을 만족하는지 확인
+        same_key = np.ones(len(starts), dtype=bool)
+        for offset in range(1, length):
+            same_key &= self.keys[starts + offset] == self.keys[starts]
+        starts = starts[same_key]
+        if key is not None or mode is not None:
+            start_keys = self.keys[starts]
+            allowed = [
+                code for code in np.unique(start_keys).tolist()
+                if self._key_matches(HARMONY_VOCABULARY.lookup(code), mode, key)
+            ]
+            starts = starts[np.isin(start_keys, allowed)]
+
+        # 시작 위치는 오름차순이므로 작품별로 연속해 있다
+        return self._collect(symbols, starts, length, limit)
+
+    def _candidate_starts(self, codes: np.ndarray) -> np.ndarray:
+        """첫 화음들의 일치 위치 (NGRAM 이상이면 n-gram 색인, 짧으면 배열 직접 비교)"""
+        if len(codes) >= self.NGRAM:
+            gram_key = 0
+            for code in codes[:self.NGRAM].tolist():
+                gram_key = gram_key * self._base + code
+            low = np.searchsorted(self._gram_keys, gram_key, side='left')
+            high = np.searchsorted(self._gram_keys, gram_key, side='right')
+            return self._gram_positions[low:high]
+
+        count = len(self.sequence) - len(codes) + 1
+        mask = np.ones(max(count, 0), dtype=bool)
+        for offset, code in enumerate(codes.tolist()):
+            mask &= self.sequence[offset:offset + count] == code
+        return np.flatnonzero(mask)
+
+    @staticmethod
+    def _key_matches(value: Optional[str], mode: Optional[str], key: Optional[str]) -> bool:
+        """조성 조건 확인 (RNTXT 조성 표기는 소문자가 단조)"""
+        if not value or value == "Unknown":
+            return False
+        if key is not None and value != key:
+            return False
+        if mode == "minor":
+            return value[0].islower()
+        if mode == "major":
+            return value[0].isupper()
+        return True
+
+    def _collect(self, symbols: List[str], starts: np.ndarray, length: int, limit: Optional[int]) -> Dict[str, Any]:
+        """일치 위치를 작품별 마디 구간으로 묶기"""
+        works = []
+        work_of_start = self.work_ids[starts]
+        # 작품별 연속 구간의 시작 인덱스 (limit개 작품만 응답으로 만든다)
+        group_bounds = np.concatenate(([0], np.flatnonzero(np.diff(work_of_start)) + 1, [len(starts)]))
+        group_count = len(group_bounds) - 1 if len(starts) else 0
+        shown = group_count if limit is None else min(limit, group_count)
+
+        start_measures = self.measures[starts].tolist()
+        end_measures = self.measures[starts + length - 1].tolist() if len(starts) else []
+        key_codes = self.keys[starts].tolist()
+
+        for group in range(shown):
+            low, high = int(group_bounds[group]), int(group_bounds[group + 1])
+            item = self.items[int(work_of_start[low])]
+            works.append({
+                "item_id": getattr(item, 'item_id', None),
+                "genre": item.genre,
+                "composer": item.composer,
+                "set": item.set,
+                "movement": item.movement,
+                "title": item.metadata.get('title', ''),
+                "matches": [
+                    {
+                        "start_measure": start_measures[i],
+                        "end_measure": end_measures[i],
+                        "key": HARMONY_VOCABULARY.lookup(key_codes[i])
+                    }
+                    for i in range(low, high)
+                ]
+            })
+
+        return {
+            "progression": symbols,
+            "works": works,
+            "total_works": group_count,
+            "total_matches": int(len(starts))
+        }
@@ -0,0 +1,211 @@
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .analysis_store import AnalysisColumns, RomanNumeralAnalysis, WorkAnalysis
+
+logger = logging.getLogger(__name__)
+
+# 파싱 결과 캐시 크기 (분석 파일 수 기준)
+ANALYSIS_CACHE_SIZE = 4096
+
+# 로마 숫자 (긴 것부터 매칭)
+_NUMERAL = r"(?:VII|vii|VI|vi|IV|iv|V|v|III|iii|II|ii|I|i)"
+
+# RNTXT 토큰 문법 (정규식 대안 순서가 곧 우선순위)
+TOKEN_RE = re.compile(rf"""
+        (?P<key>[A-Ga-g][#b-]*):                        # 조성 (예: "c#:", "Bb:")
+      | b(?P<beat>\d+(?:\.\d+)?)                        # 박 (예: "b2", "b3.5")
+      | (?P<chord>                                      # 화음 (예: "V7", "viio6", "V65/V", "Ger65")
+            (?P<numeral>[#b]*(?:{_NUMERAL}|Ger|It|Fr|Cad|N))
+            (?:/o|[o+%ø])?                            # 화음 성질
+            (?P<figure>(?:[#b]?\d+)*)                    # 숫자저음 / 전위
+            (?:\[[^\]]*\])*                               # 추가/생략음 (예: "[add9]")
+            (?P<applied>(?:/[#b]*{_NUMERAL}(?:/o|[o+%ø])?)*)  # 부속화음 대상 (예: "/V")
+        )
+      | (?P<word>\S+)                                   # 그 밖의 토큰 (형식 섹션, "||" 등)
+""", re.VERBOSE)
+
+# 토큰 종류
+TOKEN_CHORD, TOKEN_BEAT, TOKEN_KEY, TOKEN_FORM, TOKEN_OTHER = range(5)
+
+# 토큰 분류 테이블: 코퍼스의 토큰 어휘는 작으므로 한 번 정규식으로 분류한 결과를 재사용
+_TOKEN_TABLE: Dict[str, Tuple[Any, ...]] = {}
+_TOKEN_TABLE_LIMIT = 65536
+
+# 마디 라인 (예: "m12 b2 V7"), 변주 라인("m12var1")과 반복 라인("m5-8 = m1-4")은 제외
+MEASURE_LINE_RE = re.compile(r"m(\d+)[a-z]?\s+(.*)")
+
+# 헤더 라인 (예: "Time Signature: 3/4")
+HEADER_RE = re.compile(r"(Composer|Title|Movement|Time signature|Form|Key):\s*(.*)", re.IGNORECASE)
+
+# 형식 섹션 토큰
+FORM_SECTIONS = {'Exposition', 'Development', 'Recapitulation', 'Coda', 'Introduction'}
+
+# 분석 파일 헤더 필드 → WorkAnalysis 필드
+HEADER_FIELDS = {
+    'composer': 'composer',
+    'title': 'title',
+    'movement': 'movement',
+    'time signature': 'time_signature',
+    'form': 'form',
+    'key': 'key_signature',
+}
+
+def iter_analysis(analysis_path: str) -> Iterator[Tuple[str, Any]]:
+    """분석 파일을 한 줄씩 읽으며 헤더와 마디 분석 레코드를 차례로 반환
+
+    ("header", (필드명, 값)), ("measure_number", 마디 번호),
+    ("measure", RomanNumeralAnalysis 필드 순서의 튜플) 형태의 이벤트를 내보낸다.
+    조성은 라인을 넘어 유지되므로 조성 표기가 없는 마디도 현재 조성으로 분석된다.
+    """
+    key = None
+    
+    with open(analysis_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            
+            if line[0] == 'm':
+                match = MEASURE_LINE_RE.match(line)
+                if match:
+                    measure = int(match.group(1))
+                    yield "measure_number", measure
+                    
+                    rows, key = parse_measure_rows(measure, match.group(2), key)
+                    for row in rows:
+                        yield "measure", row
+                    continue
+            
+            match = HEADER_RE.match(line)
+            if match:
+                yield "header", (HEADER_FIELDS[match.group(1).lower()], match.group(2).strip())
+
+def parse_work_analysis(analysis_path: str) -> WorkAnalysis:
+    """iter_analysis를 한 번 순회하여 WorkAnalysis 생성 (분석은 열 단위로 저장)"""
+    header = {
+        'composer': "Unknown",
+        'title': "Unknown",
+        'movement': "Unknown",
+        'time_signature': "Unknown",
+        'form': "Unknown",
+        'key_signature': "Unknown",
+    }
+    rows = []
+    last_measure = 0
+    
+    for event, value in iter_analysis(analysis_path):
+        if event == "measure":
+            rows.append(value)
+        elif event == "measure_number":
+            last_measure = max(last_measure, value)
+        else:
+            field, field_value = value
+            header[field] = field_value
+    
+    analysis = AnalysisColumns.from_rows(rows)
+    
+    return WorkAnalysis(
+        analysis=analysis,
+        total_measures=len(set(analysis.measures.tolist())),
+        last_measure=last_measure,
+        **header
+    )
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def _load_work_analysis_cached(analysis_path: str, mtime_ns: int, size: int) -> WorkAnalysis:
+    """(경로, mtime, size) 기준 파싱 결과 캐시"""
+    return parse_work_analysis(analysis_path)
+
+def load_work_analysis(analysis_path: str) -> WorkAnalysis:
+    """캐시된 분석 결과 반환 (파일이 바뀌었으면 다시 파싱)
+
+    스캔, 악보 처리, 학습 데이터 준비가 같은 결과를 공유하므로
+    반환된 객체는 읽기 전용으로 다룬다.
+    """
+    stat = os.stat(analysis_path)
+    return _load_work_analysis_cached(str(analysis_path), stat.st_mtime_ns, stat.st_size)
+
+def classify_token(token: str) -> Tuple[Any, ...]:
+    """토큰 하나를 분류 (결과는 토큰 테이블에 저장)
+
+    화음: (TOKEN_CHORD, 로마 숫자, 전위, 부속화음 대상, 원래 표기)
+    박: (TOKEN_BEAT, 박 위치) / 조성: (TOKEN_KEY, 조성) / 형식 섹션: (TOKEN_FORM, 섹션)
+    """
+    entry = _TOKEN_TABLE.get(token)
+    if entry is not None:
+        return entry
+    
+    match = TOKEN_RE.fullmatch(token)
+    kind = match.lastgroup if match else 'word'
+    
+    if kind == 'chord':
+        numeral, figure, applied = match.group('numeral', 'figure', 'applied')
+        entry = (TOKEN_CHORD, numeral, figure or None, applied[1:] if applied else None, token)
+    elif kind == 'beat':
+        entry = (TOKEN_BEAT, float(match.group('beat')))
+    elif kind == 'key':
+        entry = (TOKEN_KEY, match.group('key'))
+    elif token in FORM_SECTIONS:
+        entry = (TOKEN_FORM, token)
+    else:
+        entry = (TOKEN_OTHER, token)
+    
+    if len(_TOKEN_TABLE) < _TOKEN_TABLE_LIMIT:
+        _TOKEN_TABLE[token] = entry
+    return entry
+
+def parse_measure_rows(
+    measure: int,
+    text: str,
+    key: Optional[str] = None
+) -> Tuple[List[Tuple[Any, ...]], Optional[str]]:
+    """마디 번호 뒤의 토큰열을 파싱하여 화음별 튜플(RomanNumeralAnalysis 필드 순서)과 갱신된 조성을 반환"""
+    rows = []
+    beat = 1.0
+    modulation = None
+    form_section = None
+    table = _TOKEN_TABLE
+    
+    for token in text.split():
+        entry = table.get(token) or classify_token(token)
+        kind = entry[0]
+        
+        if kind == TOKEN_CHORD:
+            rows.append((
+                measure, entry[1], key or "Unknown", entry[2], entry[3],
+                modulation, form_section, beat, entry[4]
+            ))
+            modulation = None
+            form_section = None
+        elif kind == TOKEN_BEAT:
+            beat = entry[1]
+        elif kind == TOKEN_KEY:
+            if key is not None and entry[1] != key:
+                modulation = entry[1]
+            key = entry[1]
+        elif kind == TOKEN_FORM:
+            form_section = entry[1]
+    
+    return rows, key
+
+def parse_measure_tokens(
+    measure: int,
+    text: str,
+    key: Optional[str] = None
+) -> Tuple[List[RomanNumeralAnalysis], Optional[str]]:
+    """마디 번호 뒤의 토큰열을 파싱하여 화음별 레코드와 갱신된 조성을 반환"""
+    rows, key = parse_measure_rows(measure, text, key)
+    return [RomanNumeralAnalysis(*row) for row in rows], key
+
+def parse_measure_line(line: str, key: Optional[str] = None) -> List[RomanNumeralAnalysis]:
+    """마디 라인 파싱 (예: "m1 c#: i", "m5 i", "m7 i b2 E: ii")"""
+    match = MEASURE_LINE_RE.match(line.strip())
+    if not match:
+        return []
+    
+    records, _ = parse_measure_tokens(int(match.group(1)), match.group(2), key)
+    return records
@@ -0,0 +1,202 @@
+import bisect
+import logging
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 영숫자 연속 구간을 토큰으로 사용 ("Beethoven,_Ludwig_van" → beethoven / ludwig / van)
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+class CorpusSearchIndex:
+    """코퍼스 아이템 검색용 역색인 (토큰 → 아이템, n-gram → 토큰)
+
+    질의 토큰 중 양옆이 구분자인 토큰은 정확 일치, 앞만 구분자면 접두사
+    (정렬된 토큰 목록), 뒤만 구분자면 접미사(뒤집은 토큰 목록), 구분자가
+    없으면 부분 문자열(토큰 어휘의 길이 1~NGRAM n-gram 색인)로 후보를 찾는다.
+    후보는 원래 검색과 같은 기준(소문자 필드에 질의 문자열 포함)으로
+    최종 확인하고, 필드 가중치와 일치 위치(전체/단어 시작/중간)로 순위를 매긴다.
+    """
+
+    NGRAM = 3
+    FIELD_WEIGHTS = {'title': 3.0, 'composer': 2.0, 'genre': 1.0}
+
+    def __init__(self):
+        # 문서 ID → (아이템, 소문자 필드, 토큰 집합)
+        self._documents: Dict[int, Tuple[Any, Dict[str, str], Set[str]]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._sorted_tokens: List[str] = []
+        self._sorted_reversed: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def clear(self):
+        """색인 초기화"""
+        self._documents = {}
+        self._postings = {}
+        self._grams = {}
+        self._sorted_tokens = []
+        self._sorted_reversed = []
+
+    def add(self, doc_id: int, item: Any, fields: Dict[str, str]):
+        """아이템 색인 (같은 ID가 있으면 교체)"""
+        if doc_id in self._documents:
+            self.remove(doc_id)
+
+        lowered = {name: (value or '').lower() for name, value in fields.items()}
+        tokens = set()
+        for value in lowered.values():
+            tokens.update(TOKEN_PATTERN.findall(value))
+
+        self._documents[doc_id] = (item, lowered, tokens)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                bisect.insort(self._sorted_tokens, token)
+                bisect.insort(self._sorted_reversed, token[::-1])
+                for gram in self._token_grams(token):
+                    self._grams.setdefault(gram, set()).add(token)
+            postings.add(doc_id)
+
+    def remove(self, doc_id: int):
+        """아이템 색인 제거"""
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+
+        for token in document[2]:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(doc_id)
+            if not postings:
+                # 더 이상 쓰이지 않는 토큰은 n-gram 색인에서도 제거
+                del self._postings[token]
+                self._discard_sorted(self._sorted_tokens, token)
+                self._discard_sorted(self._sorted_reversed, token[::-1])
+                for gram in self._token_grams(token):
+                    tokens = self._grams.get(gram)
+                    if tokens is not None:
+                        tokens.discard(token)
+                        if not tokens:
+                            del self._grams[gram]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Any]:
+        """질의 문자열을 포함하는 아이템을 순위순으로 반환"""
+        query = query.lower()
+        candidates = self._candidates(query)
+
+        ranked = []
+        for doc_id in candidates:
+            item, fields, _ = self._documents[doc_id]
+            score = self._score(query, fields)
+            if score > 0:
+                ranked.append((-score, doc_id, item))
+
+        ranked.sort(key=lambda entry: (entry[0], entry[1]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [item for _, _, item in ranked]
+
+    def _candidates(self, query: str) -> Set[int]:
+        """질의 문자열이 들어 있을 수 있는 문서 ID"""
+        terms = list(TOKEN_PATTERN.finditer(query))
+        if not terms:
+            # 구두점/공백만 있는 질의는 토큰으로 좁힐 수 없으므로 전체 문서 확인
+            return set(self._documents)
+
+        # 질의 토큰별로 일치할 수 있는 색인 토큰 찾기
+        term_tokens = []
+        for match in terms:
+            left_bounded = match.start() > 0
+            right_bounded = match.end() < len(query)
+            tokens = self._matching_tokens(match.group(), left_bounded, right_bounded)
+            if not tokens:
+                return set()
+            term_tokens.append(tokens)
+
+        # 일치 토큰이 적은 질의 토큰부터 교집합을 구해 후보를 줄이고,
+        # 후보가 일치 토큰 수보다 적어지면 나머지는 최종 확인 단계에서 거른다
+        term_tokens.sort(key=len)
+        candidates = None
+        for tokens in term_tokens:
+            if candidates is not None and len(candidates) <= len(tokens):
+                break
+
+            documents = set().union(*(self._postings[token] for token in tokens))
+            candidates = documents if candidates is None else candidates & documents
+            if not candidates:
+                return set()
+
+        return candidates
+
+    def _matching_tokens(self, term: str, left_bounded: bool, right_bounded: bool) -> List[str]:
+        """질의 토큰과 일치할 수 있는 색인 토큰 (구분자 위치에 따라 정확/접두사/접미사/부분 문자열)"""
+        if left_bounded and right_bounded:
+            return [term] if term in self._postings else []
+        if left_bounded:
+            return self._prefix_range(self._sorted_tokens, term)
+        if right_bounded:
+            return [token[::-1] for token in self._prefix_range(self._sorted_reversed, term[::-1])]
+
+        if len(term) <= self.NGRAM:
+            return list(self._grams.get(term, ()))
+
+        gram_sets = []
+        for start in range(len(term) - self.NGRAM + 1):
+            tokens = self._grams.get(term[start:start + self.NGRAM])
+            if not tokens:
+                return []
+            gram_sets.append(tokens)
+
+        gram_sets.sort(key=len)
+        matches = set(gram_sets[0])
+        for tokens in gram_sets[1:]:
+            matches &= tokens
+        return [token for token in matches if term in token]
+
+    @staticmethod
+    def _prefix_range(sorted_tokens: List[str], prefix: str) -> List[str]:
+        """정렬된 토큰 목록에서 prefix로 시작하는 구간"""
+        start = bisect.bisect_left(sorted_tokens, prefix)
+        end = bisect.bisect_left(sorted_tokens, prefix + '\U0010ffff', start)
+        return sorted_tokens[start:end]
+
+    @staticmethod
+    def _discard_sorted(sorted_tokens: List[str], token: str):
+        """정렬된 토큰 목록에서 토큰 제거"""
+        position = bisect.bisect_left(sorted_tokens, token)
+        if position < len(sorted_tokens) and sorted_tokens[position] == token:
+            del sorted_tokens[position]
+
+    def _score(self, query: str, fields: Dict[str, str]) -> float:
+        """필드별 일치 점수 합 (전체 일치 4, 단어 시작 2, 중간 1 × 필드 가중치)"""
+        score = 0.0
+        for name, value in fields.items():
+            position = value.find(query)
+            if position < 0:
+                continue
+
+            if value == query:
+                match = 4.0
+            else:
+                match = 1.0
+                while position >= 0:
+                    if position == 0 or not value[position - 1].isalnum():
+                        match = 2.0
+                        break
+                    position = value.find(query, position + 1)
+
+            score += self.FIELD_WEIGHTS.get(name, 1.0) * match
+        return score
+
+    def _token_grams(self, token: str) -> Set[str]:
+        """토큰의 길이 1~NGRAM 부분 문자열"""
+        grams = set()
+        for size in range(1, min(self.NGRAM, len(token)) + 1):
+            for start in range(len(token) - size + 1):
+                grams.add(token[start:start + size])
+        return grams
@@ -0,0 +1,166 @@
+import bisect
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from .training_batching import sequence_lengths
+
+logger = logging.getLogger(__name__)
+
+def window_spans(length: int, window: int, overlap: int = 0) -> List[Tuple[int, int, int]]:
+    """길이 length인 시퀀스를 window 크기, overlap만큼 겹치는 구간으로 분할
+
+    반환값: (start, stop, label_from) 목록. label_from은 앞 구간에서 이미 학습한 토큰 수로,
+    이 구간에서는 문맥으로만 쓰고 손실에서 제외한다. window를 다 채우지 못하는 마지막 구간은
+    남은 토큰 + overlap 문맥만큼의 짧은 구간이 된다 (다른 곡과 함께 패킹).
+    """
+    if length <= window:
+        return [(0, length, 0)]
+    stride = max(1, window - overlap)
+    spans, start = [(0, window, 0)], stride
+    while start + window <= length:
+        spans.append((start, start + window, overlap))
+        start += stride
+    covered = spans[-1][1]
+    if covered < length:
+        spans.append((covered - overlap, length, overlap))
+    return spans
+
+def plan_blocks(
+    lengths: Sequence[int],
+    block_size: int,
+    overlap: int = 0,
+    separator: bool = True
+) -> List[List[Tuple[int, int, int, int]]]:
+    """블록별 구간 목록 [(예시 인덱스, start, stop, label_from), ...]
+
+    block_size보다 긴 예시는 겹치는 창(window_spans)으로 나눠 꽉 찬 창 하나가 블록 하나가 되고,
+    짧은 예시와 긴 예시의 마지막 조각은 긴 것부터 남은 자리가 가장 작은 블록에 넣는다
+    (best-fit decreasing). separator=True이면 같은 블록의 조각 사이에 구분자 토큰 한 칸을 둔다.
+    """
+    separator_cost = 1 if separator else 0
+    blocks: List[List[Tuple[int, int, int, int]]] = []
+    pieces = []
+    for index, length in enumerate(lengths):
+        length = int(length)
+        if length <= 0:
+            continue
+        for start, stop, label_from in window_spans(length, block_size, overlap):
+            if stop - start == block_size:
+                blocks.append([(index, start, stop, label_from)])
+            else:
+                pieces.append((stop - start, index, start, label_from))
+
+    # 블록 끝에는 구분자가 필요 없으므로 용량을 한 칸 늘려 조각마다 (길이 + 구분자)로 계산
+    capacity = block_size + separator_cost
+    free: List[Tuple[int, int]] = []  # (남은 자리, 블록 번호) 오름차순
+    pieces.sort(key=lambda piece: (-piece[0], piece[1], piece[2]))
+    for length, index, start, label_from in pieces:
+        need = length + separator_cost
+        position = bisect.bisect_left(free, (need, -1))
+        if position < len(free):
+            remaining, block = free.pop(position)
+        else:
+            remaining, block = capacity, len(blocks)
+            blocks.append([])
+        blocks[block].append((index, start, start + length, label_from))
+        remaining -= need
+        if remaining > separator_cost:
+            bisect.insort(free, (remaining, block))
+    return blocks
+
+class PackedSequenceDataset(Dataset):
+    """토큰 시퀀스 데이터셋을 고정 크기 학습 블록으로 다시 묶은 데이터셋
+
+    긴 악장은 겹치는 창으로 나누고(겹친 부분은 labels -100으로 문맥만 제공), 짧은 곡과 창의
+    마지막 조각은 separator_id로 이어 붙여 block_size를 채운다. 원본 데이터셋(TokenizedCorpus
+    또는 HuggingFace 데이터셋)의 토큰은 복사하지 않고 블록 구성표만 들고 있다가 __getitem__에서
+    이어 붙인다. 블록 끝의 남는 자리는 콜레이터가 배치 단위로 패딩한다.
+
+    같은 블록의 조각끼리는 서로 참조하지 않는다. 예시마다 조각 단위로 0부터 다시 시작하는
+    position_ids를 주고 attention_mask는 주지 않으며, 모델은 위치가 이어지지 않는 곳을 조각
+    경계로 보고 블록 대각(조각별 인과) 마스크를 만든다. 구분자는 앞 조각의 마지막 토큰으로
+    취급하고(앞 조각이 끝났음을 학습), 이어지는 조각의 첫 토큰은 앞 조각에서 예측할 수 없으므로
+    labels에서 제외한다.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        block_size: int,
+        overlap: int = 0,
+        separator_id: Optional[int] = None
+    ):
+        if not 0 <= overlap < block_size:
+            raise ValueError(f"overlap은 0 이상 block_size({block_size}) 미만이어야 합니다: {overlap}")
+        self.source = source
+        self.block_size = block_size
+        self.overlap = overlap
+        self.separator_id = separator_id
+
+        source_lengths = sequence_lengths(source)
+        blocks = plan_blocks(source_lengths, block_size, overlap, separator=separator_id is not None)
+        self.block_offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+        self.block_offsets[1:] = np.cumsum([len(block) for block in blocks])
+        self.segments = np.array([segment for block in blocks for segment in block], dtype=np.int64).reshape(-1, 4)
+
+        separators = np.diff(self.block_offsets) - 1 if separator_id is not None else np.zeros(len(blocks), dtype=np.int64)
+        spans = self.segments[:, 2] - self.segments[:, 1]
+        self._lengths = np.add.reduceat(spans, self.block_offsets[:-1]) + separators if len(blocks) else np.zeros(0, dtype=np.int64)
+        self._source_examples = len(source_lengths)
+        self._source_tokens = int(source_lengths.sum())
+
+    def __len__(self) -> int:
+        return len(self.block_offsets) - 1
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """블록별 토큰 수 (구분자 포함)"""
+        return self._lengths
+
+    def stats(self) -> Dict[str, Any]:
+        """패킹 결과 요약"""
+        blocks = len(self)
+        windows = int(np.sum(self.segments[:, 3] > 0)) if len(self.segments) else 0
+        return {
+            'source_examples': self._source_examples,
+            'source_tokens': self._source_tokens,
+            'blocks': blocks,
+            'block_size': self.block_size,
+            'overlap': self.overlap,
+            'overlapping_windows': windows,
+            'fill_ratio': float(self._lengths.sum() / (blocks * self.block_size)) if blocks else 0.0
+        }
+
+    def _source_ids(self, index: int) -> np.ndarray:
+        token_ids = getattr(self.source, 'token_ids', None)
+        if token_ids is not None:
+            return token_ids(index)
+        return np.asarray(self.source[index]['input_ids'])
+
+    def __getitem__(self, index: int) -> Dict[str, torch.Tensor]:
+        if index < 0:
+            index += len(self)
+        segments = self.segments[self.block_offsets[index]:self.block_offsets[index + 1]]
+        input_ids, labels, position_ids = [], [], []
+        for number, (source_index, start, stop, label_from) in enumerate(segments):
+            if number and self.separator_id is not None:
+                # 구분자는 앞 조각의 위치를 이어받음
+                input_ids.append(np.array([self.separator_id], dtype=np.int64))
+                labels.append(np.array([self.separator_id], dtype=np.int64))
+                position_ids.append(position_ids[-1][-1:] + 1)
+            ids = self._source_ids(int(source_index))[start:stop].astype(np.int64)
+            target = ids.copy()
+            target[:max(label_from, 1 if number else 0)] = -100
+            input_ids.append(ids)
+            labels.append(target)
+            position_ids.append(np.arange(len(ids), dtype=np.int64))
+
+        return {
+            'input_ids': torch.from_numpy(np.concatenate(input_ids)),
+            'position_ids': torch.from_numpy(np.concatenate(position_ids)),
+            'labels': torch.from_numpy(np.concatenate(labels))
+        }
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from .corpus_index import CorpusIndex
+
+logger = logging.getLogger(__name__)
+
+# 캐시 형식이 바뀌면 올려서 기존 캐시를 무효화
+CACHE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+def corpus_fingerprint(corpus_items: Iterable[Any]) -> str:
+    """학습에 쓰이는 분석 파일 집합의 버전 (경로 + mtime + size, 인덱스 스키마 버전 포함)"""
+    digest = hashlib.sha256(f"corpus-index:{CorpusIndex.SCHEMA_VERSION}".encode())
+    entries = []
+    for item in corpus_items:
+        analysis_path = getattr(item, 'analysis_path', None)
+        if not analysis_path:
+            continue
+        try:
+            stat = os.stat(analysis_path)
+        except OSError:
+            continue
+        entries.append(f"{os.path.abspath(analysis_path)}\0{stat.st_mtime_ns}\0{stat.st_size}")
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()[:16]
+
+def tokenizer_fingerprint(tokenizer: Any) -> str:
+    """토크나이저 해시 (fast 토크나이저는 병합 규칙까지, 그 밖에는 어휘와 특수 토큰 기준)"""
+    digest = hashlib.sha256(type(tokenizer).__name__.encode())
+    backend = getattr(tokenizer, 'backend_tokenizer', None)
+    if backend is not None:
+        # 호출 시 바뀌는 잘라내기/패딩 상태는 제외 (토큰화 규칙만 해시)
+        state = json.loads(backend.to_str())
+        state.pop('truncation', None)
+        state.pop('padding', None)
+        digest.update(json.dumps(state, sort_keys=True).encode())
+    else:
+        digest.update(json.dumps(tokenizer.get_vocab(), sort_keys=True, ensure_ascii=False).encode())
+    special = {
+        name: getattr(tokenizer, name, None)
+        for name in ('pad_token', 'eos_token', 'bos_token', 'unk_token', 'padding_side')
+    }
+    digest.update(json.dumps(special, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+class TokenizedCorpus(Dataset):
+    """메모리 매핑된 토큰 샤드 데이터셋 (패딩 없이 예시별 가변 길이로 저장)
+
+    각 샤드는 토큰을 이어 붙인 1차원 배열(tokens)과 예시 경계(offsets)로 이루어진다.
+    배열은 mmap_mode='r'로 열어 페이지 캐시를 공유하므로 DataLoader 워커가 데이터를
+    복사하지 않으며, 피클할 때(spawn 워커 전달)는 경로만 넘기고 워커에서 다시 연다.
+    pad_to를 주면 __getitem__이 그 길이까지 패딩한다 (기존 max_length 패딩과 같은 출력).
+    """
+
+    def __init__(self, directory: str, pad_to: Optional[int] = None, pad_token_id: int = 0):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+        self.pad_to = pad_to
+        self.pad_token_id = pad_token_id
+        counts = [shard['examples'] for shard in self.manifest['shards']]
+        # 샤드별 첫 예시의 전역 인덱스
+        self._starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._shards: Optional[List[Any]] = None
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_shards'] = None
+        return state
+
+    def _open(self) -> List[Any]:
+        """샤드 배열을 메모리 매핑으로 연다 (프로세스마다 한 번)"""
+        if self._shards is None:
+            self._shards = [
+                (
+                    np.load(self.directory / shard['tokens_file'], mmap_mode='r'),
+                    np.load(self.directory / shard['offsets_file'], mmap_mode='r')
+                )
+                for shard in self.manifest['shards']
+            ]
+        return self._shards
+
+    def token_ids(self, index: int) -> np.ndarray:
+        """예시 하나의 토큰 ID (읽기 전용 뷰)"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("tokenized corpus index out of range")
+        shard = int(np.searchsorted(self._starts, index, side='right')) - 1
+        tokens, offsets = self._open()[shard]
+        local = index - self._starts[shard]
+        return tokens[offsets[local]:offsets[local + 1]]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """예시별 토큰 수"""
+        return np.concatenate([np.diff(offsets) for _, offsets in self._open()]) if len(self) else np.zeros(0, dtype=np.int64)
+
+    def __getitem__(self, index: int) -> Dict[str, torch.Tensor]:
+        ids = self.token_ids(index).astype(np.int64)
+        length = len(ids)
+        if self.pad_to and length < self.pad_to:
+            input_ids = np.full(self.pad_to, self.pad_token_id, dtype=np.int64)
+            input_ids[:length] = ids
+            attention_mask = np.zeros(self.pad_to, dtype=np.int64)
+            attention_mask[:length] = 1
+        else:
+            input_ids = ids
+            attention_mask = np.ones(length, dtype=np.int64)
+        return {
+            'input_ids': torch.from_numpy(input_ids),
+            'attention_mask': torch.from_numpy(attention_mask)
+        }
+
+class TokenizedCorpusCache:
+    """토큰화된 학습 코퍼스 디스크 캐시 (코퍼스 버전 + 토크나이저 해시 + max_length 기준)
+
+    같은 키로 다시 요청하면 분석 파일을 읽거나 토큰화하지 않고 샤드를 메모리 매핑만 한다.
+    쓰기는 임시 디렉터리에 만든 뒤 이름을 바꾸므로 중단되어도 반쯤 쓴 캐시가 남지 않는다.
+    """
+
+    def __init__(self, cache_dir: str, shard_examples: int = 4096, keep: int = 4):
+        self.cache_dir = Path(cache_dir)
+        self.shard_examples = max(1, shard_examples)
+        self.keep = max(1, keep)
+
+    def key(self, corpus_items: List[Any], tokenizer: Any, max_length: Optional[int]) -> str:
+        """캐시 키 (max_length가 없으면 자르지 않은 전체 시퀀스 캐시)"""
+        return f"{corpus_fingerprint(corpus_items)}-{tokenizer_fingerprint(tokenizer)}-{max_length or 'full'}-v{CACHE_FORMAT_VERSION}"
+
+    def load(self, key: str, **dataset_kwargs) -> Optional[TokenizedCorpus]:
+        """캐시가 있으면 메모리 매핑한 데이터셋, 없으면 None"""
+        directory = self.cache_dir / key
+        if not (directory / MANIFEST_FILE).exists():
+            return None
+        try:
+            dataset = TokenizedCorpus(str(directory), **dataset_kwargs)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"토큰 캐시를 읽을 수 없어 다시 만듭니다 ({key}): {e}")
+            shutil.rmtree(directory, ignore_errors=True)
+            return None
+        os.utime(directory)
+        return dataset
+
+    def build(
+        self,
+        key: str,
+        sequences: Iterable[List[int]],
+        vocab_size: int,
+        metadata: Optional[Dict[str, Any]] = None,
+        **dataset_kwargs
+    ) -> TokenizedCorpus:
+        """토큰 ID 시퀀스를 샤드로 저장하고 메모리 매핑한 데이터셋 반환"""
+        dtype = np.uint16 if vocab_size <= np.iinfo(np.uint16).max + 1 else np.int32
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.cache_dir))
+        try:
+            shards = []
+            batch: List[List[int]] = []
+            total_tokens = 0
+            for sequence in sequences:
+                batch.append(sequence)
+                if len(batch) >= self.shard_examples:
+                    total_tokens += self._write_shard(staging, len(shards), batch, dtype, shards)
+                    batch = []
+            if batch or not shards:
+                total_tokens += self._write_shard(staging, len(shards), batch, dtype, shards)
+
+            manifest = {
+                'key': key,
+                'format_version': CACHE_FORMAT_VERSION,
+                'dtype': np.dtype(dtype).name,
+                'examples': sum(shard['examples'] for shard in shards),
+                'tokens': total_tokens,
+                'shards': shards,
+                **(metadata or {})
+            }
+            with open(staging / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+            target = self.cache_dir / key
+            if target.exists():
+                # 다른 프로세스가 먼저 만들었으면 그것을 사용
+                shutil.rmtree(staging, ignore_errors=True)
+            else:
+                try:
+                    os.replace(staging, target)
+                except OSError:
+                    # 확인과 이름 변경 사이에 다른 프로세스(분산 학습의 다른 rank 등)가 먼저 만든 경우
+                    if not (target / MANIFEST_FILE).exists():
+                        raise
+                    shutil.rmtree(staging, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self._prune(keep_key=key)
+        logger.info(f"토큰 캐시 저장: {key} ({manifest['examples']}개 예시, {total_tokens}개 토큰)")
+        return TokenizedCorpus(str(target), **dataset_kwargs)
+
+    def get_or_build(
+        self,
+        corpus_items: List[Any],
+        tokenizer: Any,
+        max_length: Optional[int],
+        encode: Callable[[List[Any]], Iterable[List[int]]],
+        **dataset_kwargs
+    ) -> TokenizedCorpus:
+        """캐시가 있으면 로드하고, 없으면 encode(corpus_items)로 토큰화해 저장"""
+        key = self.key(corpus_items, tokenizer, max_length)
+        dataset = self.load(key, **dataset_kwargs)
+        if dataset is not None:
+            logger.info(f"토큰 캐시 사용: {key} ({len(dataset)}개 예시)")
+            return dataset
+        return self.build(
+            key,
+            encode(corpus_items),
+            len(tokenizer),
+            metadata={'max_length': max_length},
+            **dataset_kwargs
+        )
+
+    def _write_shard(self, staging: Path, number: int, batch: List[List[int]], dtype: Any, shards: List[Dict[str, Any]]) -> int:
+        """샤드 하나 기록 (tokens: 이어 붙인 토큰, offsets: 예시 경계)"""
+        offsets = np.zeros(len(batch) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(sequence) for sequence in batch])
+        tokens = np.fromiter((token for sequence in batch for token in sequence), dtype=dtype, count=int(offsets[-1]))
+        names = {'tokens_file': f"shard_{number:05d}.tokens.npy", 'offsets_file': f"shard_{number:05d}.offsets.npy"}
+        np.save(staging / names['tokens_file'], tokens)
+        np.save(staging / names['offsets_file'], offsets)
+        shards.append({**names, 'examples': len(batch), 'tokens': int(offsets[-1])})
+        return int(offsets[-1])
+
+    def _prune(self, keep_key: str):
+        """최근에 사용한 keep개만 남기고 오래된 캐시 삭제"""
+        entries = [
+            path for path in self.cache_dir.iterdir()
+            if path.is_dir() and not path.name.startswith('.') and path.name != keep_key
+        ]
+        entries.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in entries[self.keep - 1:]:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"오래된 토큰 캐시 삭제: {path.name}")
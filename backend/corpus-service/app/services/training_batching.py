@@ -0,0 +1,166 @@
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import torch
+from torch.utils.data import Sampler
+from transformers import Trainer
+
+logger = logging.getLogger(__name__)
+
+def sequence_lengths(dataset: Any) -> np.ndarray:
+    """학습 데이터셋의 예시별 실제 토큰 수 (패딩 제외)
+
+    TokenizedCorpus는 샤드 경계(offsets)에서 바로 구하고, 그 밖의 데이터셋은
+    attention_mask 합(없으면 input_ids 길이)으로 계산한다.
+    """
+    lengths = getattr(dataset, 'lengths', None)
+    if lengths is not None:
+        return np.asarray(lengths, dtype=np.int64)
+
+    column_names = getattr(dataset, 'column_names', None)
+    if column_names is not None:
+        # HuggingFace 데이터셋: 행마다 __getitem__을 거치지 않고 열 단위로 읽음
+        column = 'attention_mask' if 'attention_mask' in column_names else 'input_ids'
+        values = dataset[column]
+        if column == 'attention_mask':
+            return np.array([int(sum(mask)) for mask in values], dtype=np.int64)
+        return np.array([len(ids) for ids in values], dtype=np.int64)
+
+    result = np.zeros(len(dataset), dtype=np.int64)
+    for index in range(len(dataset)):
+        example = dataset[index]
+        mask = example.get('attention_mask')
+        result[index] = int(sum(mask)) if mask is not None else len(example['input_ids'])
+    return result
+
+class LengthBucketSampler(Sampler[int]):
+    """길이가 비슷한 예시끼리 같은 배치에 오도록 인덱스 순서를 만드는 샘플러
+
+    전체를 섞은 뒤 batch_size * bucket_batches개씩 버킷으로 나누고, 버킷 안에서 길이순으로
+    정렬해 batch_size개씩 배치를 만든 다음 배치 순서를 다시 섞는다. 연속한 batch_size개가
+    한 배치이므로 DataLoader(batch_size=...)와 분산 학습의 배치 분할에 그대로 쓸 수 있다.
+    에포크마다 set_epoch(epoch)로 seed + epoch 기준 순서가 바뀐다.
+    """
+
+    def __init__(
+        self,
+        lengths: Sequence[int],
+        batch_size: int,
+        bucket_batches: int = 50,
+        shuffle: bool = True,
+        seed: int = 0
+    ):
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.batch_size = max(1, batch_size)
+        self.bucket_batches = max(1, bucket_batches)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def batches(self) -> List[np.ndarray]:
+        """이번 에포크의 배치별 인덱스"""
+        count = len(self.lengths)
+        rng = np.random.default_rng(self.seed + self.epoch)
+        indices = rng.permutation(count) if self.shuffle else np.arange(count)
+        bucket_size = self.batch_size * self.bucket_batches
+
+        batches = []
+        for start in range(0, count, bucket_size):
+            bucket = indices[start:start + bucket_size]
+            # 긴 예시부터 (첫 배치에서 최대 메모리 사용량이 드러나도록)
+            bucket = bucket[np.argsort(-self.lengths[bucket], kind='stable')]
+            batches.extend(bucket[i:i + self.batch_size] for i in range(0, len(bucket), self.batch_size))
+
+        if self.shuffle and len(batches) > 1:
+            # 가장 긴 배치를 맨 앞에 두고 나머지 순서만 섞음
+            longest = max(range(len(batches)), key=lambda i: self.lengths[batches[i]].max())
+            batches[0], batches[longest] = batches[longest], batches[0]
+            rest = batches[1:]
+            batches = [batches[0]] + [rest[i] for i in rng.permutation(len(rest))]
+        return batches
+
+    def __iter__(self) -> Iterator[int]:
+        for batch in self.batches():
+            yield from batch.tolist()
+
+class DynamicPaddingCollator:
+    """배치 안의 최대 길이까지만 패딩하는 Causal LM 콜레이터
+
+    예시는 패딩 없는 input_ids(리스트 또는 텐서)를 받으며, attention_mask가 있으면 그 길이로
+    잘라 이미 max_length까지 패딩된 데이터도 처리한다. labels는 input_ids와 같고 패딩 위치만
+    -100이다 (패딩 토큰이 EOS와 같아도 실제 EOS는 학습에 포함). 예시에 labels가 있으면
+    (패킹 블록의 문맥 전용 구간 등) 그대로 쓰고 패딩 위치만 -100으로 채운다.
+
+    예시에 position_ids가 있으면(PackedSequenceDataset) attention_mask 대신 position_ids를
+    돌려준다. 패딩 위치는 0부터 다시 세어 별도 조각이 되므로 실제 토큰이 참조하지 않는다.
+    """
+
+    def __init__(self, pad_token_id: int, pad_to_multiple_of: Optional[int] = None, padding_side: str = 'right'):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.padding_side = padding_side
+
+    def __call__(self, features: List[Dict[str, Any]]) -> Dict[str, torch.Tensor]:
+        sequences, targets, positions = [], [], []
+        for feature in features:
+            ids = torch.as_tensor(feature['input_ids'], dtype=torch.long)
+            target = feature.get('labels')
+            target = torch.as_tensor(target, dtype=torch.long) if target is not None else ids
+            position = feature.get('position_ids')
+            position = torch.as_tensor(position, dtype=torch.long) if position is not None else None
+            mask = feature.get('attention_mask')
+            if mask is not None:
+                keep = torch.as_tensor(mask, dtype=torch.bool)
+                ids, target = ids[keep], target[keep]
+                position = position[keep] if position is not None else None
+            sequences.append(ids)
+            targets.append(target)
+            positions.append(position)
+        packed = any(position is not None for position in positions)
+
+        longest = max((len(ids) for ids in sequences), default=0)
+        if self.pad_to_multiple_of:
+            longest = -(-longest // self.pad_to_multiple_of) * self.pad_to_multiple_of
+
+        input_ids = torch.full((len(sequences), longest), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), longest), dtype=torch.long)
+        labels = torch.full((len(sequences), longest), -100, dtype=torch.long)
+        position_ids = torch.zeros((len(sequences), longest), dtype=torch.long) if packed else None
+        for row, (ids, target, position) in enumerate(zip(sequences, targets, positions)):
+            span = slice(longest - len(ids), longest) if self.padding_side == 'left' else slice(0, len(ids))
+            input_ids[row, span] = ids
+            attention_mask[row, span] = 1
+            labels[row, span] = target
+            if packed:
+                padding = slice(0, longest - len(ids)) if self.padding_side == 'left' else slice(len(ids), longest)
+                position_ids[row, span] = position if position is not None else torch.arange(len(ids))
+                position_ids[row, padding] = torch.arange(longest - len(ids))
+
+        if packed:
+            return {'input_ids': input_ids, 'position_ids': position_ids, 'labels': labels}
+        return {'input_ids': input_ids, 'attention_mask': attention_mask, 'labels': labels}
+
+class LengthBucketTrainer(Trainer):
+    """학습 샘플러를 LengthBucketSampler로 바꾼 Trainer (DataLoader 구성은 Trainer 그대로)"""
+
+    def __init__(self, *args, bucket_batches: int = 50, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bucket_batches = bucket_batches
+
+    def _get_train_sampler(self, train_dataset=None) -> Optional[Sampler]:
+        dataset = train_dataset if train_dataset is not None else self.train_dataset
+        if dataset is None or not hasattr(dataset, '__len__'):
+            return super()._get_train_sampler(train_dataset)
+        return LengthBucketSampler(
+            sequence_lengths(dataset),
+            self.args.train_batch_size,
+            bucket_batches=self.bucket_batches,
+            seed=self.args.seed
+        )
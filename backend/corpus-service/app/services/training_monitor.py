@@ -0,0 +1,188 @@
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from transformers import TrainerCallback
+
+logger = logging.getLogger(__name__)
+
+# 스트림/상태 조회가 끝났다고 볼 수 있는 상태
+FINISHED_STATES = ('completed', 'failed')
+
+def memory_usage_mb() -> Dict[str, Optional[float]]:
+    """현재 프로세스 메모리 (RSS, 최대 RSS, MB). 측정할 수 없는 플랫폼에서는 None"""
+    rss = peak = None
+    try:
+        with open("/proc/self/statm", "r") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux는 KB, macOS는 바이트 단위
+        peak = maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+    except (ImportError, OSError):
+        pass
+    return {
+        'rss_mb': round(rss, 1) if rss is not None else None,
+        'peak_rss_mb': round(peak, 1) if peak is not None else None
+    }
+
+class TrainingMonitor:
+    """학습 작업 진행 상황 공유 상태 (학습 스레드가 기록하고 API가 읽음)
+
+    한 번에 하나의 학습 작업만 추적한다. 상태는 idle → preparing → training →
+    completed/failed 순으로 바뀌고, 갱신될 때마다 version이 1씩 올라 스트림이 변경을 감지한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._state: Dict[str, Any] = self._initial_state()
+
+    @staticmethod
+    def _initial_state() -> Dict[str, Any]:
+        return {
+            'job_id': None,
+            'status': 'idle',
+            'message': None,
+            'started_at': None,
+            'finished_at': None,
+            'current_step': 0,
+            'total_steps': 0,
+            'current_epoch': 0.0,
+            'total_epochs': 0,
+            'progress': 0.0,
+            'loss': None,
+            'learning_rate': None,
+            'tokens_seen': 0,
+            'tokens_per_second': None,
+            'samples_per_second': None,
+            'elapsed_seconds': 0.0,
+            'eta_seconds': None,
+            'memory': memory_usage_mb(),
+            'result': None,
+            'error': None
+        }
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._state['status'] in ('preparing', 'training')
+
+    def begin(self, message: Optional[str] = None) -> str:
+        """새 학습 작업 시작 (이미 진행 중이면 RuntimeError), 작업 ID 반환"""
+        with self._lock:
+            if self._state['status'] in ('preparing', 'training'):
+                raise RuntimeError(f"이미 학습 작업이 진행 중입니다: {self._state['job_id']}")
+            self._state = self._initial_state()
+            self._state.update({
+                'job_id': uuid.uuid4().hex[:12],
+                'status': 'preparing',
+                'message': message,
+                'started_at': time.time()
+            })
+            self._version += 1
+            return self._state['job_id']
+
+    def update(self, **fields: Any):
+        """진행 상황 필드 갱신 (진행률은 스텝 기준으로 다시 계산)"""
+        with self._lock:
+            self._state.update(fields)
+            total_steps = self._state['total_steps']
+            if total_steps:
+                self._state['progress'] = round(min(1.0, self._state['current_step'] / total_steps), 4)
+            self._version += 1
+
+    def finish(self, result: Optional[Dict[str, Any]] = None):
+        self._close('completed', message="학습 완료", result=result, progress=1.0, eta_seconds=0.0)
+
+    def fail(self, error: str):
+        self._close('failed', message="학습 실패", error=error)
+
+    def _close(self, status: str, **fields: Any):
+        with self._lock:
+            started_at = self._state['started_at']
+            now = time.time()
+            self._state.update(fields)
+            self._state.update({
+                'status': status,
+                'finished_at': now,
+                'elapsed_seconds': round(now - started_at, 2) if started_at else 0.0,
+                'memory': memory_usage_mb()
+            })
+            self._version += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 상태 복사본 (version 포함)"""
+        with self._lock:
+            state = dict(self._state)
+            state['version'] = self._version
+            return state
+
+class TrainingProgressCallback(TrainerCallback):
+    """Trainer 진행 상황(스텝, 에포크, 손실, tokens/sec, ETA, 메모리)을 TrainingMonitor에 기록
+
+    토큰 수는 TrainingArguments(include_num_input_tokens_seen="non_padding")로 Trainer가 모든
+    rank에서 모은 값을 쓴다. 분산 학습이면 rank 0만 기록한다.
+    """
+
+    def __init__(self, monitor: TrainingMonitor):
+        self.monitor = monitor
+        self._start_time = None
+        self._start_step = 0
+        self._start_tokens = 0
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        if not state.is_world_process_zero:
+            return
+        self._start_time = time.time()
+        self._start_step = state.global_step
+        self._start_tokens = state.num_input_tokens_seen
+        self.monitor.update(
+            status='training',
+            current_step=state.global_step,
+            total_steps=state.max_steps,
+            total_epochs=state.num_train_epochs,
+            memory=memory_usage_mb()
+        )
+
+    def on_step_end(self, args, state, control, **kwargs):
+        if not state.is_world_process_zero or self._start_time is None:
+            return
+        elapsed = time.time() - self._start_time
+        steps = state.global_step - self._start_step
+        tokens = state.num_input_tokens_seen - self._start_tokens
+        step_time = elapsed / steps if steps else None
+        samples_per_step = args.per_device_train_batch_size * args.gradient_accumulation_steps * args.world_size
+        self.monitor.update(
+            current_step=state.global_step,
+            current_epoch=round(state.epoch or 0.0, 3),
+            tokens_seen=state.num_input_tokens_seen,
+            tokens_per_second=round(tokens / elapsed, 1) if elapsed > 0 else None,
+            samples_per_second=round(steps * samples_per_step / elapsed, 2) if elapsed > 0 else None,
+            elapsed_seconds=round(elapsed, 2),
+            eta_seconds=round(step_time * max(0, state.max_steps - state.global_step), 1) if step_time else None,
+            memory=memory_usage_mb()
+        )
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if not state.is_world_process_zero or not logs:
+            return
+        fields = {}
+        if 'loss' in logs:
+            fields['loss'] = round(float(logs['loss']), 4)
+        elif 'train_loss' in logs:
+            fields['loss'] = round(float(logs['train_loss']), 4)
+        if 'learning_rate' in logs:
+            fields['learning_rate'] = float(logs['learning_rate'])
+        if fields:
+            self.monitor.update(**fields)
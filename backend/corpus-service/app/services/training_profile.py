@@ -0,0 +1,138 @@
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import torch
+
+from .distributed_training import distributed_env
+
+logger = logging.getLogger(__name__)
+
+def available_cpus() -> int:
+    """이 프로세스가 쓸 수 있는 CPU 수 (CPU affinity와 cgroup CPU 할당량 반영)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+
+    # 컨테이너(cgroup v2)에서 CPU 할당량이 걸려 있으면 그 이하로
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+@dataclass
+class TrainingProfile:
+    """학습 실행 설정 (하이퍼파라미터 + DataLoader 워커/프리페치 + torch 스레드 수)
+
+    batch_size/epochs가 None이면 start_training이 데이터셋 크기에 맞춰 고른다. batch_size는
+    프로세스(rank)당 배치 크기이며, 전역 배치는 batch_size × world_size × gradient_accumulation_steps.
+    dataloader_workers가 0이면 메인 프로세스에서 데이터를 읽고, torch_threads가 0이면
+    스레드 수를 바꾸지 않는다.
+    """
+    batch_size: Optional[int] = None
+    epochs: Optional[int] = None
+    learning_rate: float = 2e-4
+    gradient_accumulation_steps: int = 1
+    dataloader_workers: int = 0
+    persistent_workers: bool = False
+    prefetch_factor: Optional[int] = None
+    multiprocessing_context: Optional[str] = None
+    torch_threads: int = 0
+    ddp_backend: str = "gloo"
+
+    @classmethod
+    def detect(
+        cls,
+        batch_size: Optional[int] = None,
+        epochs: Optional[int] = None,
+        learning_rate: float = 2e-4,
+        gradient_accumulation_steps: int = 1,
+        workers: int = -1,
+        persistent_workers: bool = True,
+        prefetch_factor: int = 2,
+        threads: int = 0,
+        ddp_backend: str = "gloo"
+    ) -> "TrainingProfile":
+        """사용 가능한 코어 수로 워커/스레드 수 결정
+
+        workers < 0이면 자동: Linux(fork)에서는 코어 4개당 워커 1개(최대 4개), 그 밖의
+        플랫폼(macOS 등 spawn)에서는 메인 프로세스 로딩을 유지한다. threads가 0이면
+        워커에 준 코어를 뺀 나머지를 학습 연산(intra-op) 스레드로 쓴다. torchrun으로 한
+        머신에서 여러 rank를 띄우면 코어를 rank 수(LOCAL_WORLD_SIZE)로 나눠 계산한다.
+        """
+        cpus = max(1, available_cpus() // distributed_env()['local_world_size'])
+        linux = sys.platform.startswith("linux")
+        if workers < 0:
+            workers = min(4, cpus // 4) if linux else 0
+        if threads <= 0:
+            threads = max(1, cpus - workers)
+        return cls(
+            batch_size=batch_size or None,
+            epochs=epochs or None,
+            learning_rate=learning_rate,
+            gradient_accumulation_steps=max(1, gradient_accumulation_steps),
+            dataloader_workers=workers,
+            persistent_workers=persistent_workers and workers > 0,
+            prefetch_factor=max(1, prefetch_factor) if workers > 0 else None,
+            multiprocessing_context="fork" if linux and workers > 0 else None,
+            torch_threads=threads,
+            ddp_backend=ddp_backend or "gloo"
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "TrainingProfile":
+        """Settings의 HT_* 학습 설정으로 프로필 생성"""
+        return cls.detect(
+            batch_size=settings.HT_BATCH_SIZE,
+            epochs=settings.HT_EPOCHS,
+            learning_rate=settings.HT_LEARNING_RATE,
+            gradient_accumulation_steps=settings.HT_GRADIENT_ACCUMULATION_STEPS,
+            workers=settings.HT_DATALOADER_WORKERS,
+            persistent_workers=settings.HT_PERSISTENT_WORKERS,
+            prefetch_factor=settings.HT_PREFETCH_FACTOR,
+            threads=settings.HT_TORCH_THREADS,
+            ddp_backend=settings.HT_DDP_BACKEND
+        )
+
+    def dataloader_arguments(self) -> Dict[str, Any]:
+        """TrainingArguments에 넘길 DataLoader 인수 (CPU 학습이므로 pin_memory는 끔)"""
+        return {
+            'dataloader_num_workers': self.dataloader_workers,
+            'dataloader_persistent_workers': self.persistent_workers and self.dataloader_workers > 0,
+            'dataloader_prefetch_factor': self.prefetch_factor if self.dataloader_workers > 0 else None,
+            'dataloader_multiprocessing_context': self.multiprocessing_context if self.dataloader_workers > 0 else None,
+            'dataloader_pin_memory': False
+        }
+
+    def apply_threads(self) -> int:
+        """torch intra-op 스레드 수 적용, 이전 값 반환 (restore_threads로 되돌림)"""
+        previous = torch.get_num_threads()
+        if self.torch_threads > 0 and self.torch_threads != previous:
+            torch.set_num_threads(self.torch_threads)
+            logger.info(f"torch 스레드 수: {previous} → {self.torch_threads}")
+        return previous
+
+    @staticmethod
+    def restore_threads(previous: int):
+        if torch.get_num_threads() != previous:
+            torch.set_num_threads(previous)
+
+    def describe(self) -> Dict[str, Any]:
+        """로그/응답용 요약"""
+        env = distributed_env()
+        return {
+            'cpus': available_cpus(),
+            'world_size': env['world_size'],
+            'gradient_accumulation_steps': self.gradient_accumulation_steps,
+            'torch_threads': self.torch_threads or torch.get_num_threads(),
+            'dataloader_workers': self.dataloader_workers,
+            'persistent_workers': self.persistent_workers,
+            'prefetch_factor': self.prefetch_factor
+        }
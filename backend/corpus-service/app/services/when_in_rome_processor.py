@@ -1,10 +1,13 @@
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
-import json
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
 import music21 as m21
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+from .corpus_exporter import gzip_chunks, iter_csv, iter_json, iter_ndjson, write_chunks
+from .corpus_index import CorpusIndex
+from .rntxt_parser import RomanNumeralAnalysis, WorkAnalysis, load_work_analysis, parse_measure_line
 
 logger = logging.getLogger(__name__)
 
@@ -19,36 +22,31 @@ class WhenInRomeItem:
     score_path: Optional[str]
     metadata: Dict[str, Any]
 
-@dataclass
-class RomanNumeralAnalysis:
-    """로마 숫자 분석 결과"""
-    measure: int
-    roman_numeral: str
-    key: str
-    inversion: Optional[str]
-    secondary_dominant: Optional[str]
-    modulation: Optional[str]
-    form_section: Optional[str]
-
-@dataclass
-class WorkAnalysis:
-    """작품 분석 결과"""
-    composer: str
-    title: str
-    movement: str
-    time_signature: str
-    form: str
-    key_signature: str
-    analysis: List[RomanNumeralAnalysis]
-    total_measures: int
+# 작곡가 디렉토리 단위 스캔 메서드 (병렬 스캔 시 작업 분할 기준)
+COMPOSER_SCANNERS = {
+    "Piano_Sonatas": "_scan_piano_sonata_composer",
+    "OpenScore-LiederCorpus": "_scan_lieder_composer",
+    "Quartets": "_scan_quartet_composer",
+}
 
 class WhenInRomeProcessor:
     """When-in-Rome 코퍼스 데이터 처리기"""
     
-    def __init__(self, corpus_base_path: str):
+    def __init__(
+        self,
+        corpus_base_path: str,
+        index_path: Optional[str] = None,
+        scan_workers: int = 1,
+        scan_executor: str = "process"
+    ):
         self.corpus_base_path = Path(corpus_base_path)
         self.corpus_items: List[WhenInRomeItem] = []
         self.processed_data: Dict[str, Any] = {}
+        # 증분 스캔용 메타데이터 인덱스 (경로가 없으면 매번 전체 파싱)
+        self.index: Optional[CorpusIndex] = CorpusIndex(index_path) if index_path else None
+        # 병렬 스캔 설정 (워커 1개 이하면 순차 스캔)
+        self.scan_workers = scan_workers
+        self.scan_executor = scan_executor
         
     def scan_corpus(self) -> List[WhenInRomeItem]:
         """When-in-Rome 코퍼스 디렉토리 스캔"""
@@ -58,30 +56,104 @@ class WhenInRomeProcessor:
             logger.warning(f"코퍼스 경로가 존재하지 않습니다: {self.corpus_base_path}")
             return []
         
+        if self.scan_workers > 1:
+            corpus_items = self._scan_corpus_parallel()
+        else:
+            corpus_items = []
+            
+            # 각 코퍼스 디렉토리 스캔
+            for corpus_dir in self._iter_corpus_dirs():
+                corpus_name = corpus_dir.name
+                logger.info(f"코퍼스 처리 중: {corpus_name}")
+                
+                # 코퍼스별 처리
+                if corpus_name == "Piano_Sonatas":
+                    items = self._scan_piano_sonatas(corpus_dir, corpus_name)
+                elif corpus_name == "OpenScore-LiederCorpus":
+                    items = self._scan_lieder_corpus(corpus_dir, corpus_name)
+                elif corpus_name == "Quartets":
+                    items = self._scan_quartets(corpus_dir, corpus_name)
+                else:
+                    items = self._scan_generic_corpus(corpus_dir, corpus_name)
+                
+                corpus_items.extend(items)
+        
+        if self.index is not None:
+            self.index.save()
+        
+        self.corpus_items = corpus_items
+        logger.info(f"코퍼스 스캔 완료: {len(corpus_items)}개 아이템 발견")
+        return corpus_items
+    
+    def scan_composer(self, corpus_name: str, composer: str) -> List[WhenInRomeItem]:
+        """작곡가 디렉토리 하나만 다시 스캔하여 기존 아이템 교체 (업로드 후 증분 갱신용)"""
+        scanner_name = COMPOSER_SCANNERS.get(corpus_name)
+        if scanner_name is None:
+            raise ValueError(f"작곡가 단위 스캔을 지원하지 않는 코퍼스: {corpus_name}")
+        
+        composer_dir = self.corpus_base_path / corpus_name / composer
+        items = getattr(self, scanner_name)(composer_dir, corpus_name) if composer_dir.is_dir() else []
+        
+        if self.index is not None:
+            # 다른 작곡가 항목은 이번에 확인하지 않았으므로 정리하지 않는다
+            self.index.save(prune=False)
+        
+        self.corpus_items = [
+            item for item in self.corpus_items
+            if not (item.corpus == corpus_name and item.composer == composer)
+        ] + items
+        logger.info(f"작곡가 재스캔 완료: {corpus_name}/{composer} ({len(items)}개 아이템)")
+        return items
+    
+    def _iter_corpus_dirs(self) -> List[Path]:
+        """스캔 대상 하위 코퍼스 디렉토리 목록"""
+        return [
+            corpus_dir for corpus_dir in self.corpus_base_path.iterdir()
+            if corpus_dir.is_dir() and not corpus_dir.name.startswith('.')
+        ]
+    
+    def _scan_corpus_parallel(self) -> List[WhenInRomeItem]:
+        """작곡가 디렉토리 단위로 작업을 나눠 병렬 스캔"""
         corpus_items = []
+        tasks = []
         
-        # 각 코퍼스 디렉토리 스캔
-        for corpus_dir in self.corpus_base_path.iterdir():
-            if not corpus_dir.is_dir() or corpus_dir.name.startswith('.'):
-                continue
-                
+        # 작업 목록 구성 (하위 코퍼스 → 작곡가 디렉토리)
+        for corpus_dir in self._iter_corpus_dirs():
             corpus_name = corpus_dir.name
-            logger.info(f"코퍼스 처리 중: {corpus_name}")
+            if corpus_name not in COMPOSER_SCANNERS:
+                # 일반 코퍼스는 구조가 정해져 있지 않으므로 현재 프로세스에서 처리
+                corpus_items.extend(self._scan_generic_corpus(corpus_dir, corpus_name))
+                continue
             
-            # 코퍼스별 처리
-            if corpus_name == "Piano_Sonatas":
-                items = self._scan_piano_sonatas(corpus_dir, corpus_name)
-            elif corpus_name == "OpenScore-LiederCorpus":
-                items = self._scan_lieder_corpus(corpus_dir, corpus_name)
-            elif corpus_name == "Quartets":
-                items = self._scan_quartets(corpus_dir, corpus_name)
-            else:
-                items = self._scan_generic_corpus(corpus_dir, corpus_name)
+            for composer_dir in corpus_dir.iterdir():
+                if composer_dir.is_dir():
+                    tasks.append((corpus_name, str(composer_dir)))
+        
+        if not tasks:
+            return corpus_items
+        
+        # 각 작업에 해당 작곡가 디렉토리의 인덱스 항목만 전달
+        snapshots = self.index.snapshot_by_prefix([composer_dir for _, composer_dir in tasks]) if self.index is not None else {}
+        
+        executor_class = ThreadPoolExecutor if self.scan_executor == "thread" else ProcessPoolExecutor
+        workers = min(self.scan_workers, len(tasks))
+        logger.info(f"병렬 코퍼스 스캔: {len(tasks)}개 작곡가 디렉토리, 워커 {workers}개 ({self.scan_executor})")
+        
+        with executor_class(max_workers=workers) as executor:
+            results = executor.map(
+                _scan_composer_worker,
+                [str(self.corpus_base_path)] * len(tasks),
+                [corpus_name for corpus_name, _ in tasks],
+                [composer_dir for _, composer_dir in tasks],
+                [snapshots.get(composer_dir) if self.index is not None else None for _, composer_dir in tasks]
+            )
             
-            corpus_items.extend(items)
+            # 제출 순서대로 결과 병합 (순차 스캔과 동일한 순서 유지)
+            for items, index_delta in results:
+                corpus_items.extend(items)
+                if self.index is not None and index_delta is not None:
+                    self.index.merge_delta(index_delta)
         
-        self.corpus_items = corpus_items
-        logger.info(f"코퍼스 스캔 완료: {len(corpus_items)}개 아이템 발견")
         return corpus_items
     
     def _scan_piano_sonatas(self, corpus_dir: Path, corpus_name: str) -> List[WhenInRomeItem]:
@@ -91,87 +163,46 @@ class WhenInRomeProcessor:
         for composer_dir in corpus_dir.iterdir():
             if not composer_dir.is_dir():
                 continue
-                
-            composer = composer_dir.name
-            logger.debug(f"작곡가 처리 중: {composer}")
             
-            for work_dir in composer_dir.iterdir():
-                if not work_dir.is_dir():
-                    continue
-                    
-                work = work_dir.name
-                
-                for movement_dir in work_dir.iterdir():
-                    if not movement_dir.is_dir():
-                        continue
-                        
-                    movement = movement_dir.name
-                    
-                    # 분석 파일 확인
-                    analysis_file = movement_dir / "analysis.txt"
-                    if not analysis_file.exists():
-                        continue
-                    
-                    # 악보 파일 확인 (Working 디렉토리 내)
-                    score_path = None
-                    working_dir = movement_dir / "Working"
-                    if working_dir.exists():
-                        for file in working_dir.iterdir():
-                            if file.suffix in ['.mxl', '.xml', '.mid', '.midi']:
-                                score_path = str(file)
-                                break
-                    
-                    # 메타데이터 수집
-                    metadata = self._extract_metadata_from_analysis(analysis_file)
-                    
-                    item = WhenInRomeItem(
-                        corpus=corpus_name,
-                        composer=composer,
-                        work=work,
-                        movement=movement,
-                        analysis_path=str(analysis_file),
-                        score_path=score_path,
-                        metadata=metadata
-                    )
-                    
-                    items.append(item)
+            items.extend(self._scan_piano_sonata_composer(composer_dir, corpus_name))
         
         return items
     
-    def _scan_lieder_corpus(self, corpus_dir: Path, corpus_name: str) -> List[WhenInRomeItem]:
-        """리더 코퍼스 스캔"""
+    def _scan_piano_sonata_composer(self, composer_dir: Path, corpus_name: str) -> List[WhenInRomeItem]:
+        """피아노 소나타 작곡가 디렉토리 스캔"""
         items = []
         
-        for composer_dir in corpus_dir.iterdir():
-            if not composer_dir.is_dir():
+        composer = composer_dir.name
+        logger.debug(f"작곡가 처리 중: {composer}")
+        
+        for work_dir in composer_dir.iterdir():
+            if not work_dir.is_dir():
                 continue
                 
-            composer = composer_dir.name
-            logger.debug(f"작곡가 처리 중: {composer}")
+            work = work_dir.name
             
-            for work_dir in composer_dir.iterdir():
-                if not work_dir.is_dir():
+            for movement_dir in work_dir.iterdir():
+                if not movement_dir.is_dir():
                     continue
                     
-                work = work_dir.name
-                
-                # 리더는 보통 단일 곡이므로 movement는 "1"로 설정
-                movement = "1"
+                movement = movement_dir.name
                 
                 # 분석 파일 확인
-                analysis_file = work_dir / "analysis.txt"
+                analysis_file = movement_dir / "analysis.txt"
                 if not analysis_file.exists():
                     continue
                 
-                # 악보 파일 확인
+                # 악보 파일 확인 (Working 디렉토리 내)
                 score_path = None
-                for file in work_dir.iterdir():
-                    if file.suffix in ['.mxl', '.xml', '.mid', '.midi']:
-                        score_path = str(file)
-                        break
+                working_dir = movement_dir / "Working"
+                if working_dir.exists():
+                    for file in working_dir.iterdir():
+                        if file.suffix in ['.mxl', '.xml', '.mid', '.midi']:
+                            score_path = str(file)
+                            break
                 
                 # 메타데이터 수집
-                metadata = self._extract_metadata_from_analysis(analysis_file)
+                metadata = self._get_metadata(analysis_file)
                 
                 item = WhenInRomeItem(
                     corpus=corpus_name,
@@ -187,6 +218,63 @@ class WhenInRomeProcessor:
         
         return items
     
+    def _scan_lieder_corpus(self, corpus_dir: Path, corpus_name: str) -> List[WhenInRomeItem]:
+        """리더 코퍼스 스캔"""
+        items = []
+        
+        for composer_dir in corpus_dir.iterdir():
+            if not composer_dir.is_dir():
+                continue
+            
+            items.extend(self._scan_lieder_composer(composer_dir, corpus_name))
+        
+        return items
+    
+    def _scan_lieder_composer(self, composer_dir: Path, corpus_name: str) -> List[WhenInRomeItem]:
+        """리더 작곡가 디렉토리 스캔"""
+        items = []
+        
+        composer = composer_dir.name
+        logger.debug(f"작곡가 처리 중: {composer}")
+        
+        for work_dir in composer_dir.iterdir():
+            if not work_dir.is_dir():
+                continue
+                
+            work = work_dir.name
+            
+            # 리더는 보통 단일 곡이므로 movement는 "1"로 설정
+            movement = "1"
+            
+            # 분석 파일 확인
+            analysis_file = work_dir / "analysis.txt"
+            if not analysis_file.exists():
+                continue
+            
+            # 악보 파일 확인
+            score_path = None
+            for file in work_dir.iterdir():
+                if file.suffix in ['.mxl', '.xml', '.mid', '.midi']:
+                    score_path = str(file)
+                    break
+            
+            # 메타데이터 수집
+            metadata = self._get_metadata(analysis_file)
+            
+            item = WhenInRomeItem(
+                corpus=corpus_name,
+                composer=composer,
+                work=work,
+                movement=movement,
+                analysis_path=str(analysis_file),
+                score_path=score_path,
+                metadata=metadata
+            )
+            
+            items.append(item)
+        
+        return items
+    
     def _scan_quartets(self, corpus_dir: Path, corpus_name: str) -> List[WhenInRomeItem]:
         """현악 4중주 코퍼스 스캔"""
         items = []
@@ -194,48 +282,56 @@ class WhenInRomeProcessor:
         for composer_dir in corpus_dir.iterdir():
             if not composer_dir.is_dir():
                 continue
+            
+            items.extend(self._scan_quartet_composer(composer_dir, corpus_name))
+        
+        return items
+    
+    def _scan_quartet_composer(self, composer_dir: Path, corpus_name: str) -> List[WhenInRomeItem]:
+        """현악 4중주 작곡가 디렉토리 스캔"""
+        items = []
+        
+        composer = composer_dir.name
+        logger.debug(f"작곡가 처리 중: {composer}")
+        
+        for work_dir in composer_dir.iterdir():
+            if not work_dir.is_dir():
+                continue
                 
-            composer = composer_dir.name
-            logger.debug(f"작곡가 처리 중: {composer}")
+            work = work_dir.name
             
-            for work_dir in composer_dir.iterdir():
-                if not work_dir.is_dir():
+            for movement_dir in work_dir.iterdir():
+                if not movement_dir.is_dir():
                     continue
                     
-                work = work_dir.name
+                movement = movement_dir.name
                 
-                for movement_dir in work_dir.iterdir():
-                    if not movement_dir.is_dir():
-                        continue
-                        
-                    movement = movement_dir.name
-                    
-                    # 분석 파일 확인
-                    analysis_file = movement_dir / "analysis.txt"
-                    if not analysis_file.exists():
-                        continue
-                    
-                    # 악보 파일 확인
-                    score_path = None
-                    for file in movement_dir.iterdir():
-                        if file.suffix in ['.mxl', '.xml', '.mid', '.midi']:
-                            score_path = str(file)
-                            break
-                    
-                    # 메타데이터 수집
-                    metadata = self._extract_metadata_from_analysis(analysis_file)
-                    
-                    item = WhenInRomeItem(
-                        corpus=corpus_name,
-                        composer=composer,
-                        work=work,
-                        movement=movement,
-                        analysis_path=str(analysis_file),
-                        score_path=score_path,
-                        metadata=metadata
-                    )
-                    
-                    items.append(item)
+                # 분석 파일 확인
+                analysis_file = movement_dir / "analysis.txt"
+                if not analysis_file.exists():
+                    continue
+                
+                # 악보 파일 확인
+                score_path = None
+                for file in movement_dir.iterdir():
+                    if file.suffix in ['.mxl', '.xml', '.mid', '.midi']:
+                        score_path = str(file)
+                        break
+                
+                # 메타데이터 수집
+                metadata = self._get_metadata(analysis_file)
+                
+                item = WhenInRomeItem(
+                    corpus=corpus_name,
+                    composer=composer,
+                    work=work,
+                    movement=movement,
+                    analysis_path=str(analysis_file),
+                    score_path=score_path,
+                    metadata=metadata
+                )
+                
+                items.append(item)
         
         return items
     
@@ -260,45 +356,38 @@ class WhenInRomeProcessor:
         
         return items
     
+    def _get_metadata(self, analysis_file: Path) -> Dict[str, Any]:
+        """인덱스를 거쳐 메타데이터 조회 (변경된 파일만 다시 파싱)"""
+        if self.index is None:
+            return self._extract_metadata_from_analysis(analysis_file)
+        
+        try:
+            stat = analysis_file.stat()
+        except OSError:
+            return self._extract_metadata_from_analysis(analysis_file)
+        
+        path = str(analysis_file)
+        metadata = self.index.get(path, stat.st_mtime_ns, stat.st_size)
+        if metadata is None:
+            metadata = self._extract_metadata_from_analysis(analysis_file)
+            self.index.put(path, stat.st_mtime_ns, stat.st_size, metadata)
+        
+        return metadata
+    
     def _extract_metadata_from_analysis(self, analysis_file: Path) -> Dict[str, Any]:
         """분석 파일에서 메타데이터 추출"""
         try:
-            with open(analysis_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            work_analysis = load_work_analysis(str(analysis_file))
             
-            metadata = {
-                "title": "Unknown",
-                "composer": "Unknown",
-                "time_signature": "Unknown",
-                "form": "Unknown",
-                "key_signature": "Unknown",
-                "total_measures": 0
+            return {
+                "title": work_analysis.title,
+                "composer": work_analysis.composer,
+                "time_signature": work_analysis.time_signature,
+                "form": work_analysis.form,
+                "key_signature": work_analysis.key_signature,
+                "total_measures": work_analysis.last_measure
             }
             
-            lines = content.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line.startswith('Composer:'):
-                    metadata["composer"] = line.split(':', 1)[1].strip()
-                elif line.startswith('Title:'):
-                    metadata["title"] = line.split(':', 1)[1].strip()
-                elif line.startswith('Time signature:'):
-                    metadata["time_signature"] = line.split(':', 1)[1].strip()
-                elif line.startswith('Form:'):
-                    metadata["form"] = line.split(':', 1)[1].strip()
-                elif line.startswith('Key:'):
-                    metadata["key_signature"] = line.split(':', 1)[1].strip()
-                elif line.startswith('m') and ':' in line:
-                    # 마디 정보에서 총 마디 수 추정
-                    try:
-                        measure_info = line.split(':', 1)[0]
-                        measure_num = int(measure_info[1:])
-                        metadata["total_measures"] = max(metadata["total_measures"], measure_num)
-                    except:
-                        pass
-            
-            return metadata
-            
         except Exception as e:
             logger.error(f"메타데이터 추출 실패 {analysis_file}: {e}")
             return {
@@ -311,122 +400,16 @@ class WhenInRomeProcessor:
             }
     
     def parse_analysis_file(self, analysis_path: str) -> WorkAnalysis:
-        """분석 파일 파싱"""
+        """분석 파일 파싱 (파일별 캐시 사용)"""
         try:
-            with open(analysis_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            lines = content.split('\n')
-            
-            # 헤더 정보 추출
-            composer = "Unknown"
-            title = "Unknown"
-            movement = "Unknown"
-            time_signature = "Unknown"
-            form = "Unknown"
-            key_signature = "Unknown"
-            
-            analysis = []
-            
-            for line in lines:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                
-                if line.startswith('Composer:'):
-                    composer = line.split(':', 1)[1].strip()
-                elif line.startswith('Title:'):
-                    title = line.split(':', 1)[1].strip()
-                elif line.startswith('Movement:'):
-                    movement = line.split(':', 1)[1].strip()
-                elif line.startswith('Time signature:'):
-                    time_signature = line.split(':', 1)[1].strip()
-                elif line.startswith('Form:'):
-                    form = line.split(':', 1)[1].strip()
-                elif line.startswith('Key:'):
-                    key_signature = line.split(':', 1)[1].strip()
-                elif line.startswith('m') and ':' in line:
-                    # 마디 분석 파싱
-                    try:
-                        measure_analysis = self._parse_measure_line(line)
-                        if measure_analysis:
-                            analysis.append(measure_analysis)
-                    except Exception as e:
-                        logger.debug(f"마디 파싱 실패: {line} - {e}")
-            
-            return WorkAnalysis(
-                composer=composer,
-                title=title,
-                movement=movement,
-                time_signature=time_signature,
-                form=form,
-                key_signature=key_signature,
-                analysis=analysis,
-                total_measures=len(analysis)
-            )
-            
+            return load_work_analysis(analysis_path)
         except Exception as e:
             logger.error(f"분석 파일 파싱 실패 {analysis_path}: {e}")
             raise
     
-    def _parse_measure_line(self, line: str) -> Optional[RomanNumeralAnalysis]:
-        """마디 라인 파싱"""
-        try:
-            # 예: "m1 c#: i" 또는 "m5 i" 또는 "m7 i b2 E: ii"
-            parts = line.split()
-            if len(parts) < 2:
-                return None
-            
-            # 마디 번호 추출
-            measure_part = parts[0]
-            if not measure_part.startswith('m'):
-                return None
-            
-            measure = int(measure_part[1:])
-            
-            # 로마 숫자와 키 정보 추출
-            roman_numeral = None
-            key = None
-            inversion = None
-            secondary_dominant = None
-            modulation = None
-            form_section = None
-            
-            for part in parts[1:]:
-                if ':' in part:
-                    # 키 정보 (예: "c#:", "E:")
-                    key_part = part.rstrip(':')
-                    if len(key_part) <= 3:  # 키는 보통 3자 이하
-                        key = key_part
-                elif part.startswith('b'):
-                    # 인버전 정보 (예: "b2", "b6")
-                    inversion = part
-                elif part.startswith('V'):
-                    # 보조 도미넌트
-                    secondary_dominant = part
-                elif part in ['i', 'I', 'ii', 'II', 'iii', 'III', 'iv', 'IV', 'v', 'V', 'vi', 'VI', 'vii', 'VII']:
-                    # 로마 숫자
-                    roman_numeral = part
-                elif part in ['Exposition', 'Development', 'Recapitulation', 'Coda', 'Introduction']:
-                    # 형식 섹션
-                    form_section = part
-            
-            if not roman_numeral:
-                return None
-            
-            return RomanNumeralAnalysis(
-                measure=measure,
-                roman_numeral=roman_numeral,
-                key=key or "Unknown",
-                inversion=inversion,
-                secondary_dominant=secondary_dominant,
-                modulation=modulation,
-                form_section=form_section
-            )
-            
-        except Exception as e:
-            logger.debug(f"마디 라인 파싱 실패: {line} - {e}")
-            return None
+    def _parse_measure_line(self, line: str) -> List[RomanNumeralAnalysis]:
+        """마디 라인 파싱 (화음별 레코드 목록)"""
+        return parse_measure_line(line)
     
     def get_statistics(self) -> Dict[str, Any]:
         """코퍼스 통계 정보 반환"""
@@ -459,19 +442,26 @@ class WhenInRomeProcessor:
             "score_coverage": f"{score_count}/{len(self.corpus_items)} ({score_count/len(self.corpus_items)*100:.1f}%)"
         }
     
-    def export_to_json(self, output_path: str) -> bool:
-        """처리된 데이터를 JSON으로 내보내기"""
+    def iter_export(self, format: str, compress: bool = False) -> Iterator[bytes]:
+        """내보내기 데이터를 청크 단위로 생성 (전체 문서를 메모리에 만들지 않음)"""
+        # 재스캔 중에도 일관된 목록을 내보내도록 현재 목록 참조를 고정
+        items = self.corpus_items
+        
+        if format == 'json':
+            chunks = iter_json(items, len(items), self.get_statistics())
+        elif format == 'ndjson':
+            chunks = iter_ndjson(items)
+        elif format == 'csv':
+            chunks = iter_csv(items)
+        else:
+            raise ValueError(f"지원하지 않는 형식: {format}")
+        
+        return gzip_chunks(chunks) if compress else chunks
+    
+    def export_to_json(self, output_path: str, compress: bool = False) -> bool:
+        """처리된 데이터를 JSON으로 내보내기 (아이템 단위 스트리밍 기록)"""
         try:
-            # 코퍼스 아이템들을 딕셔너리로 변환
-            corpus_data = {
-                "total_items": len(self.corpus_items),
-                "corpus_items": [asdict(item) for item in self.corpus_items],
-                "statistics": self.get_statistics()
-            }
-            
-            # JSON 파일로 저장
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(corpus_data, f, ensure_ascii=False, indent=2)
+            write_chunks(self.iter_export('json', compress), output_path)
             
             logger.info(f"데이터 내보내기 완료: {output_path}")
             return True
@@ -480,28 +470,22 @@ class WhenInRomeProcessor:
             logger.error(f"데이터 내보내기 실패: {e}")
             return False
     
-    def export_to_csv(self, output_path: str) -> bool:
-        """처리된 데이터를 CSV로 내보내기"""
+    def export_to_ndjson(self, output_path: str, compress: bool = False) -> bool:
+        """처리된 데이터를 NDJSON(한 줄에 아이템 하나)으로 내보내기"""
         try:
-            # DataFrame 생성
-            data = []
-            for item in self.corpus_items:
-                data.append({
-                    'corpus': item.corpus,
-                    'composer': item.composer,
-                    'work': item.work,
-                    'movement': item.movement,
-                    'analysis_path': item.analysis_path,
-                    'score_path': item.score_path,
-                    'title': item.metadata.get('title', ''),
-                    'time_signature': item.metadata.get('time_signature', ''),
-                    'form': item.metadata.get('form', ''),
-                    'key_signature': item.metadata.get('key_signature', ''),
-                    'total_measures': item.metadata.get('total_measures', 0)
-                })
+            write_chunks(self.iter_export('ndjson', compress), output_path)
+            
+            logger.info(f"NDJSON 내보내기 완료: {output_path}")
+            return True
             
-            df = pd.DataFrame(data)
-            df.to_csv(output_path, index=False, encoding='utf-8')
+        except Exception as e:
+            logger.error(f"NDJSON 내보내기 실패: {e}")
+            return False
+    
+    def export_to_csv(self, output_path: str, compress: bool = False) -> bool:
+        """처리된 데이터를 CSV로 내보내기 (청크 단위 기록)"""
+        try:
+            write_chunks(self.iter_export('csv', compress), output_path)
             
             logger.info(f"CSV 내보내기 완료: {output_path}")
             return True
@@ -509,3 +493,21 @@ class WhenInRomeProcessor:
         except Exception as e:
             logger.error(f"CSV 내보내기 실패: {e}")
             return False
+
+def _scan_composer_worker(
+    corpus_base_path: str,
+    corpus_name: str,
+    composer_dir: str,
+    index_entries: Optional[Dict[str, Tuple[int, int, Dict[str, Any]]]]
+) -> Tuple[List[WhenInRomeItem], Optional[Dict[str, Any]]]:
+    """병렬 스캔 작업 단위: 작곡가 디렉토리 하나를 스캔하고 인덱스 변경분을 반환"""
+    processor = WhenInRomeProcessor(corpus_base_path)
+    if index_entries is not None:
+        # 디스크 대신 부모 프로세스가 넘겨준 항목만 쓰는 메모리 인덱스
+        processor.index = CorpusIndex.from_entries(index_entries)
+    
+    scanner = getattr(processor, COMPOSER_SCANNERS[corpus_name])
+    items = scanner(Path(composer_dir), corpus_name)
+    
+    index_delta = processor.index.export_delta() if processor.index is not None else None
+    return items, index_delta
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+화성 진행 제약 디코딩 벤치마크 스크립트
+
+같은 프롬프트에 대해 자유 텍스트 생성(기존 방식, length = 생성 토큰 수)과
+코퍼스 화음 어휘 트라이로 제한한 생성(length = 화음 수)을 비교한다.
+제안마다 쓸 수 있는 화음(어휘에 있는 "조성:로마숫자") 수, 모델 forward 호출 수,
+지연 시간을 측정해 화음 하나를 얻는 데 드는 forward 수를 출력한다.
+
+사용법: python benchmark_constrained_decoding.py [모델 이름] [어댑터 경로 또는 -] [프롬프트 수] [화음 수]
+"""
+
+import sys
+import os
+import re
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import torch
+
+from app.core.config import settings
+from app.services.corpus_processor import CorpusProcessor
+from app.services.harmony_constraints import build_chord_vocabulary
+from app.services.harmony_transformer import HarmonyTransformerService
+from benchmark_quantization import build_prompts
+
+_CHORD_PATTERN = re.compile(r"[A-Ga-g][#b-]?:\S+")
+
+def usable_chords(suggestion, vocabulary):
+    """제안에서 어휘에 있는 화음 수 (자유 텍스트는 마디 구분자로 나눈 조각에서 추출)"""
+    count = 0
+    for part in suggestion['progression']:
+        count += sum(1 for chord in _CHORD_PATTERN.findall(part) if chord in vocabulary)
+    return count
+
+def run_mode(service, prompts, length, constrained, vocabulary):
+    """모드 하나로 프롬프트별 생성 후 화음 수, forward 호출 수, 시간 집계"""
+    calls = [0]
+    handle = service.model.register_forward_hook(lambda *_: calls.__setitem__(0, calls[0] + 1))
+    chords = suggestions = 0
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    try:
+        for prompt in prompts:
+            for suggestion in service.generate_harmony_suggestions(prompt, length=length, constrained=constrained):
+                suggestions += 1
+                chords += usable_chords(suggestion, vocabulary)
+    finally:
+        handle.remove()
+    return {
+        "elapsed": time.perf_counter() - start,
+        "forward_calls": calls[0],
+        "suggestions": suggestions,
+        "chords": chords,
+    }
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else settings.HT_MODEL_NAME
+    adapter_path = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2] != "-" else (settings.HT_ADAPTER_PATH or None)
+    prompt_count = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    length = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+
+    print("=== 화성 진행 제약 디코딩 벤치마크 ===")
+    print(f"모델: {model_name}, 어댑터: {adapter_path or '없음'}")
+
+    corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH, settings.CORPUS_INDEX_PATH)
+    corpus_processor.scan_corpus()
+    chords = build_chord_vocabulary(
+        corpus_processor.corpus_items,
+        min_count=settings.HT_CHORD_VOCAB_MIN_COUNT,
+        max_size=settings.HT_CHORD_VOCAB_SIZE
+    )
+    if not chords:
+        print("❌ 코퍼스에서 화음 어휘를 만들 수 없습니다")
+        return False
+    vocabulary = set(chords)
+
+    service = HarmonyTransformerService(model_name, adapter_path=adapter_path, inference_only=True)
+    service.load_model()
+    service.set_chord_vocabulary(chords)
+
+    prompts = build_prompts(settings.WHEN_IN_ROME_CORPUS_PATH, prompt_count)
+    print(f"화음 어휘: {len(chords)}개, 프롬프트: {len(prompts)}개, 길이: {length}\n")
+
+    for name, constrained in (("자유 텍스트", False), ("제약 디코딩", True)):
+        result = run_mode(service, prompts, length, constrained, vocabulary)
+        per_suggestion = result["chords"] / max(result["suggestions"], 1)
+        print(f"{name}:")
+        print(f"  - 제안 {result['suggestions']}개, 쓸 수 있는 화음 {per_suggestion:.2f}개/제안")
+        print(f"  - forward 호출: {result['forward_calls']}회 "
+              f"({result['forward_calls'] / max(result['chords'], 1):.2f}회/화음)")
+        print(f"  - 시간: {result['elapsed'] / len(prompts) * 1000:.1f}ms/프롬프트")
+
+    service.release_model()
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+분산(DDP, gloo) 학습 확장성 벤치마크 스크립트
+
+When-in-Rome 코퍼스 일부로 같은 시드, 같은 전역 배치 크기(프로세스당 배치 × 프로세스 수)로
+1 에포크 LoRA 파인튜닝을 torchrun으로 1, 2, 4, ... 프로세스에서 실행하고
+학습 시간, samples/sec, 최종 손실과 단일 프로세스 대비 속도 향상을 비교한다.
+프로세스마다 코어를 나눠 쓰므로(TrainingProfile) 최대 프로세스 수는 코어 수를 넘지 않는다.
+
+사용법: python benchmark_distributed_training.py [모델 이름] [작품 수] [전역 배치 크기] [최대 프로세스 수]
+"""
+
+import sys
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.services.training_profile import available_cpus
+
+def run_worker(result_path, output_dir, model_name, work_count, batch_size):
+    """torchrun이 띄운 각 rank에서 실행: 학습 후 rank 0이 결과를 result_path에 기록"""
+    from app.services.corpus_processor import CorpusProcessor
+    from app.services.distributed_training import cleanup_distributed, init_distributed, is_main_process, main_process_first
+    from app.services.harmony_transformer import HarmonyTransformerService
+    from app.services.training_profile import TrainingProfile
+
+    init_distributed(settings.HT_DDP_BACKEND)
+    try:
+        corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH, settings.CORPUS_INDEX_PATH)
+        corpus_processor.scan_corpus()
+        service = HarmonyTransformerService(model_name, dataset_cache_dir=settings.HT_DATASET_CACHE_DIR or None)
+        service.load_model()
+        with main_process_first():
+            training_data = service.prepare_training_data(
+                corpus_processor.corpus_items[:work_count],
+                packing=settings.HT_SEQUENCE_PACKING,
+                overlap=settings.HT_PACKING_OVERLAP
+            )
+
+        profile = TrainingProfile.from_settings(settings)
+        profile.batch_size, profile.epochs = batch_size, 1
+        result = service.start_training(training_data, output_dir=output_dir, profile=profile)
+        if is_main_process():
+            with open(result_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, default=str)
+        return bool(result.get('success'))
+    finally:
+        cleanup_distributed()
+
+def launch(processes, model_name, work_count, batch_size, workdir):
+    """torchrun으로 processes개 rank 학습 실행, rank 0 결과 반환 (실패 시 None)"""
+    result_path = os.path.join(workdir, f"result_{processes}.json")
+    output_dir = os.path.join(workdir, f"model_{processes}")
+    command = [
+        sys.executable, "-m", "torch.distributed.run", "--standalone", f"--nproc-per-node={processes}",
+        os.path.abspath(__file__), "--worker", result_path, output_dir, model_name, str(work_count), str(batch_size)
+    ]
+    completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        print(f"❌ {processes}개 프로세스 실행 실패:\n{completed.stderr[-2000:]}")
+        return None
+    with open(result_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else settings.HT_MODEL_NAME
+    work_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    global_batch = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    cpus = available_cpus()
+    max_processes = int(sys.argv[4]) if len(sys.argv) > 4 else cpus
+
+    counts = [n for n in (1, 2, 4, 8, 16) if n <= max_processes and global_batch % n == 0]
+    print("=== 분산 학습 확장성 벤치마크 ===")
+    print(f"모델: {model_name}, 작품: {work_count}개, 전역 배치 크기: {global_batch}, CPU: {cpus}개")
+    print(f"프로세스 수: {counts} (백엔드: {settings.HT_DDP_BACKEND}, 1 에포크)\n")
+    if max_processes > cpus:
+        print(f"⚠️ 프로세스 수가 CPU 수({cpus})보다 많으면 코어를 나눠 써서 속도 향상이 나오지 않습니다\n")
+
+    workdir = tempfile.mkdtemp(prefix="ddp_benchmark_")
+    try:
+        baseline = None
+        for processes in counts:
+            result = launch(processes, model_name, work_count, global_batch // processes, workdir)
+            if result is None or not result.get('success'):
+                return False
+            summary = result['training_summary']
+            training_time = summary['training_time']
+            baseline = baseline or training_time
+            print(f"{processes}개 프로세스 (프로세스당 배치 {summary['batch_size']}, 전역 배치 {summary['global_batch_size']}):")
+            print(f"  - 학습 시간: {training_time:.1f}초 ({baseline / training_time:.2f}배)")
+            print(f"  - 처리량: {summary['samples_per_second']:.2f} samples/sec")
+            print(f"  - 최종 손실: {summary['final_loss']:.4f}")
+        return True
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        result_path, output_dir, model_name, work_count, batch_size = sys.argv[2:7]
+        success = run_worker(result_path, output_dir, model_name, int(work_count), int(batch_size))
+    else:
+        success = main()
+    sys.exit(0 if success else 1)
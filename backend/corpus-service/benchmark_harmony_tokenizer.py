@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+화성 토크나이저 벤치마크 스크립트
+
+코퍼스로 화성 토크나이저(HarmonyTokenizer)를 만들어 저장/로드한 뒤, 학습 텍스트를
+모델 BPE 토크나이저와 비교해 작품당 토큰 수, 인코딩 시간, 임베딩 행렬 크기를 출력한다.
+
+사용법: python benchmark_harmony_tokenizer.py [BPE 토크나이저(모델) 이름] [작품 수]
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from transformers import AutoTokenizer
+
+from app.core.config import settings
+from app.services.corpus_processor import CorpusProcessor
+from app.services.harmony_tokenizer import HarmonyTokenizer
+from app.services.harmony_transformer import HarmonyDataset
+
+def measure(encode, sequences):
+    """(전체 토큰 수, 최대 길이, 소요 시간)"""
+    start = time.perf_counter()
+    lengths = [len(encode(sequence)) for sequence in sequences]
+    return sum(lengths), max(lengths, default=0), time.perf_counter() - start
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else settings.HT_MODEL_NAME
+    work_count = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print("=== 화성 토크나이저 벤치마크 ===")
+    corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH, settings.CORPUS_INDEX_PATH)
+    corpus_processor.scan_corpus()
+    corpus_items = corpus_processor.corpus_items[:work_count]
+
+    start = time.perf_counter()
+    tokenizer = HarmonyTokenizer.build(corpus_items)
+    build_time = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        tokenizer.save_pretrained(directory)
+        if HarmonyTokenizer.from_pretrained(directory).tokens != tokenizer.tokens:
+            print("❌ 저장/로드한 어휘가 다릅니다")
+            return False
+
+    bpe = AutoTokenizer.from_pretrained(model_name)
+    data = HarmonyDataset(corpus_items, tokenizer).processed_data
+    if not data:
+        print("❌ 학습 데이터가 없습니다")
+        return False
+    print(f"작품: {len(data)}개, 화성 어휘: {len(tokenizer)}개 (생성 {build_time:.2f}초), BPE 어휘: {len(bpe)}개\n")
+
+    harmony = measure(tokenizer.encode_harmony, [item['harmony_sequence'] for item in data])
+    reference = measure(lambda text: bpe.encode(text, add_special_tokens=False), [item['text'] for item in data])
+
+    d_model = 512
+    for name, (total, longest, elapsed), vocab in (("화성 토크나이저", harmony, len(tokenizer)), (f"BPE ({model_name})", reference, len(bpe))):
+        print(f"{name}:")
+        print(f"  - 토큰: {total / len(data):.1f}개/작품 (최대 {longest})")
+        print(f"  - 인코딩: {elapsed * 1000:.1f}ms")
+        print(f"  - 임베딩 행렬 (d_model={d_model}): {vocab * d_model * 4 / 1024 / 1024:.2f}MB")
+    print(f"\n시퀀스 길이: {reference[0] / max(harmony[0], 1):.2f}배 짧음")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
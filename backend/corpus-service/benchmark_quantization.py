@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Harmony Transformer 추론 정밀도 벤치마크 스크립트
+
+추론 전용(어댑터 병합) 모델을 float32, 동적 int8, bf16으로 각각 로드해
+When-in-Rome 분석 파일에서 만든 고정 프롬프트에 대해 지연 시간, 메모리,
+float32 대비 출력 일치율(다음 토큰 top-1, 탐욕 생성 토큰)을 비교한다.
+
+사용법: python benchmark_quantization.py [모델 이름] [어댑터 경로 또는 -] [프롬프트 수] [생성 토큰 수]
+"""
+
+import sys
+import os
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import torch
+
+from app.core.config import settings
+from app.services.harmony_transformer import HarmonyTransformerService
+from app.services.model_quantization import QUANTIZATION_MODES, bf16_supported, model_nbytes
+from app.services.rntxt_parser import load_work_analysis
+
+# 코퍼스를 찾을 수 없을 때 사용하는 고정 프롬프트
+FALLBACK_PROMPTS = [
+    "m1 C:I | m2 C:IV | m3 C:V | m4 C:I",
+    "m1 a:i | m2 a:iv | m3 a:V | m4 a:i",
+    "m1 G:I | m2 G:vi | m3 G:ii | m4 G:V",
+    "m1 F:I | m2 F:V | m3 F:vi | m4 F:IV",
+]
+
+def build_prompts(corpus_path, count, measures=8):
+    """코퍼스의 분석 파일(정렬 순) 앞부분 화음으로 고정 프롬프트 생성"""
+    prompts = []
+    for analysis_file in sorted(Path(corpus_path).rglob("analysis.txt")):
+        try:
+            columns = load_work_analysis(str(analysis_file)).analysis
+        except Exception:
+            continue
+        parts = []
+        for record in columns[:measures]:
+            key = record.key if record.key and record.key != "Unknown" else "C"
+            parts.append(f"m{record.measure} {key}:{record.roman_numeral}")
+        if parts:
+            prompts.append(" | ".join(parts))
+        if len(prompts) >= count:
+            break
+    return prompts or FALLBACK_PROMPTS[:count]
+
+def current_rss():
+    """현재 프로세스 RSS (바이트, Linux /proc 기준)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+def run_mode(model_name, adapter_path, mode, prompts, new_tokens):
+    """정밀도 모드 하나로 로드 후 다음 토큰 예측과 탐욕 생성 결과 및 시간 측정"""
+    rss_before = current_rss()
+    start = time.perf_counter()
+    service = HarmonyTransformerService(model_name, adapter_path=adapter_path, inference_only=True, quantization=mode)
+    service.load_model()
+    load_time = time.perf_counter() - start
+
+    model, tokenizer = service.model, service.tokenizer
+    next_tokens, generated, latencies = [], [], []
+    with torch.inference_mode():
+        for prompt in prompts:
+            inputs = tokenizer(prompt, return_tensors="pt")
+            logits = model(**inputs).logits
+            next_tokens.append(logits[0].argmax(-1))
+
+            start = time.perf_counter()
+            output = model.generate(
+                **inputs,
+                max_new_tokens=new_tokens,
+                min_new_tokens=new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id
+            )
+            latencies.append(time.perf_counter() - start)
+            generated.append(output[0, inputs["input_ids"].shape[1]:])
+
+    result = {
+        "load_time": load_time,
+        "model_bytes": model_nbytes(model),
+        "rss_delta": current_rss() - rss_before,
+        "latency": sum(latencies) / len(latencies),
+        "next_tokens": next_tokens,
+        "generated": generated,
+    }
+    service.release_model()
+    return result
+
+def agreement(reference, candidate):
+    """(다음 토큰 top-1 일치율, 생성 토큰 위치별 일치율, 생성 시퀀스 완전 일치율)"""
+    next_equal = next_total = gen_equal = gen_total = exact = 0
+    for ref, cand in zip(reference["next_tokens"], candidate["next_tokens"]):
+        next_equal += int((ref == cand).sum())
+        next_total += len(ref)
+    for ref, cand in zip(reference["generated"], candidate["generated"]):
+        length = min(len(ref), len(cand))
+        gen_equal += int((ref[:length] == cand[:length]).sum())
+        gen_total += max(len(ref), len(cand))
+        exact += int(len(ref) == len(cand) and bool((ref == cand).all()))
+    return (
+        next_equal / max(next_total, 1),
+        gen_equal / max(gen_total, 1),
+        exact / max(len(reference["generated"]), 1),
+    )
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else settings.HT_MODEL_NAME
+    adapter_path = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2] != "-" else (settings.HT_ADAPTER_PATH or None)
+    prompt_count = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    new_tokens = int(sys.argv[4]) if len(sys.argv) > 4 else 16
+
+    print("=== Harmony Transformer 추론 정밀도 벤치마크 ===")
+    print(f"모델: {model_name}, 어댑터: {adapter_path or '없음'}")
+    print(f"스레드: {torch.get_num_threads()}, bf16 하드웨어 지원: {'예' if bf16_supported() else '아니오'}")
+
+    prompts = build_prompts(settings.WHEN_IN_ROME_CORPUS_PATH, prompt_count)
+    print(f"프롬프트: {len(prompts)}개, 생성 토큰: {new_tokens}개\n")
+
+    results = {}
+    for mode in (None,) + QUANTIZATION_MODES:
+        name = mode or "float32"
+        try:
+            results[name] = run_mode(model_name, adapter_path, mode, prompts, new_tokens)
+        except Exception as e:
+            print(f"❌ {name} 실행 실패: {e}")
+
+    reference = results.get("float32")
+    if reference is None:
+        print("❌ float32 기준 결과가 없습니다")
+        return False
+
+    for name, result in results.items():
+        print(f"{name}:")
+        print(f"  - 로드 시간: {result['load_time']:.2f}초")
+        print(f"  - 모델 크기: {result['model_bytes'] / 1024 / 1024:.1f}MB (RSS 증가 {result['rss_delta'] / 1024 / 1024:.1f}MB)")
+        print(f"  - 생성 지연: {result['latency'] * 1000:.1f}ms/프롬프트 "
+              f"({result['latency'] / new_tokens * 1000:.2f}ms/토큰, float32 대비 {reference['latency'] / result['latency']:.2f}x)")
+        if name != "float32":
+            next_rate, token_rate, exact_rate = agreement(reference, result)
+            print(f"  - float32 대비 일치율: 다음 토큰 {next_rate * 100:.1f}%, "
+                  f"생성 토큰 {token_rate * 100:.1f}%, 생성 시퀀스 {exact_rate * 100:.1f}%")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+RNTXT 마디 라인 파서 벤치마크 스크립트
+
+기존 split/startswith 기반 파서와 정규식 토크나이저(app.services.rntxt_parser)의
+처리량과 인식한 화음 수를 코퍼스 전체에서 비교한다.
+
+사용법: python benchmark_rntxt_parser.py [코퍼스 경로] [반복 횟수]
+"""
+
+import sys
+import os
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.rntxt_parser import MEASURE_LINE_RE, parse_measure_tokens
+from app.core.config import settings
+
+LEGACY_ROMAN_NUMERALS = ['i', 'I', 'ii', 'II', 'iii', 'III', 'iv', 'IV', 'v', 'V', 'vi', 'VI', 'vii', 'VII']
+LEGACY_FORM_SECTIONS = ['Exposition', 'Development', 'Recapitulation', 'Coda', 'Introduction']
+
+def legacy_parse_measure_line(line):
+    """기존 WhenInRomeProcessor._parse_measure_line 로직 (비교용)"""
+    try:
+        parts = line.split()
+        if len(parts) < 2:
+            return None
+
+        measure_part = parts[0]
+        if not measure_part.startswith('m'):
+            return None
+
+        measure = int(measure_part[1:])
+
+        roman_numeral = None
+        key = None
+        inversion = None
+        secondary_dominant = None
+        form_section = None
+
+        for part in parts[1:]:
+            if ':' in part:
+                key_part = part.rstrip(':')
+                if len(key_part) <= 3:
+                    key = key_part
+            elif part.startswith('b'):
+                inversion = part
+            elif part.startswith('V'):
+                secondary_dominant = part
+            elif part in LEGACY_ROMAN_NUMERALS:
+                roman_numeral = part
+            elif part in LEGACY_FORM_SECTIONS:
+                form_section = part
+
+        if not roman_numeral:
+            return None
+
+        return (measure, roman_numeral, key or "Unknown", inversion, secondary_dominant, None, form_section)
+
+    except Exception:
+        return None
+
+def load_measure_lines(corpus_path):
+    """코퍼스의 모든 analysis.txt에서 마디 라인을 메모리로 읽기 (I/O 제외 목적)"""
+    lines = []
+    file_count = 0
+
+    for analysis_file in Path(corpus_path).rglob("analysis.txt"):
+        file_count += 1
+        with open(analysis_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('m'):
+                    lines.append(line)
+
+    return file_count, lines
+
+def run_legacy(lines):
+    """기존 파서 (기존 동작): ':'가 있는 라인만, 라인당 최대 1개 화음"""
+    chords = 0
+    for line in lines:
+        if ':' in line and legacy_parse_measure_line(line):
+            chords += 1
+    return chords
+
+def run_legacy_all_lines(lines):
+    """기존 파서를 모든 마디 라인에 적용 (같은 작업량 비교용)"""
+    chords = 0
+    for line in lines:
+        if legacy_parse_measure_line(line):
+            chords += 1
+    return chords
+
+def run_tokenizer(lines):
+    """정규식 토크나이저: 모든 마디 라인, 화음별 레코드 (조성은 라인 간 유지)"""
+    chords = 0
+    key = None
+    for line in lines:
+        match = MEASURE_LINE_RE.match(line)
+        if match:
+            records, key = parse_measure_tokens(int(match.group(1)), match.group(2), key)
+            chords += len(records)
+    return chords
+
+def benchmark(name, func, lines, repeat):
+    """repeat회 실행 중 가장 빠른 시간 기준으로 처리량 측정"""
+    best = float('inf')
+    chords = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chords = func(lines)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{name}:")
+    print(f"  - 소요 시간: {best * 1000:.1f}ms")
+    print(f"  - 처리량: {len(lines) / best:,.0f} 라인/초")
+    print(f"  - 인식한 화음 수: {chords:,}")
+    return best, chords
+
+def main():
+    corpus_path = sys.argv[1] if len(sys.argv) > 1 else settings.WHEN_IN_ROME_CORPUS_PATH
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print("=== RNTXT 파서 벤치마크 ===")
+    print(f"코퍼스 경로: {corpus_path}")
+
+    if not Path(corpus_path).exists():
+        print("❌ 코퍼스 경로가 존재하지 않습니다!")
+        return False
+
+    file_count, lines = load_measure_lines(corpus_path)
+    print(f"분석 파일: {file_count}개, 마디 라인: {len(lines):,}개, 반복: {repeat}회\n")
+
+    if not lines:
+        print("⚠️  마디 라인이 없습니다")
+        return False
+
+    legacy_time, legacy_chords = benchmark("기존 파서 (':' 라인만)", run_legacy, lines, repeat)
+    full_time, full_chords = benchmark("기존 파서 (모든 마디 라인)", run_legacy_all_lines, lines, repeat)
+    new_time, new_chords = benchmark("정규식 토크나이저", run_tokenizer, lines, repeat)
+
+    print("\n=== 비교 ===")
+    print(f"라인 처리량 비율 (신규/기존 모든 라인): {full_time / new_time:.2f}x")
+    print(f"화음당 시간: 기존 {legacy_time / max(legacy_chords, 1) * 1e6:.2f}µs "
+          f"(모든 라인 {full_time / max(full_chords, 1) * 1e6:.2f}µs), "
+          f"신규 {new_time / max(new_chords, 1) * 1e6:.2f}µs")
+    print(f"인식 화음 비율 (신규/기존): {new_chords / max(legacy_chords, 1):.2f}x")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
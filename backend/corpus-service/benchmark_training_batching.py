@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+학습 배치 구성 벤치마크 스크립트
+
+같은 코퍼스로 CPU에서 LoRA 학습 스텝(forward + backward + optimizer)을 돌려
+기존 방식(max_length 패딩 + 무작위 배치), 배치 최대 길이 패딩(DynamicPaddingCollator),
+길이 버킷 + 배치 패딩(LengthBucketSampler), 시퀀스 패킹 블록(PackedSequenceDataset)의
+학습 토큰 처리량(손실에 들어가는 토큰 기준 tokens/sec)과 코퍼스 토큰 중 학습되는 비율을 비교한다.
+
+사용법: python benchmark_training_batching.py [모델 이름] [작품 수] [배치 크기] [스텝 수]
+"""
+
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import torch
+from torch.utils.data import DataLoader, RandomSampler
+
+from app.core.config import settings
+from app.services.corpus_processor import CorpusProcessor
+from app.services.harmony_transformer import HarmonyTransformerService
+from app.services.training_batching import DynamicPaddingCollator, LengthBucketSampler, sequence_lengths
+
+def run_mode(model, dataset, sampler, collator, batch_size, steps):
+    """학습 스텝을 돌려 (학습 토큰 수, 패딩 포함 토큰 수, 스텝 수, 소요 시간) 반환 (첫 스텝은 워밍업)"""
+    loader = DataLoader(dataset, batch_size=batch_size, sampler=sampler, collate_fn=collator)
+    parameters = [p for p in model.parameters() if p.requires_grad]
+    initial = [p.detach().clone() for p in parameters]
+    optimizer = torch.optim.AdamW(parameters, lr=2e-4)
+    model.train()
+
+    real_tokens = padded_tokens = measured = 0
+    elapsed = 0.0
+    for step, batch in enumerate(loader):
+        if step > steps:
+            break
+        start = time.perf_counter()
+        loss = model(**batch).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        if step == 0:
+            continue
+        elapsed += time.perf_counter() - start
+        real_tokens += int((batch['labels'] != -100).sum())
+        padded_tokens += batch['input_ids'].numel()
+        measured += 1
+
+    # 다음 모드가 같은 가중치에서 시작하도록 복원
+    with torch.no_grad():
+        for parameter, value in zip(parameters, initial):
+            parameter.copy_(value)
+    return real_tokens, padded_tokens, measured, elapsed
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else settings.HT_MODEL_NAME
+    work_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else (settings.HT_BATCH_SIZE or 8)
+    steps = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+
+    print("=== 학습 배치 구성 벤치마크 ===")
+    corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH, settings.CORPUS_INDEX_PATH)
+    corpus_processor.scan_corpus()
+
+    service = HarmonyTransformerService(model_name, dataset_cache_dir=settings.HT_DATASET_CACHE_DIR or None)
+    service.load_model()
+    corpus_items = corpus_processor.corpus_items[:work_count]
+    dataset = service.prepare_training_data(corpus_items)['dataset']
+    packed = service.prepare_training_data(corpus_items, packing=True, overlap=settings.HT_PACKING_OVERLAP)
+    packed_dataset, packing = packed['dataset'], packed['packing']
+    lengths = sequence_lengths(dataset)
+    max_length = service.config['max_seq_length']
+    print(f"모델: {model_name}, 예시: {len(dataset)}개, 배치 크기: {batch_size}, 스텝: {steps}")
+    print(f"예시 길이: 평균 {lengths.mean():.1f}, 최소 {lengths.min()}, 최대 {lengths.max()} (max_length {max_length})")
+    print(f"코퍼스 토큰 중 학습 대상: 자르기 {lengths.sum() / packing['source_tokens']:.1%}, 패킹 100% "
+          f"({packing['blocks']}개 블록, 채움 비율 {packing['fill_ratio']:.1%})\n")
+
+    pad_token_id = service.tokenizer.pad_token_id
+    padding_side = getattr(service.tokenizer, 'padding_side', 'right')
+    generator = torch.Generator().manual_seed(0)
+    collator = DynamicPaddingCollator(pad_token_id, padding_side=padding_side)
+    modes = (
+        ("max_length 패딩 (기존)", dataset, RandomSampler(dataset, generator=generator),
+         DynamicPaddingCollator(pad_token_id, pad_to_multiple_of=max_length, padding_side=padding_side)),
+        ("배치 최대 길이 패딩", dataset, RandomSampler(dataset, generator=generator), collator),
+        ("길이 버킷 + 배치 패딩", dataset, LengthBucketSampler(lengths, batch_size), collator),
+        ("패킹 블록 + 길이 버킷", packed_dataset, LengthBucketSampler(packed_dataset.lengths, batch_size), collator),
+    )
+
+    baseline = None
+    for name, mode_dataset, sampler, collator in modes:
+        real, padded, measured, elapsed = run_mode(service.model, mode_dataset, sampler, collator, batch_size, steps)
+        if not measured:
+            print("❌ 측정할 스텝이 없습니다 (작품 수 또는 배치 크기를 확인하세요)")
+            return False
+        throughput = real / elapsed
+        baseline = baseline or throughput
+        print(f"{name}:")
+        print(f"  - 학습 토큰 비율: {real / padded:.1%} ({real / measured:.0f}/{padded / measured:.0f}개 토큰/배치)")
+        print(f"  - 스텝: {elapsed / measured * 1000:.1f}ms")
+        print(f"  - 처리량: {throughput:.0f} tokens/sec ({throughput / baseline:.2f}배)")
+
+    service.release_model()
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
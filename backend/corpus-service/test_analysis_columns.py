@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+열 단위 분석 저장(AnalysisColumns) 테스트 스크립트
+
+RomanNumeralAnalysis 레코드 목록을 열 배열로 바꿔도 인덱싱/슬라이싱/순회 결과가 기존 목록과
+같은지, 코드 마스크로 계산한 HarmonyAnalysis가 기존 레코드 단위 계산과 같은 결과를 내는지,
+어휘가 피클 왕복 후에도 같은 코드를 주는지 확인한다.
+"""
+
+import sys
+import os
+import pickle
+import random
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.analysis_store import AnalysisColumns, HarmonyVocabulary, RomanNumeralAnalysis, WorkAnalysis
+from app.services.corpus_processor import HarmonyAnalysis
+from app.services.rntxt_parser import parse_measure_rows
+
+def random_records(count, seed=0):
+    """None 값과 여러 조성/전위/형식 섹션이 섞인 레코드 목록"""
+    rng = random.Random(seed)
+    romans = ['I', 'i', 'IV', 'iv', 'V', 'v', 'ii', 'vi', 'viio']
+    records = []
+    for i in range(count):
+        roman = rng.choice(romans)
+        inversion = rng.choice([None, None, '6', '64', '7', '65'])
+        secondary = rng.choice([None, None, None, 'V', 'IV'])
+        records.append(RomanNumeralAnalysis(
+            measure=i // 2 + 1,
+            roman_numeral=roman,
+            key=rng.choice(['C', 'G', 'a', 'Unknown']),
+            inversion=inversion,
+            secondary_dominant=secondary,
+            modulation=rng.choice([None, None, None, 'G', 'a']),
+            form_section=rng.choice([None, None, None, None, 'Exposition', 'Coda']),
+            beat=rng.choice([1.0, 2.0, 2.5, 3.0]),
+            chord=roman + (inversion or "") + (f"/{secondary}" if secondary else "")
+        ))
+    return records
+
+def legacy_harmony_analysis(work_analysis, records):
+    """레코드 단위로 계산하던 기존 HarmonyAnalysis 결과"""
+    cadences, modulations, form_sections = [], [], []
+    for i, analysis in enumerate(records):
+        if i > 0:
+            prev_analysis = records[i - 1]
+            if prev_analysis.roman_numeral in ['V', 'v'] and analysis.roman_numeral in ['I', 'i']:
+                cadences.append(f"V-I (m{prev_analysis.measure}-{analysis.measure})")
+            elif prev_analysis.roman_numeral in ['IV', 'iv'] and analysis.roman_numeral in ['I', 'i']:
+                cadences.append(f"IV-I (m{prev_analysis.measure}-{analysis.measure})")
+        if analysis.key != "Unknown" and analysis.key != work_analysis.key_signature:
+            modulations.append(f"m{analysis.measure}: {analysis.key}")
+        if analysis.form_section:
+            form_sections.append(f"m{analysis.measure}: {analysis.form_section}")
+    return {
+        'roman_numerals': [analysis.roman_numeral for analysis in records],
+        'chord_progressions': [f"{a.key}:{a.roman_numeral}" for a in records if a.key != "Unknown"],
+        'cadences': cadences,
+        'modulations': modulations,
+        'form_sections': form_sections
+    }
+
+def test_sequence_interface():
+    """인덱싱, 음수 인덱스, 슬라이스, 순회가 기존 레코드 목록과 같다"""
+    print("=== 시퀀스 인터페이스 테스트 ===")
+
+    records = random_records(500)
+    columns = AnalysisColumns.from_records(records, HarmonyVocabulary())
+    assert len(columns) == len(records)
+    assert list(columns) == records
+    assert [columns[i] for i in range(len(records))] == records
+    assert columns[-1] == records[-1] and columns[-len(records)] == records[0]
+    for index in (slice(10, 20), slice(None, None, 7), slice(-5, None), slice(30, 10, -3), slice(600, 700)):
+        assert columns[index] == records[index], index
+    for index in (len(records), -len(records) - 1):
+        try:
+            columns[index]
+            raise AssertionError(f"범위 밖 인덱스 {index}가 허용됨")
+        except IndexError:
+            pass
+    print(f"✅ {len(records)}개 레코드: 인덱싱/슬라이스/순회가 기존 목록과 같음, 범위 밖은 IndexError")
+
+    empty = AnalysisColumns.from_records([], HarmonyVocabulary())
+    assert len(empty) == 0 and list(empty) == [] and empty[:] == []
+    print("✅ 빈 분석")
+
+def test_rows_and_columns():
+    """파서 튜플에서 만든 열은 레코드에서 만든 열과 같고, 열 값/마스크는 레코드 필드와 같다"""
+    print("\n=== 열 값/마스크 테스트 ===")
+
+    vocabulary = HarmonyVocabulary()
+    rows, key = [], None
+    for measure, text in enumerate(["C: I b2 V7", "Exposition IV b1.5 V65/V", "a: i", "viio7/V b3 V"], start=1):
+        measure_rows, key = parse_measure_rows(measure, text, key)
+        rows.extend(measure_rows)
+    records = [RomanNumeralAnalysis(*row) for row in rows]
+    columns = AnalysisColumns.from_rows(rows, vocabulary)
+    assert list(columns) == records
+    assert np.array_equal(columns.codes, AnalysisColumns.from_records(records, vocabulary).codes)
+    print(f"✅ 파서 튜플 {len(rows)}개와 레코드에서 만든 열이 같음")
+
+    for name in ('measure', 'beat', 'roman_numeral', 'key', 'inversion', 'secondary_dominant',
+                 'modulation', 'form_section', 'chord'):
+        assert columns.values(name) == [getattr(record, name) for record in records], name
+    assert columns.mask('roman_numeral', ['V', 'v']).tolist() == [r.roman_numeral in ('V', 'v') for r in records]
+    assert columns.mask('modulation', [None]).tolist() == [r.modulation is None for r in records]
+    assert not columns.mask('key', ["없는 조성"]).any()
+    print("✅ values()/mask()가 레코드 필드 비교와 같음")
+
+    view = columns.column('key')
+    try:
+        view[0] = 0
+        raise AssertionError("column() 뷰에 쓸 수 있음")
+    except ValueError:
+        pass
+    assert columns.values('key') == [record.key for record in records]
+    print("✅ column()은 읽기 전용 뷰")
+
+def test_narrowing():
+    """값을 잃지 않을 때만 uint16/float16으로 줄인다"""
+    print("\n=== dtype 축소 테스트 ===")
+
+    records = random_records(200)
+    columns = AnalysisColumns.from_records(records, HarmonyVocabulary())
+    assert columns.measures.dtype == np.uint16 and columns.beats.dtype == np.float16
+    assert columns.codes.dtype == np.uint16
+    assert columns.nbytes == columns.measures.nbytes + columns.beats.nbytes + columns.codes.nbytes
+    assert columns.nbytes == len(records) * (2 + 2 + 2 * columns.codes.shape[0])
+    print(f"✅ uint16/float16 저장: 화음당 {columns.nbytes // len(records)}바이트")
+
+    wide = [RomanNumeralAnalysis(70000, 'I', 'C', None, None, None, None, 1.1)]
+    columns = AnalysisColumns.from_records(wide, HarmonyVocabulary())
+    assert columns.measures.dtype == np.int32 and columns.beats.dtype == np.float32
+    assert columns[0].measure == 70000 and abs(columns[0].beat - 1.1) < 1e-6
+    print("✅ uint16/float16로 표현할 수 없는 마디 번호/박 위치는 원래 dtype 유지")
+
+def test_vocabulary_pickle():
+    """어휘는 None을 코드 0으로 예약하고, 피클 왕복 후에도 같은 코드를 준다"""
+    print("\n=== 어휘 피클 테스트 ===")
+
+    vocabulary = HarmonyVocabulary()
+    assert vocabulary.intern(None) == HarmonyVocabulary.NONE_CODE
+    codes = [vocabulary.intern(value) for value in ('I', 'V', 'I', 'C')]
+    assert codes == [1, 2, 1, 3] and len(vocabulary) == 4
+    assert vocabulary.codes(['V', None, '없음']).tolist() == [2, 0]  # 어휘에 없는 값은 제외
+
+    columns = AnalysisColumns.from_records(random_records(100), vocabulary)
+    restored = pickle.loads(pickle.dumps(columns.vocabulary))
+    assert len(restored) == len(vocabulary)
+    assert restored.decode(columns.codes[1]) == columns.values('key')
+    assert restored.intern('V') == 2 and restored.intern('새 값') == len(vocabulary)
+    print(f"✅ 어휘 {len(vocabulary)}개: 피클 왕복 후 같은 코드, 새 값은 이어서 추가")
+
+def test_harmony_analysis_matches_records():
+    """코드 마스크로 계산한 HarmonyAnalysis가 기존 레코드 단위 계산과 같다"""
+    print("\n=== HarmonyAnalysis 비교 테스트 ===")
+
+    for seed in range(5):
+        records = random_records(400, seed=seed)
+        work = WorkAnalysis(
+            composer="Test", title=f"Work {seed}", movement="1", time_signature="4/4", form="",
+            key_signature="C", analysis=AnalysisColumns.from_records(records), total_measures=200
+        )
+        harmony = HarmonyAnalysis(work)
+        expected = legacy_harmony_analysis(work, records)
+        for name, values in expected.items():
+            assert getattr(harmony, name) == values, (seed, name)
+        assert harmony.cadences, seed
+    print("✅ 5개 작품에서 로마 숫자/화음 진행/종지/전조/형식 섹션이 기존 계산과 같음")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_sequence_interface, test_rows_and_columns, test_narrowing, test_vocabulary_pickle,
+                 test_harmony_analysis_matches_records):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
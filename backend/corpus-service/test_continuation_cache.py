@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+세션별 KV 캐시 이어 쓰기(ContinuationCache, continue_harmony_suggestions) 테스트 스크립트
+
+세션 캐시의 프리픽스 재사용/자르기/LRU 제거와, 이어 쓰기 요청 뒤 세션에 남은 캐시가
+프리픽스 전체를 처음부터 인코딩한 캐시와 같은지 확인한다. 다운로드 없이 임시 디렉토리에
+만든 작은 Llama 모델로 실행한다.
+"""
+
+import sys
+import os
+import tempfile
+
+import torch
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.continuation_cache import ContinuationCache, cache_nbytes
+from app.services.harmony_transformer import HarmonyTransformerService
+
+def write_tiny_model(directory):
+    """작은 Llama 모델과 단어 단위 토크나이저 저장"""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    words = ["<unk>", "<eos>", "C", "F", "G", "Am", "Dm", "Bb", "|", "m1", "m2", "m3", "m4", "m5", "m6"]
+    tokenizer = Tokenizer(models.WordLevel(vocab={word: i for i, word in enumerate(words)}, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="<unk>", eos_token="<eos>").save_pretrained(directory)
+
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=len(words), hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=4, max_position_embeddings=64, eos_token_id=1, bos_token_id=1
+    )
+    LlamaForCausalLM(config).save_pretrained(directory)
+
+def encode(model, token_ids):
+    """프리픽스 전체를 처음부터 인코딩한 KV 캐시"""
+    with torch.no_grad():
+        return model(input_ids=torch.tensor([token_ids]), use_cache=True).past_key_values
+
+def assert_same_cache(cache, expected):
+    assert cache.get_seq_length() == expected.get_seq_length(), (cache.get_seq_length(), expected.get_seq_length())
+    for layer, expected_layer in zip(cache.layers, expected.layers):
+        assert torch.allclose(layer.keys, expected_layer.keys, atol=1e-5)
+        assert torch.allclose(layer.values, expected_layer.values, atol=1e-5)
+
+def test_session_cache():
+    """공통 프리픽스만큼 캐시를 넘기고(자르기 포함), 세션 수/메모리 상한을 지킨다"""
+    print("=== 세션 캐시 테스트 ===")
+
+    from transformers import LlamaForCausalLM
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        write_tiny_model(model_dir)
+        model = LlamaForCausalLM.from_pretrained(model_dir).eval()
+        tokens = [2, 3, 4, 5, 6, 7]
+
+        cache = ContinuationCache(max_sessions=2)
+        assert cache.lookup("a", tokens) == (0, None)
+        assert cache.store("a", tokens, encode(model, tokens))
+        assert cache.lookup("a", [9, 9]) == (0, None) and len(cache) == 1  # 공통 프리픽스 없음: 항목 유지
+
+        # 앞 4개 토큰만 같으면 캐시를 4개로 잘라 넘기고 세션에서는 꺼낸다
+        reused, past_key_values = cache.lookup("a", tokens[:4] + [8, 8])
+        assert reused == 4 and len(cache) == 0
+        assert_same_cache(past_key_values, encode(model, tokens[:4]))
+        print("✅ 공통 프리픽스만큼 잘린 캐시를 꺼내 넘김 (처음부터 인코딩한 캐시와 같음)")
+
+        # 세션 수 상한: 가장 오래 쓰지 않은 세션부터 제거
+        for session in ("a", "b", "c"):
+            cache.store(session, tokens, encode(model, tokens))
+        stats = cache.get_stats()
+        assert len(cache) == 2 and cache.lookup("a", tokens) == (0, None) and stats['evictions'] == 1
+        assert stats['bytes'] == 2 * cache_nbytes(encode(model, tokens))
+        assert cache.drop("b") and not cache.drop("b")
+        print("✅ 세션 수 상한을 넘으면 LRU 세션 제거, drop으로 해제")
+
+        # 메모리 상한보다 큰 캐시는 저장하지 않는다
+        small = ContinuationCache(max_bytes=cache_nbytes(encode(model, tokens[:2])))
+        assert not small.store("a", tokens, encode(model, tokens)) and len(small) == 0
+        assert small.store("a", tokens[:2], encode(model, tokens[:2]))
+        assert small.store("b", tokens[:2], encode(model, tokens[:2])) and len(small) == 1
+        print("✅ 메모리 상한을 넘는 캐시는 저장하지 않고, 상한까지만 세션 유지")
+
+def test_continuation_reuses_prefix():
+    """이어 쓰기 요청은 새 토큰만 인코딩하고, 세션 캐시는 프리픽스를 처음부터 인코딩한 것과 같다"""
+    print("\n=== 이어 쓰기 캐시 재사용 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        write_tiny_model(model_dir)
+        service = HarmonyTransformerService(model_dir)
+        service.load_model()
+        try:
+            def check(context, reused):
+                result = service.continue_harmony_suggestions("s1", context, length=2, num_return_sequences=2)
+                token_ids = service.tokenizer(context)['input_ids']
+                assert result['reused_tokens'] == reused, (context, result)
+                assert result['encoded_tokens'] == len(token_ids) - reused
+                assert result['context_tokens'] == len(token_ids)
+                # generate가 쓴 복사본이 아니라 프리픽스(마지막 토큰 제외)만 담은 캐시가 남아야 한다
+                entry = service.session_cache._entries["s1"]
+                assert entry.token_ids == token_ids[:-1]
+                assert_same_cache(entry.past_key_values, encode(service.model, token_ids[:-1]))
+                return result
+
+            first = "m1 C F | m2 G"
+            check(first, 0)
+            extended = first + " | m3 Am F"
+            check(extended, len(service.tokenizer(first)['input_ids']) - 1)
+            print("✅ 직전 컨텍스트에 마디를 덧붙이면 직전 프리픽스 토큰을 모두 재사용")
+
+            # 중간에서 갈라지는 컨텍스트는 공통 프리픽스까지만 재사용 (캐시를 잘라 사용)
+            diverged = "m1 C F | m2 Dm Bb"
+            check(diverged, 5)
+            print("✅ 갈라진 컨텍스트는 공통 프리픽스까지만 재사용하고 캐시를 잘라 이어 씀")
+
+            assert service.end_session("s1") and not service.end_session("s1")
+            assert check(first, 0)['suggestions'] is not None
+            try:
+                service.continue_harmony_suggestions("s1", "")
+                raise AssertionError("빈 컨텍스트 허용")
+            except ValueError:
+                pass
+            print("✅ 세션 해제 후 처음부터 인코딩, 빈 컨텍스트 거부")
+        finally:
+            service.release_model()
+        assert len(service.session_cache) == 0
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_session_cache, test_continuation_reuses_prefix):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+코퍼스 스트리밍 내보내기(corpus_exporter) 테스트 스크립트
+
+청크 단위로 만든 JSON/NDJSON/CSV 출력이 기존 방식(json.dump 전체 문서, pandas DataFrame.to_csv)과
+같은 내용인지, gzip 스트림이 원본으로 풀리는지, 파일 내보내기가 스트림과 같은 바이트를 쓰는지
+확인한다.
+"""
+
+import sys
+import os
+import gzip
+import json
+import random
+import tempfile
+from dataclasses import asdict
+
+import pandas as pd
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.corpus_exporter import EXPORT_CHUNK_SIZE, export_filename, gzip_chunks, media_type_for
+from app.services.when_in_rome_processor import WhenInRomeItem, WhenInRomeProcessor
+
+def make_processor(count=3000, seed=0):
+    """CSV 인용이 필요한 제목(쉼표/따옴표/줄바꿈)과 한글, 악보 없는 아이템이 섞인 프로세서"""
+    rng = random.Random(seed)
+    titles = ['Sonata', 'Fantasy, "Quasi una"', '소나타 제8번', 'Line\nBreak', 'Rondo; Allegro']
+    processor = WhenInRomeProcessor(tempfile.gettempdir())
+    for number in range(count):
+        corpus = rng.choice(["Piano_Sonatas", "OpenScore-LiederCorpus", "Quartets"])
+        composer = rng.choice(["Beethoven", "Mozart", "Schubert"])
+        path = f"/corpus/{corpus}/{composer}/Op{number}/1"
+        metadata = {
+            'title': f"{rng.choice(titles)} {number}",
+            'time_signature': rng.choice(["4/4", "3/4", "6/8"]),
+            'form': rng.choice(["", "Rondo", "Sonata"]),
+            'key_signature': rng.choice(["Unknown", "C", "a"]),
+            'total_measures': rng.randint(1, 400)
+        }
+        if number % 50 == 0:
+            del metadata['form']  # 메타데이터 키가 빠진 아이템
+        processor.corpus_items.append(WhenInRomeItem(
+            corpus, composer, f"Op{number}", "1", f"{path}/analysis.txt",
+            f"{path}/score.mxl" if rng.random() < 0.4 else None, metadata
+        ))
+    return processor
+
+def legacy_csv(items):
+    """pandas DataFrame으로 만들던 기존 CSV 출력"""
+    data = [{
+        'corpus': item.corpus,
+        'composer': item.composer,
+        'work': item.work,
+        'movement': item.movement,
+        'analysis_path': item.analysis_path,
+        'score_path': item.score_path,
+        'title': item.metadata.get('title', ''),
+        'time_signature': item.metadata.get('time_signature', ''),
+        'form': item.metadata.get('form', ''),
+        'key_signature': item.metadata.get('key_signature', ''),
+        'total_measures': item.metadata.get('total_measures', 0)
+    } for item in items]
+    return pd.DataFrame(data).to_csv(index=False)
+
+def read_stream(chunks):
+    chunks = list(chunks)
+    assert all(isinstance(chunk, bytes) for chunk in chunks)
+    return chunks, b''.join(chunks)
+
+def test_matches_legacy_output():
+    """JSON/NDJSON/CSV 스트림이 기존 전체 문서 출력과 같은 내용이다"""
+    print("=== 스트리밍 내보내기 비교 테스트 ===")
+
+    processor = make_processor()
+    items = processor.corpus_items
+    expected = {
+        "total_items": len(items),
+        "corpus_items": [asdict(item) for item in items],
+        "statistics": processor.get_statistics()
+    }
+
+    chunks, data = read_stream(processor.iter_export('json'))
+    assert json.loads(data.decode('utf-8')) == expected
+    assert len(chunks) > 1 and all(len(chunk) >= EXPORT_CHUNK_SIZE for chunk in chunks[:-1])
+    print(f"✅ JSON: 기존 json.dump 문서와 같은 내용, {len(chunks)}개 청크")
+
+    chunks, data = read_stream(processor.iter_export('ndjson'))
+    lines = data.decode('utf-8').split('\n')
+    assert lines[-1] == '' and [json.loads(line) for line in lines[:-1]] == expected['corpus_items']
+    print(f"✅ NDJSON: 한 줄에 아이템 하나, {len(lines) - 1}줄")
+
+    chunks, data = read_stream(processor.iter_export('csv'))
+    assert data.decode('utf-8') == legacy_csv(items)
+    print("✅ CSV: pandas DataFrame.to_csv 출력과 바이트 단위로 같음 (인용/한글/빈 값 포함)")
+
+    for format in ('json', 'ndjson', 'csv'):
+        _, raw = read_stream(processor.iter_export(format))
+        chunks, compressed = read_stream(processor.iter_export(format, compress=True))
+        assert gzip.decompress(compressed) == raw and len(compressed) < len(raw)
+    print("✅ gzip 스트림을 풀면 압축하지 않은 출력과 같음")
+
+def test_empty_and_files():
+    """빈 코퍼스 내보내기, 파일 내보내기와 스트림의 바이트 일치, 파일 이름/미디어 타입"""
+    print("\n=== 파일 내보내기 테스트 ===")
+
+    empty = WhenInRomeProcessor(tempfile.gettempdir())
+    _, data = read_stream(empty.iter_export('json'))
+    assert json.loads(data) == {"total_items": 0, "corpus_items": [], "statistics": {}}
+    _, data = read_stream(empty.iter_export('csv'))
+    assert data.decode('utf-8').strip() == "corpus,composer,work,movement,analysis_path,score_path,title,time_signature,form,key_signature,total_measures"
+    _, data = read_stream(empty.iter_export('ndjson'))
+    assert data == b''
+    print("✅ 빈 코퍼스: 빈 목록 JSON, 헤더만 있는 CSV, 빈 NDJSON")
+
+    processor = make_processor(count=200, seed=1)
+    with tempfile.TemporaryDirectory() as directory:
+        for format, export in (
+            ('json', processor.export_to_json),
+            ('ndjson', processor.export_to_ndjson),
+            ('csv', processor.export_to_csv)
+        ):
+            for compress in (False, True):
+                path = os.path.join(directory, export_filename(format, compress))
+                assert export(path, compress)
+                with open(path, 'rb') as f:
+                    written = f.read()
+                if compress:
+                    written = gzip.decompress(written)
+                _, raw = read_stream(processor.iter_export(format))
+                assert written == raw, (format, compress)
+    print("✅ export_to_json/ndjson/csv 파일이 스트림과 같은 바이트 (압축 포함)")
+
+    assert export_filename('ndjson', True, prefix="a") == "a.ndjson.gz"
+    assert media_type_for('csv') == "text/csv" and media_type_for('csv', True) == "application/gzip"
+    try:
+        processor.iter_export('xml')
+        raise AssertionError("지원하지 않는 형식 허용")
+    except ValueError:
+        pass
+    assert b''.join(gzip_chunks([])) and gzip.decompress(b''.join(gzip_chunks([]))) == b''
+    print("✅ 파일 이름/미디어 타입, 지원하지 않는 형식 거부")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_matches_legacy_output, test_empty_and_files):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+코퍼스 메타데이터 영속 인덱스(CorpusIndex) 테스트 스크립트
+
+SQLite 인덱스 저장/로드, 스키마 버전이 바뀌면 초기화, 워커 변경분 병합, 보이지 않은 항목 정리,
+그리고 인덱스를 쓰는 재스캔이 전체 파싱과 같은 결과를 내는지 확인한다.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+from dataclasses import asdict
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.corpus_index import CorpusIndex
+from app.services.rntxt_parser import _load_work_analysis_cached
+from app.services.when_in_rome_processor import WhenInRomeProcessor
+
+def write_analysis(path, title, measures=4):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = ["Composer: Test", f"Title: {title}", "Time Signature: 3/4", ""]
+    lines += [f"m{measure} {'C: ' if measure == 1 else ''}I" for measure in range(1, measures + 1)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+def write_corpus(corpus_path):
+    """피아노 소나타 / 리더 / 현악 4중주 구조의 작은 코퍼스, analysis.txt 경로 목록 반환"""
+    paths = []
+    for composer in ("Beethoven", "Mozart"):
+        for work in ("Op001", "Op002"):
+            for movement in ("1", "2"):
+                paths.append(os.path.join(corpus_path, "Piano_Sonatas", composer, work, movement, "analysis.txt"))
+    paths.append(os.path.join(corpus_path, "OpenScore-LiederCorpus", "Schubert", "Song_1", "analysis.txt"))
+    paths.append(os.path.join(corpus_path, "Quartets", "Haydn", "Op20_No1", "1", "analysis.txt"))
+    for number, path in enumerate(paths):
+        write_analysis(path, f"Work {number}", measures=number + 1)
+    return paths
+
+def sorted_items(items):
+    return sorted((asdict(item) for item in items), key=lambda item: item['analysis_path'])
+
+def test_index_store():
+    """저장/로드 왕복, 스키마 버전 변경 시 초기화, 변경분 병합과 정리"""
+    print("=== SQLite 인덱스 저장/로드 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        index_path = os.path.join(directory, "index", "corpus.sqlite")
+        index = CorpusIndex(index_path)
+        assert index.load() == 0
+        index.put("a/analysis.txt", 1, 10, {'title': 'A'})
+        index.put("b/analysis.txt", 2, 20, {'title': 'B'})
+        summary = index.save()
+        assert summary['updated'] == 2 and summary['total'] == 2 and summary['removed'] == 0
+
+        reloaded = CorpusIndex(index_path)
+        assert reloaded.load() == 2
+        assert reloaded.get("a/analysis.txt", 1, 10) == {'title': 'A'}
+        assert reloaded.get("b/analysis.txt", 2, 21) is None  # 크기가 다르면 다시 파싱
+        assert (reloaded.hits, reloaded.misses) == (1, 1)
+        print("✅ 저장한 항목을 다시 로드, stat이 다르면 캐시 무시")
+
+        # 워커가 반환한 변경분 병합 (b는 보이지 않았으므로 정리 대상)
+        worker = CorpusIndex.from_entries({"a/analysis.txt": (1, 10, {'title': 'A'})})
+        worker.get("a/analysis.txt", 1, 10)
+        worker.put("c/analysis.txt", 3, 30, {'title': 'C'})
+        fresh = CorpusIndex(index_path)
+        fresh.merge_delta(worker.export_delta())
+        summary = fresh.save()
+        assert summary == {'hits': 1, 'misses': 0, 'updated': 1, 'removed': 1, 'total': 2}, summary
+        fresh = CorpusIndex(index_path)
+        fresh.load()
+        assert sorted(fresh._entries) == ["a/analysis.txt", "c/analysis.txt"]
+        print("✅ 워커 변경분 병합, 보이지 않은 항목 정리")
+
+        # prune=False(작곡가 단위 재스캔)이면 확인하지 않은 항목도 남긴다
+        fresh.put("d/analysis.txt", 4, 40, {'title': 'D'})
+        assert fresh.save(prune=False)['total'] == 3
+        print("✅ prune=False면 다른 항목 유지")
+
+        # 스키마 버전이 다르면 기존 항목을 비운다
+        conn = sqlite3.connect(index_path)
+        with conn:
+            conn.execute("UPDATE index_meta SET value = '1' WHERE key = 'schema_version'")
+        conn.close()
+        assert CorpusIndex(index_path).load() == 0
+        print("✅ 스키마 버전이 바뀌면 인덱스 초기화")
+
+def test_incremental_scan():
+    """인덱스를 쓰는 재스캔은 바뀐 파일만 다시 파싱하고 결과는 전체 파싱과 같다"""
+    print("\n=== 증분 스캔 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus_path = os.path.join(directory, "Corpus")
+        paths = write_corpus(corpus_path)
+        index_path = os.path.join(directory, "corpus_index.sqlite")
+
+        processor = WhenInRomeProcessor(corpus_path, index_path=index_path)
+        processor.index.load()
+        items = processor.scan_corpus()
+        assert len(items) == len(paths)
+        baseline = sorted_items(WhenInRomeProcessor(corpus_path).scan_corpus())
+        assert sorted_items(items) == baseline
+        assert baseline[0]['metadata']['time_signature'] == "3/4"
+
+        # 크기와 mtime이 같으면 파일을 다시 열지 않는다 (같은 길이로 제목만 바꾸고 mtime 복원)
+        stat = os.stat(paths[1])
+        write_analysis(paths[1], "Wxrk 1", measures=2)
+        os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        _load_work_analysis_cached.cache_clear()
+        processor = WhenInRomeProcessor(corpus_path, index_path=index_path)
+        processor.index.load()
+        assert sorted_items(processor.scan_corpus()) == baseline
+        assert sorted_items(WhenInRomeProcessor(corpus_path).scan_corpus()) != baseline
+        print(f"✅ 재시작 후 재스캔: stat이 같은 {len(paths)}개는 인덱스의 메타데이터 사용")
+        write_analysis(paths[1], "Work 1", measures=2)
+        os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        # 파일 하나 수정, 하나 삭제
+        write_analysis(paths[0], "Changed", measures=12)
+        os.remove(paths[-1])
+        _load_work_analysis_cached.cache_clear()
+        index = CorpusIndex(index_path)
+        index.load()
+        processor = WhenInRomeProcessor(corpus_path, index_path=index_path)
+        processor.index = index
+        items = processor.scan_corpus()
+        assert sorted_items(items) == sorted_items(WhenInRomeProcessor(corpus_path).scan_corpus())
+        changed = next(item for item in items if item.analysis_path == paths[0])
+        assert changed.metadata['title'] == "Changed" and changed.metadata['total_measures'] == 12
+        stored = CorpusIndex(index_path)
+        stored.load()
+        assert paths[-1] not in stored._entries and len(stored._entries) == len(paths) - 1
+        print("✅ 수정된 파일만 다시 파싱, 삭제된 파일은 인덱스에서 제거")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_index_store, test_incremental_scan):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
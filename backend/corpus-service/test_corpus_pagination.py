@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+코퍼스 아이템 커서 페이지네이션 / 필드 선택 테스트 스크립트
+"""
+
+import sys
+import os
+import tempfile
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.corpus_processor import CorpusProcessor
+from app.services.when_in_rome_processor import WhenInRomeItem
+
+GENRES = ("Piano_Sonatas", "Quartets", "OpenScore-LiederCorpus")
+COMPOSERS = ("Beethoven", "Mozart", "Schubert", "Haydn")
+
+def create_processor(corpus_path, count=47):
+    """가짜 When-in-Rome 아이템으로 색인을 채운 프로세서"""
+    processor = CorpusProcessor(corpus_path)
+    items = processor._create_items([
+        WhenInRomeItem(
+            corpus=GENRES[i % len(GENRES)],
+            composer=COMPOSERS[i % len(COMPOSERS)],
+            work=f"Op{i:03d}",
+            movement=str(i % 3 + 1),
+            analysis_path=f"{corpus_path}/analysis_{i}.txt",
+            score_path=f"{corpus_path}/score_{i}.mxl" if i % 2 else None,
+            metadata={'title': f"Work {i}"}
+        )
+        for i in range(count)
+    ])
+    processor.corpus_items = items
+    processor._index_items(items)
+    return processor
+
+def collect_pages(processor, limit, **filters):
+    """next_cursor를 따라가며 모든 페이지의 아이템 ID 수집"""
+    result = processor.get_corpus_page(cursor=None, limit=limit, fields=['item_id'], **filters)
+    ids, pages = [], 0
+    while True:
+        assert result['success'], result
+        assert len(result['items']) <= limit
+        ids.extend(item['item_id'] for item in result['items'])
+        pages += 1
+        if result['next_cursor'] is None:
+            return ids, pages, result['total']
+        result = processor.get_corpus_page(cursor=result['next_cursor'], limit=limit, fields=['item_id'], **filters)
+
+def test_cursor_pagination():
+    """커서를 따라가면 모든 아이템을 ID 순으로 한 번씩 받는다"""
+    print("=== 커서 페이지네이션 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as corpus_path:
+        processor = create_processor(corpus_path)
+        all_ids = [item.item_id for item in processor.corpus_items]
+
+        for limit in (1, 5, 10, 47, 100):
+            ids, pages, total = collect_pages(processor, limit)
+            assert ids == all_ids and total == len(all_ids)
+            assert pages == max(1, -(-len(all_ids) // limit))
+        print(f"✅ 전체 {len(all_ids)}개 아이템: 페이지 크기와 무관하게 누락/중복 없음")
+
+        for genre in GENRES:
+            for composer in (None,) + COMPOSERS:
+                ids, _, total = collect_pages(processor, 4, genre=genre, composer=composer)
+                expected = [
+                    item.item_id for item in processor.corpus_items
+                    if item.genre == genre and (composer is None or item.composer == composer)
+                ]
+                assert ids == expected and total == len(expected)
+        print("✅ 장르/작곡가 필터와 함께 사용")
+
+        # 다음 페이지를 받기 전에 커서가 가리키는 아이템이 지워져도 그다음부터 이어진다
+        first = processor.get_corpus_page(limit=10)
+        processor.facet_index.remove(9)
+        second = processor.get_corpus_page(cursor=first['next_cursor'], limit=10)
+        assert [item['item_id'] for item in second['items']] == list(range(10, 20))
+        print("✅ 커서 위치의 아이템이 삭제되어도 이어서 조회")
+
+def test_cursor_validation():
+    """잘못된 커서와 재스캔 이전의 커서는 거부한다"""
+    print("\n=== 커서 검증 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as corpus_path:
+        processor = create_processor(corpus_path)
+        cursor = processor.get_corpus_page(limit=5)['next_cursor']
+        assert processor.get_corpus_page(cursor=cursor, limit=5)['success']
+
+        for invalid in ("not-a-cursor", "!!!", processor._encode_cursor(3)[:-2] + "xx"):
+            result = processor.get_corpus_page(cursor=invalid, limit=5)
+            assert not result['success'] and result.get('invalid_cursor'), (invalid, result)
+        print("✅ 형식이 잘못된 커서 거부")
+
+        # 빈 디렉토리 재스캔: 스캔 세대가 바뀌므로 이전 커서는 만료
+        processor.scan_corpus()
+        result = processor.get_corpus_page(cursor=cursor, limit=5)
+        assert not result['success'] and result.get('invalid_cursor'), result
+        print("✅ 재스캔 이전 커서 만료")
+
+def test_field_selection():
+    """fields로 지정한 CorpusItem 필드만 직렬화한다"""
+    print("\n=== 필드 선택 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as corpus_path:
+        processor = create_processor(corpus_path, count=3)
+        result = processor.get_corpus_page(limit=3, fields=['item_id', 'composer'])
+        assert [set(item) for item in result['items']] == [{'item_id', 'composer'}] * 3
+        assert result['items'][1] == {'item_id': 1, 'composer': COMPOSERS[1]}
+
+        item = processor.corpus_items[0]
+        full = item.to_dict()
+        assert full['genre'] == GENRES[0] and full['score_path'] is None and 'auto_analysis_path' in full
+        print("✅ 선택 필드 / 전체 필드 직렬화")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_cursor_pagination, test_cursor_validation, test_field_selection):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+업로드 후 작곡가 단위 증분 갱신(refresh_directory) 테스트 스크립트
+
+갱신 후 검색/패싯/진행 검색 결과가 전체 재스캔과 같은지, 그리고 다른 스레드에서 갱신하는
+동안 조회가 실패하지 않는지 확인한다. 합성 코퍼스를 임시 디렉토리에 만들어 실행한다.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.corpus_processor import CorpusProcessor
+
+def write_work(corpus_path, composer, work, title, progression="I IV V I"):
+    """Piano_Sonatas/<작곡가>/<작품>/1/analysis.txt 작성"""
+    movement_dir = os.path.join(corpus_path, "Piano_Sonatas", composer, work, "1")
+    os.makedirs(movement_dir, exist_ok=True)
+    lines = [f"Composer: {composer}", f"Title: {title}", "Time Signature: 4/4", ""]
+    for measure, roman in enumerate(progression.split(), start=1):
+        lines.append(f"m{measure} {'C: ' if measure == 1 else ''}{roman}")
+    with open(os.path.join(movement_dir, "analysis.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return f"Piano_Sonatas/{composer}/{work}/1/analysis.txt"
+
+def snapshot(processor):
+    """비교용 조회 결과 (아이템 ID는 재스캔마다 달라지므로 경로 기준)"""
+    def paths(items):
+        return sorted(item.analysis_path for item in items)
+    return {
+        'items': paths(processor.get_corpus_items()['items']),
+        'composers': processor.get_composers("Piano_Sonatas"),
+        'statistics': processor.get_corpus_statistics()['statistics'],
+        'search': paths(processor.search_corpus("fantasy")['results']),
+        'progression': sorted(
+            (work['composer'], work['set'], [match['start_measure'] for match in work['matches']])
+            for work in processor.search_progression("ii-V")['works']
+        )
+    }
+
+def test_refresh_matches_rescan():
+    """갱신 후 조회 결과가 전체 재스캔한 새 프로세서와 같다"""
+    print("=== 증분 갱신 결과 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as corpus_path:
+        for number in range(3):
+            write_work(corpus_path, "Beethoven", f"Op{number:03d}", f"Sonata {number}")
+            write_work(corpus_path, "Mozart", f"K{number:03d}", f"Fantasy {number}")
+        processor = CorpusProcessor(corpus_path)
+        assert processor.scan_corpus()['success']
+        assert processor.search_corpus("fantasy")['total'] == 3
+
+        # 작품 추가 (진행 ii-V 포함) 후 해당 작곡가만 갱신
+        uploaded = write_work(corpus_path, "Mozart", "K999", "Fantasy Nova", "I ii V I")
+        result = processor.refresh_directory(uploaded)
+        assert result['success'] and result['updated'] == 4, result
+        assert processor.search_corpus("nova")['total'] == 1
+        assert processor.search_progression("ii-V")['total_works'] == 1
+        assert processor.get_corpus_items(composer="Mozart")['total'] == 4
+
+        fresh = CorpusProcessor(corpus_path)
+        fresh.scan_corpus()
+        assert snapshot(processor) == snapshot(fresh)
+        print("✅ 작품 추가 후 검색/패싯/통계/진행 검색이 전체 재스캔과 같음")
+
+        # 작품 삭제 후 갱신
+        shutil.rmtree(os.path.join(corpus_path, "Piano_Sonatas", "Mozart", "K999"))
+        assert processor.refresh_directory("Piano_Sonatas/Mozart")['success']
+        assert processor.search_corpus("nova")['total'] == 0
+        assert processor.search_progression("ii-V")['total_works'] == 0
+        fresh = CorpusProcessor(corpus_path)
+        fresh.scan_corpus()
+        assert snapshot(processor) == snapshot(fresh)
+        print("✅ 작품 삭제 후에도 전체 재스캔과 같음")
+
+        ids = [item.item_id for item in processor.corpus_items]
+        assert len(ids) == len(set(ids))
+        assert not processor.refresh_directory("Unknown/Composer")['success']
+        print("✅ 아이템 ID 중복 없음, 지원하지 않는 경로 거부")
+
+def test_refresh_while_reading():
+    """다른 스레드에서 갱신하는 동안 조회가 실패하지 않고, 동시 갱신이 서로 덮어쓰지 않는다"""
+    print("\n=== 동시 갱신/조회 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as corpus_path:
+        for number in range(20):
+            write_work(corpus_path, "Beethoven", f"Op{number:03d}", f"Sonata {number}")
+            write_work(corpus_path, "Mozart", f"K{number:03d}", f"Sonata {number}")
+        processor = CorpusProcessor(corpus_path)
+        processor.scan_corpus()
+
+        errors = []
+        stop = threading.Event()
+
+        def refresh(composer, rounds=15):
+            try:
+                for _ in range(rounds):
+                    result = processor.refresh_directory(f"Piano_Sonatas/{composer}")
+                    if not result['success']:
+                        errors.append(result['message'])
+            finally:
+                stop.set()
+
+        writers = [threading.Thread(target=refresh, args=(composer,)) for composer in ("Beethoven", "Mozart")]
+        for writer in writers:
+            writer.start()
+        reads = 0
+        while not stop.is_set() or any(writer.is_alive() for writer in writers):
+            for result in (
+                processor.search_corpus("sonata"),
+                processor.get_corpus_items(composer="Mozart"),
+                processor.get_corpus_page(genre="Piano_Sonatas", limit=7),
+                processor.get_corpus_statistics()
+            ):
+                if not result['success']:
+                    errors.append(result['message'])
+            if processor.get_genres() != ["Piano_Sonatas"]:
+                errors.append("장르 목록 불일치")
+            reads += 1
+        for writer in writers:
+            writer.join()
+
+        assert not errors, errors[:3]
+        assert processor.search_corpus("sonata")['total'] == 40
+        assert processor.get_corpus_items(composer="Beethoven")['total'] == 20
+        assert processor.get_corpus_items(composer="Mozart")['total'] == 20
+        print(f"✅ 갱신 30회 동안 조회 {reads}회 모두 성공, 동시 갱신 후 40개 아이템 유지")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_refresh_matches_rescan, test_refresh_while_reading):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+분산(DDP, gloo) 학습 스모크 테스트 스크립트
+
+작은 합성 코퍼스로 torchrun 2개 프로세스에서 두 모델 경로를 각각 1 에포크(rank당 2스텝 이상) 학습한다.
+- LoRA: 작은 Llama 모델 + 단어 단위 토크나이저 (어댑터 외 가중치 고정)
+- HarmonyTransformer: 화성 토크나이저(HT_HARMONY_TOKENIZER_PATH 경로), 손실에 쓰이지 않는 헤드 포함
+다운로드 없이 임시 디렉토리 안에서만 실행된다.
+
+사용법: python test_distributed_training.py
+"""
+
+import sys
+import os
+import json
+import random
+import subprocess
+import tempfile
+from types import SimpleNamespace
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+KEYS = ("C", "G", "a", "d")
+ROMANS = ("I", "ii", "IV", "V", "V7", "vi", "i", "iv")
+WORKS = 16
+
+def write_corpus(directory):
+    """합성 분석 파일(rntxt) WORKS개 생성"""
+    rng = random.Random(0)
+    paths = []
+    for number in range(WORKS):
+        path = os.path.join(directory, "corpus", f"work_{number}", "analysis.txt")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lines = ["Composer: Test", f"Title: Work {number}", "Time Signature: 4/4", ""]
+        for measure in range(1, rng.randint(4, 12) + 1):
+            key = f"{rng.choice(KEYS)}: " if measure == 1 or rng.random() < 0.1 else ""
+            lines.append(f"m{measure} {key}{rng.choice(ROMANS)}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        paths.append(path)
+    return paths
+
+def write_tiny_model(directory):
+    """LoRA 경로용 작은 Llama 모델과 단어 단위 토크나이저 저장"""
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    words = ["<unk>", "<eos>", "<START>", "<END>", "|"] + [f"m{i}" for i in range(1, 13)]
+    words += [f"{key}:{roman}" for key in KEYS for roman in ROMANS]
+    tokenizer = Tokenizer(models.WordLevel(vocab={word: i for i, word in enumerate(words)}, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="<unk>", eos_token="<eos>").save_pretrained(directory)
+
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=len(words), hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=4, max_position_embeddings=128, eos_token_id=1, bos_token_id=1
+    )
+    LlamaForCausalLM(config).save_pretrained(directory)
+
+def run_worker(mode, workdir, result_path):
+    """torchrun이 띄운 각 rank에서 실행: 학습 후 rank 0이 결과를 result_path에 기록"""
+    from app.services.distributed_training import cleanup_distributed, init_distributed, is_main_process, main_process_first
+    from app.services.harmony_transformer import HarmonyTransformerService
+    from app.services.training_profile import TrainingProfile
+
+    init_distributed("gloo")
+    try:
+        corpus_items = [
+            SimpleNamespace(analysis_path=os.path.join(workdir, "corpus", f"work_{number}", "analysis.txt"))
+            for number in range(WORKS)
+        ]
+        if mode == "harmony":
+            service = HarmonyTransformerService(harmony_tokenizer_path=os.path.join(workdir, "harmony_tokenizer"))
+            service.config.update(d_model=32, nhead=4, num_layers=2, max_seq_length=128)
+            with main_process_first():
+                service.prepare_harmony_tokenizer(corpus_items)
+        else:
+            service = HarmonyTransformerService(os.path.join(workdir, "model"))
+            service.config.update(max_seq_length=128)
+        service.load_model()
+        with main_process_first():
+            training_data = service.prepare_training_data(corpus_items)
+
+        profile = TrainingProfile(batch_size=2, epochs=1)
+        result = service.start_training(training_data, output_dir=os.path.join(workdir, f"output_{mode}"), profile=profile)
+        if is_main_process():
+            with open(result_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, default=str)
+        return bool(result.get('success'))
+    finally:
+        cleanup_distributed()
+
+def launch(mode, workdir):
+    """torchrun 2개 프로세스로 mode 모델 학습, rank 0 결과 반환 (실패 시 stderr 출력 후 None)"""
+    result_path = os.path.join(workdir, f"result_{mode}.json")
+    command = [
+        sys.executable, "-m", "torch.distributed.run", "--standalone", "--nproc-per-node=2",
+        os.path.abspath(__file__), "--worker", mode, workdir, result_path
+    ]
+    env = dict(os.environ, HF_HUB_OFFLINE="1", OMP_NUM_THREADS="1")
+    completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=env)
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        print(f"❌ {mode} 분산 학습 실패:\n{completed.stderr[-3000:]}")
+        return None
+    with open(result_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def test_distributed_training():
+    """LoRA / HarmonyTransformer 모델 모두 2개 프로세스 DDP 학습이 끝까지 진행"""
+    print("=== 분산 학습 스모크 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_corpus(workdir)
+        write_tiny_model(os.path.join(workdir, "model"))
+
+        for mode in ("lora", "harmony"):
+            result = launch(mode, workdir)
+            assert result is not None and result['success'], f"{mode} 학습 실패"
+            summary = result['training_summary']
+            assert summary['world_size'] == 2 and summary['global_batch_size'] == 4
+            # 16개 예시 / 전역 배치 4 → rank마다 여러 스텝 (두 번째 스텝부터 DDP 리덕션 검사)
+            assert summary['dataset_size'] == WORKS
+            print(f"✅ {mode}: {summary['world_size']}개 프로세스, 손실 {summary['final_loss']:.4f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        mode, workdir, result_path = sys.argv[2:5]
+        sys.exit(0 if run_worker(mode, workdir, result_path) else 1)
+
+    success = True
+    try:
+        test_distributed_training()
+    except AssertionError as e:
+        print(f"❌ test_distributed_training 실패: {e}")
+        success = False
+    sys.exit(0 if success else 1)
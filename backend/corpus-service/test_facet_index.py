@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+장르/작곡가 패싯 색인(CorpusFacetIndex) 테스트 스크립트
+
+아이템 추가/제거를 반복하는 동안 필터 목록, 장르/작곡가 목록, 통계가 전체 아이템 목록을
+매번 다시 훑어 계산한 결과(기존 방식)와 같은지, 캐시가 변경 시에만 무효화되는지 확인한다.
+"""
+
+import sys
+import os
+import random
+from types import SimpleNamespace
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.facet_index import CorpusFacetIndex
+
+GENRES = ["Piano_Sonatas", "OpenScore-LiederCorpus", "Quartets"]
+COMPOSERS = ["Beethoven", "Mozart", "Haydn", "Schubert"]
+
+def make_item(rng, item_id):
+    return SimpleNamespace(
+        item_id=item_id,
+        genre=rng.choice(GENRES),
+        composer=rng.choice(COMPOSERS),
+        analysis_path=f"{item_id}/analysis.txt" if rng.random() < 0.8 else None,
+        score_path=f"{item_id}/score.mxl" if rng.random() < 0.3 else None
+    )
+
+def brute_force(items, genre=None, composer=None):
+    """전체 목록을 훑어 계산하던 기존 방식의 필터/목록/통계"""
+    filtered = [
+        item for item in items
+        if (not genre or item.genre == genre) and (not composer or item.composer == composer)
+    ]
+    composers = sorted({item.composer for item in items if not genre or item.genre == genre})
+    statistics = {}
+    if items:
+        analysis_count = sum(1 for item in items if item.analysis_path)
+        statistics = {
+            "total_items": len(items),
+            "genre_distribution": {g: sum(1 for item in items if item.genre == g) for g in {i.genre for i in items}},
+            "composer_distribution": {c: sum(1 for item in items if item.composer == c) for c in {i.composer for i in items}},
+            "manual_analysis_count": analysis_count,
+            "score_count": sum(1 for item in items if item.score_path),
+            "analysis_coverage": f"{analysis_count}/{len(items)} ({analysis_count/len(items)*100:.1f}%)"
+        }
+    return filtered, sorted({item.genre for item in items}), composers, statistics
+
+def assert_matches(index, items):
+    for genre in [None] + GENRES:
+        for composer in [None] + COMPOSERS:
+            filtered, genres, composers, statistics = brute_force(items, genre, composer)
+            assert index.items(genre, composer) == filtered, (genre, composer)
+            assert index.count(genre, composer) == len(filtered), (genre, composer)
+        assert index.composers(genre) == composers, genre
+    assert index.genres() == genres
+    assert index.statistics() == statistics
+
+def test_matches_brute_force():
+    """무작위 추가/제거 중에도 목록/통계가 전체를 훑은 결과와 같다"""
+    print("=== 패싯 색인 비교 테스트 ===")
+
+    rng = random.Random(0)
+    index = CorpusFacetIndex()
+    items = []
+    assert index.statistics() == {} and index.genres() == [] and index.items() == []
+    next_id = 0
+    for step in range(300):
+        if items and rng.random() < 0.35:
+            removed = items.pop(rng.randrange(len(items)))
+            index.remove(removed.item_id)
+        else:
+            item = make_item(rng, next_id)
+            next_id += 1
+            items.append(item)
+            index.add(item.item_id, item)
+        if step % 10 == 0:
+            assert_matches(index, items)
+    assert_matches(index, items)
+    assert len(index) == len(items)
+    print("✅ 추가/제거 300회: 장르×작곡가 조합별 목록, 장르/작곡가 목록, 통계가 기존 계산과 같음")
+
+    # 작곡가 하나를 통째로 제거 (증분 갱신과 같은 순서)하면 빈 패싯도 사라진다
+    for item in [item for item in items if item.composer == "Haydn"]:
+        index.remove(item.item_id)
+    items = [item for item in items if item.composer != "Haydn"]
+    assert_matches(index, items)
+    assert "Haydn" not in index.composers() and "Haydn" not in index.statistics()["composer_distribution"]
+    index.remove(-1)  # 없는 ID는 무시
+    print("✅ 작곡가 제거 후 빈 패싯 정리, 없는 ID 제거는 무시")
+
+def test_cache_invalidation():
+    """조회 결과는 변경 전까지 캐시되고, 추가/제거/같은 ID 재추가 시 갱신된다"""
+    print("\n=== 패싯 캐시 테스트 ===")
+
+    rng = random.Random(1)
+    index = CorpusFacetIndex()
+    items = [make_item(rng, item_id) for item_id in range(20)]
+    for item in items:
+        index.add(item.item_id, item)
+    listed, statistics = index.items(), index.statistics()
+    assert index.items() is listed and index.statistics() is statistics
+    print("✅ 변경이 없으면 같은 캐시 객체 반환")
+
+    # 같은 ID로 다시 추가하면 이전 패싯에서 빠진다
+    moved = SimpleNamespace(**{**vars(items[0]), 'genre': "New_Genre", 'composer': "New_Composer"})
+    index.add(moved.item_id, moved)
+    items[0] = moved
+    assert index.items() is not listed and index.statistics() is not statistics
+    assert index.items("New_Genre") == [moved] and len(index) == 20
+    assert index.statistics()["genre_distribution"]["New_Genre"] == 1
+    print("✅ 같은 ID 재추가 시 이전 패싯에서 제거하고 캐시 갱신")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_matches_brute_force, test_cache_invalidation):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+화음 어휘 제약 디코딩(ChordTrie, ChordConstraintProcessor) 테스트 스크립트
+"""
+
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+
+import torch
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.harmony_constraints import (
+    ChordConstraintProcessor,
+    ChordTrie,
+    build_chord_vocabulary,
+    harmony_token,
+    next_measure
+)
+
+EOS_TOKEN_ID = 0
+VOCABULARY = ['C:I', 'C:V', 'C:V7', 'C:IV', 'a:i', 'a:V', 'C:♭VI']
+
+class CharTokenizer:
+    """문자 하나가 토큰 하나인 테스트용 토크나이저 (ASCII 밖의 문자는 "?"로 인코딩)"""
+
+    def encode(self, text, add_special_tokens=False):
+        return [ord(char) if ord(char) < 128 else ord('?') for char in text]
+
+    def decode(self, token_ids):
+        return ''.join(chr(token_id) for token_id in token_ids if token_id != EOS_TOKEN_ID)
+
+def measure_prefixes(trie, context, length):
+    """서비스와 같은 방식의 마디 구분자 토큰 (" | m5", " | m6", ...)"""
+    start = next_measure(context)
+    return [trie.encode(f"{' | ' if context or offset else ''}m{start + offset}") for offset in range(length)]
+
+def test_measure_helpers():
+    """마디 번호 계산과 화음 표기"""
+    print("=== 마디/화음 표기 테스트 ===")
+
+    assert next_measure("m1 C:I | m2 C:V | m3 C:I") == 4
+    assert next_measure("m12 C:I") == 13
+    assert next_measure("C:I | C:IV | C:V") == 4
+    assert next_measure("") == 1
+    assert harmony_token("G", None, "V7") == "G:V7"
+    assert harmony_token("Unknown", "I6", "I") == "C:I6"
+    print("✅ next_measure / harmony_token")
+
+    with tempfile.TemporaryDirectory() as directory:
+        analysis_path = os.path.join(directory, "analysis.txt")
+        with open(analysis_path, "w", encoding="utf-8") as f:
+            f.write("Composer: Test\nTitle: Test\nTime Signature: 4/4\n\n")
+            f.write("m1 C: I b3 V\nm2 IV\nm3 V7 b3 I\nm4 a: i b2 V\n")
+        items = [
+            SimpleNamespace(analysis_path=analysis_path),
+            SimpleNamespace(analysis_path=None),
+            SimpleNamespace(analysis_path=os.path.join(directory, "missing.txt"))
+        ]
+        vocabulary = build_chord_vocabulary(items)
+        assert vocabulary[0] == 'C:I', vocabulary  # 두 번 등장
+        assert set(vocabulary) == {'C:I', 'C:V', 'C:IV', 'C:V7', 'a:i', 'a:V'}
+        assert build_chord_vocabulary(items, min_count=2) == ['C:I']
+        print(f"✅ 분석 파일에서 화음 어휘 수집 (읽을 수 없는 파일은 건너뜀): {vocabulary}")
+
+def test_chord_trie():
+    """트라이: 화음마다 토큰 경로 하나, 표현할 수 없는 화음은 제외"""
+    print("\n=== 화음 트라이 테스트 ===")
+
+    trie = ChordTrie(CharTokenizer(), VOCABULARY + ['C:I'])
+    assert len(trie) == len(VOCABULARY) - 1  # 중복 제외, "C:♭VI"는 디코딩이 달라 제외
+    assert trie.depth == len(" C:V7")
+
+    node = trie.root
+    for token_id in CharTokenizer().encode(" C:V"):
+        node = node.children[token_id]
+    assert node.chord == 'C:V' and ord('7') in node.children
+    print(f"✅ {len(trie)}개 화음, 최대 깊이 {trie.depth}, 접두사가 겹치는 화음(C:V / C:V7) 공존")
+
+def generate(processor, prompt, rows, max_new_tokens, seed):
+    """model.generate처럼 무작위 점수에 프로세서를 적용해 탐욕적으로 토큰을 고름"""
+    generator = torch.Generator().manual_seed(seed)
+    sequences = prompt.repeat(rows, 1)
+    for _ in range(max_new_tokens):
+        scores = processor(sequences, torch.randn(rows, 128, generator=generator))
+        next_tokens = scores.argmax(dim=-1, keepdim=True)
+        sequences = torch.cat([sequences, next_tokens], dim=-1)
+        if (next_tokens == EOS_TOKEN_ID).all():
+            break
+    return sequences
+
+def test_constrained_generation():
+    """제약 디코딩: 모든 행이 구분자 + 어휘 화음으로 정확히 length마디를 만들고 EOS로 끝남"""
+    print("\n=== 제약 디코딩 테스트 ===")
+
+    tokenizer = CharTokenizer()
+    trie = ChordTrie(tokenizer, VOCABULARY)
+    context = "m1 C:I | m2 C:IV | m3 C:V"
+    prompt = torch.tensor([tokenizer.encode(context)])
+    length, rows = 4, 6
+    prefixes = measure_prefixes(trie, context, length)
+    max_new_tokens = sum(len(prefix) for prefix in prefixes) + length * trie.depth
+
+    for seed in range(5):
+        processor = ChordConstraintProcessor(trie, prompt.shape[1], [prefixes] * rows, EOS_TOKEN_ID)
+        sequences = generate(processor, prompt, rows, max_new_tokens + 1, seed)
+        results = processor.finalize(sequences)
+        for row, chords in enumerate(results):
+            assert len(chords) == length and all(chord in VOCABULARY for chord in chords), chords
+            expected = ''.join(f" | m{4 + offset} {chord}" for offset, chord in enumerate(chords))
+            generated = sequences[row, prompt.shape[1]:].tolist()
+            assert EOS_TOKEN_ID in generated
+            assert tokenizer.decode(generated) == expected, (tokenizer.decode(generated), expected)
+    print(f"✅ {rows}개 행 × 5회: 구분자 강제, 어휘 화음 {length}개, EOS 종료")
+
+    # 토큰 한도로 잘린 경우: 끝날 수 있는 위치의 화음만 결과에 포함
+    finished = ChordConstraintProcessor(trie, prompt.shape[1], [prefixes], EOS_TOKEN_ID)
+    sequences = torch.tensor([tokenizer.encode(context + " | m4 C:I | m5 C:V")])
+    assert finished.finalize(sequences) == [['C:I', 'C:V']]
+    truncated = ChordConstraintProcessor(trie, prompt.shape[1], [prefixes], EOS_TOKEN_ID)
+    sequences = torch.tensor([tokenizer.encode(context + " | m4 C:I | m5 C:")])
+    assert truncated.finalize(sequences) == [['C:I']]
+    print("✅ 토큰 한도에서 잘린 화음 제외")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_measure_helpers, test_chord_trie, test_constrained_generation):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
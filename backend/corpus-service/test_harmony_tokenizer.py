@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+화성 토크나이저(HarmonyTokenizer) 테스트 스크립트
+
+코퍼스 분석 파일로 어휘를 만들고, 화성 시퀀스 인코딩 → 디코딩이 원래 마디별 화음(조성 포함)으로
+돌아오는지, 학습 텍스트를 거친 인코딩도 같은 화음으로 디코딩되는지, 저장/로드 후에도
+같은 ID를 주는지, HF 토크나이저 형태의 패딩/자르기가 맞는지 확인한다.
+"""
+
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+
+import torch
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.harmony_tokenizer import (
+    SPECIAL_TOKENS,
+    TOKENIZER_FILE,
+    HarmonyTokenizer,
+    split_chord
+)
+from app.services.harmony_transformer import HarmonyDataset
+
+ANALYSES = [
+    "m1 C: I b3 V65/V\nm2 V7\nm3 a: viio7/V b2 V\nm4 i6 b3 Ger65\nm5 C: I64 b2 V\nm6 I",
+    "m1 Eb: I\nm2 IV6\nm3 ii65 b3 V7\nm4 I\nm5 c: iv b3 bVI\nm6 N6 b3 V",
+    "m1 I\nm2 V\nm3 G: I",  # 첫 마디에 조성 표기가 없는 작품 (조성 미상은 C)
+]
+
+def write_corpus(directory):
+    items = []
+    for number, body in enumerate(ANALYSES):
+        path = os.path.join(directory, f"work_{number}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"Composer: Test\nTitle: Work {number}\n\n{body}\n")
+        items.append(SimpleNamespace(analysis_path=path))
+    items.append(SimpleNamespace(analysis_path=None))
+    return items
+
+def expected_measures(harmony_sequence):
+    """화성 시퀀스의 마디별 "조성:화음" 문자열 (decode_progression 기대값)"""
+    measures = {}
+    for harmony in harmony_sequence:
+        measures.setdefault(harmony['measure'], []).append(f"{harmony['key']}:{harmony['roman_numeral']}")
+    return [" ".join(chords) for chords in measures.values()]
+
+def test_split_chord():
+    """화음 표기를 로마 숫자/전위/부속화음 대상 토큰으로 분리"""
+    print("=== 화음 표기 분리 테스트 ===")
+
+    assert split_chord("V65/V") == ["V", "65", "/V"]
+    assert split_chord("viio7/V") == ["viio", "7", "/V"]
+    assert split_chord("Ger65") == ["Ger", "65"]
+    assert split_chord("bVI") == ["bVI"]
+    assert split_chord("I[add9]") == ["I"]
+    assert split_chord("Exposition") == ["Exposition"]
+    print("✅ V65/V, viio7/V, Ger65, bVI, 추가음 표기, 화음이 아닌 표기")
+
+def test_round_trip():
+    """코퍼스 화성 시퀀스를 인코딩/디코딩하면 원래 마디별 화음이 되고, 텍스트 경로도 같은 화음으로 디코딩된다"""
+    print("\n=== 인코딩/디코딩 왕복 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        items = write_corpus(directory)
+        tokenizer = HarmonyTokenizer.build(items)
+        assert tuple(tokenizer.tokens[:len(SPECIAL_TOKENS)]) == SPECIAL_TOKENS
+        assert tokenizer.pad_token_id == 0 and len(tokenizer) < 60
+        assert {"C:", "a:", "Eb:", "c:", "G:", "V", "65", "/V", "viio", "Ger", "N"} <= set(tokenizer.tokens)
+        print(f"✅ 코퍼스 {len(items) - 1}개 작품으로 어휘 {len(tokenizer)}개 생성 (특수 토큰이 앞 ID)")
+
+        dataset = HarmonyDataset(items, tokenizer, padding=False)
+        assert len(dataset) == len(ANALYSES)
+        for data in dataset.processed_data:
+            sequence = data['harmony_sequence']
+            ids = tokenizer.encode_harmony(sequence)
+            assert ids[0] == tokenizer.bos_token_id and ids[-1] == tokenizer.eos_token_id
+            assert tokenizer.unk_token_id not in ids
+            assert tokenizer.decode_progression(ids) == expected_measures(sequence), tokenizer.decode_progression(ids)
+            assert tokenizer.decode(ids) == " | ".join(expected_measures(sequence))
+
+            # 학습 텍스트("m1 C:I | m1 C:V65/V ...")는 화음마다 마디 구분자가 있으므로 화음별로 나뉜다
+            text_ids = tokenizer.encode(data['text'])
+            assert tokenizer.decode_progression(text_ids) == [
+                f"{harmony['key']}:{harmony['roman_numeral']}" for harmony in sequence
+            ]
+            item = dataset[dataset.processed_data.index(data)]
+            assert item['input_ids'].tolist() == ids and item['attention_mask'].tolist() == [1] * len(ids)
+        print("✅ encode_harmony → decode가 마디별 조성:화음으로 돌아옴 (전위/부속화음/전조 포함)")
+        print("✅ 학습 텍스트 경로도 같은 화음으로 디코딩, HarmonyDataset은 직접 인코딩한 ID 사용")
+
+        # 조성 토큰은 바뀔 때만 넣는다
+        ids = tokenizer.encode_harmony([
+            {'measure': 1, 'key': 'C', 'roman_numeral': 'I'},
+            {'measure': 1, 'key': 'C', 'roman_numeral': 'V7'},
+            {'measure': 2, 'key': 'a', 'roman_numeral': 'i'},
+        ], add_special_tokens=False)
+        assert tokenizer.convert_ids_to_tokens(ids) == ["|", "C:", "I", "V", "7", "|", "a:", "i"]
+        assert tokenizer.decode(ids, skip_special_tokens=False) == "| C: I V 7 | a: i"
+        print("✅ 조성이 바뀔 때만 조성 토큰, 마디마다 구분자 하나")
+
+        # 어휘에 없는 토큰은 [UNK]이고 디코딩에서 빠진다
+        ids = tokenizer.encode("m1 C:I | m2 C:XYZ | m3 C:V")
+        assert tokenizer.unk_token_id in ids
+        assert tokenizer.decode_progression(ids) == ["C:I", "C:V"]
+        print("✅ 어휘에 없는 토큰은 [UNK], 디코딩 시 제외")
+
+def test_save_and_load():
+    """저장/로드 후 같은 어휘와 ID, 잘못된 파일은 ValueError"""
+    print("\n=== 저장/로드 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        tokenizer = HarmonyTokenizer.build(write_corpus(directory))
+        path = tokenizer.save_pretrained(os.path.join(directory, "tokenizer"))
+        assert os.path.basename(path) == TOKENIZER_FILE
+        for source in (os.path.dirname(path), path):
+            loaded = HarmonyTokenizer.from_pretrained(source)
+            assert loaded.tokens == tokenizer.tokens and loaded.get_vocab() == tokenizer.get_vocab()
+        text = "<START> m1 a:viio7/V | m2 a:V <END>"
+        assert loaded.encode(text) == tokenizer.encode(text)
+        print("✅ 디렉터리/파일 경로로 로드, 같은 어휘와 ID")
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"type": "bpe", "tokens": []}')
+        bad_special = os.path.join(directory, "bad.json")
+        with open(bad_special, "w", encoding="utf-8") as f:
+            f.write('{"type": "harmony", "tokens": ["C:", "I"]}')
+        for source in (path, bad_special):
+            try:
+                HarmonyTokenizer.from_pretrained(source)
+                raise AssertionError(f"잘못된 토크나이저 파일 허용: {source}")
+            except ValueError:
+                pass
+        try:
+            HarmonyTokenizer(["I", "V", "I"])
+            raise AssertionError("중복 토큰 허용")
+        except ValueError:
+            pass
+        print("✅ 다른 형식/특수 토큰이 맞지 않는 파일, 중복 어휘는 ValueError")
+
+def test_padding():
+    """HF 토크나이저와 같은 형태의 패딩/자르기/텐서 반환"""
+    print("\n=== 패딩 테스트 ===")
+
+    tokenizer = HarmonyTokenizer(["C:", "I", "IV", "V", "7"])
+    texts = ["m1 C:I", "m1 C:I | m2 C:IV | m3 C:V7"]
+    single = tokenizer(texts[0])
+    assert single == {'input_ids': tokenizer.encode(texts[0]), 'attention_mask': [1, 1, 1]}
+
+    batch = tokenizer(texts, padding=True, return_tensors="pt")
+    assert batch['input_ids'].shape == (2, 8) and batch['input_ids'].dtype == torch.long
+    assert batch['attention_mask'][0].tolist() == [1, 1, 1] + [0] * 5
+    assert batch['input_ids'][0, 3:].tolist() == [tokenizer.pad_token_id] * 5
+
+    left = tokenizer(texts, padding=True, padding_side="left")
+    assert left['attention_mask'][0] == [0] * 5 + [1, 1, 1]
+    assert left['input_ids'][1] == tokenizer.encode(texts[1])
+
+    limited = tokenizer(texts, truncation=True, max_length=4, padding="max_length")
+    assert [len(ids) for ids in limited['input_ids']] == [4, 4]
+    assert limited['input_ids'][1] == tokenizer.encode(texts[1])[:4]
+    ids = tokenizer.encode(texts[0], add_special_tokens=True)
+    assert ids == [tokenizer.bos_token_id] + tokenizer.encode(texts[0]) + [tokenizer.eos_token_id]
+    assert tokenizer.encode("<START> " + texts[0] + " <END>", add_special_tokens=True) == ids
+    print("✅ 오른쪽/왼쪽 패딩, max_length 자르기/패딩, 텐서 반환, 특수 토큰 추가")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_split_chord, test_round_trip, test_save_and_load, test_padding):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
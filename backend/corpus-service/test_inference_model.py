@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+추론 전용 모델 로드(inference_only) 테스트 스크립트
+
+LoRA 어댑터를 병합한 모델이 PEFT 래퍼 모델과 같은 출력을 내는지, model_name을 로드할 수
+없으면 간단한 기본 모델로 대체하는지, int8/bf16 정밀도로 로드한 모델이 float32 출력에 가까운지
+확인한다. 다운로드 없이 임시 디렉토리에 만든 작은
+Llama 모델로 실행한다.
+"""
+
+import sys
+import os
+import tempfile
+
+import torch
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import harmony_transformer as harmony_transformer_module
+from app.services.harmony_transformer import HarmonyTransformerService
+from app.services.model_quantization import conv1d_to_linear, describe_precision, quantize_model
+
+def write_tiny_model(directory):
+    """작은 Llama 모델과 단어 단위 토크나이저 저장"""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    words = ["<unk>", "<eos>", "C", "F", "G", "Am", "Dm", "Bb"]
+    tokenizer = Tokenizer(models.WordLevel(vocab={word: i for i, word in enumerate(words)}, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="<unk>", eos_token="<eos>").save_pretrained(directory)
+
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=len(words), hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=4, max_position_embeddings=64, eos_token_id=1, bos_token_id=1
+    )
+    LlamaForCausalLM(config).save_pretrained(directory)
+
+def write_adapter(model_dir, adapter_dir):
+    """학습된 것처럼 0이 아닌 LoRA 가중치를 가진 어댑터와 토크나이저 저장"""
+    from peft import LoraConfig, TaskType, get_peft_model
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    model = AutoModelForCausalLM.from_pretrained(model_dir)
+    model = get_peft_model(model, LoraConfig(task_type=TaskType.CAUSAL_LM, r=4, lora_alpha=8, target_modules=["q_proj", "v_proj"]))
+    torch.manual_seed(1)
+    with torch.no_grad():
+        for name, param in model.named_parameters():
+            if "lora_B" in name:
+                param.normal_(std=0.5)
+    model.save_pretrained(adapter_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.save_pretrained(adapter_dir)
+
+def logits(model, tokenizer, text="C F G Am"):
+    inputs = tokenizer(text, return_tensors="pt")
+    with torch.no_grad():
+        return model(**inputs).logits
+
+def test_merged_adapter():
+    """병합된 추론 전용 모델은 eval/no-grad이고 PEFT 래퍼 모델과 같은 출력을 낸다"""
+    print("=== 어댑터 병합 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_dir, adapter_dir = os.path.join(directory, "model"), os.path.join(directory, "adapter")
+        write_tiny_model(model_dir)
+        write_adapter(model_dir, adapter_dir)
+
+        wrapped = HarmonyTransformerService(model_dir, adapter_path=adapter_dir)
+        merged = HarmonyTransformerService(model_dir, adapter_path=adapter_dir, inference_only=True)
+        try:
+            wrapped.load_model()
+            info = merged.load_model()
+            assert info['inference_only'] and info['adapter_merged'] and info['trainable_params'] == 0
+            assert not merged.model.training
+            assert not any(param.requires_grad for param in merged.model.parameters())
+            assert wrapped.model is not merged.model
+            wrapped.model.eval()
+            expected = logits(wrapped.model, wrapped.tokenizer)
+            assert torch.allclose(logits(merged.model, merged.tokenizer), expected, atol=1e-5)
+            print("✅ 병합 모델 출력이 PEFT 래퍼 모델과 같음, 학습 파라미터 없음")
+        finally:
+            wrapped.release_model()
+            merged.release_model()
+
+def test_fallback_model():
+    """model_name을 로드할 수 없으면 간단한 기본 모델을 추론 전용으로 로드한다"""
+    print("\n=== 추론 전용 대안 모델 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_dir = os.path.join(directory, "model")
+        write_tiny_model(model_dir)
+
+        simple_model_name = harmony_transformer_module.SIMPLE_MODEL_NAME
+        # 다운로드 없이 실행하도록 대안 모델을 로컬의 작은 모델로 지정
+        harmony_transformer_module.SIMPLE_MODEL_NAME = model_dir
+        service = HarmonyTransformerService(
+            os.path.join(directory, "missing"),
+            adapter_path=os.path.join(directory, "missing_adapter"),
+            inference_only=True
+        )
+        try:
+            info = service.load_model()
+            assert info['model_name'] == model_dir and info['note'], info
+            assert info['adapter_path'] is None and not info['adapter_merged'] and info['inference_only']
+            assert not service.model.training
+            assert not any(param.requires_grad for param in service.model.parameters())
+            assert logits(service.model, service.tokenizer).shape[-1] == 8
+            print(f"✅ 로드 실패 시 대안 모델로 대체: {info['note']}")
+        finally:
+            harmony_transformer_module.SIMPLE_MODEL_NAME = simple_model_name
+            service.release_model()
+
+def test_quantized_model():
+    """int8/bf16 추론 전용 모델은 가중치가 작아지고 float32 병합 모델과 가까운 출력을 낸다"""
+    print("\n=== 양자화 모델 로드 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_dir, adapter_dir = os.path.join(directory, "model"), os.path.join(directory, "adapter")
+        write_tiny_model(model_dir)
+        write_adapter(model_dir, adapter_dir)
+
+        services = {
+            mode: HarmonyTransformerService(model_dir, adapter_path=adapter_dir, inference_only=True, quantization=mode)
+            for mode in (None, 'int8', 'bf16')
+        }
+        try:
+            infos = {mode: service.load_model() for mode, service in services.items()}
+            models = {mode: service.model for mode, service in services.items()}
+            assert len({id(model) for model in models.values()}) == 3  # 정밀도마다 다른 레지스트리 항목
+            expected = logits(models[None], services[None].tokenizer)
+
+            int8 = infos['int8']
+            assert int8['quantization'] == 'int8' and int8['adapter_merged']
+            assert any('int8' in dtype for dtype in int8['precision']['dtypes']), int8['precision']
+            assert int8['precision']['nbytes'] < infos[None]['precision']['nbytes']
+            int8_logits = logits(models['int8'], services['int8'].tokenizer)
+            assert torch.allclose(int8_logits, expected, atol=0.1), (int8_logits - expected).abs().max()
+            print(f"✅ int8: {infos[None]['precision']['nbytes']} → {int8['precision']['nbytes']} 바이트, "
+                  f"float32와 최대 차이 {(int8_logits - expected).abs().max():.4f}")
+
+            bf16 = infos['bf16']
+            assert set(bf16['precision']['dtypes']) == {'bfloat16'}, bf16['precision']
+            assert bf16['precision']['nbytes'] * 2 == infos[None]['precision']['nbytes']
+            bf16_logits = logits(models['bf16'], services['bf16'].tokenizer).float()
+            assert torch.allclose(bf16_logits, expected, atol=0.1), (bf16_logits - expected).abs().max()
+            print(f"✅ bf16: 가중치 크기 절반, float32와 최대 차이 {(bf16_logits - expected).abs().max():.4f}")
+        finally:
+            for service in services.values():
+                service.release_model()
+
+    # 양자화는 추론 전용에서만 적용하고, 지원하지 않는 모드는 거부한다
+    assert HarmonyTransformerService("unused", quantization='int8').quantization is None
+    for create in (
+        lambda: HarmonyTransformerService("unused", inference_only=True, quantization='int4'),
+        lambda: quantize_model(torch.nn.Linear(2, 2), 'fp8')
+    ):
+        try:
+            create()
+            raise AssertionError("지원하지 않는 양자화 모드 허용")
+        except ValueError:
+            pass
+    print("✅ 학습용 모델은 float32 유지, 지원하지 않는 모드는 ValueError")
+
+def test_conv1d_to_linear():
+    """GPT-2 계열 Conv1D를 nn.Linear로 바꿔도 출력이 같고, 바꾼 뒤 int8 양자화된다"""
+    print("\n=== Conv1D 변환 테스트 ===")
+
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    torch.manual_seed(0)
+    model = GPT2LMHeadModel(GPT2Config(
+        vocab_size=16, n_embd=32, n_layer=2, n_head=4, n_positions=32, bos_token_id=1, eos_token_id=1
+    )).eval()
+    input_ids = torch.tensor([[1, 5, 7, 3, 9]])
+    with torch.no_grad():
+        expected = model(input_ids).logits
+        assert conv1d_to_linear(model) == 8  # 레이어마다 c_attn, c_proj(attn), c_fc, c_proj(mlp)
+        assert torch.allclose(model(input_ids).logits, expected, atol=1e-5)
+        print("✅ Conv1D 8개를 nn.Linear로 바꿔도 출력이 같음")
+
+        quantized = quantize_model(model, 'int8')
+        assert any('int8' in dtype for dtype in describe_precision(quantized)['dtypes'])
+        assert torch.allclose(quantized(input_ids).logits, expected, atol=0.1)
+        print("✅ 변환한 GPT-2 모델의 int8 양자화")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_merged_adapter, test_fallback_model, test_quantized_model, test_conv1d_to_linear):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
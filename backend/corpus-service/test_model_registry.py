@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+공유 모델 레지스트리(MODEL_REGISTRY) 테스트 스크립트
+
+같은 모델을 쓰는 서비스 인스턴스가 가중치 한 벌을 공유하는지, 인스턴스별 디바이스 확인
+(test_model / ensure_model_on_cpu)이 공유 가중치를 바꾸지 않는지 확인한다.
+다운로드 없이 임시 디렉토리에 만든 작은 Llama 모델로 실행한다.
+"""
+
+import sys
+import os
+import tempfile
+
+import torch
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.harmony_transformer import HarmonyTransformerService
+from app.services.model_registry import MODEL_REGISTRY, ModelRegistry
+
+def write_tiny_model(directory):
+    """작은 Llama 모델과 단어 단위 토크나이저 저장"""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    words = ["<unk>", "<eos>", "C", "F", "G", "Am", "Dm", "Bb"]
+    tokenizer = Tokenizer(models.WordLevel(vocab={word: i for i, word in enumerate(words)}, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="<unk>", eos_token="<eos>").save_pretrained(directory)
+
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=len(words), hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=4, max_position_embeddings=64, eos_token_id=1, bos_token_id=1
+    )
+    LlamaForCausalLM(config).save_pretrained(directory)
+
+def parameter_state(model):
+    """파라미터 객체/저장소/디바이스 (가중치가 바뀌거나 새로 할당됐는지 비교용)"""
+    return [(id(param), param.data_ptr(), param.device) for param in model.parameters()]
+
+def test_registry_sharing():
+    """같은 키는 로더를 한 번만 실행하고, 마지막 참조가 해제되면 내린다"""
+    print("=== 레지스트리 공유 테스트 ===")
+
+    registry = ModelRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object(), object(), {'model_name': 'test'}
+
+    key = ("test", None, False, None)
+    first = registry.acquire(key, loader)
+    second = registry.acquire(key, loader)
+    assert first is second and first.references == 2 and len(calls) == 1
+    assert not registry.release(key) and key in registry
+    assert registry.release(key) and key not in registry and first.model is None
+    print("✅ 로더 한 번 실행, 참조 수만큼 해제해야 내림")
+
+    def failing_loader():
+        raise RuntimeError("로드 실패")
+
+    try:
+        registry.acquire(key, failing_loader)
+        raise AssertionError("로드 실패가 전달되지 않음")
+    except RuntimeError:
+        pass
+    assert registry.acquire(key, loader).references == 1 and len(calls) == 2
+    print("✅ 로드 실패 후 같은 키로 다시 로드")
+
+def test_device_check_keeps_shared_weights():
+    """디바이스가 같으면 아무것도 옮기지 않고, 공유 중인 모델은 다른 인스턴스의 디바이스로 옮기지 않는다"""
+    print("\n=== 공유 모델 디바이스 확인 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        write_tiny_model(model_dir)
+        first = HarmonyTransformerService(model_dir)
+        second = HarmonyTransformerService(model_dir)
+        first.load_model()
+        second.load_model()
+        try:
+            assert first.model is second.model
+            shared = parameter_state(first.model)
+
+            assert second.ensure_model_on_cpu()
+            result = second.test_model(["C F G"])
+            assert result['success'] and result['device_used'] == "cpu", result
+            assert parameter_state(first.model) == shared
+            print("✅ 같은 디바이스면 파라미터 객체/저장소 그대로 (test_model, ensure_model_on_cpu)")
+
+            # 다른 디바이스를 쓰는 인스턴스라도 공유 중인 가중치는 옮기지 않고 모델 쪽 디바이스를 사용
+            second.device = torch.device("meta")
+            assert not second.ensure_model_on_cpu()
+            assert second._ensure_model_device() == torch.device("cpu")
+            assert parameter_state(first.model) == shared
+            print("✅ 공유 중인 모델은 다른 인스턴스의 디바이스로 옮기지 않음")
+
+            # 혼자 쓰는 모델은 디바이스가 다를 때만 이동
+            first.release_model()
+            assert second.ensure_model_on_cpu()
+            assert {param.device for param in second.model.parameters()} == {torch.device("meta")}
+            print("✅ 혼자 쓰는 모델은 디바이스가 다르면 이동")
+        finally:
+            first.release_model()
+            second.release_model()
+        assert not MODEL_REGISTRY.status()
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_registry_sharing, test_device_check_keeps_shared_weights):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
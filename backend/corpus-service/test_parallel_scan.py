@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+작곡가 디렉토리 단위 병렬 코퍼스 스캔 테스트 스크립트
+
+스레드/프로세스 워커로 스캔한 결과가 순차 스캔과 같은 순서·내용인지, 워커의 인덱스 변경분이
+부모 인덱스에 병합되는지 확인한다.
+"""
+
+import sys
+import os
+import tempfile
+from dataclasses import asdict
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.corpus_index import CorpusIndex
+from app.services.rntxt_parser import _load_work_analysis_cached
+from app.services.when_in_rome_processor import WhenInRomeProcessor
+
+def write_analysis(path, title, measures):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = ["Composer: Test", f"Title: {title}", "Time Signature: 4/4", ""]
+    lines += [f"m{measure} {'G: ' if measure == 1 else ''}V" for measure in range(1, measures + 1)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+def write_corpus(corpus_path):
+    """세 하위 코퍼스에 작곡가 여러 명, 악보 파일이 있는 악장 포함"""
+    paths = []
+    for composer in ("Beethoven", "Mozart", "Haydn", "Clementi"):
+        for work in ("Op001", "Op002", "Op003"):
+            for movement in ("1", "2"):
+                paths.append(os.path.join(corpus_path, "Piano_Sonatas", composer, work, movement, "analysis.txt"))
+    for composer in ("Schubert", "Schumann"):
+        for song in ("Song_1", "Song_2"):
+            paths.append(os.path.join(corpus_path, "OpenScore-LiederCorpus", composer, song, "analysis.txt"))
+    paths.append(os.path.join(corpus_path, "Quartets", "Haydn", "Op20_No1", "1", "analysis.txt"))
+    for number, path in enumerate(paths):
+        write_analysis(path, f"Work {number}", measures=number % 7 + 1)
+    working_dir = os.path.join(os.path.dirname(paths[0]), "Working")
+    os.makedirs(working_dir)
+    open(os.path.join(working_dir, "score.mxl"), "w").close()
+    return paths
+
+def test_parallel_matches_sequential():
+    """스레드/프로세스 병렬 스캔 결과가 순차 스캔과 같은 순서로 같다"""
+    print("=== 병렬 스캔 결과 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as corpus_path:
+        paths = write_corpus(corpus_path)
+        sequential = [asdict(item) for item in WhenInRomeProcessor(corpus_path).scan_corpus()]
+        assert len(sequential) == len(paths)
+        assert sum(item['score_path'] is not None for item in sequential) == 1
+
+        for executor in ("thread", "process"):
+            for workers in (2, 4):
+                processor = WhenInRomeProcessor(corpus_path, scan_workers=workers, scan_executor=executor)
+                parallel = [asdict(item) for item in processor.scan_corpus()]
+                assert parallel == sequential, (executor, workers)
+                print(f"✅ {executor} 워커 {workers}개: {len(parallel)}개 아이템, 순차 스캔과 같은 순서")
+
+def test_parallel_index_delta():
+    """워커가 확인/갱신한 인덱스 항목이 부모 인덱스에 병합된다"""
+    print("\n=== 병렬 스캔 인덱스 병합 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus_path = os.path.join(directory, "Corpus")
+        paths = write_corpus(corpus_path)
+        index_path = os.path.join(directory, "corpus_index.sqlite")
+
+        processor = WhenInRomeProcessor(corpus_path, index_path=index_path, scan_workers=3)
+        processor.index.load()
+        baseline = [asdict(item) for item in processor.scan_corpus()]
+        stored = CorpusIndex(index_path)
+        assert stored.load() == len(paths)
+        print(f"✅ 첫 병렬 스캔: 워커 변경분 {len(paths)}개가 인덱스에 저장됨")
+
+        # stat이 같으면 워커도 인덱스 항목을 쓴다 (같은 길이로 제목만 바꾸고 mtime 복원)
+        stat = os.stat(paths[3])
+        write_analysis(paths[3], "Wxrk 3", measures=4)
+        os.utime(paths[3], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        _load_work_analysis_cached.cache_clear()
+        processor = WhenInRomeProcessor(corpus_path, index_path=index_path, scan_workers=3)
+        processor.index.load()
+        assert [asdict(item) for item in processor.scan_corpus()] == baseline
+        print("✅ 재스캔 시 워커가 부모가 넘긴 인덱스 항목 사용")
+
+        # 작곡가 디렉토리 하나를 지우면 그 항목은 정리된다
+        removed = [path for path in paths if "/Clementi/" in path]
+        for path in removed:
+            os.remove(path)
+        processor = WhenInRomeProcessor(corpus_path, index_path=index_path, scan_workers=3)
+        processor.index.load()
+        assert len(processor.scan_corpus()) == len(paths) - len(removed)
+        stored = CorpusIndex(index_path)
+        assert stored.load() == len(paths) - len(removed)
+        print(f"✅ 사라진 파일 {len(removed)}개는 인덱스에서 제거")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_parallel_matches_sequential, test_parallel_index_delta):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
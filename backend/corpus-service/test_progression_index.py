@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+화성 진행 n-gram 색인(ProgressionIndex) 테스트 스크립트
+
+무작위 분석 파일 코퍼스에서 색인 검색 결과가 작품별 레코드 목록을 하나씩 비교한 결과와
+같은지(길이 1~5 진행, numeral/chord 단위, 조성/모드 조건, limit), 그리고 진행이 작품 경계를
+넘지 않는지 확인한다.
+"""
+
+import sys
+import os
+import random
+import tempfile
+from types import SimpleNamespace
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.progression_index import ProgressionIndex
+from app.services.rntxt_parser import load_work_analysis
+
+CHORDS = ['I', 'ii', 'ii7', 'IV', 'V', 'V7', 'V65/V', 'vi', 'i', 'iv', 'viio7']
+KEYS = ['C', 'G', 'a', 'c', 'Eb']
+
+def write_corpus(directory, works=40, seed=0):
+    """무작위 화음과 전조가 있는 분석 파일, 진행 색인용 아이템 목록 반환"""
+    rng = random.Random(seed)
+    items = []
+    for number in range(works):
+        lines = ["Composer: Test", f"Title: Work {number}", "Time Signature: 4/4", ""]
+        for measure in range(1, rng.randint(2, 30)):
+            tokens = [f"m{measure}"]
+            if measure == 1 or rng.random() < 0.1:
+                tokens.append(f"{rng.choice(KEYS)}:")
+            tokens.append(rng.choice(CHORDS))
+            if rng.random() < 0.5:
+                tokens += ["b3", rng.choice(CHORDS)]
+            lines.append(" ".join(tokens))
+        path = os.path.join(directory, f"work_{number}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        items.append(SimpleNamespace(
+            item_id=number, genre="Piano_Sonatas", composer=f"Composer {number % 3}",
+            set=f"Op{number}", movement="1", analysis_path=path, metadata={'title': f"Work {number}"}
+        ))
+    # 분석 파일이 없는 아이템은 건너뛴다
+    items.append(SimpleNamespace(
+        item_id=works, genre="Piano_Sonatas", composer="None", set="", movement="",
+        analysis_path=None, metadata={}
+    ))
+    return items
+
+def brute_force(items, symbols, level, mode=None, key=None):
+    """작품별 레코드 목록을 위치마다 비교해 (아이템 ID, 시작 마디, 끝 마디, 조성) 목록 반환"""
+    matches = []
+    for item in items:
+        if not item.analysis_path:
+            continue
+        records = list(load_work_analysis(item.analysis_path).analysis)
+        values = [
+            record.roman_numeral if level == 'numeral' else (record.chord or record.roman_numeral)
+            for record in records
+        ]
+        for start in range(len(records) - len(symbols) + 1):
+            window = records[start:start + len(symbols)]
+            if values[start:start + len(symbols)] != symbols:
+                continue
+            record_key = window[0].key
+            if any(record.key != record_key for record in window):
+                continue
+            if (key is not None or mode is not None) and (
+                record_key == "Unknown"
+                or (key is not None and record_key != key)
+                or (mode == "minor" and not record_key[0].islower())
+                or (mode == "major" and not record_key[0].isupper())
+            ):
+                continue
+            matches.append((item.item_id, window[0].measure, window[-1].measure, record_key))
+    return matches
+
+def flatten(result):
+    return [
+        (work['item_id'], match['start_measure'], match['end_measure'], match['key'])
+        for work in result['works'] for match in work['matches']
+    ]
+
+def test_matches_brute_force():
+    """길이 1~5 진행 검색 결과가 레코드 단위 비교와 같다"""
+    print("=== 진행 검색 비교 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        items = write_corpus(directory)
+        rng = random.Random(1)
+        for level in ('numeral', 'chord'):
+            index = ProgressionIndex(level)
+            summary = index.build(items)
+            assert summary['works'] == len(items) - 1 and len(index) == len(items) - 1
+            checked = found = 0
+            for _ in range(150):
+                # 코퍼스에 실제로 있는 구간을 질의로 사용 (일치가 있는 경우를 충분히 만든다)
+                item = rng.choice(items[:-1])
+                records = list(load_work_analysis(item.analysis_path).analysis)
+                length = rng.randint(1, min(5, len(records)))
+                start = rng.randrange(len(records) - length + 1)
+                symbols = [
+                    record.roman_numeral if level == 'numeral' else (record.chord or record.roman_numeral)
+                    for record in records[start:start + length]
+                ]
+                for mode, key in ((None, None), ("minor", None), ("major", None), (None, "C")):
+                    expected = brute_force(items, symbols, level, mode, key)
+                    result = index.search("-".join(symbols), mode=mode, key=key)
+                    assert flatten(result) == expected, (level, symbols, mode, key)
+                    assert result['total_matches'] == len(expected)
+                    assert result['total_works'] == len({match[0] for match in expected})
+                    checked += 1
+                    found += len(expected)
+            print(f"✅ {level} 단위: 질의 {checked}개 (일치 {found}개)가 레코드 단위 비교와 같음")
+
+def test_query_handling():
+    """질의 구분자, 부속화음 표기 정규화, 작품 경계, limit, 잘못된 질의"""
+    print("\n=== 진행 질의 처리 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        items = write_corpus(directory, works=3)
+        index = ProgressionIndex('numeral')
+        index.build(items)
+        assert index.parse_progression("ii–V7 , I") == ["ii", "V", "I"]
+        assert index.parse_progression("V65/V > V") == ["V", "V"]
+        assert ProgressionIndex('chord').parse_progression("V65/V-V") == ["V65/V", "V"]
+        print("✅ 구분자(-, –, 공백, 쉼표, >)와 numeral 단위 표기 정규화")
+
+        # 한 작품의 끝과 다음 작품의 시작을 잇는 진행은 일치하지 않는다
+        first = list(load_work_analysis(items[0].analysis_path).analysis)
+        second = list(load_work_analysis(items[1].analysis_path).analysis)
+        crossing = [first[-2].roman_numeral, first[-1].roman_numeral, second[0].roman_numeral]
+        matches = flatten(index.search("-".join(crossing)))
+        assert matches == brute_force(items, crossing, 'numeral')
+        assert all(start <= end for _, start, end, _ in matches)
+        print("✅ 작품 경계를 넘는 진행은 일치하지 않음")
+
+        result = index.search("I")
+        assert result['total_works'] > 1
+        limited = index.search("I", limit=1)
+        assert len(limited['works']) == 1 and limited['total_works'] == result['total_works']
+        assert limited['works'][0] == result['works'][0]
+        print("✅ limit은 응답 작품 수만 제한하고 전체 개수는 유지")
+
+        assert index.search("I-bVII-IV")['total_matches'] == 0  # 코퍼스에 없는 화음
+        for query in ("", "I-Exposition"):
+            try:
+                index.search(query)
+                raise AssertionError(f"잘못된 질의 허용: {query!r}")
+            except ValueError:
+                pass
+        empty = ProgressionIndex('numeral')
+        empty.build([])
+        assert empty.search("ii-V-I")['works'] == []
+        print("✅ 코퍼스에 없는 화음은 일치 없음, 빈/해석할 수 없는 질의는 ValueError, 빈 색인 검색")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_matches_brute_force, test_query_handling):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
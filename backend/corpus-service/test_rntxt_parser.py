@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+RNTXT 분석 파일 파서(rntxt_parser) 테스트 스크립트
+
+한 번의 순회로 헤더/마디 분석을 읽는 파서와 (경로, mtime, size) 캐시, 스캔 메타데이터와
+학습 데이터 추출이 같은 파싱 결과를 공유하는지, 그리고 정규식 토크나이저가 기존 split 기반
+파서(benchmark_rntxt_parser.legacy_parse_measure_line)와 같은 결과를 내는지 확인한다.
+"""
+
+import sys
+import os
+import random
+import tempfile
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.rntxt_parser import (
+    TOKEN_BEAT,
+    TOKEN_CHORD,
+    TOKEN_FORM,
+    TOKEN_KEY,
+    TOKEN_OTHER,
+    classify_token,
+    iter_analysis,
+    load_work_analysis,
+    parse_measure_line,
+    parse_work_analysis
+)
+from app.services.when_in_rome_processor import WhenInRomeProcessor
+from benchmark_rntxt_parser import LEGACY_FORM_SECTIONS, legacy_parse_measure_line
+
+ANALYSIS = """Composer: Ludwig van Beethoven
+Title: Piano Sonata No. 8
+Movement: 2
+Time signature: 2/4
+Form: Rondo
+# 주석은 건너뜀
+
+m1 Ab: I b2 V7
+m2 I
+m3 Exposition IV b1.5 V
+m4 f: i
+m5 V7/iv b2 iv
+"""
+
+def write_analysis(directory, content=ANALYSIS):
+    path = os.path.join(directory, "analysis.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+def test_single_pass_parse():
+    """헤더와 화음 레코드를 한 번에 읽고, 조성은 라인을 넘어 유지된다"""
+    print("=== 분석 파일 파싱 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_analysis(directory)
+        events = list(iter_analysis(path))
+        headers = dict(value for event, value in events if event == "header")
+        assert headers == {
+            'composer': "Ludwig van Beethoven", 'title': "Piano Sonata No. 8", 'movement': "2",
+            'time_signature': "2/4", 'form': "Rondo"
+        }, headers
+        assert [value for event, value in events if event == "measure_number"] == [1, 2, 3, 4, 5]
+
+        work = parse_work_analysis(path)
+        assert work.key_signature == "Unknown" and work.last_measure == 5 and work.total_measures == 5
+        records = list(work.analysis)
+        assert [record.roman_numeral for record in records] == ["I", "V", "I", "IV", "V", "i", "V", "iv"]
+        # 조성 표기가 없는 m2, m3도 앞 라인의 조성(Ab)으로 분석
+        assert [record.key for record in records] == ["Ab"] * 5 + ["f"] * 3
+        assert records[5].modulation == "f" and records[3].form_section == "Exposition"
+        print(f"✅ 헤더 {len(headers)}개, 화음 {len(records)}개, 라인을 넘는 조성 유지")
+
+def test_shared_cache():
+    """같은 파일은 한 번만 파싱해 공유하고, 파일이 바뀌면 다시 파싱한다"""
+    print("\n=== 파싱 결과 캐시 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_analysis(directory)
+        first = load_work_analysis(path)
+        assert load_work_analysis(path) is first
+
+        # 스캔 메타데이터와 분석 파일 파싱이 같은 결과를 사용
+        processor = WhenInRomeProcessor(directory)
+        assert processor.parse_analysis_file(path) is first
+        metadata = processor._extract_metadata_from_analysis(Path(path))
+        assert metadata['title'] == first.title and metadata['total_measures'] == first.last_measure
+        print("✅ 같은 파일은 한 번 파싱한 결과를 공유 (스캔 메타데이터, parse_analysis_file)")
+
+        write_analysis(directory, ANALYSIS + "m6 Ab: I\n")
+        changed = load_work_analysis(path)
+        assert changed is not first and changed.last_measure == 6
+        print("✅ 파일이 바뀌면 다시 파싱")
+
+def test_token_classification():
+    """토큰 문법: 화음(숫자저음/부속화음 대상), 박, 조성, 형식 섹션, 그 밖의 토큰"""
+    print("\n=== 토큰 분류 테스트 ===")
+
+    assert classify_token("V65/V") == (TOKEN_CHORD, "V", "65", "V", "V65/V")
+    assert classify_token("viio7/V") == (TOKEN_CHORD, "vii", "7", "V", "viio7/V")
+    assert classify_token("bVI") == (TOKEN_CHORD, "bVI", None, None, "bVI")
+    assert classify_token("Ger65") == (TOKEN_CHORD, "Ger", "65", None, "Ger65")
+    assert classify_token("I[add9]")[:2] == (TOKEN_CHORD, "I")
+    assert classify_token("b2.5") == (TOKEN_BEAT, 2.5)
+    assert classify_token("c#:") == (TOKEN_KEY, "c#")
+    assert classify_token("Bb:") == (TOKEN_KEY, "Bb")
+    assert classify_token("Coda") == (TOKEN_FORM, "Coda")
+    assert classify_token("||") == (TOKEN_OTHER, "||")
+    assert classify_token("V65/V") is classify_token("V65/V")  # 분류 테이블 재사용
+    print("✅ 화음/박/조성/형식/기타 토큰 분류, 분류 결과 재사용")
+
+    records = parse_measure_line("m7 i b2 E: ii b3.5 V43/V", key="c#")
+    assert [(r.roman_numeral, r.key, r.beat, r.inversion, r.secondary_dominant, r.modulation) for r in records] == [
+        ("i", "c#", 1.0, None, None, None),
+        ("ii", "E", 2.0, None, None, "E"),
+        ("V", "E", 3.5, "43", "V", None)
+    ]
+    assert parse_measure_line("m5var1 I") == [] and parse_measure_line("m5-8 = m1-4") == []
+    print("✅ 마디 안 여러 화음: 박 위치, 전조, 전위, 부속화음 대상 / 변주·반복 라인 제외")
+
+def test_matches_legacy_parser():
+    """기존 파서가 인식하던 라인(조성 + 단독 로마 숫자)은 같은 마디/화음/조성/형식 섹션으로 파싱"""
+    print("\n=== 기존 파서 비교 테스트 ===")
+
+    rng = random.Random(0)
+    numerals = ['i', 'I', 'ii', 'II', 'iii', 'III', 'iv', 'IV', 'v', 'vi', 'vii']  # 'V'로 시작하지 않는 것만
+    keys = ['C', 'c', 'F#', 'bb', 'Eb', 'g#']
+    compared = 0
+    for measure in range(1, 2001):
+        parts = [f"m{measure}", f"{rng.choice(keys)}:"]
+        if rng.random() < 0.3:
+            parts.insert(1, rng.choice(LEGACY_FORM_SECTIONS))
+        parts.append(rng.choice(numerals))
+        line = " ".join(parts)
+
+        legacy = legacy_parse_measure_line(line)
+        records = parse_measure_line(line)
+        assert legacy is not None and len(records) == 1, line
+        record = records[0]
+        assert (record.measure, record.roman_numeral, record.key, record.form_section) == (
+            legacy[0], legacy[1], legacy[2], legacy[6]
+        ), line
+        compared += 1
+    print(f"✅ {compared}개 라인에서 기존 파서와 같은 결과")
+
+    # 의도한 차이: V로 시작하는 화음, 조성 없는 라인, 한 라인의 여러 화음
+    assert legacy_parse_measure_line("m3 C: VI") is None
+    assert [r.roman_numeral for r in parse_measure_line("m3 C: VI")] == ["VI"]
+    assert [(r.roman_numeral, r.key) for r in parse_measure_line("m4 IV b3 V7", key="C")] == [("IV", "C"), ("V", "C")]
+    print("✅ 의도한 차이: VI/VII 인식, 이전 조성 유지, 화음별 레코드")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_single_pass_parse, test_shared_cache, test_token_classification, test_matches_legacy_parser):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+시퀀스 패킹(겹치는 창 분할, 블록 배치, 레이블 마스킹, 조각 분리) 테스트 스크립트
+"""
+
+import sys
+import os
+from collections import Counter
+
+import numpy as np
+import torch
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.sequence_packing import PackedSequenceDataset, plan_blocks, window_spans
+from app.services.training_batching import DynamicPaddingCollator
+
+SEPARATOR_ID = 1
+
+class FakeTokenizedCorpus:
+    """TokenizedCorpus처럼 lengths와 token_ids(index)만 제공하는 테스트용 원본 (예시 i의 토큰은 1000 * (i + 1) + 위치)"""
+
+    def __init__(self, lengths):
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def token_ids(self, index):
+        return 1000 * (index + 1) + np.arange(self.lengths[index], dtype=np.int64)
+
+def test_window_spans():
+    """겹치는 창: 첫 창만 전체 학습, 이후 창은 overlap 토큰을 문맥으로만 사용"""
+    print("=== 겹치는 창 분할 테스트 ===")
+
+    assert window_spans(5, 6, 2) == [(0, 5, 0)]
+    assert window_spans(10, 6, 2) == [(0, 6, 0), (4, 10, 2)]
+    assert window_spans(11, 6, 2) == [(0, 6, 0), (4, 10, 2), (8, 11, 2)]
+    print("✅ 창 경계와 label_from")
+
+    for length in range(1, 40):
+        for window, overlap in ((6, 0), (6, 2), (8, 7), (16, 4)):
+            spans = window_spans(length, window, overlap)
+            trained = []
+            for start, stop, label_from in spans:
+                assert 0 < stop - start <= window
+                trained.extend(range(start + label_from, stop))
+            # 손실에 들어가는 위치는 시퀀스 전체를 정확히 한 번씩 덮어야 한다
+            assert trained == list(range(length)), (length, window, overlap, spans)
+    print("✅ 학습 대상 토큰이 겹치거나 빠지지 않음")
+
+def test_plan_blocks_capacity():
+    """best-fit 배치: 구분자를 포함해 블록 크기를 넘지 않음"""
+    print("\n=== 블록 배치 용량 테스트 ===")
+
+    # 구분자 한 칸 때문에 3 + 1 + 3 > 6
+    assert len(plan_blocks([3, 3], 6, separator=True)) == 2
+    assert len(plan_blocks([3, 3], 6, separator=False)) == 1
+    assert plan_blocks([0, 4], 6) == [[(1, 0, 4, 0)]]
+    print("✅ 구분자 비용 반영, 빈 예시 제외")
+
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(1, 60, size=200)
+    for separator in (True, False):
+        blocks = plan_blocks(lengths, 32, overlap=4, separator=separator)
+        pieces = Counter()
+        for block in blocks:
+            used = sum(stop - start for _, start, stop, _ in block) + (len(block) - 1 if separator else 0)
+            assert used <= 32, (block, used)
+            for index, start, stop, label_from in block:
+                pieces[(index, start, stop, label_from)] += 1
+        expected = Counter(
+            (index, start, stop, label_from)
+            for index, length in enumerate(lengths)
+            for start, stop, label_from in window_spans(int(length), 32, 4)
+        )
+        assert pieces == expected
+        print(f"✅ 구분자 {'사용' if separator else '없음'}: {len(lengths)}개 예시 → {len(blocks)}개 블록, 모든 조각 한 번씩 배치")
+
+def test_packed_dataset_labels():
+    """패킹된 블록: input_ids와 labels 정렬, 겹친 문맥은 -100, 구분자 위치, 조각별 position_ids"""
+    print("\n=== 패킹 데이터셋 레이블 테스트 ===")
+
+    source = FakeTokenizedCorpus([10, 3, 4, 2, 13, 1])
+    dataset = PackedSequenceDataset(source, block_size=6, overlap=2, separator_id=SEPARATOR_ID)
+
+    learned, skipped = Counter(), Counter()
+    for index in range(len(dataset)):
+        item = dataset[index]
+        input_ids, labels = item['input_ids'].numpy(), item['labels'].numpy()
+        position_ids = item['position_ids'].numpy()
+        assert len(input_ids) == len(labels) == len(position_ids) == dataset.lengths[index] <= dataset.block_size
+        assert 'attention_mask' not in item
+
+        masked = labels == -100
+        assert np.array_equal(labels[~masked], input_ids[~masked])
+
+        segments = dataset.segments[dataset.block_offsets[index]:dataset.block_offsets[index + 1]]
+        assert (input_ids == SEPARATOR_ID).sum() == len(segments) - 1
+
+        # 각 조각의 앞 label_from 토큰 (이어지는 조각은 최소 첫 토큰)만 마스킹, 위치는 조각마다 0부터
+        position = 0
+        for number, (source_index, start, stop, label_from) in enumerate(segments):
+            if number:
+                assert input_ids[position] == SEPARATOR_ID
+                assert position_ids[position] == position_ids[position - 1] + 1
+                position += 1
+            length = stop - start
+            context = max(label_from, 1 if number else 0)
+            expected = source.token_ids(int(source_index))[start:stop]
+            assert np.array_equal(input_ids[position:position + length], expected)
+            assert np.array_equal(position_ids[position:position + length], np.arange(length))
+            assert masked[position:position + context].all()
+            assert not masked[position + context:position + length].any()
+            if number and label_from == 0:
+                skipped[int(input_ids[position])] += 1
+            position += length
+        learned.update(int(token) for token in labels[~masked] if token != SEPARATOR_ID)
+
+    expected = Counter(int(token) for index in range(len(source)) for token in source.token_ids(index))
+    assert learned + skipped == expected
+    print(f"✅ {len(dataset)}개 블록: 레이블 정렬, 문맥 마스킹, 구분자 위치, 조각별 position_ids 일치")
+    print(f"✅ 이어지는 조각의 첫 토큰({sum(skipped.values())}개) 외 원본 토큰이 모두 한 번씩 학습 대상: {dataset.stats()}")
+
+    unseparated = PackedSequenceDataset(source, block_size=6, overlap=2)
+    assert all(len(unseparated[index]['input_ids']) <= 6 for index in range(len(unseparated)))
+    assert len(unseparated) <= len(dataset)
+    print(f"✅ 구분자 없이 패킹: {len(unseparated)}개 블록")
+
+def tiny_models(vocab_size):
+    """다운로드 없이 만드는 작은 무작위 모델들 (평가 모드, 조각별 마스크가 적용되도록 KV 캐시 끔)"""
+    from transformers import GPT2Config, GPT2LMHeadModel, LlamaConfig, LlamaForCausalLM
+    from app.services.harmony_transformer import HarmonyTransformer
+
+    torch.manual_seed(0)
+    models = {
+        'HarmonyTransformer': HarmonyTransformer(
+            vocab_size=vocab_size, d_model=32, nhead=4, num_layers=2, max_seq_length=64, causal=True
+        ),
+        'Llama': LlamaForCausalLM(LlamaConfig(
+            vocab_size=vocab_size, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+            num_attention_heads=4, num_key_value_heads=4, max_position_embeddings=64, use_cache=False
+        )),
+        'GPT2': GPT2LMHeadModel(GPT2Config(
+            vocab_size=vocab_size, n_embd=32, n_layer=2, n_head=4, n_positions=64,
+            bos_token_id=1, eos_token_id=1, use_cache=False
+        ))
+    }
+    for model in models.values():
+        model.eval()
+    return models
+
+def test_packed_segments_isolated():
+    """패킹된 조각은 서로 참조하지 않음: 블록 안 조각의 출력이 조각을 따로 넣은 출력과 같다"""
+    print("\n=== 패킹 조각 분리 테스트 ===")
+
+    rng = np.random.default_rng(0)
+    sequences = [rng.integers(2, 50, size=length).tolist() for length in (9, 5, 7, 3, 12)]
+    collator = DynamicPaddingCollator(pad_token_id=0)
+
+    for separator_id in (None, SEPARATOR_ID):
+        dataset = PackedSequenceDataset([{'input_ids': ids} for ids in sequences], block_size=16, separator_id=separator_id)
+        assert any(dataset.block_offsets[index + 1] - dataset.block_offsets[index] > 1 for index in range(len(dataset)))
+        batch = collator([dataset[index] for index in range(len(dataset))])
+        assert 'attention_mask' not in batch and batch['position_ids'].shape == batch['input_ids'].shape
+
+        for name, model in tiny_models(50).items():
+            with torch.no_grad():
+                packed = model(input_ids=batch['input_ids'], position_ids=batch['position_ids'])['logits']
+                checked = 0
+                for index in range(len(dataset)):
+                    position = 0
+                    segments = dataset.segments[dataset.block_offsets[index]:dataset.block_offsets[index + 1]]
+                    for source_index, start, stop, _ in segments:
+                        ids = torch.tensor([sequences[source_index][start:stop]])
+                        alone = model(input_ids=ids)['logits'][0]
+                        assert torch.allclose(packed[index, position:position + len(alone)], alone, atol=1e-5), (name, index)
+                        position += len(alone) + (separator_id is not None)
+                        checked += 1
+            print(f"✅ {name} (구분자 {'있음' if separator_id is not None else '없음'}): 조각 {checked}개 출력이 단독 입력과 같음")
+
+    # 기존 방식(attention_mask만 주고 위치가 이어짐)이면 뒤 조각 출력이 달라져야 한다 (테스트 자체 검증)
+    dataset = PackedSequenceDataset([{'input_ids': ids} for ids in sequences[:2]], block_size=16)
+    item = dataset[0]
+    model = tiny_models(50)['Llama']
+    with torch.no_grad():
+        joined = model(input_ids=item['input_ids'].unsqueeze(0))['logits'][0]
+        (_, start, stop, _), (second, _, _, _) = dataset.segments[:2]
+        alone = model(input_ids=torch.tensor([sequences[second]]))['logits'][0]
+        offset = int(stop - start)
+    assert not torch.allclose(joined[offset:], alone, atol=1e-5)
+    print("✅ position_ids 없이 이어 붙이면 앞 조각을 참조함 (비교 기준 확인)")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_window_spans, test_plan_blocks_capacity, test_packed_dataset_labels, test_packed_segments_isolated):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
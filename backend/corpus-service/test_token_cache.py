@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+토큰화 코퍼스 캐시(TokenizedCorpusCache, TokenizedCorpus) 테스트 스크립트
+"""
+
+import sys
+import os
+import pickle
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.token_cache import MANIFEST_FILE, TokenizedCorpusCache, corpus_fingerprint
+
+class VocabTokenizer:
+    """어휘만 가진 테스트용 토크나이저 (slow 토크나이저처럼 어휘와 특수 토큰으로 해시)"""
+
+    pad_token = "<pad>"
+    eos_token = "<eos>"
+    padding_side = "right"
+
+    def __init__(self, size):
+        self.vocab = {f"t{i}": i for i in range(size)}
+
+    def get_vocab(self):
+        return self.vocab
+
+    def __len__(self):
+        return len(self.vocab)
+
+def sample_sequences(count=10, vocab_size=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, vocab_size, size=int(rng.integers(0, 30))).tolist() for _ in range(count)]
+
+def test_round_trip():
+    """샤드로 나눠 저장한 시퀀스를 그대로 다시 읽는다"""
+    print("=== 토큰 캐시 저장/로드 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = TokenizedCorpusCache(cache_dir, shard_examples=3)
+        sequences = sample_sequences()
+        dataset = cache.build("round-trip", iter(sequences), vocab_size=500, metadata={'max_length': None})
+
+        manifest = dataset.manifest
+        assert manifest['dtype'] == 'uint16' and manifest['max_length'] is None
+        assert [shard['examples'] for shard in manifest['shards']] == [3, 3, 3, 1]
+        assert manifest['tokens'] == sum(len(sequence) for sequence in sequences)
+        assert len(dataset) == len(sequences)
+        assert dataset.lengths.tolist() == [len(sequence) for sequence in sequences]
+        for index, sequence in enumerate(sequences):
+            assert dataset.token_ids(index).tolist() == sequence
+        assert dataset.token_ids(-1).tolist() == sequences[-1]
+        try:
+            dataset.token_ids(len(sequences))
+            raise AssertionError("범위 밖 인덱스가 허용됨")
+        except IndexError:
+            pass
+        print(f"✅ {len(sequences)}개 예시, {len(manifest['shards'])}개 샤드 왕복")
+
+        # 피클(spawn 워커 전달)에는 메모리 매핑이 아니라 경로만 담긴다
+        dataset.token_ids(0)
+        restored = pickle.loads(pickle.dumps(dataset))
+        assert restored._shards is None
+        assert [restored.token_ids(i).tolist() for i in range(len(sequences))] == sequences
+        print("✅ 피클 후 워커에서 다시 열기")
+
+        padded = cache.load("round-trip", pad_to=32, pad_token_id=7)
+        for index, sequence in enumerate(sequences):
+            item = padded[index]
+            assert item['input_ids'].shape[0] == 32
+            assert item['input_ids'][:len(sequence)].tolist() == sequence
+            assert (item['input_ids'][len(sequence):] == 7).all()
+            assert item['attention_mask'].sum().item() == len(sequence)
+        print("✅ pad_to 패딩과 attention_mask")
+
+        wide = cache.build("wide-vocab", [[0, 70000, 5]], vocab_size=80000)
+        assert wide.manifest['dtype'] == 'int32' and wide.token_ids(0).tolist() == [0, 70000, 5]
+        empty = cache.build("empty", [], vocab_size=500)
+        assert len(empty) == 0 and len(empty.lengths) == 0
+        print("✅ 큰 어휘는 int32, 빈 코퍼스도 저장")
+
+def test_cache_keys():
+    """같은 코퍼스/토크나이저/max_length는 다시 토큰화하지 않고, 파일이 바뀌면 새 키"""
+    print("\n=== 토큰 캐시 키 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        analysis_path = os.path.join(directory, "analysis.txt")
+        with open(analysis_path, "w", encoding="utf-8") as f:
+            f.write("m1 C: I\n")
+        items = [SimpleNamespace(analysis_path=analysis_path), SimpleNamespace(analysis_path=None)]
+        cache = TokenizedCorpusCache(os.path.join(directory, "cache"))
+        tokenizer = VocabTokenizer(500)
+        calls = []
+
+        def encode(corpus_items):
+            calls.append(len(corpus_items))
+            return sample_sequences(count=4)
+
+        first = cache.get_or_build(items, tokenizer, 128, encode)
+        second = cache.get_or_build(items, tokenizer, 128, encode)
+        assert calls == [len(items)] and first.directory == second.directory
+        print("✅ 같은 키는 캐시에서 로드 (encode 한 번)")
+
+        key = cache.key(items, tokenizer, 128)
+        assert cache.key(items, tokenizer, 256) != key
+        assert cache.key(items, tokenizer, None).split('-')[2] == 'full'
+        assert cache.key(items, VocabTokenizer(501), 128) != key
+        fingerprint = corpus_fingerprint(items)
+        with open(analysis_path, "a", encoding="utf-8") as f:
+            f.write("m2 V\n")
+        assert corpus_fingerprint(items) != fingerprint
+        assert cache.key(items, tokenizer, 128) != key
+        print("✅ max_length, 토크나이저, 분석 파일 변경 시 키가 바뀜")
+
+        # 손상된 캐시는 지우고 다시 만든다
+        new_key = cache.get_or_build(items, tokenizer, 128, encode).directory.name
+        with open(os.path.join(cache.cache_dir, new_key, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            f.write("{")
+        assert cache.load(new_key) is None
+        assert not os.path.exists(os.path.join(cache.cache_dir, new_key))
+        rebuilt = cache.get_or_build(items, tokenizer, 128, encode)
+        assert len(calls) == 3 and len(rebuilt) == 4
+        print("✅ 손상된 캐시는 삭제 후 다시 토큰화")
+
+def test_prune():
+    """최근에 쓴 keep개만 남긴다"""
+    print("\n=== 토큰 캐시 정리 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = TokenizedCorpusCache(cache_dir, keep=2)
+        for number in range(4):
+            cache.build(f"key-{number}", [[number]], vocab_size=10)
+            os.utime(os.path.join(cache_dir, f"key-{number}"), (number, number))
+        remaining = sorted(name for name in os.listdir(cache_dir) if not name.startswith('.'))
+        assert remaining == ["key-2", "key-3"], remaining
+        print(f"✅ 남은 캐시: {remaining}")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_round_trip, test_cache_keys, test_prune):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
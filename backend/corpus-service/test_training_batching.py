@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+동적 패딩/길이 버킷 배치(training_batching) 테스트 스크립트
+
+DynamicPaddingCollator의 labels가 기존 max_length 패딩 + DataCollatorForLanguageModeling과 같은
+토큰을 학습하고 손실도 같은지, LengthBucketSampler가 모든 예시를 한 번씩 길이가 비슷한 배치로
+묶는지 확인한다. 다운로드 없이 작은 Llama 모델로 실행한다.
+"""
+
+import sys
+import os
+import tempfile
+
+import numpy as np
+import torch
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.training_batching import (
+    DynamicPaddingCollator,
+    LengthBucketSampler,
+    LengthBucketTrainer,
+    sequence_lengths
+)
+
+PAD, EOS = 0, 1
+
+def make_examples(count=12, seed=0, max_length=24):
+    """EOS로 끝나는 길이가 다른 예시 (기존 방식처럼 max_length까지 패딩한 것도 함께 반환)"""
+    rng = np.random.default_rng(seed)
+    examples, padded = [], []
+    for _ in range(count):
+        length = int(rng.integers(3, max_length))
+        ids = rng.integers(2, 16, size=length - 1).tolist() + [EOS]
+        examples.append({'input_ids': ids})
+        padded.append({
+            'input_ids': ids + [PAD] * (max_length - length),
+            'attention_mask': [1] * length + [0] * (max_length - length)
+        })
+    return examples, padded
+
+def tiny_tokenizer():
+    """ID 0이 패딩, 1이 EOS인 단어 단위 토크나이저 (기존 콜레이터 비교용)"""
+    from tokenizers import Tokenizer, models
+    from transformers import PreTrainedTokenizerFast
+
+    words = ["<pad>", "<eos>"] + [f"w{i}" for i in range(2, 16)]
+    tokenizer = Tokenizer(models.WordLevel(vocab={word: i for i, word in enumerate(words)}, unk_token="<pad>"))
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token="<pad>", eos_token="<eos>")
+
+def tiny_model():
+    from transformers import LlamaConfig, LlamaForCausalLM
+
+    torch.manual_seed(0)
+    return LlamaForCausalLM(LlamaConfig(
+        vocab_size=16, hidden_size=32, intermediate_size=64, num_hidden_layers=2, num_attention_heads=4,
+        num_key_value_heads=4, max_position_embeddings=64, pad_token_id=PAD, eos_token_id=EOS, bos_token_id=EOS
+    )).eval()
+
+def test_collator_labels():
+    """패딩 위치만 -100이고, 기존 max_length 패딩 배치와 같은 토큰을 학습하며 손실이 같다"""
+    print("=== 동적 패딩 콜레이터 테스트 ===")
+
+    from transformers import DataCollatorForLanguageModeling
+
+    examples, padded = make_examples()
+    collator = DynamicPaddingCollator(pad_token_id=PAD)
+    batch = collator(examples)
+    longest = max(len(example['input_ids']) for example in examples)
+    assert set(batch) == {'input_ids', 'attention_mask', 'labels'}
+    assert batch['input_ids'].shape == (len(examples), longest)
+
+    legacy = DataCollatorForLanguageModeling(tiny_tokenizer(), mlm=False)(padded)
+    assert torch.equal(batch['labels'], legacy['labels'][:, :longest])
+    assert (legacy['labels'][:, longest:] == -100).all()
+    assert torch.equal(batch['attention_mask'], legacy['attention_mask'][:, :longest])
+    print(f"✅ labels/attention_mask가 기존 max_length 배치를 배치 최대 길이({longest})로 자른 것과 같음")
+
+    # 이미 max_length까지 패딩된 예시는 attention_mask 길이로 잘라 같은 배치를 만든다
+    again = collator(padded)
+    assert all(torch.equal(again[key], batch[key]) for key in batch)
+
+    model = tiny_model()
+    with torch.no_grad():
+        dynamic_loss = model(**batch).loss
+        legacy_loss = model(**legacy).loss
+    assert torch.allclose(dynamic_loss, legacy_loss, atol=1e-5), (dynamic_loss, legacy_loss)
+    print(f"✅ 손실이 기존 max_length 패딩 배치와 같음 ({dynamic_loss:.4f}), 패딩된 예시 입력도 처리")
+
+    # 패딩 토큰이 EOS와 같아도 실제 EOS는 학습한다 (기존 콜레이터는 EOS까지 -100으로 가렸음)
+    eos_collator = DynamicPaddingCollator(pad_token_id=EOS)
+    labels = eos_collator(examples)['labels']
+    for row, example in enumerate(examples):
+        length = len(example['input_ids'])
+        assert labels[row, length - 1] == EOS and (labels[row, length:] == -100).all()
+    print("✅ pad_token_id == eos_token_id여도 실제 EOS는 학습 대상")
+
+    # 8의 배수까지 패딩, 왼쪽 패딩, 예시에 있는 labels는 그대로 사용
+    rounded = DynamicPaddingCollator(PAD, pad_to_multiple_of=8)(examples)
+    assert rounded['input_ids'].shape[1] % 8 == 0 and rounded['input_ids'].shape[1] >= longest
+    left = DynamicPaddingCollator(PAD, padding_side='left')([{'input_ids': [5, 6]}, {'input_ids': [5, 6, 7, EOS]}])
+    assert left['input_ids'].tolist() == [[PAD, PAD, 5, 6], [5, 6, 7, EOS]]
+    assert left['labels'].tolist() == [[-100, -100, 5, 6], [5, 6, 7, EOS]]
+    kept = DynamicPaddingCollator(PAD)([{'input_ids': [5, 6, 7], 'labels': [-100, 6, 7]}, {'input_ids': [5]}])
+    assert kept['labels'].tolist() == [[-100, 6, 7], [5, -100, -100]]
+    print("✅ pad_to_multiple_of, 왼쪽 패딩, 예시의 labels 유지")
+
+def test_length_bucket_sampler():
+    """모든 인덱스를 한 번씩, 버킷 안에서 길이순 배치로, 가장 긴 배치를 먼저 낸다"""
+    print("\n=== 길이 버킷 샘플러 테스트 ===")
+
+    rng = np.random.default_rng(1)
+    lengths = rng.integers(1, 500, size=1003)
+    sampler = LengthBucketSampler(lengths, batch_size=8, bucket_batches=10, seed=3)
+    batches = sampler.batches()
+    order = list(sampler)
+    assert len(sampler) == len(lengths) and sorted(order) == list(range(len(lengths)))
+    assert order == [index for batch in batches for index in batch.tolist()]
+    assert all(0 < len(batch) <= 8 for batch in batches)
+    assert sum(len(batch) for batch in batches) == len(lengths)
+    assert lengths[batches[0]].max() == lengths.max()
+    for batch in batches:
+        assert list(lengths[batch]) == sorted(lengths[batch], reverse=True)
+    print(f"✅ {len(lengths)}개 인덱스를 한 번씩, 배치 {len(batches)}개, 첫 배치에 가장 긴 예시")
+
+    def padded_tokens(batches):
+        return int(sum(len(batch) * lengths[batch].max() for batch in batches))
+
+    random_batches = np.array_split(rng.permutation(len(lengths)), len(batches))
+    assert padded_tokens(batches) < 0.8 * padded_tokens(random_batches)
+    print(f"✅ 패딩 포함 토큰 수: 무작위 배치 {padded_tokens(random_batches)} → 버킷 배치 {padded_tokens(batches)}")
+
+    same = LengthBucketSampler(lengths, batch_size=8, bucket_batches=10, seed=3)
+    assert list(same) == order
+    sampler.set_epoch(1)
+    assert list(sampler) != order and sorted(sampler) == list(range(len(lengths)))
+    fixed = LengthBucketSampler([3, 1, 2, 5], batch_size=2, shuffle=False)
+    assert list(fixed) == [3, 0, 2, 1]
+    print("✅ 같은 seed/에포크면 같은 순서, 에포크마다 다른 순서, shuffle=False는 길이순")
+
+def test_sequence_lengths():
+    """데이터셋 종류별 실제 토큰 수와 Trainer 샘플러 교체"""
+    print("\n=== 예시 길이 계산 테스트 ===")
+
+    examples, padded = make_examples(count=6)
+    expected = [len(example['input_ids']) for example in examples]
+    assert sequence_lengths(examples).tolist() == expected
+    assert sequence_lengths(padded).tolist() == expected
+
+    class WithLengths(list):
+        lengths = [7, 8, 9]
+    assert sequence_lengths(WithLengths([{}, {}, {}])).tolist() == [7, 8, 9]
+
+    from datasets import Dataset
+    assert sequence_lengths(Dataset.from_list(padded)).tolist() == expected
+    assert sequence_lengths(Dataset.from_list(examples)).tolist() == expected
+    print("✅ 패딩 없는 예시, attention_mask, lengths 속성, HuggingFace 데이터셋")
+
+    from transformers import TrainingArguments
+    with tempfile.TemporaryDirectory() as output_dir:
+        trainer = LengthBucketTrainer(
+            model=tiny_model(),
+            args=TrainingArguments(output_dir=output_dir, per_device_train_batch_size=4, use_cpu=True, report_to=[]),
+            train_dataset=examples,
+            data_collator=DynamicPaddingCollator(PAD)
+        )
+        sampler = trainer._get_train_sampler()
+        assert isinstance(sampler, LengthBucketSampler) and sampler.batch_size == 4
+        assert sampler.lengths.tolist() == expected
+        batch = next(iter(trainer.get_train_dataloader()))
+        assert batch['input_ids'].shape == (4, max(expected[index] for index in sampler.batches()[0].tolist()))
+    print("✅ LengthBucketTrainer는 길이 버킷 샘플러와 동적 패딩 배치로 학습 데이터를 읽음")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_collator_labels, test_length_bucket_sampler, test_sequence_lengths):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
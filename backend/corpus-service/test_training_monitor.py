@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+학습 진행 상황 모니터(TrainingMonitor, TrainingProgressCallback) 테스트 스크립트
+
+상태가 idle → preparing → training → completed/failed 순으로 바뀌고 갱신마다 version이 오르는지,
+실제 학습(start_training)에서 스텝/에포크/토큰 수/손실/ETA가 기록되고 완료 시 요약이 남는지,
+학습 전 오류가 failed 상태로 기록되는지 확인한다. 다운로드 없이 작은 Llama 모델로 실행한다.
+"""
+
+import sys
+import os
+import random
+import tempfile
+from types import SimpleNamespace
+
+import torch
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from transformers import TrainerControl, TrainerState, TrainingArguments
+
+from app.services.harmony_transformer import HarmonyTransformerService
+from app.services.training_batching import sequence_lengths
+from app.services.training_monitor import FINISHED_STATES, TrainingMonitor, TrainingProgressCallback
+from app.services.training_profile import TrainingProfile
+
+KEYS = ("C", "G", "a", "d")
+ROMANS = ("I", "ii", "IV", "V", "V7", "vi", "i", "iv")
+WORKS = 6
+
+def write_corpus(directory):
+    """합성 분석 파일(rntxt) WORKS개 생성, 코퍼스 아이템 목록 반환"""
+    rng = random.Random(0)
+    items = []
+    for number in range(WORKS):
+        path = os.path.join(directory, "corpus", f"work_{number}", "analysis.txt")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lines = ["Composer: Test", f"Title: Work {number}", "Time Signature: 4/4", ""]
+        for measure in range(1, rng.randint(4, 12) + 1):
+            key = f"{rng.choice(KEYS)}: " if measure == 1 or rng.random() < 0.1 else ""
+            lines.append(f"m{measure} {key}{rng.choice(ROMANS)}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        items.append(SimpleNamespace(analysis_path=path))
+    return items
+
+def write_tiny_model(directory):
+    """작은 Llama 모델과 단어 단위 토크나이저 저장"""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    words = ["<unk>", "<eos>", "<START>", "<END>", "|"] + [f"m{i}" for i in range(1, 13)]
+    words += [f"{key}:{roman}" for key in KEYS for roman in ROMANS]
+    tokenizer = Tokenizer(models.WordLevel(vocab={word: i for i, word in enumerate(words)}, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="<unk>", eos_token="<eos>").save_pretrained(directory)
+
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=len(words), hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=4, max_position_embeddings=128, eos_token_id=1, bos_token_id=1
+    )
+    LlamaForCausalLM(config).save_pretrained(directory)
+
+class RecordingMonitor(TrainingMonitor):
+    """갱신될 때마다 상태 스냅샷을 남기는 모니터 (학습 중 상태 변화 확인용)"""
+
+    def __init__(self):
+        super().__init__()
+        self.history = []
+
+    def update(self, **fields):
+        super().update(**fields)
+        self.history.append(self.snapshot())
+
+def expect_error(error_type, function, *args):
+    try:
+        function(*args)
+    except error_type as e:
+        return e
+    raise AssertionError(f"{error_type.__name__}가 발생하지 않음: {function.__name__}")
+
+def test_state_transitions():
+    """idle → preparing → training → completed/failed, 진행률 계산과 version 증가"""
+    print("=== 모니터 상태 전이 테스트 ===")
+
+    monitor = TrainingMonitor()
+    state = monitor.snapshot()
+    assert state['status'] == 'idle' and state['job_id'] is None and state['version'] == 0
+    assert not monitor.is_running()
+
+    job_id = monitor.begin("학습 대기 중")
+    state = monitor.snapshot()
+    assert state['status'] == 'preparing' and state['job_id'] == job_id and len(job_id) == 12
+    assert state['message'] == "학습 대기 중" and state['started_at'] is not None
+    assert monitor.is_running() and monitor.version == 1
+    expect_error(RuntimeError, monitor.begin)
+    assert monitor.snapshot()['job_id'] == job_id and monitor.version == 1
+    print("✅ begin: preparing 상태와 작업 ID, 진행 중에 다시 begin하면 RuntimeError")
+
+    monitor.update(status='training', total_steps=8, total_epochs=2)
+    monitor.update(current_step=3)
+    assert monitor.snapshot()['progress'] == round(3 / 8, 4) and monitor.version == 3
+    monitor.update(current_step=1, total_steps=3)
+    assert monitor.snapshot()['progress'] == round(1 / 3, 4)
+    monitor.update(current_step=5)
+    assert monitor.snapshot()['progress'] == 1.0 and monitor.is_running()
+    print("✅ update: 스텝 기준 진행률 (소수 4자리, 1.0 상한), 갱신마다 version 증가")
+
+    # 스냅샷은 복사본이다
+    snapshot = monitor.snapshot()
+    snapshot['status'] = 'changed'
+    assert monitor.snapshot()['status'] == 'training'
+
+    result = {'final_loss': 1.5}
+    version = monitor.version
+    monitor.finish(result)
+    state = monitor.snapshot()
+    assert state['status'] == 'completed' and state['status'] in FINISHED_STATES
+    assert state['progress'] == 1.0 and state['eta_seconds'] == 0.0 and state['result'] == result
+    assert state['message'] == "학습 완료" and state['finished_at'] >= state['started_at']
+    assert state['elapsed_seconds'] >= 0.0 and monitor.version == version + 1 and not monitor.is_running()
+    print("✅ finish: completed, 진행률 1.0, 결과 기록")
+
+    # 끝난 작업 뒤에는 새 작업을 시작할 수 있고 상태가 초기화된다 (version은 계속 증가)
+    second = monitor.begin()
+    state = monitor.snapshot()
+    assert second != job_id and state['result'] is None and state['current_step'] == 0
+    assert state['progress'] == 0.0 and state['version'] == version + 2
+    monitor.fail("데이터 없음")
+    state = monitor.snapshot()
+    assert state['status'] == 'failed' and state['error'] == "데이터 없음" and state['message'] == "학습 실패"
+    assert not monitor.is_running()
+    print("✅ 완료 후 새 작업은 상태 초기화, fail: failed와 오류 기록")
+
+def test_callback_during_training():
+    """start_training 중 콜백이 스텝/토큰 수/손실/ETA를 기록하고 완료 시 요약을 남긴다"""
+    print("\n=== 학습 중 진행 상황 기록 테스트 ===")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        items = write_corpus(workdir)
+        write_tiny_model(os.path.join(workdir, "model"))
+        service = HarmonyTransformerService(os.path.join(workdir, "model"))
+        service.config.update(max_seq_length=128)
+        service.training_monitor = monitor = RecordingMonitor()
+        service.load_model()
+        training_data = service.prepare_training_data(items)
+
+        job_id = monitor.begin("학습 대기 중")
+        result = service.start_training(
+            training_data,
+            output_dir=os.path.join(workdir, "output"),
+            profile=TrainingProfile(batch_size=2, epochs=2)
+        )
+        assert result['success']
+
+    history = monitor.history
+    assert history[0]['status'] == 'training' and history[0]['current_step'] == 0
+    total_steps = history[0]['total_steps']
+    assert total_steps == 2 * -(-WORKS // 2) and history[0]['total_epochs'] == 2
+    assert all(state['job_id'] == job_id for state in history)
+    assert [state['version'] for state in history] == sorted({state['version'] for state in history})
+    print(f"✅ on_train_begin: training 상태, 전체 스텝 {total_steps}, 에포크 2")
+
+    # on_log 갱신은 직전 스텝 값을 그대로 두므로 스텝이 바뀐 스냅샷만 본다
+    steps = [
+        state for previous, state in zip(history, history[1:])
+        if state['current_step'] != previous['current_step']
+    ]
+    assert [state['current_step'] for state in steps] == list(range(1, total_steps + 1))
+    assert [state['progress'] for state in steps] == [round(step / total_steps, 4) for step in range(1, total_steps + 1)]
+    tokens = [state['tokens_seen'] for state in steps]
+    assert tokens == sorted(tokens) and tokens[-1] == 2 * int(sequence_lengths(training_data['dataset']).sum())
+    assert steps[-1]['current_epoch'] == 2.0 and steps[-1]['eta_seconds'] == 0.0
+    assert all(state['samples_per_second'] > 0 and state['memory']['rss_mb'] for state in steps)
+    print(f"✅ on_step_end: 스텝마다 진행률, 패딩 제외 토큰 {tokens[-1]}개(2에포크), 마지막 ETA 0")
+
+    losses = [state['loss'] for state in history if state['loss'] is not None]
+    assert losses and all(loss > 0 for loss in losses)
+    assert any(state['learning_rate'] for state in history)
+    state = monitor.snapshot()
+    assert state['status'] == 'completed' and state['result'] == result['training_summary']
+    assert state['current_step'] == total_steps and state['progress'] == 1.0
+    print(f"✅ on_log: 손실/학습률 기록, 완료 시 요약 저장 (마지막 손실 {state['loss']})")
+
+def test_errors_and_other_ranks():
+    """학습 전 오류는 failed로 기록, rank 0이 아닌 프로세스의 콜백은 기록하지 않음"""
+    print("\n=== 학습 오류/다른 rank 테스트 ===")
+
+    service = HarmonyTransformerService()
+    error = expect_error(ValueError, service.start_training, {'dataset': [{'input_ids': [1]}]})
+    state = service.get_training_status()
+    assert state['status'] == 'failed' and state['error'] == str(error) and state['job_id']
+    assert not service.training_monitor.is_running()
+    print("✅ 모델 없이 start_training: ValueError, 모니터는 failed와 오류 메시지")
+
+    monitor = TrainingMonitor()
+    monitor.begin()
+    version = monitor.version
+    callback = TrainingProgressCallback(monitor)
+    with tempfile.TemporaryDirectory() as output_dir:
+        args = TrainingArguments(output_dir=output_dir, use_cpu=True, report_to=[])
+        state = TrainerState(is_world_process_zero=False, max_steps=4, global_step=1)
+        for event in (callback.on_train_begin, callback.on_step_end):
+            event(args, state, TrainerControl())
+        callback.on_log(args, state, TrainerControl(), logs={'loss': 1.0})
+    assert monitor.version == version and monitor.snapshot()['status'] == 'preparing'
+    print("✅ rank 0이 아닌 프로세스는 모니터를 갱신하지 않음")
+
+if __name__ == "__main__":
+    success = True
+    for test in (test_state_transitions, test_callback_during_training, test_errors_and_other_ranks):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__} 실패: {e}")
+            success = False
+    sys.exit(0 if success else 1)
@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 """
 Harmony Transformer 모델 파인튜닝 스크립트 (개선된 버전)
+
+사용법: python train_harmony_model.py [선택 1-4] [아이템 수 (선택 3)]
+분산 학습 (CPU DDP, gloo): torchrun --nproc-per-node 4 train_harmony_model.py 1
+여러 노드: torchrun --nnodes 2 --node-rank <0|1> --nproc-per-node 4 \
+    --rdzv-backend c10d --rdzv-endpoint <노드0 주소>:29500 train_harmony_model.py 1
 """
 
 import sys
@@ -14,6 +19,14 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.services.harmony_transformer import HarmonyTransformerService
 from app.services.corpus_processor import CorpusProcessor
+from app.services.training_profile import TrainingProfile
+from app.services.distributed_training import (
+    cleanup_distributed,
+    init_distributed,
+    is_distributed,
+    is_main_process,
+    main_process_first
+)
 from app.core.config import settings
 
 def analyze_corpus_quality(corpus_items):
@@ -86,11 +99,15 @@ def train_harmony_model():
     try:
         # 1. 서비스 초기화
         print("1. Harmony Transformer 서비스 초기화...")
-        harmony_service = HarmonyTransformerService()
+        harmony_service = HarmonyTransformerService(
+            settings.HT_MODEL_NAME,
+            dataset_cache_dir=settings.HT_DATASET_CACHE_DIR or None,
+            harmony_tokenizer_path=settings.HT_HARMONY_TOKENIZER_PATH or None
+        )
         
         # 2. 코퍼스 데이터 로드
         print("2. When-in-Rome 코퍼스 데이터 로드...")
-        corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH)
+        corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH, settings.CORPUS_INDEX_PATH)
         
         scan_result = corpus_processor.scan_corpus()
         if not scan_result["success"]:
@@ -104,6 +121,12 @@ def train_harmony_model():
         
         # 4. 모델 로드
         print("\n3. 기본 모델 로드...")
+        # 화성 토크나이저 모델이면 전체 코퍼스로 어휘를 만든 뒤 로드 (rank 0이 먼저 저장)
+        with main_process_first():
+            tokenizer_info = harmony_service.prepare_harmony_tokenizer(corpus_processor.corpus_items)
+        if tokenizer_info:
+            print(f"   ✅ 화성 토크나이저: {tokenizer_info['path']} (어휘 {tokenizer_info['vocab_size']}개, "
+                  f"{'새로 생성' if tokenizer_info['built'] else '기존 파일'})")
         model_info = harmony_service.load_model()
         print(f"   ✅ 모델 로드 완료:")
         print(f"      - 모델명: {model_info['model_name']}")
@@ -113,10 +136,21 @@ def train_harmony_model():
         
         # 5. 학습 데이터 준비
         print("\n4. 학습 데이터 준비...")
-        training_data = harmony_service.prepare_training_data(corpus_items)
+        # 토큰 캐시는 rank 0이 먼저 만들고 나머지 rank는 그것을 연다
+        with main_process_first():
+            training_data = harmony_service.prepare_training_data(
+                corpus_items,
+                packing=settings.HT_SEQUENCE_PACKING,
+                overlap=settings.HT_PACKING_OVERLAP
+            )
         print(f"   ✅ 학습 데이터 준비 완료:")
         print(f"      - 총 예시: {training_data['total_examples']}")
         print(f"      - 특성: {training_data['features']}")
+        if training_data.get('cache_key'):
+            print(f"      - 토큰 캐시: {training_data['cache_key']}")
+        if training_data.get('packing'):
+            packing = training_data['packing']
+            print(f"      - 패킹: {packing['source_examples']}개 악장 → {packing['blocks']}개 블록 (채움 비율 {packing['fill_ratio']:.1%})")
         
         # 6. 모델 파인튜닝 시작
         print("\n5. 모델 파인튜닝 시작...")
@@ -127,11 +161,20 @@ def train_harmony_model():
         output_dir = f"models/harmony_transformer_full_{timestamp}"
         
         # 파인튜닝 실행
-        training_result = harmony_service.start_training(training_data, output_dir)
+        training_result = harmony_service.start_training(
+            training_data,
+            output_dir,
+            length_bucketing=settings.HT_LENGTH_BUCKETING,
+            profile=TrainingProfile.from_settings(settings)
+        )
         
         end_time = time.time()
         total_duration = end_time - start_time
         
+        # 테스트/요약 저장은 rank 0만
+        if not is_main_process():
+            return True
+        
         print(f"\n   ✅ 모델 파인튜닝 완료!")
         print(f"      - 출력 디렉토리: {training_result['output_dir']}")
         print(f"      - 총 소요 시간: {total_duration:.2f}초")
@@ -142,6 +185,7 @@ def train_harmony_model():
         print(f"        * 배치 크기: {summary['batch_size']}")
         print(f"        * 학습 시간: {summary['training_time']:.2f}초")
         print(f"        * 최종 손실: {summary['final_loss']:.4f}")
+        print(f"        * 실행 환경: {summary['runtime']}")
         
         # 7. 파인튜닝된 모델 테스트
         print("\n6. 파인튜닝된 모델 테스트...")
@@ -179,7 +223,7 @@ def train_harmony_model():
             'timestamp': timestamp
         }
         
-        summary_file = f"{output_dir}/full_training_summary.json"
+        summary_file = f"{training_result['output_dir']}/full_training_summary.json"
         with open(summary_file, 'w', encoding='utf-8') as f:
             json.dump(results_summary, f, ensure_ascii=False, indent=2)
         
@@ -203,11 +247,15 @@ def train_with_subset():
     try:
         # 1. 서비스 초기화
         print("1. Harmony Transformer 서비스 초기화...")
-        harmony_service = HarmonyTransformerService()
+        harmony_service = HarmonyTransformerService(
+            settings.HT_MODEL_NAME,
+            dataset_cache_dir=settings.HT_DATASET_CACHE_DIR or None,
+            harmony_tokenizer_path=settings.HT_HARMONY_TOKENIZER_PATH or None
+        )
         
         # 2. 코퍼스 데이터 로드 (일부만)
         print("2. When-in-Rome 코퍼스 데이터 로드 (일부)...")
-        corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH)
+        corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH, settings.CORPUS_INDEX_PATH)
         
         scan_result = corpus_processor.scan_corpus()
         if not scan_result["success"]:
@@ -222,12 +270,24 @@ def train_with_subset():
         
         # 4. 모델 로드
         print("\n3. 기본 모델 로드...")
+        # 화성 토크나이저 모델이면 전체 코퍼스로 어휘를 만든 뒤 로드 (rank 0이 먼저 저장)
+        with main_process_first():
+            tokenizer_info = harmony_service.prepare_harmony_tokenizer(corpus_processor.corpus_items)
+        if tokenizer_info:
+            print(f"   ✅ 화성 토크나이저: {tokenizer_info['path']} (어휘 {tokenizer_info['vocab_size']}개, "
+                  f"{'새로 생성' if tokenizer_info['built'] else '기존 파일'})")
         model_info = harmony_service.load_model()
         print(f"   ✅ 모델 로드 완료: {model_info['model_name']}")
         
         # 5. 학습 데이터 준비
         print("\n4. 학습 데이터 준비...")
-        training_data = harmony_service.prepare_training_data(corpus_items)
+        # 토큰 캐시는 rank 0이 먼저 만들고 나머지 rank는 그것을 연다
+        with main_process_first():
+            training_data = harmony_service.prepare_training_data(
+                corpus_items,
+                packing=settings.HT_SEQUENCE_PACKING,
+                overlap=settings.HT_PACKING_OVERLAP
+            )
         print(f"   ✅ 학습 데이터 준비 완료: {training_data['total_examples']}개 예시")
         
         # 6. 모델 파인튜닝 시작 (빠른 설정)
@@ -239,11 +299,20 @@ def train_with_subset():
         output_dir = f"models/harmony_transformer_quick_{timestamp}"
         
         # 파인튜닝 실행
-        training_result = harmony_service.start_training(training_data, output_dir)
+        training_result = harmony_service.start_training(
+            training_data,
+            output_dir,
+            length_bucketing=settings.HT_LENGTH_BUCKETING,
+            profile=TrainingProfile.from_settings(settings)
+        )
         
         end_time = time.time()
         training_duration = end_time - start_time
         
+        # 테스트/요약 저장은 rank 0만
+        if not is_main_process():
+            return True
+        
         print(f"\n   ✅ 빠른 파인튜닝 완료!")
         print(f"      - 출력 디렉토리: {training_result['output_dir']}")
         print(f"      - 학습 시간: {training_duration:.2f}초")
@@ -274,7 +343,7 @@ def train_with_subset():
             'timestamp': timestamp
         }
         
-        summary_file = f"{output_dir}/quick_training_summary.json"
+        summary_file = f"{training_result['output_dir']}/quick_training_summary.json"
         with open(summary_file, 'w', encoding='utf-8') as f:
             json.dump(results_summary, f, ensure_ascii=False, indent=2)
         
@@ -295,11 +364,15 @@ def train_with_custom_size():
     try:
         # 1. 서비스 초기화
         print("1. Harmony Transformer 서비스 초기화...")
-        harmony_service = HarmonyTransformerService()
+        harmony_service = HarmonyTransformerService(
+            settings.HT_MODEL_NAME,
+            dataset_cache_dir=settings.HT_DATASET_CACHE_DIR or None,
+            harmony_tokenizer_path=settings.HT_HARMONY_TOKENIZER_PATH or None
+        )
         
         # 2. 코퍼스 데이터 로드
         print("2. When-in-Rome 코퍼스 데이터 로드...")
-        corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH)
+        corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH, settings.CORPUS_INDEX_PATH)
         
         scan_result = corpus_processor.scan_corpus()
         if not scan_result["success"]:
@@ -311,7 +384,10 @@ def train_with_custom_size():
         # 3. 사용자 입력 받기
         print(f"\n사용 가능한 아이템 수: {total_items}")
         try:
-            subset_size = int(input(f"사용할 아이템 수를 입력하세요 (1-{total_items}): "))
+            if len(sys.argv) > 2:
+                subset_size = int(sys.argv[2])
+            else:
+                subset_size = int(input(f"사용할 아이템 수를 입력하세요 (1-{total_items}): "))
             if subset_size < 1 or subset_size > total_items:
                 print(f"잘못된 입력입니다. 1-{total_items} 사이의 숫자를 입력하세요.")
                 return False
@@ -328,12 +404,24 @@ def train_with_custom_size():
         
         # 6. 모델 로드
         print("\n3. 기본 모델 로드...")
+        # 화성 토크나이저 모델이면 전체 코퍼스로 어휘를 만든 뒤 로드 (rank 0이 먼저 저장)
+        with main_process_first():
+            tokenizer_info = harmony_service.prepare_harmony_tokenizer(corpus_processor.corpus_items)
+        if tokenizer_info:
+            print(f"   ✅ 화성 토크나이저: {tokenizer_info['path']} (어휘 {tokenizer_info['vocab_size']}개, "
+                  f"{'새로 생성' if tokenizer_info['built'] else '기존 파일'})")
         model_info = harmony_service.load_model()
         print(f"   ✅ 모델 로드 완료: {model_info['model_name']}")
         
         # 7. 학습 데이터 준비
         print("\n4. 학습 데이터 준비...")
-        training_data = harmony_service.prepare_training_data(corpus_items)
+        # 토큰 캐시는 rank 0이 먼저 만들고 나머지 rank는 그것을 연다
+        with main_process_first():
+            training_data = harmony_service.prepare_training_data(
+                corpus_items,
+                packing=settings.HT_SEQUENCE_PACKING,
+                overlap=settings.HT_PACKING_OVERLAP
+            )
         print(f"   ✅ 학습 데이터 준비 완료: {training_data['total_examples']}개 예시")
         
         # 8. 모델 파인튜닝 시작
@@ -344,11 +432,20 @@ def train_with_custom_size():
         output_dir = f"models/harmony_transformer_custom_{subset_size}_{timestamp}"
         
         # 파인튜닝 실행
-        training_result = harmony_service.start_training(training_data, output_dir)
+        training_result = harmony_service.start_training(
+            training_data,
+            output_dir,
+            length_bucketing=settings.HT_LENGTH_BUCKETING,
+            profile=TrainingProfile.from_settings(settings)
+        )
         
         end_time = time.time()
         training_duration = end_time - start_time
         
+        # 테스트/요약 저장은 rank 0만
+        if not is_main_process():
+            return True
+        
         print(f"\n   ✅ 파인튜닝 완료!")
         print(f"      - 출력 디렉토리: {training_result['output_dir']}")
         print(f"      - 학습 시간: {training_duration:.2f}초")
@@ -366,7 +463,7 @@ def train_with_custom_size():
             'subset_size': subset_size
         }
         
-        summary_file = f"{output_dir}/custom_training_summary.json"
+        summary_file = f"{training_result['output_dir']}/custom_training_summary.json"
         with open(summary_file, 'w', encoding='utf-8') as f:
             json.dump(results_summary, f, ensure_ascii=False, indent=2)
         
@@ -381,6 +478,11 @@ def train_with_custom_size():
         return False
 
 if __name__ == "__main__":
+    # torchrun으로 실행되면 분산 학습 초기화, 출력은 rank 0만
+    init_distributed(settings.HT_DDP_BACKEND)
+    if not is_main_process():
+        sys.stdout = open(os.devnull, 'w')
+    
     print("🎵 Harmony Transformer 모델 파인튜닝 시작")
     print("=" * 50)
     print("1. 전체 데이터셋으로 파인튜닝 (권장)")
@@ -390,7 +492,14 @@ if __name__ == "__main__":
     print("=" * 50)
     
     try:
-        choice = input("선택하세요 (1-4): ").strip()
+        if len(sys.argv) > 1:
+            choice = sys.argv[1].strip()
+        elif is_distributed():
+            # torchrun의 각 rank는 표준 입력을 받을 수 없음
+            print("분산 학습에서는 선택을 인수로 지정하세요 (예: torchrun ... train_harmony_model.py 1)")
+            sys.exit(1)
+        else:
+            choice = input("선택하세요 (1-4): ").strip()
         
         if choice == "1":
             success = train_harmony_model()
@@ -401,7 +510,7 @@ if __name__ == "__main__":
         elif choice == "4":
             # 코퍼스 품질 분석만 실행
             print("=== 코퍼스 품질 분석만 실행 ===")
-            corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH)
+            corpus_processor = CorpusProcessor(settings.WHEN_IN_ROME_CORPUS_PATH, settings.CORPUS_INDEX_PATH)
             scan_result = corpus_processor.scan_corpus()
             if scan_result["success"]:
                 analyze_corpus_quality(corpus_processor.corpus_items)
@@ -428,3 +537,5 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        cleanup_distributed()